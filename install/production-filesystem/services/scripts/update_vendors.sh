@@ -18,19 +18,37 @@ set -euo pipefail
 TEMP_FILE="${SYSTEM_SERVICES_RUN_TMP}/ieee-oui.txt.tmp"
 OUTPUT_FILE="${SYSTEM_SERVICES_RUN_TMP}/ieee-oui.txt"
 
-# Download the file using wget to stdout and process it
-if ! wget --timeout=30 --tries=3 "https://standards-oui.ieee.org/oui/oui.txt" -O /dev/stdout 2>/dev/null | \
-	sed -E 's/ *\(base 16\)//' | \
-	awk -F' ' '{printf "%s\t%s\n", $1, substr($0, index($0, $2))}' | \
-	sort | \
-	awk '{$1=$1; print}' | \
-	sort -u | \
-	awk -F' ' '{printf "%s\t%s\n", $1, substr($0, index($0, $2))}' \
-	> "${TEMP_FILE}"; then
+# Download one IEEE registry and print "<prefix>\t<vendor>" lines.
+#   $1 - registry URL
+#   $2 - hex digits of the block taken from the "(base 16)" range start:
+#        0 for MA-L (the range start is the OUI itself), 1 for MA-M (28-bit
+#        prefix, 7 digits), 3 for MA-S (36-bit prefix, 9 digits)
+fetch_registry() {
+	wget --timeout=30 --tries=3 "$1" -O /dev/stdout 2>/dev/null | \
+	awk -v digits="$2" '
+		{ sub(/\r$/, "") }
+		/\(hex\)/ { oui = $1; gsub("-", "", oui) }
+		/\(base 16\)/ {
+			vendor = $0
+			sub(/.*\(base 16\)[ \t]*/, "", vendor)
+			prefix = (digits == 0) ? $1 : oui substr($1, 1, digits)
+			if (vendor != "") printf "%s\t%s\n", prefix, vendor
+		}'
+}
+
+# MA-L is required, MA-M / MA-S only refine vendors of IEEE-owned OUIs
+if ! fetch_registry "https://standards-oui.ieee.org/oui/oui.txt" 0 > "${TEMP_FILE}.all"; then
 	echo "ERROR: Failed to download or process OUI data" >&2
-	rm -f "${TEMP_FILE}"
+	rm -f "${TEMP_FILE}.all"
 	exit 1
 fi
+fetch_registry "https://standards-oui.ieee.org/oui28/mam.txt" 1 >> "${TEMP_FILE}.all" || \
+	echo "WARNING: Failed to download MA-M data" >&2
+fetch_registry "https://standards-oui.ieee.org/oui36/oui36.txt" 3 >> "${TEMP_FILE}.all" || \
+	echo "WARNING: Failed to download MA-S data" >&2
+
+sort -u "${TEMP_FILE}.all" > "${TEMP_FILE}"
+rm -f "${TEMP_FILE}.all"
 
 # Validate we got actual content (should have hundreds of thousands of lines)
 if [ ! -s "${TEMP_FILE}" ] || [ "$(wc -l < "${TEMP_FILE}")" -lt 1000 ]; then
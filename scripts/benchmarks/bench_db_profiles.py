@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Benchmark the scan pipeline (scan.session_events.process_scan) under each
+SQLite PRAGMA_PROFILE.
+
+Every profile runs in its own subprocess against a fresh copy of the shipped
+database (back/app.db) seeded with synthetic devices, so page cache and mmap
+state never leak between profiles.
+
+Usage:
+    python scripts/benchmarks/bench_db_profiles.py --devices 5000 --rounds 5
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+PROFILES = ["low_memory", "balanced", "performance"]
+
+
+def _random_mac(rng):
+    return ":".join(f"{rng.randint(0, 255):02x}" for _ in range(6))
+
+
+def run_worker(profile, devices, rounds, seed):
+    """Run inside the subprocess: seed a DB and time process_scan rounds."""
+    sys.path.extend([REPO_ROOT, os.path.join(REPO_ROOT, "server"), os.path.join(REPO_ROOT, "server", "plugins")])
+
+    import helper
+    helper.SETTINGS_SECONDARYCACHE["PRAGMA_PROFILE"] = profile
+    helper.SETTINGS_SECONDARYCACHE["PRAGMA_PAGE_SIZE_REBUILD"] = True
+    helper.SETTINGS_SECONDARYCACHE["LOG_LEVEL"] = "none"
+
+    from database import DB
+    from db.db_upgrade import ensure_views
+    import scan.session_events as session_events
+    from scan.session_events import process_scan
+
+    # The unread-count broadcast needs a Flask app context and is not DB work
+    session_events.update_unread_notifications_count = lambda: None
+
+    db = DB()
+    db.open()
+    db.initDB()
+    ensure_views(db.sql)
+    db.commitDB()
+
+    rng = random.Random(seed)
+    macs = [_random_mac(rng) for _ in range(devices)]
+    ips = [f"10.{i // 65536 % 256}.{i // 256 % 256}.{i % 256}" for i in range(devices)]
+
+    timings = []
+    for _ in range(rounds):
+        # Roughly 80% of the fleet answers each scan
+        online = [(m, ip) for m, ip in zip(macs, ips) if rng.random() < 0.8]
+        db.sql.executemany(
+            "INSERT INTO CurrentScan (scanMac, scanLastIP, scanSourcePlugin, scanLastConnection) VALUES (?, ?, 'ARPSCAN', datetime('now'))",
+            online,
+        )
+        db.commitDB()
+
+        started = time.perf_counter()
+        process_scan(db)
+        db.commitDB()
+        timings.append(time.perf_counter() - started)
+
+    pragmas = {row[0]: db.sql.execute(f"PRAGMA {row[0]};").fetchone()[0] for row in [("cache_size",), ("mmap_size",), ("page_size",)]}
+    print(json.dumps({"profile": profile, "timings": timings, "pragmas": pragmas}))
+
+
+def run_profile(profile, devices, rounds, seed):
+    workdir = tempfile.mkdtemp(prefix=f"nax-bench-{profile}-")
+    for sub in ("db", "config", "tmp/api", "tmp/log/plugins"):
+        os.makedirs(os.path.join(workdir, sub), exist_ok=True)
+    shutil.copy(os.path.join(REPO_ROOT, "back", "app.db"), os.path.join(workdir, "db", "app.db"))
+    shutil.copy(os.path.join(REPO_ROOT, "back", "app.conf"), os.path.join(workdir, "config", "app.conf"))
+
+    env = dict(os.environ)
+    env.update({
+        "NETALERTX_APP": REPO_ROOT,
+        "NETALERTX_DATA": workdir,
+        "NETALERTX_TMP": os.path.join(workdir, "tmp"),
+    })
+    try:
+        out = subprocess.run(
+            [sys.executable, __file__, "--worker", profile, "--devices", str(devices), "--rounds", str(rounds), "--seed", str(seed)],
+            env=env, capture_output=True, text=True, check=True,
+        ).stdout
+        return json.loads(out.strip().splitlines()[-1])
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--devices", type=int, default=2000)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.worker, args.devices, args.rounds, args.seed)
+        return
+
+    print(f"process_scan, {args.devices} devices, {args.rounds} rounds")
+    print(f"{'profile':<12} {'first (s)':>10} {'median (s)':>11} {'page':>6} {'cache':>8} {'mmap':>11}")
+    for profile in PROFILES:
+        result = run_profile(profile, args.devices, args.rounds, args.seed)
+        t = sorted(result["timings"])
+        p = result["pragmas"]
+        print(f"{profile:<12} {result['timings'][0]:>10.3f} {t[len(t) // 2]:>11.3f} {p['page_size']:>6} {p['cache_size']:>8} {p['mmap_size']:>11}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Benchmark device type / icon guessing (server/scan/device_heuristics.py)
+over synthetic devices.
+
+Devices get MACs from the rule prefixes, random and locally administered
+MACs, vendor names with and without rule keywords, names matching the name
+patterns and plain IPs, so every branch of guess_device_attributes runs.
+
+Compared runs:
+  legacy     the previous sequential walk over every rule and pattern,
+             called twice per device (guess_icon + guess_type)
+  compiled   CompiledRules (MAC trie, vendor Aho-Corasick, precompiled
+             regexes), one guess_device_attributes call per device
+
+Both runs must return the same icon and type for every device.
+
+Usage:
+    python scripts/benchmarks/bench_device_heuristics.py --devices 50000
+"""
+
+import argparse
+import os
+import random
+import re
+import sys
+import time
+from unittest.mock import patch
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+os.environ.setdefault("NETALERTX_APP", REPO_ROOT)
+sys.path.extend([os.path.join(REPO_ROOT, "server")])
+
+from scan import device_heuristics  # noqa: E402
+from scan.device_heuristics import MAC_TYPE_ICON_RULES, guess_device_attributes  # noqa: E402
+
+DEFAULT_ICON = "default-icon"
+DEFAULT_TYPE = "default-type"
+
+VENDOR_WORDS = ["Acme", "Generic", "Networks", "Electronics", "Corp", "Ltd", "Technology", "Inc"]
+NAME_WORDS = ["host", "desk", "laptop", "node", "living-room", "office", "pc"]
+
+
+# -------------------------------------------------------------------------------
+# Previous implementation (one full walk per step)
+# -------------------------------------------------------------------------------
+def _legacy_guess(vendor, mac, ip, name, default_icon, default_type):
+    vendor = str(vendor).lower().strip() if vendor else "unknown"
+    mac = str(mac).upper().strip() if mac else "00:00:00:00:00:00"
+    ip = str(ip).strip() if ip else "169.254.0.0"
+    name = str(name).lower().strip() if name else "(unknown)"
+    mac_clean = mac.replace(":", "").replace("-", "").upper()
+
+    def mac_and_vendor():
+        for rule in MAC_TYPE_ICON_RULES:
+            for pattern in rule.get("matching_pattern", []):
+                vendor_pattern = pattern.get("vendor", "").lower()
+                if mac_clean.startswith(pattern.get("mac_prefix", "").upper()):
+                    if not vendor_pattern or vendor_pattern in vendor:
+                        return rule.get("dev_type"), rule.get("icon_base64", "") or default_icon
+        return default_type, default_icon
+
+    def by_name():
+        for rule in MAC_TYPE_ICON_RULES:
+            for pattern in rule.get("name_pattern", []):
+                if re.search(pattern, name, re.IGNORECASE):
+                    return rule.get("dev_type"), rule.get("icon_base64", "") or default_icon
+        return default_type, default_icon
+
+    def by_vendor():
+        for rule in MAC_TYPE_ICON_RULES:
+            for pattern in rule.get("matching_pattern", []):
+                vendor_pattern = pattern.get("vendor", "").lower()
+                if vendor_pattern and vendor_pattern in vendor:
+                    return rule.get("dev_type"), rule.get("icon_base64", "") or default_icon
+        return default_type, default_icon
+
+    def by_ip():
+        for rule in MAC_TYPE_ICON_RULES:
+            for pattern in rule.get("ip_pattern", []):
+                if re.match(pattern, ip):
+                    return rule.get("dev_type"), rule.get("icon_base64", "") or default_icon
+        return default_type, default_icon
+
+    type_, icon = mac_and_vendor()
+    if not type_ or type_ == default_type:
+        type_, icon = by_name()
+    if type_ == default_type and device_heuristics.is_random_mac(mac):
+        return default_icon, default_type
+    if not type_ or type_ == default_type:
+        type_, icon = by_vendor()
+    if (not type_ or type_ == default_type) or (not icon or icon == default_icon):
+        type_, icon = by_ip()
+    return icon or default_icon, type_ or default_type
+
+
+# -------------------------------------------------------------------------------
+# Synthetic devices
+# -------------------------------------------------------------------------------
+def make_devices(count, seed):
+    rnd = random.Random(seed)
+    prefixes = [p.get("mac_prefix", "") for r in MAC_TYPE_ICON_RULES for p in r.get("matching_pattern", [])]
+    prefixes = [p for p in prefixes if re.fullmatch(r"[0-9A-F]{6}", p.upper())]
+    keywords = [p.get("vendor", "") for r in MAC_TYPE_ICON_RULES for p in r.get("matching_pattern", [])]
+    keywords = [k for k in keywords if k]
+    # Literal name keywords taken from simple name patterns
+    names = [p for r in MAC_TYPE_ICON_RULES for p in r.get("name_pattern", []) if re.fullmatch(r"[\w -]+", p)]
+
+    devices = []
+    for i in range(count):
+        kind = rnd.random()
+        if kind < 0.3 and prefixes:
+            first = rnd.choice(prefixes).upper()
+        elif kind < 0.5:
+            # Locally administered (random) MAC
+            first = f"{rnd.randrange(256) | 0x02:02X}" + f"{rnd.randrange(1 << 16):04X}"
+        else:
+            first = f"{rnd.randrange(256) & 0xFC:02X}" + f"{rnd.randrange(1 << 16):04X}"
+        rest = f"{rnd.randrange(1 << 24):06X}"
+        mac = ":".join((first + rest)[j:j + 2] for j in range(0, 12, 2))
+
+        words = rnd.sample(VENDOR_WORDS, 2)
+        if keywords and rnd.random() < 0.4:
+            words.insert(rnd.randrange(3), rnd.choice(keywords))
+        vendor = " ".join(words) if rnd.random() < 0.9 else None
+
+        if names and rnd.random() < 0.3:
+            name = f"{rnd.choice(NAME_WORDS)}-{rnd.choice(names)}-{i}"
+        else:
+            name = f"{rnd.choice(NAME_WORDS)}-{i}" if rnd.random() < 0.8 else None
+
+        ip = f"192.168.{rnd.randrange(256)}.{rnd.randrange(1, 255)}"
+        devices.append((vendor, mac, ip, name))
+    return devices
+
+
+def run(label, devices, guess, calls_per_device):
+    start = time.perf_counter()
+    results = [guess(*device) for device in devices]
+    elapsed = time.perf_counter() - start
+    print(f"{label:<10} {elapsed:8.3f} s   {len(devices) / elapsed:10.0f} devices/s   ({calls_per_device} call(s) per device)")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--devices", type=int, default=50000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    if not MAC_TYPE_ICON_RULES:
+        sys.exit("No rules loaded (back/device_heuristics_rules.json)")
+
+    devices = make_devices(args.devices, args.seed)
+    print(f"{len(devices)} devices, {len(MAC_TYPE_ICON_RULES)} rules")
+
+    # is_random_mac reads UI_NOT_RANDOM_MAC; no settings outside the app
+    # and the debug logging is not part of the measurement
+    with patch("helper.get_setting_value", return_value=[]), \
+            patch.object(device_heuristics, "mylog", lambda *args, **kwargs: None):
+
+        def legacy(vendor, mac, ip, name):
+            icon = _legacy_guess(vendor, mac, ip, name, DEFAULT_ICON, "unknown_type")[0]
+            type_ = _legacy_guess(vendor, mac, ip, name, "unknown_icon", DEFAULT_TYPE)[1]
+            return icon, type_
+
+        def compiled(vendor, mac, ip, name):
+            return guess_device_attributes(vendor, mac, ip, name, DEFAULT_ICON, DEFAULT_TYPE)
+
+        expected = run("legacy", devices, legacy, 2)
+        device_heuristics.COMPILED_RULES.vendor_matches.cache_clear()
+        got = run("compiled", devices, compiled, 1)
+
+    mismatches = sum(1 for a, b in zip(expected, got) if a != b)
+    print(f"mismatches: {mismatches}")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Benchmark the startup of Python plugin scripts with and without the plugin
+fork-server (server/plugin_forkserver.py, PLUGINS_FORKSERVER).
+
+The default script imports what most plugins import (plugin_helper, helper,
+logger, const, database) and exits; pass --script to time a real plugin,
+e.g. one that only prints its help or fails fast on missing settings.
+
+Compared runs:
+  subprocess   `python3 <script>` in a new interpreter per run, as with
+               PLUGINS_FORKSERVER disabled
+  forkserver   the script run in a child forked from the fork-server; the
+               fork-server's own start is reported separately
+
+Usage:
+    python scripts/benchmarks/bench_plugin_forkserver.py --runs 20
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+os.environ.setdefault("NETALERTX_APP", REPO_ROOT)
+sys.path.extend([os.path.join(REPO_ROOT, "server")])
+
+from plugin_forkserver import ForkServer  # noqa: E402
+
+PLUGIN_SCRIPT = f"""
+import sys
+
+sys.path.extend(["{REPO_ROOT}/server/plugins", "{REPO_ROOT}/server"])
+
+from plugin_helper import Plugin_Objects  # noqa: E402, F401
+from helper import get_setting_value  # noqa: E402, F401
+from logger import mylog, Logger  # noqa: E402, F401
+from const import logPath  # noqa: E402, F401
+from database import DB  # noqa: E402, F401
+"""
+
+
+def _report(label, timings):
+    print(f"{label:<11} median {statistics.median(timings):8.1f} ms   min {min(timings):8.1f} ms   max {max(timings):8.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--script", help="plugin script to run instead of the import-only script")
+    parser.add_argument("--timeout", type=int, default=60)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        script = args.script
+        if script is None:
+            script = os.path.join(tmp, "plugin.py")
+            with open(script, "w") as f:
+                f.write(PLUGIN_SCRIPT)
+
+        subprocess_ms = []
+        for _ in range(args.runs):
+            start = time.monotonic()
+            subprocess.run([sys.executable, script], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=args.timeout)
+            subprocess_ms.append((time.monotonic() - start) * 1000)
+
+        server = ForkServer()
+        forked_ms = []
+        try:
+            for _ in range(args.runs):
+                start = time.monotonic()
+                answer = server.run("BENCH", [script], args.timeout)
+                forked_ms.append((time.monotonic() - start) * 1000)
+                if answer["rc"] != 0:
+                    print(f"forked run failed ({answer['rc']}):\n{answer['output']}")
+                    return 1
+            cold_start_ms = server.cold_start_ms
+        finally:
+            server.stop()
+
+    print(f"{args.runs} runs of {args.script or 'the import-only script'}")
+    _report("subprocess", subprocess_ms)
+    # The first forked run includes the fork-server start
+    _report("forkserver", forked_ms[1:] or forked_ms)
+    print(f"fork-server start {cold_start_ms:.1f} ms, paid once; "
+          f"saved per run {statistics.median(subprocess_ms) - statistics.median(forked_ms[1:] or forked_ms):.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Benchmark writing and reading plugin result files (last_result.<PREFIX>.log)
+in the pipe-delimited text format and as JSON lines
+(server/utils/plugin_results.py).
+
+Rows look like scan results (MAC, IP, timestamp, name, vendor, ...); a part
+of them has values with a pipe or a line break, which the text format
+cannot carry.
+
+Compared runs:
+  text (legacy)  the previous core parsing: read the whole file, split it
+                 into lines, keep the lines with a pipe, split each line
+  text           iter_result_rows over the text file, line by line
+  jsonl          iter_result_rows over the JSON lines file, line by line
+
+Reported per run: time, peak Python memory and the rows that came back
+with their original values. Like the core, the new reader handles each row
+as it is read; the legacy parsing holds all lines at once.
+
+Usage:
+    python scripts/benchmarks/bench_plugin_results.py --rows 100000
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+sys.path.extend([os.path.join(REPO_ROOT, "server")])
+
+from utils.plugin_results import encode_result_row, encode_text_row, iter_result_rows  # noqa: E402
+
+
+def make_rows(count, special, seed):
+    rng = random.Random(seed)
+    rows = []
+    for i in range(count):
+        mac = ":".join(f"{rng.randrange(256):02x}" for _ in range(6))
+        name = f"host-{i}"
+        extra = "null"
+        if rng.random() < special:
+            name = f"{name} | lab"
+            extra = "line 1\nline 2"
+        rows.append([
+            mac, f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}", "2026-10-19 10:00:00",
+            name, "Acme Networks", "null", "null", extra, mac, "null", "null", "null", "null",
+        ])
+    return rows
+
+
+def legacy_read(path, expected):
+    with open(path, "r") as f:
+        lines = f.read().split("\n")
+    lines = list(filter(lambda x: "|" in x, lines))
+    return sum(1 for line in lines if tuple(line.split("|")) in expected)
+
+
+def new_read(path, expected):
+    with open(path, "r") as f:
+        return sum(1 for row in iter_result_rows(f) if tuple(row) in expected)
+
+
+def timed(func, *args):
+    """Result and time of a run, plus the peak Python memory of a second, traced run."""
+    start = time.perf_counter()
+    result = func(*args)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    func(*args)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def write(path, rows, encode):
+    with open(path, "w") as f:
+        for row in rows:
+            f.write(encode(row))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--special", type=float, default=0.01, help="share of rows with a pipe or line break in a value")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows, args.special, args.seed)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        text_path = os.path.join(tmp, "last_result.BENCH.log")
+        jsonl_path = os.path.join(tmp, "last_result.BENCH.jsonl.log")
+
+        print(f"{len(rows)} rows, {args.special:.1%} with a pipe or line break")
+        for label, path, encode in (("text", text_path, encode_text_row), ("jsonl", jsonl_path, encode_result_row)):
+            start = time.perf_counter()
+            write(path, rows, encode)
+            elapsed = time.perf_counter() - start
+            print(f"write {label:<14} {elapsed:7.3f} s   {os.path.getsize(path) / 1024 / 1024:7.1f} MiB")
+
+        expected = {tuple(row) for row in rows}
+        for label, func, path in (
+            ("text (legacy)", legacy_read, text_path),
+            ("text", new_read, text_path),
+            ("jsonl", new_read, jsonl_path),
+        ):
+            intact, elapsed, peak = timed(func, path, expected)
+            print(f"read  {label:<14} {elapsed:7.3f} s   peak {peak / 1024 / 1024:7.1f} MiB   {intact}/{len(rows)} rows intact")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Benchmark the native reverse DNS engine of NSLOOKUP / DIGSCAN
+(server/utils/reverse_dns.py) against a local stub DNS server.
+
+The stub answers PTR queries on 127.0.0.1 after --latency milliseconds,
+returns NXDOMAIN for a share of the hosts and never answers another share
+(--silent), which is what makes the per-device subprocess approach slow.
+
+Compared runs:
+  sequential   concurrency=1, the per-device behaviour of the old plugins
+  concurrent   concurrency=--concurrency
+  warm cache   second concurrent run with the TTL cache of the first
+  dig          one `dig -x` process per host (only if dig is installed)
+
+Usage:
+    python scripts/benchmarks/bench_reverse_dns.py --hosts 1000 --silent 0.2
+"""
+
+import argparse
+import os
+import random
+import shutil
+import socket
+import struct
+import subprocess
+import sys
+import threading
+import time
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+sys.path.extend([os.path.join(REPO_ROOT, "server"), os.path.join(REPO_ROOT, "server", "plugins")])
+
+from utils.reverse_dns import ReverseResolver, _encode_name  # noqa: E402
+from utils.ttl_cache import TTLCache  # noqa: E402
+
+
+class StubDNSServer:
+    """Minimal UDP PTR responder; behaviour per host is fixed by --seed."""
+
+    def __init__(self, latency, silent, nxdomain, seed):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind(("127.0.0.1", 0))
+        self.sock.settimeout(0.1)
+        self.latency = latency
+        self.silent = silent
+        self.nxdomain = nxdomain
+        self.seed = seed
+        self.stop = threading.Event()
+        self.thread = threading.Thread(target=self._serve, daemon=True)
+
+    @property
+    def address(self):
+        return self.sock.getsockname()
+
+    def _kind(self, qname):
+        r = random.Random(f"{self.seed}:{qname}").random()
+        if r < self.silent:
+            return "silent"
+        if r < self.silent + self.nxdomain:
+            return "nxdomain"
+        return "ptr"
+
+    def _reply(self, query):
+        qid = struct.unpack("!H", query[:2])[0]
+        end = query.index(b"\x00", 12) + 5
+        question = query[12:end]
+        kind = self._kind(question)
+        if kind == "silent":
+            return None
+        if kind == "nxdomain":
+            soa = _encode_name("ns.lan") + _encode_name("admin.lan") + struct.pack("!IIIII", 1, 2, 3, 4, 300)
+            rr = b"\xc0\x0c" + struct.pack("!HHIH", 6, 1, 300, len(soa)) + soa
+            return struct.pack("!HHHHHH", qid, 0x8183, 1, 0, 1, 0) + question + rr
+        target = _encode_name(f"host-{qid}.lan")
+        rr = b"\xc0\x0c" + struct.pack("!HHIH", 12, 1, 3600, len(target)) + target
+        return struct.pack("!HHHHHH", qid, 0x8180, 1, 1, 0, 0) + question + rr
+
+    def _serve(self):
+        while not self.stop.is_set():
+            try:
+                data, addr = self.sock.recvfrom(512)
+            except socket.timeout:
+                continue
+            reply = self._reply(data)
+            if reply is None:
+                continue
+            if self.latency:
+                threading.Timer(self.latency, self.sock.sendto, (reply, addr)).start()
+            else:
+                self.sock.sendto(reply, addr)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop.set()
+        self.thread.join()
+        self.sock.close()
+
+
+def time_native(ips, server, concurrency, timeout, cache=None):
+    resolver = ReverseResolver(nameservers=[server], concurrency=concurrency, timeout=timeout, retries=0, cache=cache)
+    started = time.perf_counter()
+    results = resolver.resolve_many(ips)
+    elapsed = time.perf_counter() - started
+    return elapsed, sum(1 for names, _ in results.values() if names), resolver.stats
+
+
+def time_dig(ips, server, timeout):
+    started = time.perf_counter()
+    found = 0
+    for ip in ips:
+        out = subprocess.run(
+            ["dig", f"@{server[0]}", "-p", str(server[1]), "+short", f"+time={max(int(timeout), 1)}", "+tries=1", "-x", ip],
+            capture_output=True, text=True,
+        ).stdout
+        found += bool(out.strip())
+    return time.perf_counter() - started, found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--hosts", type=int, default=500)
+    parser.add_argument("--silent", type=float, default=0.1, help="share of hosts that never get an answer")
+    parser.add_argument("--nxdomain", type=float, default=0.3, help="share of hosts answered with NXDOMAIN")
+    parser.add_argument("--latency", type=float, default=5, help="server reply latency in ms")
+    parser.add_argument("--timeout", type=float, default=1.0, help="per-query timeout in seconds")
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--skip-sequential", action="store_true", help="skip the (slow) concurrency=1 run")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    ips = [f"10.{i // 65536 % 256}.{i // 256 % 256}.{i % 256}" for i in range(1, args.hosts + 1)]
+
+    with StubDNSServer(args.latency / 1000.0, args.silent, args.nxdomain, args.seed) as stub:
+        server = stub.address
+        print(f"{args.hosts} hosts, {args.silent:.0%} silent, {args.nxdomain:.0%} NXDOMAIN, "
+              f"{args.latency:g} ms latency, {args.timeout:g} s timeout")
+        print(f"{'run':<12} {'time (s)':>9} {'hosts/s':>9} {'names':>6} {'queries':>8} {'timeouts':>9}")
+
+        def row(label, elapsed, found, stats=None):
+            queries = stats["queries"] if stats else len(ips)
+            timeouts = stats["timeouts"] if stats else "-"
+            print(f"{label:<12} {elapsed:>9.3f} {len(ips) / elapsed:>9.0f} {found:>6} {queries:>8} {timeouts:>9}")
+
+        if not args.skip_sequential:
+            row("sequential", *time_native(ips, server, 1, args.timeout))
+
+        cache = TTLCache()
+        row("concurrent", *time_native(ips, server, args.concurrency, args.timeout, cache))
+        row("warm cache", *time_native(ips, server, args.concurrency, args.timeout, cache))
+
+        if shutil.which("dig"):
+            row("dig", *time_dig(ips, server, args.timeout))
+        else:
+            print("dig          not installed, skipped")
+
+
+if __name__ == "__main__":
+    main()
@@ -31,7 +31,7 @@ from app_state import updateState
 from api import update_api, check_activity, update_GUI_port
 from scan.session_events import process_scan
 from initialise import importConfigs, renameSettings
-from database import DB
+from database import DB, get_db_writer
 from messaging.reporting import get_notifications
 from models.notification_instance import NotificationInstance
 from models.user_events_queue_instance import UserEventsQueueInstance
@@ -246,6 +246,9 @@ def main():
                 # Commit SQL
                 db.commitDB()
 
+                # Queue wait / batch size / commit time of API-side writes
+                mylog("debug", ["[MAIN] DB writer stats: ", get_db_writer().stats()])
+
                 mylog("verbose", ["[MAIN] Process: Idle"])
             else:
                 # do something
@@ -1966,8 +1966,17 @@ def api_mark_notification_read(guid, payload=None):
 @validate_request(
     operation_id="sync_data_pull",
     summary="Sync Data Pull",
-    description="Pull synchronization data.",
+    description=(
+        "Pull synchronization data. With `since`, the devices are streamed as a gzip compressed, versioned JSON envelope: "
+        "only the changes since that version if it is the version served last, all devices otherwise."
+    ),
     response_model=SyncPullResponse,
+    query_params=[{
+        "name": "since",
+        "description": "Devices version the hub holds (empty for none)",
+        "required": False,
+        "schema": {"type": "string"}
+    }],
     tags=["sync"],
     auth_callable=is_authorized
 )
@@ -10,9 +10,11 @@ from flask import jsonify
 INSTALL_PATH = os.getenv("NETALERTX_APP", "/app")
 sys.path.extend([f"{INSTALL_PATH}/server/plugins", f"{INSTALL_PATH}/server"])
 
-from database import get_temp_db_connection  # noqa: E402 [flake8 lint suppression]
+from database import get_read_db_connection, get_db_writer  # noqa: E402 [flake8 lint suppression]
 from logger import mylog  # noqa: E402 [flake8 lint suppression]
 
+TRANSACTION_KEYWORDS = ("BEGIN", "COMMIT", "END", "ROLLBACK", "SAVEPOINT", "RELEASE")
+
 
 def read_query(raw_sql_b64):
     """Execute a read-only query (SELECT)."""
@@ -20,16 +22,17 @@ def read_query(raw_sql_b64):
         # Decode: base64 -> URL decode (matches JS: btoa(unescape(encodeURIComponent())))
         raw_sql = unquote(base64.b64decode(raw_sql_b64).decode("utf-8"))
 
-        conn = get_temp_db_connection()
-        cur = conn.cursor()
-        cur.execute(raw_sql)
-        rows = cur.fetchall()
-
-        # Convert rows → dict list
-        columns = [col[0] for col in cur.description] if cur.description else []
-        results = [dict(zip(columns, row)) for row in rows]
-
-        conn.close()
+        conn = get_read_db_connection()
+        try:
+            cur = conn.cursor()
+            cur.execute(raw_sql)
+            rows = cur.fetchall()
+
+            # Convert rows → dict list
+            columns = [col[0] for col in cur.description] if cur.description else []
+            results = [dict(zip(columns, row)) for row in rows]
+        finally:
+            conn.close()
         return jsonify({"success": True, "results": results})
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 400
@@ -41,13 +44,11 @@ def write_query(raw_sql_b64):
         # Decode: base64 -> URL decode (matches JS: btoa(unescape(encodeURIComponent())))
         raw_sql = unquote(base64.b64decode(raw_sql_b64).decode("utf-8"))
 
-        conn = get_temp_db_connection()
-        cur = conn.cursor()
-        cur.execute(raw_sql)
-        conn.commit()
+        # The writer owns the transaction; explicit transaction control would break the batch
+        if raw_sql.lstrip().upper().startswith(TRANSACTION_KEYWORDS):
+            return jsonify({"success": False, "error": "Transaction control statements are not allowed"}), 400
 
-        affected = cur.rowcount
-        conn.close()
+        affected = get_db_writer().execute(raw_sql).rowcount
         return jsonify({"success": True, "affected_rows": affected})
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 400
@@ -56,22 +57,18 @@ def write_query(raw_sql_b64):
 def update_query(column_name, ids, dbtable, columns, values):
     """Update rows in dbtable based on column_name + ids."""
     try:
-        conn = get_temp_db_connection()
-        cur = conn.cursor()
-
         if not isinstance(ids, list):
             ids = [ids]
 
-        updated_count = 0
-        for i in range(len(ids)):
+        def _update(conn):
+            updated = 0
             set_clause = ", ".join([f"{col} = ?" for col in columns])
             sql = f"UPDATE {dbtable} SET {set_clause} WHERE {column_name} = ?"
-            params = list(values) + [ids[i]]
-            cur.execute(sql, params)
-            updated_count += cur.rowcount
+            for id_val in ids:
+                updated += conn.execute(sql, list(values) + [id_val]).rowcount
+            return updated
 
-        conn.commit()
-        conn.close()
+        updated_count = get_db_writer().run(_update)
         return jsonify({"success": True, "updated_count": updated_count})
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 400
@@ -80,19 +77,16 @@ def update_query(column_name, ids, dbtable, columns, values):
 def delete_query(column_name, ids, dbtable):
     """Delete rows in dbtable based on column_name + ids."""
     try:
-        conn = get_temp_db_connection()
-        cur = conn.cursor()
-
-        deleted_count = 0
-        for id_val in ids:
+        def _delete(conn):
+            deleted = 0
             # Wrap table and column in quotes to handle reserved words
             sql = f'DELETE FROM "{dbtable}" WHERE "{column_name}" = ?'
-            mylog("debug", f"[delete_query] sql {sql} with id={id_val}")
-            cur.execute(sql, (id_val,))
-            deleted_count += cur.rowcount
+            for id_val in ids:
+                mylog("debug", f"[delete_query] sql {sql} with id={id_val}")
+                deleted += conn.execute(sql, (id_val,)).rowcount
+            return deleted
 
-        conn.commit()
-        conn.close()
+        deleted_count = get_db_writer().run(_delete)
         return jsonify({"success": True, "deleted_count": deleted_count})
 
     except Exception as e:
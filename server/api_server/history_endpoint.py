@@ -8,7 +8,7 @@ from flask import jsonify
 INSTALL_PATH = os.getenv("NETALERTX_APP", "/app")
 sys.path.extend([f"{INSTALL_PATH}/server/plugins", f"{INSTALL_PATH}/server"])
 
-from database import get_temp_db_connection  # noqa: E402 [flake8 lint suppression]
+from database import get_db_writer  # noqa: E402 [flake8 lint suppression]
 
 
 # --------------------------------------------------
@@ -19,12 +19,6 @@ from database import get_temp_db_connection  # noqa: E402 [flake8 lint suppressi
 def delete_online_history():
     """Delete all online history activity"""
 
-    conn = get_temp_db_connection()
-    cur = conn.cursor()
-
-    sql = "DELETE FROM Online_History"
-    cur.execute(sql)
-    conn.commit()
-    conn.close()
+    get_db_writer().execute("DELETE FROM Online_History")
 
     return jsonify({"success": True, "message": "Deleted online history"})
@@ -917,6 +917,8 @@ class SyncPushRequest(BaseModel):
     node_name: str = Field(..., description="Name of the node sending data")
     plugin: str = Field(..., description="Plugin identifier")
     file_path: Optional[str] = Field(None, description="Source file path on the node")
+    version: Optional[int] = Field(None, description="Version of a versioned devices payload")
+    base_version: Optional[int] = Field(None, description="Version a delta payload applies to (null for a full payload)")
 
 
 class SyncPullResponse(BaseResponse):
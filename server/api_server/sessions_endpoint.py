@@ -1,7 +1,6 @@
 #!/usr/bin/env python
 
 import os
-import sqlite3
 import sys
 from flask import jsonify
 
@@ -9,9 +8,10 @@ from flask import jsonify
 INSTALL_PATH = os.getenv("NETALERTX_APP", "/app")
 sys.path.extend([f"{INSTALL_PATH}/server/plugins", f"{INSTALL_PATH}/server"])
 
-from database import get_temp_db_connection  # noqa: E402 [flake8 lint suppression]
+from database import get_read_db_connection, get_db_writer  # noqa: E402 [flake8 lint suppression]
 from helper import get_setting_value, format_ip_long  # noqa: E402 [flake8 lint suppression]
 from db.db_helper import get_date_from_period  # noqa: E402 [flake8 lint suppression]
+from db.db_partitions import partition_source, delete_from_partitions  # noqa: E402 [flake8 lint suppression]
 from utils.datetime_utils import timeNowUTC, format_date_iso, format_event_date, format_date_diff, format_date   # noqa: E402 [flake8 lint suppression]
 
 
@@ -28,10 +28,7 @@ def create_session(
     event_type_disc="Disconnected",
 ):
     """Insert a new session into Sessions table"""
-    conn = get_temp_db_connection()
-    cur = conn.cursor()
-
-    cur.execute(
+    get_db_writer().execute(
         """
         INSERT INTO Sessions (sesMac, sesIp, sesDateTimeConnection, sesDateTimeDisconnection,
                               sesEventTypeConnection, sesEventTypeDisconnection)
@@ -40,21 +37,17 @@ def create_session(
         (mac, ip, start_time, end_time, event_type_conn, event_type_disc),
     )
 
-    conn.commit()
-    conn.close()
-
     return jsonify({"success": True, "message": f"Session created for MAC {mac}"})
 
 
 # -------------------------------------------------------------------------------------------
 def delete_session(mac):
     """Delete all sessions for a given MAC"""
-    conn = get_temp_db_connection()
-    cur = conn.cursor()
+    def _delete(conn):
+        conn.execute("DELETE FROM Sessions WHERE sesMac = ?", (mac,))
+        delete_from_partitions(conn, "Sessions", "sesMac = ?", (mac,))
 
-    cur.execute("DELETE FROM Sessions WHERE sesMac = ?", (mac,))
-    conn.commit()
-    conn.close()
+    get_db_writer().run(_delete)
 
     return jsonify({"success": True, "message": f"Deleted sessions for MAC {mac}"})
 
@@ -62,10 +55,16 @@ def delete_session(mac):
 # -------------------------------------------------------------------------------------------
 def get_sessions(mac=None, start_date=None, end_date=None):
     """Retrieve sessions optionally filtered by MAC and date range"""
-    conn = get_temp_db_connection()
+    conn = get_read_db_connection()
     cur = conn.cursor()
 
-    sql = "SELECT * FROM Sessions WHERE 1=1"
+    # Archived months too, only those overlapping the range when it has a start
+    if start_date:
+        sessions = partition_source(conn, "Sessions", "?", (start_date,))
+    else:
+        sessions = partition_source(conn, "Sessions")
+
+    sql = f"SELECT * FROM {sessions} WHERE 1=1"
     params = []
 
     if mac:
@@ -100,11 +99,13 @@ def get_sessions_calendar(start_date, end_date, mac):
     # Normalize MAC (empty string → NULL)
     mac = mac or None
 
-    conn = get_temp_db_connection()
-    conn.row_factory = sqlite3.Row
+    conn = get_read_db_connection()
     cur = conn.cursor()
 
-    sql = """
+    # Only the monthly partitions overlapping the calendar range (if any)
+    sessions = partition_source(conn, "Sessions", "Date(?)", (start_date,))
+
+    sql = f"""
         SELECT
             SES1.sesMac,
             SES1.sesEventTypeConnection,
@@ -120,7 +121,7 @@ def get_sessions_calendar(start_date, end_date, mac):
                 IFNULL(
                   (
                     SELECT MAX(SES2.sesDateTimeDisconnection)
-                    FROM Sessions AS SES2
+                    FROM {sessions} AS SES2
                     WHERE SES2.sesMac = SES1.sesMac
                       AND SES2.sesDateTimeDisconnection < SES1.sesDateTimeDisconnection
                       AND SES2.sesDateTimeDisconnection BETWEEN Date(?) AND Date(?)
@@ -134,7 +135,7 @@ def get_sessions_calendar(start_date, end_date, mac):
               WHEN SES1.sesEventTypeDisconnection = '<missing event>' THEN
                 (
                   SELECT MIN(SES2.sesDateTimeConnection)
-                  FROM Sessions AS SES2
+                  FROM {sessions} AS SES2
                   WHERE SES2.sesMac = SES1.sesMac
                     AND SES2.sesDateTimeConnection > SES1.sesDateTimeConnection
                     AND SES2.sesDateTimeConnection BETWEEN Date(?) AND Date(?)
@@ -142,7 +143,7 @@ def get_sessions_calendar(start_date, end_date, mac):
               ELSE SES1.sesDateTimeDisconnection
             END AS sesDateTimeDisconnectionCorrected
 
-        FROM Sessions AS SES1
+        FROM {sessions} AS SES1
         WHERE (
               (SES1.sesDateTimeConnection BETWEEN Date(?) AND Date(?))
            OR (SES1.sesDateTimeDisconnection BETWEEN Date(?) AND Date(?))
@@ -214,9 +215,12 @@ def get_device_sessions(mac, period):
     """
     period_date = get_date_from_period(period)
 
-    conn = get_temp_db_connection()
+    conn = get_read_db_connection()
     cur = conn.cursor()
 
+    # Only the monthly partitions overlapping the period (if any)
+    sessions = partition_source(conn, "Sessions", period_date)
+
     sql = f"""
         SELECT
             IFNULL(sesDateTimeConnection, sesDateTimeDisconnection) AS sesDateTimeOrder,
@@ -227,7 +231,7 @@ def get_device_sessions(mac, period):
             sesStillConnected,
             sesIp,
             sesAdditionalInfo
-        FROM Sessions
+        FROM {sessions}
         WHERE sesMac = ?
           AND (
               sesDateTimeConnection >= {period_date}
@@ -305,11 +309,14 @@ def get_session_events(event_type, period_date, page=1, limit=100, search=None,
     limit = min(max(1, int(limit)), _MAX_LIMIT)
     page  = max(1, int(page))
 
-    conn = get_temp_db_connection()
-    conn.row_factory = sqlite3.Row
+    conn = get_read_db_connection()
     cur = conn.cursor()
     tz_name = get_setting_value("TIMEZONE") or "UTC"
 
+    # Live rows plus the archived months overlapping the period
+    events = partition_source(conn, "Events", period_date)
+    sessions = partition_source(conn, "Sessions", period_date)
+
     # Base SQLs
     sql_events = f"""
         SELECT
@@ -328,11 +335,12 @@ def get_session_events(event_type, period_date, page=1, limit=100, search=None,
             NULL,
             devMac,
             evePendingAlertEmail
-        FROM Events_Devices
+        FROM {events}
+        LEFT JOIN Devices ON eveMac = devMac
         WHERE eveDateTime >= {period_date}
     """
 
-    sql_sessions = """
+    sql_sessions = f"""
         SELECT
             IFNULL(sesDateTimeConnection, sesDateTimeDisconnection) AS sesDateTimeOrder,
             devName,
@@ -349,7 +357,8 @@ def get_session_events(event_type, period_date, page=1, limit=100, search=None,
             sesStillConnected,
             devMac,
             0 AS sesPendingAlertEmail
-        FROM Sessions_Devices
+        FROM {sessions}
+        LEFT JOIN Devices ON sesMac = devMac
     """
 
     # Build SQL based on type
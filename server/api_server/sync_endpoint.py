@@ -1,15 +1,30 @@
 import json
 import os
 import base64
-from flask import jsonify, request
+import threading
+from flask import Response, jsonify, request
 from logger import mylog, Logger
 from helper import get_setting_value
 from utils.datetime_utils import timeNowUTC
+from utils.sync_delta import SYNC_PROTOCOL, diff_rows, iter_json_gzip
+from plugin_helper import load_plugin_cache, save_plugin_cache
 from messaging.in_app import write_notification
 
 # Make sure log level is initialized correctly
 lggr = Logger(get_setting_value('LOG_LEVEL'))
 
+# Serializes the read-modify-write of the delta sync state files
+_state_lock = threading.Lock()
+
+
+def _storage_path():
+    return os.getenv("NETALERTX_PLUGINS_LOG", "/tmp/log/plugins")
+
+
+def _state_file(name):
+    # e.g. cache.SYNC.served.json (NODE) / cache.SYNC.received.json (HUB)
+    return os.path.join(_storage_path(), f"cache.SYNC.{name}.json")
+
 
 def handle_sync_get():
     """Handle GET requests for SYNC (NODE → HUB)."""
@@ -28,6 +43,11 @@ def handle_sync_get():
         mylog("verbose", [msg])
         return jsonify({"error": msg}), 500
 
+    # Delta aware hubs pass the version they hold (empty on the first pull)
+    since = request.args.get("since")
+    if since is not None:
+        return _sync_get_versioned(raw_data, since)
+
     response_data = base64.b64encode(raw_data).decode("utf-8")
 
     message = "[Plugin: SYNC] Data sent"
@@ -44,6 +64,53 @@ def handle_sync_get():
     }), 200
 
 
+def _sync_get_versioned(raw_data, since):
+    """
+    Stream the devices as a gzip compressed JSON envelope.
+
+    The node remembers the digests of the rows it served last. If the hub
+    asks for changes since that version it only gets the inserted, changed
+    and deleted rows, otherwise (first pull, another hub pulled in between,
+    hub lost its copy) it gets all rows.
+    """
+    try:
+        rows = json.loads(raw_data).get("data", [])
+    except (ValueError, AttributeError) as e:
+        msg = f"[Plugin: SYNC] Invalid devices data: {e}"
+        mylog("verbose", [msg])
+        return jsonify({"error": msg}), 500
+
+    node_name = get_setting_value("SYNC_node_name")
+
+    with _state_lock:
+        state = load_plugin_cache(_state_file("served"))
+        served_version = state.get("version")
+        upserts, deletes, digests = diff_rows(rows, state.get("digests", {}))
+        version = (served_version or 0) + 1
+
+        save_plugin_cache(_state_file("served"), {"version": version, "digests": digests})
+
+    head = {"node_name": node_name, "version": version}
+    if served_version is not None and since == str(served_version):
+        head.update(base_version=served_version, delta=True)
+        body = iter_json_gzip(head, "upserts", upserts, tail={"deletes": deletes})
+        message = f"[Plugin: SYNC] Delta v{version} sent ({len(upserts)} changed, {len(deletes)} deleted)"
+    else:
+        head.update(base_version=None)
+        body = iter_json_gzip(head, "data", rows)
+        message = f"[Plugin: SYNC] Full data v{version} sent ({len(rows)} devices)"
+
+    mylog('verbose', [message])
+    if lggr.isAbove('verbose'):
+        write_notification(message, 'info', timeNowUTC())
+
+    return Response(body, status=200, mimetype="application/json", headers={
+        "Content-Encoding": "gzip",
+        "X-Sync-Node": node_name,
+        "X-Sync-Version": str(version),
+    })
+
+
 def handle_sync_post():
     """Handle POST requests for SYNC (HUB receiving from NODE)."""
 
@@ -85,7 +152,11 @@ def handle_sync_post():
         f"[SYNC API] node_name={repr(node_name)} plugin={repr(plugin)} data_type={type(data).__name__} data_len={len(data) if isinstance(data, str) else 'non-string'}"
     ])
 
-    storage_path = os.getenv("NETALERTX_PLUGINS_LOG", "/tmp/log/plugins")
+    # Versioned (delta) device payloads, see utils/sync_delta.py
+    version = body.get("version")
+    base_version = body.get("base_version")
+
+    storage_path = _storage_path()
 
     try:
         os.makedirs(storage_path, exist_ok=True)
@@ -96,6 +167,13 @@ def handle_sync_post():
         write_notification(msg, 'alert', timeNowUTC())
         return jsonify({"error": "storage path error"}), 500
 
+    # A delta only applies on top of the version received last from this node
+    if base_version is not None:
+        received = load_plugin_cache(_state_file("received"))
+        if received.get(node_name) != base_version:
+            mylog("verbose", [f"[SYNC API] Delta from {node_name} is based on v{base_version}, hub has v{received.get(node_name)}: full resync required"])
+            return jsonify({"error": "resync required", "version": received.get(node_name), "sync_protocol": SYNC_PROTOCOL}), 409
+
     # ---- FILE COUNT LOGIC
     try:
         encoded_files = [
@@ -137,9 +215,15 @@ def handle_sync_post():
         write_notification(msg, 'alert', timeNowUTC())
         return jsonify({"error": str(e)}), 500
 
+    if version is not None:
+        with _state_lock:
+            received = load_plugin_cache(_state_file("received"))
+            received[node_name] = version
+            save_plugin_cache(_state_file("received"), received)
+
     msg = f"[Plugin: SYNC] Data received ({file_path_new})"
     if lggr.isAbove('verbose'):
         write_notification(msg, 'info', timeNowUTC())
     mylog("verbose", [msg])
 
-    return jsonify({"message": "Data received and stored successfully"}), 200
+    return jsonify({"message": "Data received and stored successfully", "sync_protocol": SYNC_PROTOCOL}), 200
@@ -45,6 +45,10 @@ vendorsPath = os.getenv("VENDORSPATH", "/usr/share/arp-scan/ieee-oui.txt")
 vendorsPathNewest = os.getenv(
     "VENDORSPATH_NEWEST", "/usr/share/arp-scan/ieee-oui_all_filtered.txt"
 )
+# Binary prefix index of the vendors file (see utils/oui_index.py)
+vendorsIndexPath = os.getenv(
+    "VENDORSINDEXPATH", os.path.join(os.path.dirname(vendorsPathNewest), "ieee-oui.idx")
+)
 
 NATIVE_SPEEDTEST_PATH = os.getenv("NATIVE_SPEEDTEST_PATH", "/usr/bin/speedtest")
 
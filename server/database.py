@@ -1,6 +1,8 @@
 """all things database to support NetAlertX"""
 
 import sqlite3
+import threading
+import time
 
 # Register NetAlertX modules
 from const import fullDbPath, sql_devices_stats, sql_devices_all
@@ -11,6 +13,7 @@ from workflows.app_events import AppEvent_obj
 from db.db_upgrade import (
     ensure_column,
     ensure_CurrentScan,
+    ensure_SyncNodes,
     ensure_plugins_tables,
     ensure_Parameters,
     ensure_Settings,
@@ -21,7 +24,14 @@ from db.db_upgrade import (
     migrate_to_camelcase,
     migrate_timestamps_to_utc,
 )
+from db.db_partitions import sync_partition_columns
 from db.db_history import ensure_deviceshistory_table, ensure_deviceshistory_triggers
+from db.db_pool import ReadConnectionPool
+from db.db_pragmas import apply_pragmas, apply_database_pragmas, apply_page_size, report_pragmas
+from db.db_writer import DBWriter
+
+# Commits slower than this (seconds) are logged as main-loop stalls
+SLOW_COMMIT_SECONDS = 1.0
 
 
 class DB:
@@ -41,16 +51,18 @@ class DB:
         """
         self.sql = None
         self.sql_connection = None
+        self.pragma_profile = None
 
     def open(self):
         """
         Opens a connection to the SQLite database if it is not already open.
-        This method initializes the database connection and cursor, and sets
-        several SQLite PRAGMA options to optimize performance and reliability:
-        - Enables Write-Ahead Logging (WAL) mode.
+        This method initializes the database connection and cursor, and applies
+        the per-connection part of the active PRAGMA profile (see db/db_pragmas.py):
         - Sets synchronous mode to NORMAL for a balance between
           performance and safety.
         - Stores temporary tables and indices in memory.
+        - Sets cache_size and mmap_size from PRAGMA_PROFILE.
+        WAL and the other database-wide PRAGMAs are applied by initDB.
         If the database is already open, the method logs a debug message
         and returns.
         If an error occurs during connection, it logs the error
@@ -68,27 +80,9 @@ class DB:
         try:
             self.sql_connection = sqlite3.connect(fullDbPath, isolation_level=None)
 
-            # The WAL journaling mode uses a write-ahead log instead of a
-            # rollback journal to implement transactions.
-            self.sql_connection.execute("pragma journal_mode=WAL;")
-            # When synchronous is NORMAL (1), the SQLite database engine will
-            # still sync at the most critical moments,
-            # but less often than in FULL mode.
-            self.sql_connection.execute("PRAGMA synchronous=NORMAL;")
-            # When temp_store is MEMORY (2) temporary tables and indices
-            # are kept as if they were in pure in-memory databases.
-            self.sql_connection.execute("PRAGMA temp_store=MEMORY;")
-            # WAL size limit: auto-checkpoint when WAL approaches this size,
-            # even if other connections are active. Prevents unbounded WAL growth
-            # on systems with multiple long-lived processes (backend, nginx, PHP-FPM).
-            # User-configurable via PRAGMA_JOURNAL_SIZE_LIMIT setting (default 50 MB).
-            try:
-                from helper import get_setting_value
-                wal_limit_mb = int(get_setting_value("PRAGMA_JOURNAL_SIZE_LIMIT", "50"))
-                wal_limit_bytes = wal_limit_mb * 1000000
-            except Exception:
-                wal_limit_bytes = 50000000  # 50 MB fallback
-            self.sql_connection.execute(f"PRAGMA journal_size_limit={wal_limit_bytes};")
+            # synchronous, temp_store, busy_timeout and the PRAGMA_PROFILE
+            # memory settings (see db/db_pragmas.py)
+            self.pragma_profile = apply_pragmas(self.sql_connection, long_lived=True)
 
             self.sql_connection.text_factory = str
             self.sql_connection.row_factory = sqlite3.Row
@@ -106,8 +100,13 @@ class DB:
             mylog("debug", "commitDB: database is not open")
             return False
 
-        # Commit changes to DB
+        # Commit changes to DB; time the COMMIT itself so slow commits (large
+        # transactions, slow disk, busy retries) show up in the log
+        started = time.monotonic()
         self.sql_connection.commit()
+        elapsed = time.monotonic() - started
+        if elapsed > SLOW_COMMIT_SECONDS:
+            mylog("verbose", [f"[Database] Slow commit: COMMIT took {elapsed:.2f}s"])
         return True
 
     def rollbackDB(self):
@@ -156,6 +155,10 @@ class DB:
             Exception: For any other errors encountered during initialization.
         """
 
+        # WAL, journal size limit, page size of a new file: once per start,
+        # outside the upgrade transaction
+        apply_database_pragmas(self.sql_connection, self.pragma_profile)
+
         try:
             # Start transactional upgrade
             self.sql_connection.execute("BEGIN IMMEDIATE;")
@@ -217,6 +220,12 @@ class DB:
             # CurrentScan table setup
             ensure_CurrentScan(self.sql)
 
+            # SYNC hub per-node pull watermarks and latency stats
+            ensure_SyncNodes(self.sql)
+
+            # Archived Events / Sessions partitions get the columns added above
+            sync_partition_columns(self.sql)
+
             # Views are created in importConfigs() after settings are committed,
             # so NTFPRCS_sleep_time is available when the view is built.
             # ensure_views is NOT called here.
@@ -251,6 +260,14 @@ class DB:
         ensure_dangling_parentmac_cleanup_trigger(self.sql)
         self.commitDB()
 
+        # Rebuild with the profile's page size if it changed: a full VACUUM,
+        # so only on request (best effort, skipped while other processes
+        # hold the DB). Then report what is in effect.
+        from helper import get_setting_value
+        if get_setting_value("PRAGMA_PAGE_SIZE_REBUILD", False):
+            apply_page_size(self.sql_connection, self.pragma_profile)
+        report_pragmas(self.sql_connection, self.pragma_profile)
+
     def get_table_as_json(self, sqlQuery, parameters=None):
         """
         Wrapper to use the central get_table_as_json helper.
@@ -363,15 +380,46 @@ def get_temp_db_connection():
     Should be used per-thread/request to avoid cross-thread issues.
     """
     conn = sqlite3.connect(fullDbPath, timeout=5, isolation_level=None)
-    conn.execute("PRAGMA journal_mode=WAL;")
-    conn.execute("PRAGMA busy_timeout=5000;")  # 5s wait before giving up
-    # Apply user-configured WAL size limit (default 50 MB in initialise.py)
-    try:
-        from helper import get_setting_value
-        wal_limit_mb = int(get_setting_value("PRAGMA_JOURNAL_SIZE_LIMIT", "50"))
-        wal_limit_bytes = wal_limit_mb * 1000000
-    except Exception:
-        wal_limit_bytes = 50000000  # 50 MB fallback
-    conn.execute(f"PRAGMA journal_size_limit={wal_limit_bytes};")
+    apply_pragmas(conn)
     conn.row_factory = sqlite3.Row
     return conn
+
+
+# Process-wide read-only pool, created lazily on first use
+_read_pool = None
+_read_pool_lock = threading.Lock()
+
+
+def get_read_db_connection():
+    """
+    Returns a pooled, read-only SQLite connection with Row factory.
+    The connection rejects writes (mode=ro + query_only) and is reused
+    across requests; calling close() hands it back to the pool.
+    Use get_temp_db_connection() for anything that modifies the database.
+    """
+    global _read_pool
+    if _read_pool is None:
+        with _read_pool_lock:
+            if _read_pool is None:
+                _read_pool = ReadConnectionPool(fullDbPath)
+    return _read_pool.acquire()
+
+
+# Process-wide single writer, started lazily on first submit
+_db_writer = None
+_db_writer_lock = threading.Lock()
+
+
+def get_db_writer():
+    """
+    Returns the process-wide DBWriter.
+    API handlers and model helpers submit their mutations here instead of
+    opening their own connection, so writes from the same process never
+    compete for the SQLite write lock and are group-committed.
+    """
+    global _db_writer
+    if _db_writer is None:
+        with _db_writer_lock:
+            if _db_writer is None:
+                _db_writer = DBWriter(get_temp_db_connection)
+    return _db_writer
@@ -294,10 +294,14 @@ def get_locked_field_overrides(devMac, updates_dict, conn):
 
 def lock_field(devMac, field_name, conn):
     """
-    Lock a field so it won't be overwritten by plugins.
+    Lock a field so it won't be overwritten by plugins. Runs in the caller's
+    transaction, the caller commits.
 
     Returns:
         dict: {"success": bool, "error": str|None}
+
+    Raises:
+        sqlite3.Error: if the update fails.
     """
     if field_name not in FIELD_SOURCE_MAP:
         msg = f"Field {field_name} does not support locking"
@@ -323,24 +327,24 @@ def lock_field(devMac, field_name, conn):
 
     try:
         cur.execute(sql, (devMac,))
-        conn.commit()
         mylog("debug", [f"[lock_field] Locked {field_name} for {devMac}"])
         return {"success": True, "error": None}
     except Exception as e:
+        # Propagate so the caller's write unit rolls back
         mylog("none", [f"[lock_field] ERROR: {e}"])
-        try:
-            conn.rollback()
-        except Exception:
-            pass
-        return {"success": False, "error": str(e)}
+        raise
 
 
 def unlock_field(devMac, field_name, conn):
     """
-    Unlock a field so plugins can overwrite it again.
+    Unlock a field so plugins can overwrite it again. Runs in the caller's
+    transaction, the caller commits.
 
     Returns:
         dict: {"success": bool, "error": str|None}
+
+    Raises:
+        sqlite3.Error: if the update fails.
     """
     if field_name not in FIELD_SOURCE_MAP:
         msg = f"Field {field_name} does not support unlocking"
@@ -366,21 +370,18 @@ def unlock_field(devMac, field_name, conn):
 
     try:
         cur.execute(sql, (devMac,))
-        conn.commit()
         mylog("debug", [f"[unlock_field] Unlocked {field_name} for {devMac}"])
         return {"success": True, "error": None}
     except Exception as e:
+        # Propagate so the caller's write unit rolls back
         mylog("none", [f"[unlock_field] ERROR: {e}"])
-        try:
-            conn.rollback()
-        except Exception:
-            pass
-        return {"success": False, "error": str(e)}
+        raise
 
 
 def unlock_fields(conn, mac=None, fields=None, clear_all=False):
     """
     Unlock or clear source fields for one device, multiple devices, or all devices.
+    Runs in the caller's transaction, the caller commits.
 
     Args:
         conn: Database connection object.
@@ -395,6 +396,9 @@ def unlock_fields(conn, mac=None, fields=None, clear_all=False):
             "devicesAffected": int,
             "fieldsAffected": list
         }
+
+    Raises:
+        sqlite3.Error: if the update fails.
     """
     target_fields = fields if fields else list(FIELD_SOURCE_MAP.keys())
     if not target_fields:
@@ -428,7 +432,6 @@ def unlock_fields(conn, mac=None, fields=None, clear_all=False):
             sql = f"UPDATE Devices SET {set_clause}"
             cur.execute(sql)
 
-        conn.commit()
         return {
             "success": True,
             "error": None,
@@ -437,15 +440,6 @@ def unlock_fields(conn, mac=None, fields=None, clear_all=False):
         }
 
     except Exception as e:
-        try:
-            conn.rollback()
-        except Exception:
-            pass
-        return {
-            "success": False,
-            "error": str(e),
-            "devicesAffected": 0,
-            "fieldsAffected": [],
-        }
-    finally:
-        conn.close()
+        # Propagate so the caller's write unit rolls back
+        mylog("none", [f"[unlock_fields] ERROR: {e}"])
+        raise
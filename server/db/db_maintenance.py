@@ -0,0 +1,143 @@
+"""
+db_maintenance.py — online database maintenance helpers.
+
+Used by the DB cleanup plugin (DBCLNP) instead of the old REINDEX / unbounded
+DELETE / full VACUUM sequence, which rewrote the whole file and blocked every
+reader and writer for the duration:
+
+  - ``delete_in_batches`` trims a table in rowid ranges, committing after each
+    range so the write lock is only ever held for a short transaction
+  - ``enable_incremental_vacuum`` switches the database to
+    ``auto_vacuum=INCREMENTAL`` (one-time VACUUM on databases created before)
+  - ``incremental_vacuum`` returns free pages to the file system in small
+    steps until a time budget runs out; leftovers are handled next run
+  - ``optimize`` refreshes planner statistics with ``PRAGMA optimize``
+"""
+
+import time
+
+from logger import mylog
+
+# Rows covered by one DELETE transaction (by rowid range)
+DELETE_BATCH_SIZE = 5000
+# Free pages released per incremental_vacuum step
+VACUUM_STEP_PAGES = 512
+# Rows sampled per index by ANALYZE / PRAGMA optimize
+ANALYSIS_LIMIT = 1000
+
+
+def delete_in_batches(conn, table, where, params=(), batch_size=DELETE_BATCH_SIZE):
+    """
+    Delete the rows of *table* matching *where*, one rowid range at a time.
+
+    Each range holds at most *batch_size* rows and is committed on its own:
+    on an autocommit connection (``isolation_level=None``, e.g.
+    ``get_temp_db_connection()``) every DELETE is its own transaction and the
+    ``commit()`` calls are no-ops, on a default connection they end the
+    implicit transaction. Rows inserted after the call started are never
+    touched.
+
+    Args:
+        conn: sqlite3 connection, autocommit or default isolation level.
+        table (str): table name.
+        where (str): SQL condition, may use ``?`` placeholders.
+        params (tuple): values for the placeholders in *where*.
+        batch_size (int): rows per range.
+
+    Returns:
+        int: number of deleted rows.
+    """
+    batch_size = max(int(batch_size), 1)
+    conn.commit()
+
+    min_rowid, max_rowid = conn.execute(f"SELECT MIN(rowid), MAX(rowid) FROM {table}").fetchone()
+    if max_rowid is None:
+        return 0
+
+    deleted = 0
+    last = min_rowid - 1
+    while last < max_rowid:
+        # Upper bound of the next range: the batch_size-th rowid after `last`
+        bound = conn.execute(
+            f"SELECT rowid FROM {table} WHERE rowid > ? ORDER BY rowid LIMIT 1 OFFSET ?",
+            (last, batch_size - 1),
+        ).fetchone()
+        upper = min(bound[0], max_rowid) if bound else max_rowid
+
+        cur = conn.execute(
+            f"DELETE FROM {table} WHERE rowid > ? AND rowid <= ? AND ({where})",
+            (last, upper) + tuple(params),
+        )
+        conn.commit()
+        deleted += max(cur.rowcount, 0)
+        last = upper
+
+    return deleted
+
+
+def enable_incremental_vacuum(conn):
+    """
+    Make sure the database uses ``auto_vacuum=INCREMENTAL``.
+
+    Databases created before the switch need one full VACUUM to convert;
+    that only happens once.
+
+    Returns:
+        bool: True if the database is (now) in incremental mode.
+    """
+    if conn.execute("PRAGMA auto_vacuum;").fetchone()[0] == 2:
+        return True
+
+    mylog("verbose", ["[Database] Converting to auto_vacuum=INCREMENTAL (one-time VACUUM)"])
+    conn.commit()
+    conn.execute("PRAGMA auto_vacuum=INCREMENTAL;")
+    conn.execute("VACUUM;")
+    return conn.execute("PRAGMA auto_vacuum;").fetchone()[0] == 2
+
+
+def incremental_vacuum(conn, budget_secs, step_pages=VACUUM_STEP_PAGES):
+    """
+    Release free pages in steps of *step_pages* until none are left or
+    *budget_secs* have passed. Each step is its own short transaction.
+
+    In WAL mode the file itself shrinks at the next checkpoint.
+
+    Returns:
+        int: number of pages released.
+    """
+    if budget_secs <= 0 or conn.execute("PRAGMA auto_vacuum;").fetchone()[0] != 2:
+        return 0
+
+    conn.commit()
+    start_free = conn.execute("PRAGMA freelist_count;").fetchone()[0]
+    free = start_free
+    deadline = time.monotonic() + budget_secs
+
+    while free > 0 and time.monotonic() < deadline:
+        # executescript steps the PRAGMA to completion; execute() would
+        # only release a single page
+        conn.executescript(f"PRAGMA incremental_vacuum({int(min(step_pages, free))});")
+        remaining = conn.execute("PRAGMA freelist_count;").fetchone()[0]
+        if remaining >= free:
+            break
+        free = remaining
+
+    return start_free - free
+
+
+def optimize(conn):
+    """
+    Refresh query-planner statistics without a blanket ANALYZE / REINDEX.
+
+    ``PRAGMA optimize`` only re-analyzes tables whose statistics drifted;
+    ANALYZE runs once when no statistics exist yet. ``analysis_limit`` keeps
+    both bounded on large tables.
+    """
+    conn.execute(f"PRAGMA analysis_limit={ANALYSIS_LIMIT};")
+    has_stats = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sqlite_stat1'"
+    ).fetchone()
+    if not has_stats:
+        conn.execute("ANALYZE;")
+    conn.execute("PRAGMA optimize=0x10002;")
+    conn.commit()
@@ -0,0 +1,338 @@
+"""
+db_partitions.py — optional monthly partitions for Events and Sessions.
+
+Events only grow; retention used to be a ``DELETE ... WHERE eveDateTime <=``
+that scans by datetime string and fragments the file. With partitioning
+enabled (``DBCLNP_PARTITION_MONTHS`` > 0) the DB cleanup plugin moves closed
+months out of the live tables into per-month tables:
+
+  - ``Events_pYYYYMM``   events of that month that are fully processed
+                         (alert sent, session paired on both ends)
+  - ``Sessions_pYYYYMM`` the sessions those events form, materialised once,
+                         because the live Sessions snapshot is rebuilt from
+                         the live Events table on every scan
+
+The live tables keep the recent, still changing rows, so scans, pairing and
+notifications are unaffected. Retention becomes a ``DROP TABLE`` per expired
+month, and period-bounded readers use ``partition_source`` to only union in
+the partitions that overlap their period. ``Events_All`` / ``Sessions_All``
+are UNION ALL views over live + archived rows for custom queries.
+
+Partitions are read and written with the live table's column list, never
+``SELECT *``, and ``sync_partition_columns`` adds columns that a schema
+migration added to the live table, so the unions keep lining up.
+"""
+
+import re
+
+from logger import mylog
+
+PARTITIONED_TABLES = ("Events", "Sessions")
+
+PARTITION_RE = re.compile(r"^(Events|Sessions)_p(\d{6})$")
+
+# Connection-type events that open a session
+CONNECTION_EVENTS = "('New Device', 'Connected', 'Down Reconnected')"
+
+SESSION_COLUMNS = (
+    "sesMac, sesIp, sesEventTypeConnection, sesDateTimeConnection, "
+    "sesEventTypeDisconnection, sesDateTimeDisconnection, sesStillConnected, sesAdditionalInfo"
+)
+
+# Same projection as the Convert_Events_to_Sessions view, limited to the
+# rowids selected for archiving
+_SESSIONS_OF_MOVED_EVENTS = f"""
+    SELECT EVE1.eveMac, EVE1.eveIp,
+           EVE1.eveEventType,
+           EVE1.eveDateTime,
+           CASE WHEN EVE2.eveEventType IN ('Disconnected', 'Device Down') OR
+                     EVE2.eveEventType IS NULL THEN EVE2.eveEventType ELSE '<missing event>' END,
+           CASE WHEN EVE2.eveEventType IN ('Disconnected', 'Device Down') THEN EVE2.eveDateTime ELSE NULL END,
+           CASE WHEN EVE2.eveEventType IS NULL THEN 1 ELSE 0 END,
+           EVE1.eveAdditionalInfo
+      FROM Events AS EVE1
+      LEFT JOIN Events AS EVE2 ON EVE1.evePairEventRowid = EVE2.rowid
+     WHERE EVE1.eveEventType IN {CONNECTION_EVENTS}
+       AND EVE1.rowid IN (SELECT rid FROM temp.partition_move)
+    UNION
+    SELECT eveMac, eveIp, '<missing event>', NULL, eveEventType, eveDateTime, 0, eveAdditionalInfo
+      FROM Events
+     WHERE eveEventType IN ('Device Down', 'Disconnected')
+       AND evePairEventRowid IS NULL
+       AND rowid IN (SELECT rid FROM temp.partition_move)
+"""
+
+
+def list_partitions(conn, table):
+    """Return ``[(month, name), ...]`` of the archived partitions of *table*, oldest first."""
+    rows = conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND name GLOB ?",
+        (f"{table}_p[0-9][0-9][0-9][0-9][0-9][0-9]",),
+    ).fetchall()
+    parts = []
+    for (name,) in rows:
+        m = PARTITION_RE.match(name)
+        if m and m.group(1) == table:
+            parts.append((m.group(2), name))
+    return sorted(parts)
+
+
+def partition_source(conn, table, since=None, params=()):
+    """
+    FROM-clause source for a period-bounded read of *table*.
+
+    Returns the plain table name when there are no partitions, so callers pay
+    nothing unless partitioning is in use. Otherwise returns a UNION ALL
+    sub-select of the live table and every partition whose month is not
+    older than *since*. Sessions are archived by connection month, so an
+    older Sessions partition is included too when one of its sessions was
+    disconnected within the period.
+
+    Args:
+        conn: sqlite3 connection used to list partitions.
+        table (str): "Events" or "Sessions".
+        since (str): SQLite date expression for the start of the period
+            (e.g. ``date('now', '-7 day')`` or ``Date(?)``). None = all.
+        params (tuple): parameters for placeholders in *since*.
+    """
+    parts = list_partitions(conn, table)
+    if not parts:
+        return table
+
+    if since is not None:
+        first_month = conn.execute(f"SELECT strftime('%Y%m', {since})", tuple(params)).fetchone()[0]
+        if first_month:
+            parts = [
+                (month, name) for month, name in parts
+                if month >= first_month or (table == "Sessions" and _ends_since(conn, name, since, params))
+            ]
+
+    if not parts:
+        return table
+
+    return "(" + _union(conn, table, [name for _, name in parts]) + ")"
+
+
+def _columns(conn, name):
+    """Column names of table *name*, in declaration order."""
+    return [row[1] for row in conn.execute(f'PRAGMA table_info("{name}")').fetchall()]
+
+
+def _union(conn, table, names):
+    """UNION ALL of *table* and the partitions *names*, projected on the live table's columns."""
+    # "*" only while the live table does not exist yet (views built before the schema)
+    cols = ", ".join(f'"{col}"' for col in _columns(conn, table)) or "*"
+    return " UNION ALL ".join([f"SELECT {cols} FROM {table}"] + [f'SELECT {cols} FROM "{name}"' for name in names])
+
+
+def _ends_since(conn, name, since, params):
+    """True if the Sessions partition *name* holds a session disconnected in the period."""
+    return conn.execute(
+        f'SELECT 1 FROM "{name}" WHERE sesDateTimeDisconnection >= {since} LIMIT 1', tuple(params)
+    ).fetchone() is not None
+
+
+def _create_partition(conn, table, month):
+    """Create ``<table>_p<month>`` with the live table's column definitions, or bring an existing one up to date."""
+    name = f"{table}_p{month}"
+    ddl = conn.execute(
+        "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)
+    ).fetchone()[0]
+    ddl = re.sub(
+        rf'^CREATE TABLE\s+(?:IF NOT EXISTS\s+)?["`\[]?{table}["`\]]?',
+        f'CREATE TABLE IF NOT EXISTS "{name}"',
+        ddl,
+        count=1,
+    )
+    conn.execute(ddl)
+    _add_missing_columns(conn, table, name)
+    if table == "Events":
+        conn.execute(f'CREATE INDEX IF NOT EXISTS "idx_{name}_mac_date" ON "{name}" (eveMac, eveDateTime)')
+        # Notification queries read Events_Devices by pending flag, never set on archived rows
+        conn.execute(f'CREATE INDEX IF NOT EXISTS "idx_{name}_pending" ON "{name}" (evePendingAlertEmail)')
+    else:
+        conn.execute(f'CREATE INDEX IF NOT EXISTS "idx_{name}_mac_date" ON "{name}" (sesMac, sesDateTimeConnection)')
+        conn.execute(f'CREATE INDEX IF NOT EXISTS "idx_{name}_disconnection" ON "{name}" (sesDateTimeDisconnection)')
+    return name
+
+
+def archive_partitions(conn, hot_months):
+    """
+    Move closed Events (and the sessions they form) older than the last
+    *hot_months* calendar months into monthly partitions.
+
+    An event is moved once its alert was processed and, for session events,
+    both ends of its pair are older than the boundary; still-open sessions
+    stay in the live table however old they are. Safe to call repeatedly:
+    rows that become eligible later are appended to existing partitions.
+
+    Returns:
+        dict: ``{"events": moved_events, "sessions": archived_sessions}``
+    """
+    hot_months = max(int(hot_months), 1)
+    conn.commit()
+
+    # One transaction: a failure part-way must neither leave events both
+    # archived and live (archived again on the next run) nor an empty Sessions
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        result = _archive(conn, hot_months)
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+
+    if result["events"]:
+        mylog("verbose", [f"[Partitions] Archived {result['events']} events / {result['sessions']} sessions into {result['months']} month(s)"])
+    return {"events": result["events"], "sessions": result["sessions"]}
+
+
+def _archive(conn, hot_months):
+    conn.execute("DROP TABLE IF EXISTS temp.partition_move")
+    conn.execute(
+        f"""CREATE TEMP TABLE partition_move AS
+            SELECT E.rowid AS rid, strftime('%Y%m', E.eveDateTime) AS month
+              FROM Events AS E
+              LEFT JOIN Events AS P ON P.rowid = E.evePairEventRowid
+             WHERE E.eveDateTime < date('now', 'start of month', ?)
+               AND E.evePendingAlertEmail = 0
+               AND (
+                    -- unpaired non-session events and orphan disconnections
+                    (E.evePairEventRowid IS NULL AND E.eveEventType NOT IN {CONNECTION_EVENTS})
+                    -- pair already removed by retention
+                 OR (E.evePairEventRowid IS NOT NULL AND P.rowid IS NULL)
+                    -- both ends closed and old enough
+                 OR (P.eveDateTime < date('now', 'start of month', ?) AND P.evePendingAlertEmail = 0)
+               )""",
+        (f"-{hot_months - 1} month", f"-{hot_months - 1} month"),
+    )
+    conn.execute("CREATE INDEX temp.idx_partition_move ON partition_move (rid)")
+
+    months = [r[0] for r in conn.execute("SELECT DISTINCT month FROM temp.partition_move WHERE month IS NOT NULL")]
+    if not months:
+        conn.execute("DROP TABLE temp.partition_move")
+        return {"events": 0, "sessions": 0, "months": 0}
+
+    # Sessions first: they are computed from the rows about to be moved
+    conn.execute("DROP TABLE IF EXISTS temp.partition_sessions")
+    conn.execute(
+        """CREATE TEMP TABLE partition_sessions (
+               sesMac, sesIp, sesEventTypeConnection, sesDateTimeConnection,
+               sesEventTypeDisconnection, sesDateTimeDisconnection, sesStillConnected, sesAdditionalInfo
+           )"""
+    )
+    conn.execute(f"INSERT INTO temp.partition_sessions {_SESSIONS_OF_MOVED_EVENTS}")
+
+    moved_events = 0
+    archived_sessions = 0
+    session_month = "strftime('%Y%m', IFNULL(sesDateTimeConnection, sesDateTimeDisconnection))"
+    session_months = [r[0] for r in conn.execute(f"SELECT DISTINCT {session_month} FROM temp.partition_sessions") if r[0]]
+
+    for month in sorted(set(months) | set(session_months)):
+        if month in months:
+            name = _create_partition(conn, "Events", month)
+            cols = ", ".join(f'"{col}"' for col in _columns(conn, "Events"))
+            cur = conn.execute(
+                f'INSERT INTO "{name}" ({cols}) SELECT {cols} FROM Events WHERE rowid IN (SELECT rid FROM temp.partition_move WHERE month = ?)',
+                (month,),
+            )
+            moved_events += cur.rowcount
+        if month in session_months:
+            name = _create_partition(conn, "Sessions", month)
+            cur = conn.execute(
+                f'INSERT INTO "{name}" ({SESSION_COLUMNS}) SELECT {SESSION_COLUMNS} FROM temp.partition_sessions WHERE {session_month} = ?',
+                (month,),
+            )
+            archived_sessions += cur.rowcount
+
+    conn.execute("DELETE FROM Events WHERE rowid IN (SELECT rid FROM temp.partition_move)")
+    # Rebuild the live snapshot right away so archived sessions are not
+    # counted twice until the next scan does it
+    conn.execute("DELETE FROM Sessions")
+    conn.execute("INSERT INTO Sessions SELECT * FROM Convert_Events_to_Sessions")
+
+    conn.execute("DROP TABLE temp.partition_move")
+    conn.execute("DROP TABLE temp.partition_sessions")
+    create_partition_views(conn)
+
+    return {"events": moved_events, "sessions": archived_sessions, "months": len(months)}
+
+
+def drop_expired_partitions(conn, days):
+    """
+    Apply retention to archived partitions: DROP months that ended before
+    the cutoff, trim the single month the cutoff falls into. Runs in the
+    caller's transaction, the caller commits.
+
+    Returns:
+        int: number of dropped partition tables.
+    """
+    cutoff_month = conn.execute("SELECT strftime('%Y%m', date('now', ?))", (f"-{int(days)} day",)).fetchone()[0]
+    dropped = 0
+
+    for table, date_col in (("Events", "eveDateTime"), ("Sessions", "IFNULL(sesDateTimeConnection, sesDateTimeDisconnection)")):
+        for month, name in list_partitions(conn, table):
+            if month < cutoff_month:
+                conn.execute(f'DROP TABLE "{name}"')
+                dropped += 1
+            elif month == cutoff_month:
+                conn.execute(f'DELETE FROM "{name}" WHERE {date_col} <= date(\'now\', ?)', (f"-{int(days)} day",))
+
+    if dropped:
+        create_partition_views(conn)
+        mylog("verbose", [f"[Partitions] Dropped {dropped} expired partition(s)"])
+    return dropped
+
+
+def delete_from_partitions(conn, table, where="1 = 1", params=()):
+    """Run ``DELETE FROM <partition> WHERE <where>`` on every archived partition of *table*."""
+    deleted = 0
+    for _, name in list_partitions(conn, table):
+        cur = conn.execute(f'DELETE FROM "{name}" WHERE {where}', tuple(params))
+        deleted += max(cur.rowcount, 0)
+    return deleted
+
+
+def sync_partition_columns(conn):
+    """
+    Add to every archived partition the columns its live table gained since
+    the partition was created. Called from the schema migration; runs in the
+    caller's transaction.
+
+    Returns:
+        int: number of added columns.
+    """
+    added = 0
+    for table in PARTITIONED_TABLES:
+        for _, name in list_partitions(conn, table):
+            added += _add_missing_columns(conn, table, name)
+    if added:
+        mylog("verbose", [f"[Partitions] Added {added} missing column(s) to archived partitions"])
+    return added
+
+
+def _add_missing_columns(conn, table, name):
+    have = set(_columns(conn, name))
+    added = 0
+    for _, col, col_type, _, default, _ in conn.execute(f'PRAGMA table_info("{table}")').fetchall():
+        if col in have:
+            continue
+        # NOT NULL / PRIMARY KEY are left out, ADD COLUMN cannot fill existing rows for them
+        definition = f'"{col}" {col_type}' + (f" DEFAULT {default}" if default is not None else "")
+        conn.execute(f'ALTER TABLE "{name}" ADD COLUMN {definition}')
+        added += 1
+    return added
+
+
+def create_partition_views(conn):
+    """(Re)create the ``Events_All`` / ``Sessions_All`` UNION ALL views. Runs in the caller's transaction."""
+    for table in PARTITIONED_TABLES:
+        union = _union(conn, table, [name for _, name in list_partitions(conn, table)])
+        conn.execute(f"DROP VIEW IF EXISTS {table}_All")
+        conn.execute(f"CREATE VIEW {table}_All AS {union}")
+
+
+def refresh_partition_views(conn):
+    """(Re)create the ``Events_All`` / ``Sessions_All`` UNION ALL views and commit."""
+    create_partition_views(conn)
+    conn.commit()
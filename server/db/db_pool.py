@@ -0,0 +1,183 @@
+"""
+db_pool.py — bounded pool of read-only SQLite connections.
+
+API handlers and model helpers (DeviceInstance, EventInstance, ...) used to
+open a brand-new connection for every query, re-running the WAL / busy_timeout
+PRAGMAs each time. The pool keeps a small number of connections open instead:
+
+  - connections are opened with the ``mode=ro`` URI and ``PRAGMA query_only``,
+    so a pooled connection can never take a write lock
+  - a thread that already holds a pooled connection gets the same one back
+    (nested helpers share a connection instead of opening a second one)
+  - released connections are parked and reused by the next request
+  - the pool is bounded; callers block until a connection is free
+
+Leased connections are wrapped so existing ``conn.close()`` calls return the
+connection to the pool instead of closing it.
+"""
+
+import sqlite3
+import threading
+
+from logger import mylog
+from db.db_pragmas import apply_pragmas
+
+# Maximum number of simultaneously open read connections per process
+READ_POOL_SIZE = 8
+# Seconds a caller waits for a free connection before giving up
+READ_POOL_TIMEOUT = 10
+# Prepared statements cached per connection (sqlite3 default is 128)
+READ_POOL_CACHED_STATEMENTS = 256
+
+
+class PooledConnection:
+    """Thin proxy around a pooled sqlite3 connection.
+
+    Everything except ``close()`` is forwarded to the real connection.
+    ``close()`` releases the lease back to the pool.
+    """
+
+    def __init__(self, pool, conn, owner):
+        self._pool = pool
+        self._conn = conn
+        self._owner = owner
+        self._released = False
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def __del__(self):
+        # Safety net for callers that bail out on an exception before close()
+        if not self._released:
+            self.close()
+
+    def close(self):
+        if self._released:
+            return
+        self._released = True
+        self._pool.release(self._conn, self._owner)
+
+
+class ReadConnectionPool:
+    """Bounded, thread-aware pool of read-only SQLite connections."""
+
+    def __init__(self, db_path, size=READ_POOL_SIZE, timeout=READ_POOL_TIMEOUT):
+        self.db_path = db_path
+        self.size = size
+        self.timeout = timeout
+        self._idle = []
+        self._open = 0
+        # thread ident -> [connection, lease depth]
+        self._held = {}
+        self._cond = threading.Condition()
+
+    # -- connection lifecycle -------------------------------------------------
+    def _connect(self):
+        conn = sqlite3.connect(
+            f"file:{self.db_path}?mode=ro",
+            uri=True,
+            timeout=5,
+            isolation_level=None,
+            check_same_thread=False,
+            cached_statements=READ_POOL_CACHED_STATEMENTS,
+        )
+        # cache_size / mmap_size from the active PRAGMA_PROFILE
+        apply_pragmas(conn, read_only=True)
+        # Belt and braces: reject any write even if the URI mode is ignored
+        conn.execute("PRAGMA query_only=1;")
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _reclaim_dead_leases(self):
+        """Return connections still held by threads that have exited."""
+        alive = {t.ident for t in threading.enumerate()}
+        for ident in [i for i in self._held if i not in alive]:
+            conn, _ = self._held.pop(ident)
+            self._idle.append(conn)
+
+    def acquire(self):
+        """Lease a read-only connection for the calling thread.
+
+        Returns:
+            PooledConnection: call ``close()`` (or use as a context manager)
+            to hand the connection back.
+
+        Raises:
+            TimeoutError: if no connection becomes free within ``timeout``.
+        """
+        ident = threading.get_ident()
+        with self._cond:
+            entry = self._held.get(ident)
+            if entry is not None:
+                entry[1] += 1
+                return PooledConnection(self, entry[0], ident)
+
+            if not self._idle and self._open >= self.size:
+                self._reclaim_dead_leases()
+            while not self._idle and self._open >= self.size:
+                if not self._cond.wait(self.timeout):
+                    raise TimeoutError("[Database] read pool exhausted")
+
+            if self._idle:
+                conn = self._idle.pop()
+                self._held[ident] = [conn, 1]
+                return PooledConnection(self, conn, ident)
+            self._open += 1
+
+        try:
+            conn = self._connect()
+        except Exception:
+            with self._cond:
+                self._open -= 1
+                self._cond.notify()
+            raise
+
+        with self._cond:
+            self._held[ident] = [conn, 1]
+        return PooledConnection(self, conn, ident)
+
+    def release(self, conn, owner):
+        """Return a leased connection; called by ``PooledConnection.close``."""
+        with self._cond:
+            entry = self._held.get(owner)
+            if entry is None or entry[0] is not conn:
+                return
+            entry[1] -= 1
+            if entry[1] > 0:
+                return
+            del self._held[owner]
+
+        # Never park a connection with an open read transaction
+        if conn.in_transaction:
+            try:
+                conn.rollback()
+            except sqlite3.Error:
+                pass
+
+        with self._cond:
+            self._idle.append(conn)
+            self._cond.notify()
+
+    def close_all(self):
+        """Close idle connections (e.g. after the DB file was replaced)."""
+        with self._cond:
+            idle, self._idle = self._idle, []
+            self._open -= len(idle)
+            self._cond.notify_all()
+        for conn in idle:
+            try:
+                conn.close()
+            except sqlite3.Error as e:
+                mylog("debug", ["[Database] read pool close error: ", e])
+
+    def stats(self):
+        """Return pool occupancy, e.g. for debug logging."""
+        with self._cond:
+            return {"size": self.size, "open": self._open, "idle": len(self._idle), "leased": len(self._held)}
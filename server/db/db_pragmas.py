@@ -0,0 +1,222 @@
+"""
+db_pragmas.py — SQLite performance profiles applied to every connection.
+
+All connections the app opens (the main-loop ``DB``, ``get_temp_db_connection``,
+the read pool and therefore every plugin subprocess) go through
+``apply_pragmas`` so they share one tuned configuration instead of each call
+site setting its own subset of PRAGMAs. ``apply_pragmas`` only sets the cheap
+per-connection PRAGMAs; the ones stored in or tied to the database file
+(page size, auto_vacuum, WAL, journal size limit) are set once by
+``apply_database_pragmas`` from ``DB.initDB``.
+
+The profile is chosen with the ``PRAGMA_PROFILE`` setting:
+
+  low_memory   — SQLite defaults, no memory mapping (SD-card NAS, Pi Zero)
+  balanced     — modest page cache + 64 MB mmap (default)
+  performance  — large page cache + 256 MB mmap, bigger pages, fewer checkpoints
+
+``page_size`` only takes effect when the database is created or rebuilt with
+VACUUM; ``apply_page_size`` handles the WAL dance needed for the latter. The
+rebuild rewrites the whole file, so ``DB.initDB`` only runs it when
+``PRAGMA_PAGE_SIZE_REBUILD`` is enabled.
+"""
+
+import sqlite3
+
+from logger import mylog
+
+PRAGMA_PROFILES = {
+    "low_memory": {
+        "mmap_size": 0,
+        "cache_size": -2000,          # KiB (negative) -> 2 MB
+        "page_size": 4096,
+        "wal_autocheckpoint": 1000,   # pages
+    },
+    "balanced": {
+        "mmap_size": 64 * 1024 * 1024,
+        "cache_size": -16000,
+        "page_size": 4096,
+        "wal_autocheckpoint": 1000,
+    },
+    "performance": {
+        "mmap_size": 256 * 1024 * 1024,
+        "cache_size": -64000,
+        "page_size": 8192,
+        "wal_autocheckpoint": 4000,
+    },
+}
+
+DEFAULT_PRAGMA_PROFILE = "balanced"
+
+# PRAGMAs included in the startup report
+REPORTED_PRAGMAS = [
+    "journal_mode",
+    "synchronous",
+    "temp_store",
+    "page_size",
+    "cache_size",
+    "mmap_size",
+    "wal_autocheckpoint",
+    "journal_size_limit",
+    "auto_vacuum",
+    "busy_timeout",
+]
+
+
+# PRAGMA_PROFILE as read by the first connection of this process
+_profile_setting = None
+
+
+def _setting(key, default):
+    try:
+        from helper import get_setting_value
+        return get_setting_value(key, default)
+    except Exception:
+        return default
+
+
+def get_pragma_profile(name=None):
+    """
+    Return ``(profile_name, pragmas)`` for *name* or the PRAGMA_PROFILE setting.
+
+    The setting is read once per process (it needs a restart anyway), so
+    opening a connection does not look it up again.
+    """
+    global _profile_setting
+    if name is None:
+        if _profile_setting is None:
+            _profile_setting = _setting("PRAGMA_PROFILE", DEFAULT_PRAGMA_PROFILE)
+        name = _profile_setting
+
+    if name not in PRAGMA_PROFILES:
+        mylog("verbose", [f"[Database] Unknown PRAGMA_PROFILE '{name}', using '{DEFAULT_PRAGMA_PROFILE}'"])
+        name = DEFAULT_PRAGMA_PROFILE
+
+    return name, PRAGMA_PROFILES[name]
+
+
+def get_journal_size_limit():
+    """WAL size limit in bytes from PRAGMA_JOURNAL_SIZE_LIMIT (MB, default 50)."""
+    try:
+        return int(_setting("PRAGMA_JOURNAL_SIZE_LIMIT", "50")) * 1000000
+    except (TypeError, ValueError):
+        return 50000000  # 50 MB fallback
+
+
+def apply_database_pragmas(conn, profile=None):
+    """
+    Apply the PRAGMAs tied to the database file, once at startup.
+
+    Must run outside a transaction on the writable main connection, which
+    also does the WAL checkpoints.
+
+    Returns:
+        str: the name of the profile that was applied.
+    """
+    name, pragmas = get_pragma_profile(profile)
+
+    # page_size is a no-op on an existing DB; on a brand new file it must
+    # be set before the first table is created (and before WAL is enabled)
+    conn.execute(f"PRAGMA page_size={int(pragmas['page_size'])};")
+    # Same for auto_vacuum: new databases start in incremental mode so the
+    # DB cleanup plugin can shrink them without a full VACUUM
+    conn.execute("PRAGMA auto_vacuum=INCREMENTAL;")
+    # The WAL journaling mode uses a write-ahead log instead of a
+    # rollback journal to implement transactions. Persistent in the file.
+    conn.execute("PRAGMA journal_mode=WAL;")
+    # WAL size limit: auto-checkpoint when WAL approaches this size,
+    # even if other connections are active.
+    conn.execute(f"PRAGMA journal_size_limit={get_journal_size_limit()};")
+    conn.execute(f"PRAGMA wal_autocheckpoint={int(pragmas['wal_autocheckpoint'])};")
+
+    return name
+
+
+def apply_pragmas(conn, read_only=False, long_lived=False, profile=None):
+    """
+    Apply the per-connection part of the active performance profile.
+
+    Args:
+        conn: sqlite3 connection.
+        read_only (bool): skip PRAGMAs that only matter for writes.
+        long_lived (bool): also run ``PRAGMA optimize=0x10002`` as SQLite
+            recommends for connections that stay open for hours.
+        profile (str): force a profile instead of reading the setting.
+
+    Returns:
+        str: the name of the profile that was applied.
+    """
+    name, pragmas = get_pragma_profile(profile)
+
+    if not read_only:
+        # When synchronous is NORMAL (1), the SQLite database engine will
+        # still sync at the most critical moments, but less often than in FULL mode.
+        conn.execute("PRAGMA synchronous=NORMAL;")
+
+    # Temporary tables and indices are kept in memory
+    conn.execute("PRAGMA temp_store=MEMORY;")
+    conn.execute("PRAGMA busy_timeout=5000;")  # 5s wait before giving up
+    conn.execute(f"PRAGMA cache_size={int(pragmas['cache_size'])};")
+    conn.execute(f"PRAGMA mmap_size={int(pragmas['mmap_size'])};")
+
+    if long_lived:
+        try:
+            conn.execute("PRAGMA optimize=0x10002;")
+        except Exception as e:
+            mylog("debug", ["[Database] PRAGMA optimize on open failed: ", e])
+
+    return name
+
+
+def get_effective_pragmas(conn):
+    """Read back the effective value of every reported PRAGMA."""
+    effective = {}
+    for pragma in REPORTED_PRAGMAS:
+        try:
+            row = conn.execute(f"PRAGMA {pragma};").fetchone()
+            effective[pragma] = row[0] if row else None
+        except Exception:
+            effective[pragma] = None
+    return effective
+
+
+def report_pragmas(conn, profile_name):
+    """Log the effective PRAGMAs once at startup."""
+    effective = get_effective_pragmas(conn)
+    wanted = PRAGMA_PROFILES[profile_name]["page_size"]
+    summary = ", ".join(f"{k}={v}" for k, v in effective.items())
+    mylog("verbose", [f"[Database] PRAGMA profile '{profile_name}': {summary}"])
+    if effective.get("page_size") != wanted:
+        mylog("verbose", [f"[Database] page_size {effective.get('page_size')} differs from profile ({wanted}); PRAGMA_PAGE_SIZE_REBUILD rebuilds it on a restart"])
+    return effective
+
+
+def apply_page_size(conn, profile=None):
+    """
+    Rebuild the database with the profile's page size if it differs.
+
+    A WAL database cannot change page size, so the journal is switched to
+    DELETE for the VACUUM and back to WAL afterwards. Must run outside a
+    transaction on a writable connection. Returns True if a rebuild ran.
+    """
+    _, pragmas = get_pragma_profile(profile)
+    wanted = int(pragmas["page_size"])
+    current = conn.execute("PRAGMA page_size;").fetchone()[0]
+    if current == wanted:
+        return False
+
+    mylog("verbose", [f"[Database] Rebuilding DB: page_size {current} -> {wanted}"])
+    try:
+        # Fails while other processes hold the DB open in WAL mode
+        mode = conn.execute("PRAGMA journal_mode=DELETE;").fetchone()[0]
+        if str(mode).lower() != "delete":
+            mylog("verbose", ["[Database] page_size rebuild skipped: database is in use"])
+            return False
+        conn.execute(f"PRAGMA page_size={wanted};")
+        conn.execute("VACUUM;")
+    except sqlite3.Error as e:
+        mylog("verbose", ["[Database] page_size rebuild skipped: ", e])
+        return False
+    finally:
+        conn.execute("PRAGMA journal_mode=WAL;")
+    return True
@@ -3,6 +3,7 @@ from zoneinfo import ZoneInfo
 import datetime as dt
 from logger import mylog  # noqa: E402 [flake8 lint suppression]
 from messaging.in_app import write_notification  # noqa: E402 [flake8 lint suppression]
+from db.db_partitions import create_partition_views  # noqa: E402 [flake8 lint suppression]
 
 
 # Define the expected Devices table columns (hardcoded base schema) [v26.1/2.XX]
@@ -221,10 +222,13 @@ def ensure_views(sql) -> bool:
     Parameters:
     - sql: database cursor or connection wrapper (must support execute() and fetchall()).
     """
+    # Events_All / Sessions_All: live rows plus archived partitions
+    create_partition_views(sql)
+
     sql.execute(""" DROP VIEW IF EXISTS Events_Devices;""")
     sql.execute(""" CREATE VIEW Events_Devices AS
                             SELECT *
-                            FROM Events
+                            FROM Events_All
                             LEFT JOIN Devices ON eveMac = devMac;
                           """)
 
@@ -247,7 +251,7 @@ def ensure_views(sql) -> bool:
 
     sql.execute(""" DROP VIEW IF EXISTS Sessions_Devices;""")
     sql.execute(
-        """CREATE VIEW Sessions_Devices AS SELECT * FROM Sessions LEFT JOIN "Devices" ON sesMac = devMac;"""
+        """CREATE VIEW Sessions_Devices AS SELECT * FROM Sessions_All LEFT JOIN "Devices" ON sesMac = devMac;"""
     )
 
     # handling the Convert_Events_to_Sessions / Sessions screens
@@ -579,6 +583,31 @@ def ensure_CurrentScan(sql) -> bool:
     return True
 
 
+def ensure_SyncNodes(sql) -> bool:
+    """
+    Ensures the SyncNodes table exists. It keeps, per node pulled by a SYNC
+    hub, the last mirrored version (watermark) and pull latency statistics.
+
+    Parameters:
+    - sql: database cursor or connection wrapper (must support execute() and fetchall()).
+    """
+    sql.execute(""" CREATE TABLE IF NOT EXISTS SyncNodes (
+                                syncNodeUrl TEXT PRIMARY KEY,
+                                syncNodeName TEXT,
+                                syncWatermark INTEGER,
+                                syncLastSuccess TEXT,
+                                syncLastAttempt TEXT,
+                                syncLastError TEXT,
+                                syncLatencyLastMs REAL,
+                                syncLatencyP50Ms REAL,
+                                syncLatencyP95Ms REAL,
+                                syncLatencySamples TEXT
+                            );
+                        """)
+
+    return True
+
+
 def ensure_Parameters(sql) -> bool:
     """
     Ensures required Parameters table exist.
@@ -903,7 +932,8 @@ def migrate_to_camelcase(sql) -> bool:
     # Drop views first — ALTER TABLE RENAME COLUMN will fail if a view
     # references the old column name and the view SQL cannot be rewritten.
     for view_name in ("Events_Devices", "LatestEventsPerMAC", "Sessions_Devices",
-                      "Convert_Events_to_Sessions", "LatestDeviceScan", "DevicesView"):
+                      "Convert_Events_to_Sessions", "LatestDeviceScan", "DevicesView",
+                      "Events_All", "Sessions_All"):
         sql.execute(f"DROP VIEW IF EXISTS {view_name};")
 
     renamed_count = 0
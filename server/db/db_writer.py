@@ -0,0 +1,248 @@
+"""
+db_writer.py — single-writer queue with group commit.
+
+The API server, model helpers and the main loop all used to open their own
+connection for every mutation, competing for SQLite's write lock and hitting
+``database is locked`` once the 5 s busy timeout ran out. Inside a process,
+``DBWriter`` funnels those mutations through one dedicated thread that owns
+the only writing connection:
+
+  - callers ``submit()`` a statement (or a unit of work) and wait for its
+    result on a ``concurrent.futures.Future``
+  - the writer drains everything queued within a short window and applies
+    it in ONE transaction (group commit), so 50 small writes cost one fsync
+  - every unit runs inside its own SAVEPOINT: a failing unit is rolled back
+    on its own and its exception is delivered to its caller, the rest of the
+    batch still commits
+  - queue wait, batch size and commit time are tracked so stalls show up in
+    the logs instead of as mysterious slowness
+
+Plugin subprocesses run in their own interpreter and are not routed through
+this queue.
+"""
+
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+
+from logger import mylog
+
+# Max number of queued units applied in a single transaction
+WRITER_MAX_BATCH = 200
+# Seconds the writer keeps collecting units after the first one arrives
+WRITER_BATCH_WINDOW = 0.005
+# Seconds a caller waits for its write before giving up
+WRITER_SUBMIT_TIMEOUT = 30
+# Log a warning when a unit waited longer than this (seconds) in the queue
+WRITER_SLOW_WAIT = 1.0
+
+
+class WriteResult:
+    """Outcome of a single queued statement."""
+
+    __slots__ = ("rowcount", "lastrowid")
+
+    def __init__(self, rowcount, lastrowid):
+        self.rowcount = rowcount
+        self.lastrowid = lastrowid
+
+
+class _WriteUnit:
+    __slots__ = ("fn", "future", "queued_at")
+
+    def __init__(self, fn):
+        self.fn = fn
+        self.future = Future()
+        self.queued_at = time.monotonic()
+
+
+class DBWriter:
+    """Dedicated writer thread applying queued mutations with group commit."""
+
+    def __init__(self, connect, max_batch=WRITER_MAX_BATCH, batch_window=WRITER_BATCH_WINDOW):
+        """
+        Args:
+            connect: zero-argument callable returning a new sqlite3 connection.
+                     It is called once, from the writer thread.
+            max_batch: max units per transaction.
+            batch_window: seconds to keep collecting units for a batch.
+        """
+        self._connect = connect
+        self.max_batch = max_batch
+        self.batch_window = batch_window
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._stats = {
+            "units": 0,
+            "failed": 0,
+            "batches": 0,
+            "max_batch": 0,
+            "max_wait_ms": 0.0,
+            "total_commit_ms": 0.0,
+        }
+
+    # -- lifecycle ------------------------------------------------------------
+    def start(self):
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout=5):
+        """Flush pending units and stop the writer thread."""
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+        if thread is not None:
+            self._queue.put(None)
+            thread.join(timeout)
+
+    # -- public API -----------------------------------------------------------
+    def submit(self, fn):
+        """Queue a unit of work ``fn(conn)``; returns a Future with its result.
+
+        ``fn`` must not commit or roll back: the writer owns the transaction.
+        Raise to discard everything the unit did.
+        """
+        if threading.current_thread() is self._thread:
+            raise RuntimeError("[DBWriter] nested submit from the writer thread would deadlock")
+        self.start()
+        unit = _WriteUnit(fn)
+        self._queue.put(unit)
+        return unit.future
+
+    def run(self, fn, timeout=WRITER_SUBMIT_TIMEOUT):
+        """Queue ``fn(conn)`` and block until it is committed; returns its result."""
+        return self.submit(fn).result(timeout=timeout)
+
+    def execute(self, query, params=(), timeout=WRITER_SUBMIT_TIMEOUT):
+        """Queue a single statement and wait for it to commit.
+
+        Returns:
+            WriteResult: rowcount / lastrowid of the statement.
+        """
+        def _unit(conn):
+            cur = conn.execute(query, params)
+            return WriteResult(cur.rowcount, cur.lastrowid)
+
+        return self.run(_unit, timeout=timeout)
+
+    def stats(self):
+        """Return a copy of the writer counters (for logs / diagnostics)."""
+        with self._lock:
+            snapshot = dict(self._stats)
+        snapshot["queued"] = self._queue.qsize()
+        batches = snapshot["batches"] or 1
+        snapshot["avg_batch"] = round(snapshot["units"] / batches, 2)
+        snapshot["avg_commit_ms"] = round(snapshot["total_commit_ms"] / batches, 2)
+        return snapshot
+
+    # -- writer thread --------------------------------------------------------
+    def _collect(self, first):
+        batch = [first]
+        deadline = time.monotonic() + self.batch_window
+        stop = False
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                unit = self._queue.get(timeout=max(remaining, 0)) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if unit is None:
+                stop = True
+                break
+            batch.append(unit)
+        return batch, stop
+
+    def _apply(self, conn, batch):
+        started = time.monotonic()
+        max_wait = max(started - u.queued_at for u in batch)
+        results = []
+
+        try:
+            conn.execute("BEGIN IMMEDIATE;")
+        except sqlite3.Error as e:
+            for unit in batch:
+                unit.future.set_exception(e)
+            return
+
+        for unit in batch:
+            try:
+                conn.execute("SAVEPOINT unit;")
+                value = unit.fn(conn)
+                conn.execute("RELEASE SAVEPOINT unit;")
+                results.append((unit, True, value))
+            except Exception as e:
+                try:
+                    conn.execute("ROLLBACK TO SAVEPOINT unit;")
+                    conn.execute("RELEASE SAVEPOINT unit;")
+                except sqlite3.Error:
+                    pass
+                results.append((unit, False, e))
+
+        try:
+            conn.execute("COMMIT;")
+        except sqlite3.Error as e:
+            mylog("minimal", ["[DBWriter] Commit failed, batch discarded: ", e])
+            try:
+                conn.execute("ROLLBACK;")
+            except sqlite3.Error:
+                pass
+            for unit in batch:
+                unit.future.set_exception(e)
+            return
+
+        commit_ms = (time.monotonic() - started) * 1000
+        failed = 0
+        for unit, ok, value in results:
+            if ok:
+                unit.future.set_result(value)
+            else:
+                failed += 1
+                unit.future.set_exception(value)
+
+        with self._lock:
+            self._stats["units"] += len(batch)
+            self._stats["failed"] += failed
+            self._stats["batches"] += 1
+            self._stats["max_batch"] = max(self._stats["max_batch"], len(batch))
+            self._stats["max_wait_ms"] = max(self._stats["max_wait_ms"], max_wait * 1000)
+            self._stats["total_commit_ms"] += commit_ms
+
+        if max_wait > WRITER_SLOW_WAIT:
+            mylog("verbose", [f"[DBWriter] Slow write: waited {max_wait:.2f}s in queue, batch of {len(batch)} committed in {commit_ms:.1f}ms"])
+
+    def _run(self):
+        try:
+            conn = self._connect()
+            # The writer controls transactions explicitly
+            conn.isolation_level = None
+        except Exception as e:
+            mylog("minimal", ["[DBWriter] Could not open writer connection: ", e])
+            self._fail_pending(e)
+            return
+
+        try:
+            while True:
+                first = self._queue.get()
+                if first is None:
+                    break
+                batch, stop = self._collect(first)
+                self._apply(conn, batch)
+                if stop:
+                    break
+        finally:
+            conn.close()
+
+    def _fail_pending(self, exc):
+        while True:
+            try:
+                unit = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            if unit is not None:
+                unit.future.set_exception(exc)
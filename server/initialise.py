@@ -415,6 +415,42 @@ def importConfigs(pm, db, all_plugins):
         "[]",
         "General",
     )
+    conf.PRAGMA_PROFILE = ccd(
+        "PRAGMA_PROFILE",
+        "balanced",
+        c_d,
+        "SQLite performance profile",
+        '{"dataType":"string", "elements": [{"elementType" : "select", "elementOptions" : [] ,"transformers": []}]}',
+        "['low_memory', 'balanced', 'performance']",
+        "General",
+    )
+    conf.PRAGMA_PAGE_SIZE_REBUILD = ccd(
+        "PRAGMA_PAGE_SIZE_REBUILD",
+        False,
+        c_d,
+        "Rebuild DB for page size",
+        """{"dataType": "boolean","elements": [{"elementType": "input","elementOptions": [{ "type": "checkbox" }],"transformers": []}]}""",
+        "[]",
+        "General",
+    )
+    conf.PUBLISHER_RUNTIME = ccd(
+        "PUBLISHER_RUNTIME",
+        "in-process",
+        c_d,
+        "Publisher runtime",
+        '{"dataType":"string", "elements": [{"elementType" : "select", "elementOptions" : [] ,"transformers": []}]}',
+        "['in-process', 'subprocess']",
+        "General",
+    )
+    conf.PLUGINS_FORKSERVER = ccd(
+        "PLUGINS_FORKSERVER",
+        False,
+        c_d,
+        "Plugin fork-server",
+        """{"dataType": "boolean","elements": [{"elementType": "input","elementOptions": [{ "type": "checkbox" }],"transformers": []}]}""",
+        "[]",
+        "General",
+    )
     conf.REFRESH_FQDN = ccd(
         "REFRESH_FQDN",
         False,
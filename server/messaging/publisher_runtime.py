@@ -0,0 +1,165 @@
+"""
+In-process runtime for the notification publishers (_publisher_* plugins).
+
+Launched as subprocesses, every publisher re-imports the helper stack, opens
+the database and re-reads the settings just to send a message. With the
+in-process runtime (PUBLISHER_RUNTIME = in-process) each publisher script is
+imported once and its main() is called in a thread of the main process. All
+publishers of a notification run at the same time, each with its plugin's
+RUN_TIMEOUT. They write their last_result file exactly like the subprocess,
+so the results are processed by execute_plugin() as before.
+
+Set PUBLISHER_RUNTIME to subprocess to run every publisher in its own process
+again, e.g. to isolate a misbehaving one.
+"""
+
+import importlib.util
+import os
+import threading
+import time
+
+from logger import mylog
+from helper import get_setting_value
+from utils.plugin_utils import get_plugin_setting_obj, resolve_app_paths
+
+# Publishers whose script only keeps state within main(). MQTT keeps module
+# level state per run and always runs as a subprocess.
+IN_PROCESS_PUBLISHERS = {"APPRISE", "NTFY", "PUSHOVER", "PUSHSAFER", "SMTP", "TELEGRAM", "WEBHOOK"}
+
+# Extra attempts when main() raises, and the delay before the first of them
+PUBLISHER_RETRIES = 2
+PUBLISHER_RETRY_DELAY = 1
+
+DEFAULT_TIMEOUT = 10
+
+
+# -------------------------------------------------------------------------------
+def publisher_script(plugin):
+    """Path of the Python script run by the plugin's CMD, or None if it is not a plain `python3 <script>.py`."""
+    cmd = get_plugin_setting_obj(plugin, "CMD")
+    if cmd is None:
+        return None
+
+    parts = resolve_app_paths(str(cmd["value"])).split()
+    if len(parts) != 2 or not os.path.basename(parts[0]).startswith("python") or not parts[1].endswith(".py"):
+        return None
+    return parts[1]
+
+
+def publisher_timeout(plugin):
+    setting = get_plugin_setting_obj(plugin, "RUN_TIMEOUT")
+    try:
+        return int(setting["value"])
+    except (TypeError, ValueError, KeyError):
+        return DEFAULT_TIMEOUT
+
+
+# -------------------------------------------------------------------------------
+class PublisherRuntime:
+    def __init__(self, retries=PUBLISHER_RETRIES, retry_delay=PUBLISHER_RETRY_DELAY):
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self._modules = {}  # script path -> imported module
+        self._threads = {}  # unique prefix -> thread of its last in-process run
+
+    def enabled(self):
+        return get_setting_value("PUBLISHER_RUNTIME") != "subprocess"
+
+    def supports(self, plugin):
+        return (
+            plugin.get("plugin_type") == "publisher"
+            and plugin.get("unique_prefix") in IN_PROCESS_PUBLISHERS
+            and publisher_script(plugin) is not None
+        )
+
+    def load(self, plugin):
+        """Import the publisher script once; returns the module or None."""
+        path = publisher_script(plugin)
+        if path in self._modules:
+            return self._modules[path]
+
+        prefix = plugin["unique_prefix"]
+        try:
+            spec = importlib.util.spec_from_file_location(f"publisher_{prefix.lower()}", path)
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+        except Exception as e:
+            mylog("none", [f"[Publishers] ⚠ ERROR loading {prefix} from {path}, running it as a subprocess: {e}"])
+            return None
+
+        if not callable(getattr(module, "main", None)):
+            mylog("none", [f"[Publishers] ⚠ ERROR {path} has no main(), running {prefix} as a subprocess"])
+            return None
+
+        self._modules[path] = module
+        return module
+
+    def _run(self, prefix, module, outcome, done):
+        try:
+            for attempt in range(self.retries + 1):
+                try:
+                    module.main()
+                    outcome["ok"] = True
+                    break
+                except SystemExit as e:
+                    # sys.exit() ends the publisher, not the worker thread
+                    outcome["ok"] = e.code in (None, 0)
+                    if not outcome["ok"]:
+                        outcome["error"] = e
+                        mylog("none", [f"[Publishers] ⚠ ERROR {prefix} exited with code {e.code}"])
+                    break
+                except Exception as e:
+                    outcome["error"] = e
+                    mylog("none", [f"[Publishers] ⚠ ERROR {prefix} failed (attempt {attempt + 1}/{self.retries + 1}): {e}"])
+                    if attempt < self.retries:
+                        time.sleep(self.retry_delay * 2 ** attempt)
+        finally:
+            # Also on any other BaseException, so run_all never waits out the timeout
+            done.set()
+
+    def run_all(self, plugins):
+        """
+        Run the supported publishers among ``plugins`` concurrently and wait
+        for each up to its RUN_TIMEOUT.
+
+        Returns the unique prefixes of the publishers that ran in process;
+        the others are left to the subprocess path. A publisher that timed
+        out is not started again: it may have sent its messages already.
+        While its thread is still running, later notifications for it go
+        through the subprocess path instead of starting a second thread.
+        """
+        if not self.enabled():
+            return set()
+
+        started = {}
+        for plugin in plugins:
+            if not self.supports(plugin):
+                continue
+
+            prefix = plugin["unique_prefix"]
+            previous = self._threads.get(prefix)
+            if previous is not None and previous.is_alive():
+                mylog("none", [f"[Publishers] ⚠ {prefix} is still running from an earlier notification, running it as a subprocess"])
+                continue
+
+            module = self.load(plugin)
+            if module is None:
+                continue
+
+            outcome, done = {}, threading.Event()
+            # Daemon thread: a publisher that hangs past its timeout must not block shutdown
+            thread = threading.Thread(
+                target=self._run, args=(prefix, module, outcome, done), name=f"publisher-{prefix}", daemon=True
+            )
+            thread.start()
+            self._threads[prefix] = thread
+            started[prefix] = (time.monotonic() + publisher_timeout(plugin), outcome, done)
+            mylog("verbose", [f"[Publishers] Running {prefix} in process"])
+
+        for prefix, (deadline, outcome, done) in started.items():
+            if not done.wait(max(0, deadline - time.monotonic())):
+                mylog("none", [f"[Publishers] ⚠ ERROR - TIMEOUT - {prefix} did not finish in time. Increase its RUN_TIMEOUT setting."])
+            elif not outcome.get("ok"):
+                mylog("none", [f"[Publishers] ⚠ ERROR {prefix} gave up after {self.retries + 1} attempts: {outcome.get('error')}"])
+
+        return set(started)
@@ -5,7 +5,7 @@ Writes are handled entirely by SQLite triggers (trg_devhist_update /
 trg_devhist_insert) created in db/db_history.py. This class is read/prune only.
 """
 
-from database import get_temp_db_connection
+from database import get_read_db_connection, get_db_writer
 from logger import mylog
 
 
@@ -16,19 +16,13 @@ class DevicesHistoryInstance:
     # -------------------------------------------------------------------------
 
     def _fetchall(self, query, params=()):
-        conn = get_temp_db_connection()
+        conn = get_read_db_connection()
         rows = conn.execute(query, params).fetchall()
         conn.close()
         return [dict(r) for r in rows]
 
     def _execute(self, query, params=()):
-        conn = get_temp_db_connection()
-        cur = conn.cursor()
-        cur.execute(query, params)
-        affected = cur.rowcount
-        conn.commit()
-        conn.close()
-        return affected
+        return get_db_writer().execute(query, params).rowcount
 
     # -------------------------------------------------------------------------
     # Public query API
@@ -8,8 +8,9 @@ from io import StringIO
 from server.plugins.plugin_helper import is_mac, normalize_mac
 from logger import mylog
 from models.plugin_object_instance import PluginObjectInstance
-from database import get_temp_db_connection
+from database import get_read_db_connection, get_db_writer
 from db.db_helper import get_table_json, get_device_conditions, get_device_condition_by_status, row_to_json, get_date_from_period
+from db.db_partitions import delete_from_partitions, partition_source
 from db.authoritative_handler import (
     enforce_source_on_user_update,
     get_locked_field_overrides,
@@ -23,27 +24,27 @@ from workflows.constants import VALID_DEVICE_COLUMNS
 from utils.datetime_utils import timeNowUTC
 
 
+class SourceTrackingError(Exception):
+    """Raised inside a write unit when source tracking cannot be enforced."""
+
+
 class DeviceInstance:
 
     # --- helpers --------------------------------------------------------------
     def _fetchall(self, query, params=()):
-        conn = get_temp_db_connection()
+        conn = get_read_db_connection()
         rows = conn.execute(query, params).fetchall()
         conn.close()
         return [dict(r) for r in rows]
 
     def _fetchone(self, query, params=()):
-        conn = get_temp_db_connection()
+        conn = get_read_db_connection()
         row = conn.execute(query, params).fetchone()
         conn.close()
         return dict(row) if row else None
 
     def _execute(self, query, params=()):
-        conn = get_temp_db_connection()
-        cur = conn.cursor()
-        cur.execute(query, params)
-        conn.commit()
-        conn.close()
+        get_db_writer().execute(query, params)
 
     # --- public API -----------------------------------------------------------
     def getAll(self):
@@ -239,60 +240,47 @@ class DeviceInstance:
         - If `macs` is None → delete ALL devices.
         - If `macs` is a list → delete only matching MACs (supports wildcard '*').
         """
-        conn = get_temp_db_connection()
-        cur = conn.cursor()
-
         if macs is None:
             # No MACs provided → delete all
-            cur.execute("DELETE FROM Devices")
-            conn.commit()
-            conn.close()
+            self._execute("DELETE FROM Devices")
             return {"success": True, "deleted": "all"}
 
-        deleted_count = 0
+        def _delete(conn):
+            cur = conn.cursor()
+            deleted_count = 0
 
-        for mac in macs:
-            if "*" in mac:
-                # Wildcard matching
-                sql_pattern = mac.replace("*", "%")
-                cur.execute("DELETE FROM Devices WHERE devMac LIKE ?", (sql_pattern,))
-            else:
-                # Exact match
-                cur.execute("DELETE FROM Devices WHERE devMac = ?", (mac,))
-            deleted_count += cur.rowcount
+            for mac in macs:
+                if "*" in mac:
+                    # Wildcard matching
+                    sql_pattern = mac.replace("*", "%")
+                    cur.execute("DELETE FROM Devices WHERE devMac LIKE ?", (sql_pattern,))
+                else:
+                    # Exact match
+                    cur.execute("DELETE FROM Devices WHERE devMac = ?", (mac,))
+                deleted_count += cur.rowcount
+            return deleted_count
 
-        conn.commit()
-        conn.close()
+        deleted_count = get_db_writer().run(_delete)
 
         return {"success": True, "deleted_count": deleted_count}
 
     def deleteAllWithEmptyMacs(self):
         """Delete devices with empty MAC addresses."""
-        conn = get_temp_db_connection()
-        cur = conn.cursor()
-        cur.execute("DELETE FROM Devices WHERE devMac IS NULL OR devMac = ''")
-        deleted = cur.rowcount
-        conn.commit()
-        conn.close()
+        deleted = get_db_writer().execute("DELETE FROM Devices WHERE devMac IS NULL OR devMac = ''").rowcount
         return {"success": True, "deleted": deleted}
 
     def deleteUnknownDevices(self):
         """Delete devices marked as unknown."""
-        conn = get_temp_db_connection()
-        cur = conn.cursor()
-        cur.execute(
+        deleted = get_db_writer().execute(
             """DELETE FROM Devices WHERE devName='(unknown)' OR devName='(name not found)'"""
-        )
-        deleted = cur.rowcount
-        conn.commit()
-        conn.close()
+        ).rowcount
         return {"success": True, "deleted": deleted}
 
     def exportDevices(self, export_format):
         """
         Export devices from the Devices table in the desired format.
         """
-        conn = get_temp_db_connection()
+        conn = get_read_db_connection()
         cur = conn.cursor()
 
         # Fetch all devices
@@ -371,29 +359,29 @@ class DeviceInstance:
         except StopIteration:
             return {"success": False, "error": "CSV missing header"}
 
-        # --- Wipe Devices table ---
-        conn = get_temp_db_connection()
-        sql = conn.cursor()
-        sql.execute("DELETE FROM Devices")
-
         # --- Prepare insert ---
         placeholders = ",".join(["?"] * len(header))
         insert_sql = f"INSERT INTO Devices ({', '.join(header)}) VALUES ({placeholders})"
 
-        row_count = 0
-        for idx, row in enumerate(reader, start=1):
-            if len(row) != len(header):
-                skipped.append(idx)
-                continue
-            try:
-                sql.execute(insert_sql, [col.strip() for col in row])
-                row_count += 1
-            except sqlite3.Error as e:
-                mylog("error", [f"[ImportCSV] SQL ERROR row {idx}: {e}"])
-                skipped.append(idx)
+        def _import(conn):
+            # --- Wipe Devices table ---
+            sql = conn.cursor()
+            sql.execute("DELETE FROM Devices")
 
-        conn.commit()
-        conn.close()
+            row_count = 0
+            for idx, row in enumerate(reader, start=1):
+                if len(row) != len(header):
+                    skipped.append(idx)
+                    continue
+                try:
+                    sql.execute(insert_sql, [col.strip() for col in row])
+                    row_count += 1
+                except sqlite3.Error as e:
+                    mylog("error", [f"[ImportCSV] SQL ERROR row {idx}: {e}"])
+                    skipped.append(idx)
+            return row_count
+
+        row_count = get_db_writer().run(_import)
 
         return {"success": True, "inserted": row_count, "skipped_lines": skipped}
 
@@ -409,7 +397,7 @@ class DeviceInstance:
           - homepage widget datav2 (reads /devices/totals indices)
         DO NOT change the order or add/remove fields without a breaking-change release.
         """
-        conn = get_temp_db_connection()
+        conn = get_read_db_connection()
         sql = conn.cursor()
 
         all_conditions = get_device_conditions()
@@ -431,7 +419,7 @@ class DeviceInstance:
 
     def getNamedTotals(self):
         """Get device totals by status."""
-        conn = get_temp_db_connection()
+        conn = get_read_db_connection()
         sql = conn.cursor()
 
         conditions = get_device_conditions()
@@ -448,6 +436,7 @@ class DeviceInstance:
 
         mylog('trace', [f'[getNamedTotals] query {query}'])
         json_obj = get_table_json(sql, query, parameters=None)
+        conn.close()
 
         return json_obj
 
@@ -456,7 +445,7 @@ class DeviceInstance:
         Return devices filtered by status. Returns all if no status provided.
         Possible statuses: my, connected, favorites, new, down, archived
         """
-        conn = get_temp_db_connection()
+        conn = get_read_db_connection()
         sql = conn.cursor()
 
         # Build condition for SQL
@@ -544,6 +533,13 @@ class DeviceInstance:
         # Compute period date for sessions/events
         period_date_sql = get_date_from_period(period)
 
+        conn = get_read_db_connection()
+        cur = conn.cursor()
+
+        # Only the monthly partitions overlapping the period (if any)
+        events = partition_source(conn, "Events", period_date_sql)
+        sessions = partition_source(conn, "Sessions", period_date_sql)
+
         # Fetch device info + computed fields
         sql = f"""
             SELECT
@@ -551,18 +547,18 @@ class DeviceInstance:
                 LOWER(d.devMac) AS devMac,
                 LOWER(d.devParentMAC) AS devParentMAC,
 
-                (SELECT COUNT(*) FROM Sessions
+                (SELECT COUNT(*) FROM {sessions}
                 WHERE LOWER(sesMac) = LOWER(d.devMac) AND (
                     sesDateTimeConnection >= {period_date_sql} OR
                     sesDateTimeDisconnection >= {period_date_sql} OR
                     sesStillConnected = 1
                 )) AS devSessions,
 
-                (SELECT COUNT(*) FROM Events
+                (SELECT COUNT(*) FROM {events}
                 WHERE LOWER(eveMac) = LOWER(d.devMac) AND eveDateTime >= {period_date_sql}
                 AND eveEventType NOT IN ('Connected','Disconnected')) AS devEvents,
 
-                (SELECT COUNT(*) FROM Events
+                (SELECT COUNT(*) FROM {events}
                 WHERE LOWER(eveMac) = LOWER(d.devMac) AND eveDateTime >= {period_date_sql}
                 AND eveEventType = 'Device Down') AS devDownAlerts,
 
@@ -571,7 +567,7 @@ class DeviceInstance:
                     julianday(CASE WHEN sesDateTimeConnection < {period_date_sql}
                                 THEN {period_date_sql} ELSE sesDateTimeConnection END)
                 ) * 24) AS INT)
-                FROM Sessions
+                FROM {sessions}
                 WHERE LOWER(sesMac) = LOWER(d.devMac)
                 AND sesDateTimeConnection IS NOT NULL
                 AND (sesDateTimeDisconnection IS NOT NULL OR sesStillConnected = 1)
@@ -583,8 +579,6 @@ class DeviceInstance:
             WHERE LOWER(d.devMac) = LOWER(?) OR CAST(d.rowid AS TEXT) = ?
         """
 
-        conn = get_temp_db_connection()
-        cur = conn.cursor()
         cur.execute(sql, (mac, mac))
         row = cur.fetchone()
 
@@ -659,7 +653,7 @@ class DeviceInstance:
         locked_fields = set()
         pre_update_tracked_values = {}
         if not data.get("createNew", False):
-            conn_preview = get_temp_db_connection()
+            conn_preview = get_read_db_connection()
             try:
                 locked_fields, overrides = get_locked_field_overrides(
                     normalized_mac,
@@ -687,7 +681,6 @@ class DeviceInstance:
             finally:
                 conn_preview.close()
 
-        conn = None
         try:
             if data.get("createNew", False):
                 sql = """
@@ -779,33 +772,6 @@ class DeviceInstance:
                     normalized_mac,
                 )
 
-            conn = get_temp_db_connection()
-            cur = conn.cursor()
-            cur.execute(sql, values)
-
-            if data.get("createNew", False):
-                # Initialize source-tracking fields on device creation.
-                # We always mark devMacSource as NEWDEV, and mark other tracked fields
-                # as NEWDEV only if the create payload provides a non-empty value.
-                initial_sources = {FIELD_SOURCE_MAP["devMac"]: "NEWDEV"}
-                for field_name, source_field in FIELD_SOURCE_MAP.items():
-                    if field_name == "devMac":
-                        continue
-                    field_value = data.get(field_name)
-                    if field_value is None:
-                        continue
-                    if isinstance(field_value, str) and not field_value.strip():
-                        continue
-                    initial_sources[source_field] = "NEWDEV"
-
-                if initial_sources:
-                    # Apply source updates in a single statement for the newly inserted row.
-                    set_clause = ", ".join([f"{col}=?" for col in initial_sources.keys()])
-                    source_values = list(initial_sources.values())
-                    source_values.append(normalized_mac)
-                    source_sql = f"UPDATE Devices SET {set_clause} WHERE devMac = ?"
-                    cur.execute(source_sql, source_values)
-
             # Enforce source tracking on user updates
             # User-updated fields should have their *Source set to "USER"
             def _normalize_tracked_value(value):
@@ -832,27 +798,52 @@ class DeviceInstance:
                     if _normalize_tracked_value(old_value) != _normalize_tracked_value(new_value):
                         user_updated_fields[field_name] = new_value
 
-            if user_updated_fields and not data.get("createNew", False):
-                try:
-                    enforce_source_on_user_update(normalized_mac, user_updated_fields, conn)
-                except Exception as e:
-                    mylog("none", [f"[DeviceInstance] Failed to enforce source tracking: {e}"])
-                    conn.rollback()
-                    conn.close()
-                    return {"success": False, "error": f"Source tracking failed: {e}"}
-
-            # Commit all changes atomically after all operations succeed
-            conn.commit()
-            conn.close()
+            def _apply(conn):
+                cur = conn.cursor()
+                cur.execute(sql, values)
+
+                if data.get("createNew", False):
+                    # Initialize source-tracking fields on device creation.
+                    # We always mark devMacSource as NEWDEV, and mark other tracked fields
+                    # as NEWDEV only if the create payload provides a non-empty value.
+                    initial_sources = {FIELD_SOURCE_MAP["devMac"]: "NEWDEV"}
+                    for field_name, source_field in FIELD_SOURCE_MAP.items():
+                        if field_name == "devMac":
+                            continue
+                        field_value = data.get(field_name)
+                        if field_value is None:
+                            continue
+                        if isinstance(field_value, str) and not field_value.strip():
+                            continue
+                        initial_sources[source_field] = "NEWDEV"
+
+                    if initial_sources:
+                        # Apply source updates in a single statement for the newly inserted row.
+                        set_clause = ", ".join([f"{col}=?" for col in initial_sources.keys()])
+                        source_values = list(initial_sources.values())
+                        source_values.append(normalized_mac)
+                        source_sql = f"UPDATE Devices SET {set_clause} WHERE devMac = ?"
+                        cur.execute(source_sql, source_values)
+
+                if user_updated_fields and not data.get("createNew", False):
+                    try:
+                        enforce_source_on_user_update(normalized_mac, user_updated_fields, conn)
+                    except Exception as e:
+                        raise SourceTrackingError(e) from e
+
+            # All statements run as one unit on the writer: any failure rolls
+            # back the device row and its sources together.
+            try:
+                get_db_writer().run(_apply)
+            except SourceTrackingError as e:
+                mylog("none", [f"[DeviceInstance] Failed to enforce source tracking: {e}"])
+                return {"success": False, "error": f"Source tracking failed: {e}"}
 
             mylog("debug", f"[DeviceInstance] setDeviceData SQL: {sql.strip()}")
             mylog("debug", f"[DeviceInstance] setDeviceData VALUES:{values}")
 
             return {"success": True}
         except Exception as e:
-            if conn:
-                conn.rollback()
-
             # Optional: your existing logger
             mylog("none", f"[DeviceInstance] setDeviceData({mac}) failed: {e}")
 
@@ -861,57 +852,40 @@ class DeviceInstance:
                 "error": str(e)
             }
 
-        finally:
-            if conn:
-                conn.close()
-
     def deleteDeviceByMAC(self, mac):
         """Delete a device by MAC."""
-        conn = get_temp_db_connection()
-        cur = conn.cursor()
-        cur.execute("DELETE FROM Devices WHERE devMac=?", (mac,))
-        conn.commit()
-        conn.close()
+        self._execute("DELETE FROM Devices WHERE devMac=?", (mac,))
         return {"success": True}
 
     def deleteDeviceEvents(self, mac):
         """Delete all events for a device."""
-        conn = get_temp_db_connection()
-        cur = conn.cursor()
-        cur.execute("DELETE FROM Events WHERE eveMac=?", (mac,))
-        conn.commit()
-        conn.close()
+        def _delete(conn):
+            conn.execute("DELETE FROM Events WHERE eveMac=?", (mac,))
+            delete_from_partitions(conn, "Events", "eveMac = ?", (mac,))
+
+        get_db_writer().run(_delete)
         return {"success": True}
 
     def resetDeviceProps(self, mac):
         """Reset device custom properties to default."""
         default_props = get_setting_value("NEWDEV_devCustomProps")
-        conn = get_temp_db_connection()
-        cur = conn.cursor()
-        cur.execute(
+        self._execute(
             "UPDATE Devices SET devCustomProps=? WHERE devMac=?",
             (default_props, mac),
         )
-        conn.commit()
-        conn.close()
         return {"success": True}
 
     def updateDeviceColumn(self, mac, column_name, column_value):
         """Update a specific column for a given device."""
-        conn = get_temp_db_connection()
-        cur = conn.cursor()
-
         # Convert the MAC to lowercase for comparison
         sql = f"UPDATE Devices SET {column_name}=? WHERE LOWER(devMac)=?"
-        cur.execute(sql, (column_value, mac.lower()))
-        conn.commit()
+        updated = get_db_writer().execute(sql, (column_value, mac.lower())).rowcount
 
-        if cur.rowcount > 0:
+        if updated > 0:
             result = {"success": True}
         else:
             result = {"success": False, "error": "Device not found"}
 
-        conn.close()
         return result
 
     def lockDeviceField(self, mac, field_name):
@@ -920,16 +894,13 @@ class DeviceInstance:
             return {"success": False, "error": f"Field {field_name} does not support locking"}
 
         mac_normalized = normalize_mac(mac)
-        conn = get_temp_db_connection()
         try:
-            result = lock_field(mac_normalized, field_name, conn)
+            result = get_db_writer().run(lambda conn: lock_field(mac_normalized, field_name, conn))
             # Include field name in response
             result["fieldName"] = field_name
             return result
         except Exception as e:
             return {"success": False, "error": str(e), "fieldName": field_name}
-        finally:
-            conn.close()
 
     def unlockDeviceField(self, mac, field_name):
         """Unlock a device field so plugins can overwrite it again."""
@@ -937,16 +908,13 @@ class DeviceInstance:
             return {"success": False, "error": f"Field {field_name} does not support unlocking"}
 
         mac_normalized = normalize_mac(mac)
-        conn = get_temp_db_connection()
         try:
-            result = unlock_field(mac_normalized, field_name, conn)
+            result = get_db_writer().run(lambda conn: unlock_field(mac_normalized, field_name, conn))
             # Include field name in response
             result["fieldName"] = field_name
             return result
         except Exception as e:
             return {"success": False, "error": str(e), "fieldName": field_name}
-        finally:
-            conn.close()
 
     def unlockFields(self, mac=None, fields=None, clear_all=False):
         """
@@ -982,18 +950,18 @@ class DeviceInstance:
                 }
             fields_to_unlock = fields
 
-        conn = get_temp_db_connection()
-        result = unlock_fields(conn, mac=mac, fields=fields_to_unlock, clear_all=clear_all)
-        conn.close()
-
-        return result
+        try:
+            return get_db_writer().run(
+                lambda conn: unlock_fields(conn, mac=mac, fields=fields_to_unlock, clear_all=clear_all)
+            )
+        except Exception as e:
+            return {"success": False, "error": str(e), "devicesAffected": 0, "fieldsAffected": []}
 
     def copyDevice(self, mac_from, mac_to):
         """Copy a device entry from one MAC to another."""
-        conn = get_temp_db_connection()
-        cur = conn.cursor()
+        def _copy(conn):
+            cur = conn.cursor()
 
-        try:
             # Drop temporary table if exists
             cur.execute("DROP TABLE IF EXISTS temp_devices")
 
@@ -1017,15 +985,13 @@ class DeviceInstance:
             # Drop temporary table
             cur.execute("DROP TABLE temp_devices")
 
-            conn.commit()
+        try:
+            # One unit on the writer: a failing step rolls back the whole copy
+            get_db_writer().run(_copy)
             return {
                 "success": True,
                 "message": f"Device copied from {mac_from} to {mac_to}",
             }
 
         except Exception as e:
-            conn.rollback()
             return {"success": False, "error": str(e)}
-
-        finally:
-            conn.close()
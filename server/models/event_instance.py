@@ -1,7 +1,8 @@
 from datetime import datetime, timedelta
 from logger import mylog
-from database import get_temp_db_connection
+from database import get_read_db_connection, get_db_writer
 from db.db_helper import row_to_json, get_date_from_period
+from db.db_partitions import partition_source, delete_from_partitions, drop_expired_partitions
 from utils.datetime_utils import ensure_datetime, timeNowUTC
 
 
@@ -10,27 +11,29 @@ from utils.datetime_utils import ensure_datetime, timeNowUTC
 # -------------------------------------------------------------------------------
 class EventInstance:
 
-    def _conn(self):
-        """Always return a new DB connection (thread-safe)."""
-        return get_temp_db_connection()
+    def _read_conn(self):
+        """Return a pooled read-only connection (thread-safe)."""
+        return get_read_db_connection()
 
     def _rows_to_list(self, rows):
         return [dict(r) for r in rows]
 
     # Get all events
     def get_all(self):
-        conn = self._conn()
+        conn = self._read_conn()
+        events = partition_source(conn, "Events")
         rows = conn.execute(
-            "SELECT * FROM Events ORDER BY eveDateTime DESC"
+            f"SELECT * FROM {events} ORDER BY eveDateTime DESC"
         ).fetchall()
         conn.close()
         return self._rows_to_list(rows)
 
     # --- Get last n events ---
     def get_last_n(self, n=10):
-        conn = self._conn()
-        rows = conn.execute("""
-            SELECT * FROM Events
+        conn = self._read_conn()
+        events = partition_source(conn, "Events")
+        rows = conn.execute(f"""
+            SELECT * FROM {events}
             ORDER BY eveDateTime DESC
             LIMIT ?
         """, (n,)).fetchall()
@@ -44,9 +47,10 @@ class EventInstance:
     # Get events in the last 24h
     def get_recent(self):
         since = timeNowUTC(as_string=False) - timedelta(hours=24)
-        conn = self._conn()
-        rows = conn.execute("""
-            SELECT * FROM Events
+        conn = self._read_conn()
+        events = partition_source(conn, "Events", "?", (since,))
+        rows = conn.execute(f"""
+            SELECT * FROM {events}
             WHERE eveDateTime >= ?
             ORDER BY eveDateTime DESC
         """, (since,)).fetchall()
@@ -60,9 +64,10 @@ class EventInstance:
             return []
 
         since = timeNowUTC(as_string=False) - timedelta(hours=hours)
-        conn = self._conn()
-        rows = conn.execute("""
-            SELECT * FROM Events
+        conn = self._read_conn()
+        events = partition_source(conn, "Events", "?", (since,))
+        rows = conn.execute(f"""
+            SELECT * FROM {events}
             WHERE eveDateTime >= ?
             ORDER BY eveDateTime DESC
         """, (since,)).fetchall()
@@ -75,9 +80,10 @@ class EventInstance:
             mylog("error", f"[Events] get_by_range invalid: {start} > {end}")
             raise ValueError("Start must not be after end")
 
-        conn = self._conn()
-        rows = conn.execute("""
-            SELECT * FROM Events
+        conn = self._read_conn()
+        events = partition_source(conn, "Events", "?", (start,))
+        rows = conn.execute(f"""
+            SELECT * FROM {events}
             WHERE eveDateTime BETWEEN ? AND ?
             ORDER BY eveDateTime DESC
         """, (start, end)).fetchall()
@@ -86,8 +92,7 @@ class EventInstance:
 
     # Insert new event
     def add(self, mac, ip, eventType, info="", pendingAlert=True, pairRow=None):
-        conn = self._conn()
-        conn.execute("""
+        get_db_writer().execute("""
             INSERT OR IGNORE INTO Events  (
                 eveMac, eveIp, eveDateTime,
                 eveEventType, eveAdditionalInfo,
@@ -95,18 +100,11 @@ class EventInstance:
             ) VALUES (?,?,?,?,?,?,?)
         """, (mac, ip, timeNowUTC(), eventType, info,
               1 if pendingAlert else 0, pairRow))
-        conn.commit()
-        conn.close()
 
     # Delete old events
     def delete_older_than(self, days: int):
         cutoff = timeNowUTC(as_string=False) - timedelta(days=days)
-        conn = self._conn()
-        result = conn.execute("DELETE FROM Events WHERE eveDateTime < ?", (cutoff,))
-        conn.commit()
-        deleted_count = result.rowcount
-        conn.close()
-        return deleted_count
+        return get_db_writer().execute("DELETE FROM Events WHERE eveDateTime < ?", (cutoff,)).rowcount
 
     # --- events_endpoint.py methods ---
 
@@ -120,9 +118,7 @@ class EventInstance:
         else:
             start_time = ensure_datetime(event_time)
 
-        conn = self._conn()
-        cur = conn.cursor()
-        cur.execute(
+        get_db_writer().execute(
             """
             INSERT OR IGNORE INTO Events  (eveMac, eveIp, eveDateTime, eveEventType, eveAdditionalInfo, evePendingAlertEmail)
             VALUES (?, ?, ?, ?, ?, ?)
@@ -130,9 +126,6 @@ class EventInstance:
             (mac, ip, start_time, event_type, additional_info, pending_alert),
         )
 
-        conn.commit()
-        conn.close()
-
         mylog("debug", f"[Events] Created event for {mac} ({event_type})")
         return {"success": True, "message": f"Created event for {mac}"}
 
@@ -141,14 +134,15 @@ class EventInstance:
         Fetch all events, or events for a specific MAC if provided.
         Returns list of events.
         """
-        conn = self._conn()
+        conn = self._read_conn()
         cur = conn.cursor()
+        events = partition_source(conn, "Events")
 
         if mac:
-            sql = "SELECT * FROM Events WHERE eveMac=? ORDER BY eveDateTime DESC"
+            sql = f"SELECT * FROM {events} WHERE eveMac=? ORDER BY eveDateTime DESC"
             cur.execute(sql, (mac,))
         else:
-            sql = "SELECT * FROM Events ORDER BY eveDateTime DESC"
+            sql = f"SELECT * FROM {events} ORDER BY eveDateTime DESC"
             cur.execute(sql)
 
         rows = cur.fetchall()
@@ -159,27 +153,25 @@ class EventInstance:
 
     def deleteEventsOlderThan(self, days):
         """Delete all events older than a specified number of days"""
-        conn = self._conn()
-        cur = conn.cursor()
+        def _delete(conn):
+            # Use a parameterized query with sqlite date function
+            sql = "DELETE FROM Events WHERE eveDateTime <= date('now', ?)"
+            conn.execute(sql, [f"-{days} days"])
 
-        # Use a parameterized query with sqlite date function
-        sql = "DELETE FROM Events WHERE eveDateTime <= date('now', ?)"
-        cur.execute(sql, [f"-{days} days"])
+            # Archived months (DBCLNP_PARTITION_MONTHS)
+            drop_expired_partitions(conn, days)
 
-        conn.commit()
-        conn.close()
+        get_db_writer().run(_delete)
 
         return {"success": True, "message": f"Deleted events older than {days} days"}
 
     def deleteAllEvents(self):
         """Delete all events"""
-        conn = self._conn()
-        cur = conn.cursor()
+        def _delete(conn):
+            conn.execute("DELETE FROM Events")
+            delete_from_partitions(conn, "Events")
 
-        sql = "DELETE FROM Events"
-        cur.execute(sql)
-        conn.commit()
-        conn.close()
+        get_db_writer().run(_delete)
 
         return {"success": True, "message": "Deleted all events"}
 
@@ -192,24 +184,28 @@ class EventInstance:
         # Convert period to SQLite date expression
         period_date_sql = get_date_from_period(period)
 
-        conn = self._conn()
+        conn = self._read_conn()
         cur = conn.cursor()
 
+        # Only the monthly partitions overlapping the period (if any)
+        events = partition_source(conn, "Events", period_date_sql)
+        sessions = partition_source(conn, "Sessions", period_date_sql)
+
         sql = f"""
             SELECT
-                (SELECT COUNT(*) FROM Events WHERE eveDateTime >= {period_date_sql}) AS all_events,
-                (SELECT COUNT(*) FROM Sessions WHERE
+                (SELECT COUNT(*) FROM {events} WHERE eveDateTime >= {period_date_sql}) AS all_events,
+                (SELECT COUNT(*) FROM {sessions} WHERE
                     sesDateTimeConnection >= {period_date_sql}
                     OR sesDateTimeDisconnection >= {period_date_sql}
                     OR sesStillConnected = 1
                 ) AS sessions,
-                (SELECT COUNT(*) FROM Sessions WHERE
+                (SELECT COUNT(*) FROM {sessions} WHERE
                     (sesDateTimeConnection IS NULL AND sesDateTimeDisconnection >= {period_date_sql})
                     OR (sesDateTimeDisconnection IS NULL AND sesStillConnected = 0 AND sesDateTimeConnection >= {period_date_sql})
                 ) AS missing,
-                (SELECT COUNT(*) FROM Events WHERE eveDateTime >= {period_date_sql} AND eveEventType LIKE 'VOIDED%') AS voided,
-                (SELECT COUNT(*) FROM Events WHERE eveDateTime >= {period_date_sql} AND eveEventType LIKE 'New Device') AS new,
-                (SELECT COUNT(*) FROM Events WHERE eveDateTime >= {period_date_sql} AND eveEventType LIKE 'Device Down') AS down
+                (SELECT COUNT(*) FROM {events} WHERE eveDateTime >= {period_date_sql} AND eveEventType LIKE 'VOIDED%') AS voided,
+                (SELECT COUNT(*) FROM {events} WHERE eveDateTime >= {period_date_sql} AND eveEventType LIKE 'New Device') AS new,
+                (SELECT COUNT(*) FROM {events} WHERE eveDateTime >= {period_date_sql} AND eveEventType LIKE 'Device Down') AS down
         """
 
         cur.execute(sql)
@@ -244,20 +240,21 @@ class EventInstance:
             mylog("warn", f"[Events] get_unstable_devices invalid params: hours={hours}, threshold={threshold}")
             return set() if macs_only else []
 
-        conn = self._conn()
+        conn = self._read_conn()
+
+        # SQLite expects "-1 hours" format
+        window = f"-{hours} hours"
+        events = partition_source(conn, "Events", "datetime('now', ?)", (window,))
 
-        sql = """
+        sql = f"""
             SELECT eveMac, COUNT(*) as event_count
-            FROM Events
+            FROM {events}
             WHERE eveEventType IN ('Connected','Disconnected','Device Down','Down Reconnected')
             AND eveDateTime >= datetime('now', ?)
             GROUP BY eveMac
             HAVING COUNT(*) >= ?
         """
 
-        # SQLite expects "-1 hours" format
-        window = f"-{hours} hours"
-
         rows = conn.execute(sql, (window, threshold)).fetchall()
         conn.close()
 
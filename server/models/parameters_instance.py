@@ -9,7 +9,7 @@ Structure:
 
 import hashlib
 import sqlite3
-from database import get_temp_db_connection
+from database import get_read_db_connection, get_db_writer
 from logger import mylog
 
 
@@ -19,25 +19,21 @@ class ParametersInstance:
     # --- helper methods (DRY pattern from DeviceInstance) ----------------------
     def _fetchall(self, query, params=()):
         """Fetch all rows and return as list of dicts."""
-        conn = get_temp_db_connection()
+        conn = get_read_db_connection()
         rows = conn.execute(query, params).fetchall()
         conn.close()
         return [dict(r) for r in rows]
 
     def _fetchone(self, query, params=()):
         """Fetch single row and return as dict or None."""
-        conn = get_temp_db_connection()
+        conn = get_read_db_connection()
         row = conn.execute(query, params).fetchone()
         conn.close()
         return dict(row) if row else None
 
     def _execute(self, query, params=()):
-        """Execute write query (INSERT/UPDATE/DELETE)."""
-        conn = get_temp_db_connection()
-        cur = conn.cursor()
-        cur.execute(query, params)
-        conn.commit()
-        conn.close()
+        """Execute write query (INSERT/UPDATE/DELETE) through the writer queue."""
+        return get_db_writer().execute(query, params).rowcount
 
     # --- public API -----------------------------------------------------------
 
@@ -118,12 +114,7 @@ class ParametersInstance:
             int: Number of parameters deleted
         """
         try:
-            conn = get_temp_db_connection()
-            cur = conn.cursor()
-            cur.execute('DELETE FROM "Parameters" WHERE "parID" LIKE ?', (f"{prefix}%",))
-            deleted_count = cur.rowcount
-            conn.commit()
-            conn.close()
+            deleted_count = self._execute('DELETE FROM "Parameters" WHERE "parID" LIKE ?', (f"{prefix}%",))
             mylog("verbose", [f"[ParametersInstance] Deleted {deleted_count} parameters with prefix '{prefix}'"])
             return deleted_count
         except Exception as e:
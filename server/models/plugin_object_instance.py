@@ -1,5 +1,5 @@
 from logger import mylog
-from database import get_temp_db_connection
+from database import get_read_db_connection, get_db_writer
 
 
 # -------------------------------------------------------------------------------
@@ -9,22 +9,19 @@ class PluginObjectInstance:
 
     # -------------- Internal DB helper wrappers --------------------------------
     def _fetchall(self, query, params=()):
-        conn = get_temp_db_connection()
+        conn = get_read_db_connection()
         rows = conn.execute(query, params).fetchall()
         conn.close()
         return [dict(r) for r in rows]
 
     def _fetchone(self, query, params=()):
-        conn = get_temp_db_connection()
+        conn = get_read_db_connection()
         row = conn.execute(query, params).fetchone()
         conn.close()
         return dict(row) if row else None
 
     def _execute(self, query, params=()):
-        conn = get_temp_db_connection()
-        conn.execute(query, params)
-        conn.commit()
-        conn.close()
+        get_db_writer().execute(query, params)
 
     # ---------------------------------------------------------------------------
     # Public API — identical behaviour, now thread-safe + self-contained
@@ -8,7 +8,7 @@ from concurrent.futures import ThreadPoolExecutor, as_completed
 
 # Register NetAlertX modules
 import conf
-from const import pluginsPath, logPath, applicationPath, reportTemplatesPath
+from const import fullConfPath, logPath, reportTemplatesPath
 from logger import mylog, Logger
 from helper import get_file_content, get_setting, get_setting_value
 from utils.datetime_utils import timeNowUTC
@@ -22,12 +22,16 @@ from utils.plugin_utils import (
     combine_plugin_objects,
     resolve_wildcards_arr,
     handle_empty,
-    decode_and_rename_files
+    decode_and_rename_files,
+    resolve_app_paths
 )
 from models.notification_instance import NotificationInstance
+from messaging.publisher_runtime import PublisherRuntime
+from plugin_forkserver import ForkServer, ForkServerError, can_fork
 from messaging.in_app import write_notification
 from models.user_events_queue_instance import UserEventsQueueInstance
 from utils.crypto_utils import generate_deterministic_guid
+from utils.plugin_results import iter_result_rows
 
 
 # -------------------------------------------------------------------------------
@@ -38,6 +42,9 @@ class plugin_manager:
         self.plugin_states = {}
         self.plugin_checks = {}
 
+        # Notification publishers imported once and run in this process
+        self.publisher_runtime = PublisherRuntime()
+
         # object cache of settings and schedules for faster lookups
         self._cache = {}
         self._build_cache()
@@ -68,6 +75,8 @@ class plugin_manager:
 
         mylog("debug", f"[Plugins] Check if any plugins need to be executed on run type: {runType}")
 
+        plugins_to_run = []
+
         for plugin in self.all_plugins:
             shouldRun = False
             prefix = plugin["unique_prefix"]
@@ -87,33 +96,45 @@ class plugin_manager:
                         shouldRun = schd.runScheduleCheck()
 
             if shouldRun:
-                # Header
-                updateState(f"Plugin: {prefix}")
+                plugins_to_run.append(plugin)
 
-                print_plugin_info(plugin, ["display_name"])
+        # Publishers send the notification concurrently, in this process;
+        # their result files are processed one by one below
+        ran_in_process = set()
+        if runType == "on_notification" and plugins_to_run:
+            updateState("Plugins: publishers")
+            ran_in_process = self.publisher_runtime.run_all(plugins_to_run)
 
-                # 🔹 CMD also retrieved from cache
-                cmd_setting = self._cache["settings"].get(prefix, {}).get("CMD")
+        for plugin in plugins_to_run:
+            prefix = plugin["unique_prefix"]
 
-                print_str = cmd_setting["value"] if cmd_setting else None
+            # Header
+            updateState(f"Plugin: {prefix}")
 
-                mylog("debug", f"[Plugins] CMD: {print_str}")
+            print_plugin_info(plugin, ["display_name"])
 
-                execute_plugin(self.db, self.all_plugins, plugin)
+            # 🔹 CMD also retrieved from cache
+            cmd_setting = self._cache["settings"].get(prefix, {}).get("CMD")
 
-                # Update plugin states in app_state
-                current_plugin_state = self.get_plugin_states(prefix)  # get latest plugin state
+            print_str = cmd_setting["value"] if cmd_setting else None
 
-                # mylog('debug', f'current_plugin_state: {current_plugin_state}')
+            mylog("debug", f"[Plugins] CMD: {print_str}")
 
-                updateState(pluginsStates={prefix: current_plugin_state.get(prefix, {})})
+            execute_plugin(self.db, self.all_plugins, plugin, run_script=prefix not in ran_in_process)
 
-                # update last run time
-                if runType == "schedule":
-                    schd = self._cache["schedules"].get(prefix)
-                    if schd:
-                        # note the last time the scheduled plugin run was executed
-                        schd.last_run = timeNowUTC(as_string=False)
+            # Update plugin states in app_state
+            current_plugin_state = self.get_plugin_states(prefix)  # get latest plugin state
+
+            # mylog('debug', f'current_plugin_state: {current_plugin_state}')
+
+            updateState(pluginsStates={prefix: current_plugin_state.get(prefix, {})})
+
+            # update last run time
+            if runType == "schedule":
+                schd = self._cache["schedules"].get(prefix)
+                if schd:
+                    # note the last time the scheduled plugin run was executed
+                    schd.last_run = timeNowUTC(as_string=False)
 
     # ===============================================================================
     # Handling of  user initialized front-end events
@@ -364,8 +385,19 @@ class plugin_param:
         self.multiplyTimeout = multiplyTimeout
 
 
+# -------------------------------------------------------------------------------
+# Fork-server for Python plugin scripts, started on the first forked run
+fork_server = ForkServer(fullConfPath)
+
+
 # Function to run a plugin command
 def run_plugin(command, set_RUN_TIMEOUT, plugin):
+    if get_setting_value("PLUGINS_FORKSERVER") and can_fork(command):
+        try:
+            return run_plugin_forked(command, set_RUN_TIMEOUT, plugin)
+        except ForkServerError as e:
+            mylog("none", f"[Plugins] ⚠ ERROR - fork-server failed, running {plugin['unique_prefix']} as a subprocess: {e}")
+
     try:
         return subprocess.check_output(
             command,
@@ -382,9 +414,32 @@ def run_plugin(command, set_RUN_TIMEOUT, plugin):
         return None
 
 
+# -------------------------------------------------------------------------------
+# Runs a `python3 <script>.py` plugin in a child of the fork-server (PLUGINS_FORKSERVER)
+def run_plugin_forked(command, set_RUN_TIMEOUT, plugin):
+    prefix = plugin["unique_prefix"]
+    answer = fork_server.run(prefix, command[1:], set_RUN_TIMEOUT)
+
+    stats = fork_server.stats.get(prefix, {"runs": 0, "saved_ms": 0.0})
+    mylog("verbose", [
+        f"[Plugins] {prefix} started from the fork-server in {answer['start_ms']:.1f}ms,",
+        f"saved {answer['saved_ms']:.0f}ms ({stats['saved_ms'] / 1000:.1f}s over {stats['runs']} runs)",
+    ])
+
+    if answer["timed_out"]:
+        mylog("none", f"[Plugins] ⚠ ERROR - TIMEOUT - the plugin {prefix} forcefully terminated as timeout reached. Increase TIMEOUT setting and scan interval.")
+        return None
+    if answer["rc"] != 0:
+        mylog("none", [answer["output"]])
+        mylog("none", "[Plugins] ⚠ ERROR - enable LOG_LEVEL=debug and check logs")
+        return None
+    return answer["output"]
+
+
 # -------------------------------------------------------------------------------
 # Executes the plugin command specified in the setting with the function specified as CMD
-def execute_plugin(db, all_plugins, plugin):
+# run_script=False only processes the result files of a script that already ran (in process)
+def execute_plugin(db, all_plugins, plugin, run_script=True):
     sql = db.sql
 
     # ------- necessary settings check  --------
@@ -394,13 +449,8 @@ def execute_plugin(db, all_plugins, plugin):
     if set is None:
         return
 
-    set_CMD = set["value"]
-
     # Replace hardcoded /app paths with environment-aware path
-    if "/app/server/plugins" in set_CMD:
-        set_CMD = set_CMD.replace("/app/server/plugins", str(pluginsPath))
-    if "/app/" in set_CMD:
-        set_CMD = set_CMD.replace("/app/", f"{applicationPath}/")
+    set_CMD = resolve_app_paths(set["value"])
 
     set = get_plugin_setting_obj(plugin, "RUN_TIMEOUT")
 
@@ -444,23 +494,21 @@ def execute_plugin(db, all_plugins, plugin):
         # prepare command from plugin settings, custom parameters
         command = resolve_wildcards_arr(set_CMD.split(), params)
 
-        # Execute command
-        mylog("verbose", f"[Plugins] Executing: {set_CMD}")
-        mylog("debug", f"[Plugins] Resolved : {command}")
-
-        # Using ThreadPoolExecutor to handle concurrent subprocesses
-        with ThreadPoolExecutor(max_workers=5) as executor:
-            futures = [
-                executor.submit(run_plugin, command, set_RUN_TIMEOUT, plugin)
-            ]  # Submit the command as a future
+        if run_script:
+            # Execute command
+            mylog("verbose", f"[Plugins] Executing: {set_CMD}")
+            mylog("debug", f"[Plugins] Resolved : {command}")
 
-            for future in as_completed(futures):
-                output = future.result()  # Get the output or error
-                if output is not None:
-                    mylog("verbose", [f"[Plugins] Output: {output}"])
+            # Using ThreadPoolExecutor to handle concurrent subprocesses
+            with ThreadPoolExecutor(max_workers=5) as executor:
+                futures = [
+                    executor.submit(run_plugin, command, set_RUN_TIMEOUT, plugin)
+                ]  # Submit the command as a future
 
-        # Initialize newLines
-        newLines = []
+                for future in as_completed(futures):
+                    output = future.result()  # Get the output or error
+                    if output is not None:
+                        mylog("verbose", [f"[Plugins] Output: {output}"])
 
         # Create the file path
         file_dir = logPath + "/plugins"
@@ -474,24 +522,20 @@ def execute_plugin(db, all_plugins, plugin):
 
             mylog("debug", [f'[Plugins] Processing file "{full_path}"'])
 
-            # Open the decrypted file and process its contents
+            # Open the decrypted file and process its records one by one (JSON lines or the pipe-delimited text format)
             with open(full_path, "r") as f:
-                newLines = f.read().split("\n")
-
-                # if the script produced some output, clean it up to ensure it's the correct format
-                # cleanup - select only lines containing a separator to filter out unnecessary data
-                newLines = list(filter(lambda x: "|" in x, newLines))
-
                 # Store e.g. Node_1 from last_result.<prefix>.encoded.Node_1.1.log
                 tmp_SyncHubNodeName = ""
                 if len(filename.split(".")) > 3:
                     tmp_SyncHubNodeName = filename.split(".")[2]
 
-                for line in newLines:
-                    columns = line.split("|")
+                def skip_invalid(line):
+                    mylog("none", f"[Plugins] Invalid result record skipped: {line}")
+
+                for columns in iter_result_rows(f, on_error=skip_invalid):
                     # There have to be 9 or 13 columns
                     if len(columns) not in [9, 13]:
-                        mylog("none", f"[Plugins] Wrong number of input values, must be 9 or 13, got {len(columns)} from: {line}")
+                        mylog("none", f"[Plugins] Wrong number of input values, must be 9 or 13, got {len(columns)} from: {columns}")
                         continue  # Skip lines with incorrect number of columns
 
                     # Common part of the SQL parameters
@@ -0,0 +1,310 @@
+"""
+Fork-server for Python plugin scripts (PLUGINS_FORKSERVER).
+
+Started as a subprocess of the main process, the fork-server imports the
+modules every plugin needs (plugin_helper, helper, database, logger, const,
+the vendor index, ...) once and then waits for run requests. Each plugin run
+is a child forked from it, so the script starts with everything already
+imported, while it still runs in its own process: a crash only ends the
+child and a timeout kills the child and its process group.
+
+Requests and answers are JSON lines on the fork-server's stdin/stdout:
+
+    -> {"argv": ["/app/server/plugins/arp_scan/script.py", "arg=..."], "timeout": 60}
+    <- {"rc": 0, "timed_out": false, "output": "...", "start_ms": 1.2}
+
+The fork-server is restarted when app.conf changes, as plugin_helper reads it
+at import time. Enable it with the PLUGINS_FORKSERVER setting.
+"""
+
+import json
+import os
+import queue
+import select
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import traceback
+
+SERVER_PATH = os.path.dirname(os.path.abspath(__file__))
+PLUGINS_PATH = os.path.join(SERVER_PATH, "plugins")
+APP_PATH = os.path.dirname(SERVER_PATH)
+
+# Modules imported by (nearly) every plugin script
+PRELOAD_MODULES = [
+    "conf",
+    "const",
+    "logger",
+    "helper",
+    "database",
+    "plugin_helper",
+    "utils.plugin_utils",
+    "utils.datetime_utils",
+    "utils.crypto_utils",
+    "models.notification_instance",
+    "scan.device_handling",
+    "requests",
+    "pytz",
+]
+
+# Seconds to wait for the fork-server to start, and on top of a plugin's timeout for its answer
+START_TIMEOUT = 60
+ANSWER_MARGIN = 10
+
+
+class ForkServerError(Exception):
+    pass
+
+
+# -------------------------------------------------------------------------------
+# Fork-server process
+# -------------------------------------------------------------------------------
+def write_log_queue():
+    """Writes the queued log lines right away, in place of logger's writer thread."""
+    logger = sys.modules["logger"]
+    lines = []
+    while True:
+        try:
+            entry = logger.log_queue.get_nowait()
+        except queue.Empty:
+            break
+        if entry is not None:
+            lines.append(entry)
+    if lines:
+        with open(logger.logPath + "/app.log", "a") as log_file:
+            log_file.write("\n".join(lines) + "\n")
+
+
+def reset_log_queue():
+    logger = sys.modules["logger"]
+    logger.log_queue = queue.Queue(maxsize=1000)
+    logger.log_thread = None
+
+
+def preload():
+    for path in (APP_PATH, SERVER_PATH, PLUGINS_PATH):
+        if path not in sys.path:
+            sys.path.append(path)
+
+    # Children are forked from this process, which must stay single-threaded:
+    # no log writer thread, log lines are written as they are logged
+    import logger
+    logger.start_log_writer_thread = write_log_queue
+    os.register_at_fork(after_in_child=reset_log_queue)
+
+    for name in PRELOAD_MODULES:
+        try:
+            __import__(name)
+        except Exception as e:
+            print(f"[ForkServer] Could not preload {name}: {e}", file=sys.stderr)
+
+    # Memory-mapped vendor index, shared with the children (rebuilt by them if outdated)
+    try:
+        sys.modules["scan.device_handling"]._load_vendor_index()
+    except Exception as e:
+        print(f"[ForkServer] Could not preload the vendor index: {e}", file=sys.stderr)
+
+    if threading.active_count() > 1:
+        print(f"[ForkServer] ⚠ Threads started while preloading: {threading.enumerate()}", file=sys.stderr)
+
+
+def run_child(argv, out_fd, answer_fd):
+    """Runs the script in the forked child; never returns."""
+    code = 1
+    try:
+        os.setsid()
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+
+        os.close(answer_fd)
+        devnull = os.open(os.devnull, os.O_RDONLY)
+        os.dup2(devnull, 0)
+        os.dup2(out_fd, 1)
+        os.dup2(out_fd, 2)
+
+        # Settings may have changed since the fork-server started
+        helper = sys.modules.get("helper")
+        if helper is not None:
+            helper.SETTINGS_CACHE = {}
+            helper.SETTINGS_SECONDARYCACHE = {}
+            helper.SETTINGS_LASTCACHEDATE = 0
+
+        # As `python3 script.py` would
+        sys.argv = list(argv)
+        sys.path.insert(0, os.path.dirname(os.path.abspath(argv[0])))
+
+        import runpy
+        runpy.run_path(argv[0], run_name="__main__")
+        code = 0
+    except SystemExit as e:
+        if e.code is None or isinstance(e.code, int):
+            code = e.code or 0
+        else:
+            print(e.code, file=sys.stderr)
+    except BaseException:
+        traceback.print_exc()
+    finally:
+        try:
+            sys.stdout.flush()
+            sys.stderr.flush()
+        finally:
+            os._exit(code)
+
+
+def run_request(request, answer_fd):
+    argv = request["argv"]
+    timeout = request.get("timeout") or 10
+
+    with tempfile.TemporaryFile() as out:
+        start = time.monotonic()
+        pid = os.fork()
+        if pid == 0:
+            run_child(argv, out.fileno(), answer_fd)
+        start_ms = (time.monotonic() - start) * 1000
+
+        deadline = time.monotonic() + timeout
+        timed_out = False
+        while True:
+            wpid, status = os.waitpid(pid, os.WNOHANG)
+            if wpid:
+                break
+            if time.monotonic() >= deadline:
+                timed_out = True
+                try:
+                    os.killpg(pid, signal.SIGKILL)
+                except ProcessLookupError:
+                    pass
+                _, status = os.waitpid(pid, 0)
+                break
+            time.sleep(0.01)
+
+        out.seek(0)
+        output = out.read().decode("utf-8", errors="replace")
+
+    return {
+        "rc": None if timed_out else os.waitstatus_to_exitcode(status),
+        "timed_out": timed_out,
+        "output": output,
+        "start_ms": round(start_ms, 2),
+    }
+
+
+def serve():
+    # Answers go to a private copy of stdout; anything printed lands on stderr
+    answer_fd = os.dup(1)
+    os.dup2(2, 1)
+    answers = os.fdopen(answer_fd, "w", buffering=1)
+
+    start = time.monotonic()
+    preload()
+    answers.write(json.dumps({"ready": True, "preload_ms": round((time.monotonic() - start) * 1000, 1)}) + "\n")
+
+    for line in sys.stdin:
+        try:
+            answer = run_request(json.loads(line), answer_fd)
+        except Exception as e:
+            answer = {"error": f"{type(e).__name__}: {e}"}
+        answers.write(json.dumps(answer) + "\n")
+
+
+# -------------------------------------------------------------------------------
+# Client (main process)
+# -------------------------------------------------------------------------------
+def can_fork(command):
+    """True if the plugin command is a plain `python3 <script>.py [args]`."""
+    return (
+        len(command) >= 2
+        and os.path.basename(command[0]).startswith("python")
+        and command[1].endswith(".py")
+    )
+
+
+class ForkServer:
+    def __init__(self, conf_path=None):
+        self.conf_path = conf_path
+        self.proc = None
+        self.lock = threading.Lock()
+        # Time a fresh interpreter needs for the imports, i.e. what every subprocess run pays
+        self.cold_start_ms = None
+        self.conf_mtime = None
+        self.stats = {}  # plugin prefix -> {"runs", "saved_ms"}
+
+    def _conf_mtime(self):
+        try:
+            return os.path.getmtime(self.conf_path) if self.conf_path else None
+        except OSError:
+            return None
+
+    def _readline(self, timeout):
+        ready, _, _ = select.select([self.proc.stdout], [], [], timeout)
+        if not ready:
+            return None
+        return self.proc.stdout.readline()
+
+    def _ensure_started(self):
+        conf_mtime = self._conf_mtime()
+        if self.proc is not None and self.proc.poll() is None and conf_mtime == self.conf_mtime:
+            return
+
+        self.stop()
+        start = time.monotonic()
+        self.proc = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__)],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            cwd=SERVER_PATH,
+        )
+        line = self._readline(START_TIMEOUT)
+        if not line:
+            self.stop()
+            raise ForkServerError("fork-server did not start")
+
+        self.cold_start_ms = (time.monotonic() - start) * 1000
+        self.conf_mtime = conf_mtime
+
+    def run(self, prefix, argv, timeout):
+        """
+        Runs a plugin script (``argv`` without the interpreter) in a forked
+        child. Returns the answer dict, with ``saved_ms`` the startup time
+        saved compared to a fresh interpreter.
+        """
+        with self.lock:
+            self._ensure_started()
+            try:
+                self.proc.stdin.write((json.dumps({"argv": argv, "timeout": timeout}) + "\n").encode("utf-8"))
+                self.proc.stdin.flush()
+            except OSError as e:
+                self.stop()
+                raise ForkServerError(f"fork-server not reachable: {e}")
+
+            line = self._readline(timeout + ANSWER_MARGIN)
+            if not line:
+                # The script may have run already, handled as a timeout rather than run again
+                self.stop()
+                return {"rc": None, "timed_out": True, "output": "", "start_ms": 0.0, "saved_ms": 0.0}
+
+            answer = json.loads(line)
+            if "error" in answer:
+                raise ForkServerError(answer["error"])
+
+            answer["saved_ms"] = max(0.0, self.cold_start_ms - answer["start_ms"])
+            stats = self.stats.setdefault(prefix, {"runs": 0, "saved_ms": 0.0})
+            stats["runs"] += 1
+            stats["saved_ms"] += answer["saved_ms"]
+            return answer
+
+    def stop(self):
+        if self.proc is not None:
+            try:
+                self.proc.kill()
+                self.proc.wait(timeout=5)
+            except (OSError, subprocess.TimeoutExpired):
+                pass
+            self.proc = None
+
+
+if __name__ == "__main__":
+    serve()
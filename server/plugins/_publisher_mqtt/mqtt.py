@@ -19,8 +19,8 @@ sys.path.extend([f"{INSTALL_PATH}/server/plugins", f"{INSTALL_PATH}/server"])
 # NetAlertX modules
 import conf  # noqa: E402 [flake8 lint suppression]
 from const import confFileName, logPath  # noqa: E402 [flake8 lint suppression]
-from utils.plugin_utils import getPluginObject  # noqa: E402 [flake8 lint suppression]
-from plugin_helper import Plugin_Objects  # noqa: E402 [flake8 lint suppression]
+from utils.plugin_utils import getPluginObjects  # noqa: E402 [flake8 lint suppression]
+from plugin_helper import Plugin_Objects, load_plugin_cache, save_plugin_cache  # noqa: E402 [flake8 lint suppression]
 from logger import mylog, Logger  # noqa: E402 [flake8 lint suppression]
 from helper import get_setting_value, bytes_to_string, \
     sanitize_string, normalize_string  # noqa: E402 [flake8 lint suppression]
@@ -39,6 +39,15 @@ pluginName = 'MQTT'
 LOG_PATH = logPath + '/plugins'
 RESULT_FILE = os.path.join(LOG_PATH, f'last_result.{pluginName}.log')
 
+# Digest of the payload last delivered per (retained) topic: {topic: [digest, epoch]}
+DIGEST_FILE = os.path.join(LOG_PATH, f'cache.{pluginName}.json')
+
+# Seconds to wait for queued messages to be delivered before disconnecting
+PUBLISH_FLUSH_TIMEOUT = 30
+
+# Unacknowledged QoS 1/2 messages in flight at the same time
+MAX_INFLIGHT_MESSAGES = 100
+
 # Initialize the Plugin obj output file
 plugin_objects = Plugin_Objects(RESULT_FILE)
 # Create an MD5 hash object
@@ -50,6 +59,10 @@ mqtt_sensors                = []
 mqtt_connected_to_broker    = False
 mqtt_client                 = None  # mqtt client
 topic_root                  = get_setting_value('MQTT_topic_root')
+known_sensors               = None  # sensor hash -> MQTT plugin object, loaded once per run
+topic_digests               = {}    # topic -> [digest, epoch] of the last delivered payload
+pending_publishes           = []    # (topic, digest, MQTTMessageInfo) awaiting delivery
+seen_topics                 = set()  # topics published or skipped as unchanged in this run
 
 
 def main():
@@ -64,7 +77,10 @@ def main():
     db = DB()  # instance of class DB
     db.open()
 
+    load_topic_digests()
+
     mqtt_start(db)
+    flush_publishes()
     mqtt_client.disconnect()
 
     plugin_objects.write_result_file()
@@ -221,7 +237,7 @@ class sensor_config:
         already known. If not, it marks the sensor as new and logs relevant information.
         """
         # Retrieve the plugin object based on the sensor's hash
-        plugObj = getPluginObject({"plugin": "MQTT", "watchedValue3": self.hash})
+        plugObj = get_known_sensors().get(self.hash)
 
         # Check if the plugin object is new
         if not plugObj:
@@ -256,19 +272,23 @@ class sensor_config:
 
 # -------------------------------------------------------------------------------
 
-def publish_mqtt(mqtt_client, topic, message):
+def publish_mqtt(mqtt_client, topic, message, changed_only=True):
     """
     Publishes a message to an MQTT topic using the provided MQTT client.
     If the message is not a string, it is converted to a JSON-formatted string.
     The function retrieves the desired QoS level from settings and logs the publishing process.
     If the client is not connected to the broker, the function logs an error and aborts.
     It attempts to publish the message, retrying until the publish status indicates success.
+    The message is queued without waiting for the broker: flush_publishes() waits for
+    all of them at the end of the run.
     Args:
         mqtt_client: The MQTT client instance used to publish the message.
         topic (str): The MQTT topic to publish to.
         message (Any): The message payload to send. Non-string messages are converted to JSON.
+        changed_only (bool): Skip the message if the same payload was delivered to the topic
+            before (see payload_changed).
     Returns:
-        bool: True if the message was published successfully, False if not connected to the broker.
+        bool: True if the message was published successfully (or is unchanged), False if not connected to the broker.
     """
     status = 1
 
@@ -276,6 +296,13 @@ def publish_mqtt(mqtt_client, topic, message):
     if not isinstance(message, str):
         message = json.dumps(message).replace("'", '"')
 
+    digest = hashlib.md5(message.encode('utf-8')).hexdigest()
+    seen_topics.add(topic)
+
+    if changed_only and not payload_changed(topic, digest):
+        mylog('debug', [f"[{pluginName}] Unchanged, skipping MQTT topic: {topic}"])
+        return True
+
     qos = get_setting_value('MQTT_QOS')
 
     mylog('debug', [f"[{pluginName}] Sending MQTT topic: {topic}",
@@ -306,9 +333,74 @@ def publish_mqtt(mqtt_client, topic, message):
         if status != 0:
             mylog('debug', [f"[{pluginName}] Waiting to reconnect to MQTT broker"])
             time.sleep(0.1)
+
+    pending_publishes.append((topic, digest, result))
     return True
 
 
+# -------------------------------------------------------------------------------
+def payload_changed(topic, digest, now=None):
+    """
+    Returns True if the payload (digest) has to be published to the topic:
+    it differs from the payload delivered last, or that one is older than
+    MQTT_REPUBLISH_HOURS (0 publishes every payload on every run).
+    """
+    entry = topic_digests.get(topic)
+    if not entry or entry[0] != digest:
+        return True
+
+    republish_hours = int(get_setting_value('MQTT_REPUBLISH_HOURS') or 0)
+    now = time.time() if now is None else now
+    return now - entry[1] >= republish_hours * 3600
+
+
+def flush_publishes(timeout=PUBLISH_FLUSH_TIMEOUT):
+    """
+    Waits until the queued messages are delivered (acknowledged by the broker
+    for QoS 1 and 2) and remembers the digests of the delivered payloads.
+    Topics not published in this run (e.g. removed devices) are forgotten.
+    """
+    deadline = time.monotonic() + timeout
+    now = time.time()
+
+    for topic, digest, info in pending_publishes:
+        try:
+            info.wait_for_publish(max(0, deadline - time.monotonic()))
+        except (ValueError, RuntimeError) as e:
+            mylog('verbose', [f"[{pluginName}] Message to {topic} not delivered: {e}"])
+
+        if info.is_published():
+            topic_digests[topic] = [digest, now]
+        else:
+            # Publish it again next run
+            topic_digests.pop(topic, None)
+
+    pending_publishes.clear()
+
+    for topic in [t for t in topic_digests if t not in seen_topics]:
+        del topic_digests[topic]
+
+    save_topic_digests()
+
+
+def load_topic_digests():
+    topic_digests.update(load_plugin_cache(DIGEST_FILE))
+
+
+def save_topic_digests():
+    save_plugin_cache(DIGEST_FILE, topic_digests)
+
+
+def get_known_sensors():
+    """Existing MQTT plugin objects by sensor hash, read once per run."""
+    global known_sensors
+
+    if known_sensors is None:
+        known_sensors = {obj.get("watchedValue3"): obj for obj in getPluginObjects({"plugin": "MQTT"})}
+
+    return known_sensors
+
+
 # ------------------------------------------------------------------------------
 # Create a generic device for overal stats
 def create_generic_device(mqtt_client, deviceId, deviceName):
@@ -332,7 +424,11 @@ def create_sensor(mqtt_client, deviceId, deviceName, sensorType, sensorName, ico
     if sensorConfig.isNew:
 
         # add the sensor to the global list to keep track of succesfully added sensors
-        if publish_mqtt(mqtt_client, sensorConfig.topic, sensorConfig.message):
+        if publish_mqtt(mqtt_client, sensorConfig.topic, sensorConfig.message, changed_only=False):
+            # A (re)created sensor gets its state again
+            topic_digests.pop(sensorConfig.state_topic, None)
+            topic_digests.pop(sensorConfig.json_attr_topic, None)
+
             # hack - delay adding to the queue in case the process is
             # restarted and previous publish processes aborted
             # (it takes ~2s to update a sensor config on the broker)
@@ -415,6 +511,10 @@ def mqtt_create_client():
     mqtt_client.on_connect = on_connect
     mqtt_client.on_disconnect = on_disconnect
 
+    # QoS 1/2: keep many messages in flight instead of waiting for each acknowledgement
+    if get_setting_value('MQTT_QOS'):
+        mqtt_client.max_inflight_messages_set(MAX_INFLIGHT_MESSAGES)
+
     if get_setting_value('MQTT_TLS'):
         mqtt_client.tls_set()
 
@@ -484,6 +584,9 @@ def mqtt_start(db):
 
         mylog('verbose', [f"[{pluginName}]         Estimated delay: ", (sec_delay), 's ', '(', round(sec_delay / 60, 1), 'min)'])
 
+        # devMac -> devName, to resolve the network parent of each device
+        parent_names = {dev["devMac"]: dev["devName"] for dev in devices}
+
         for device in devices:
 
             # # debug statement START 🔻
@@ -519,7 +622,7 @@ def mqtt_start(db):
                 "group": device["devGroup"],
                 "location": device["devLocation"],
                 "network_parent_mac": device["devParentMAC"],
-                "network_parent_name": next((dev["devName"] for dev in devices if dev["devMac"] == device["devParentMAC"]), "")
+                "network_parent_name": parent_names.get(device["devParentMAC"], "")
             }
 
             # bulk update device sensors in home assistant
@@ -601,7 +704,7 @@ def publish_notifications(db, mqtt_client):
         topic = f"{topic_root}/notifications/all"
         mylog('debug', [f"[{pluginName}] Publishing notification GUID {notification['GUID']} to MQTT topic {topic}"])
         try:
-            publish_mqtt(mqtt_client, topic, payload)
+            publish_mqtt(mqtt_client, topic, payload, changed_only=False)
         except Exception as e:
             mylog('minimal', [f"[{pluginName}] ⚠ ERROR publishing MQTT notification GUID {notification['GUID']}: {e}"])
 
@@ -6,6 +6,7 @@ import sys
 import re
 import base64
 import subprocess
+import threading
 
 # Register NetAlertX directories
 INSTALL_PATH = os.getenv('NETALERTX_APP', '/app')
@@ -31,6 +32,16 @@ LOG_PATH = logPath + "/plugins"
 LOG_FILE = os.path.join(LOG_PATH, f"script.{pluginName}.log")
 RESULT_FILE = os.path.join(LOG_PATH, f"last_result.{pluginName}.log")
 
+# One arp-scan result line: IP, MAC and vendor, tab separated
+re_ip = (
+    r"(?P<ip>((2[0-5]|1[0-9]|[0-9])?[0-9]\.){3}((2[0-5]|1[0-9]|[0-9])?[0-9]))"
+)
+re_mac = r"(?P<mac>([0-9a-fA-F]{2}[:-]){5}([0-9a-fA-F]{2}))"
+re_hw = r"(?P<hw>.*)"
+RE_ARPSCAN_LINE = re.compile(rf"{re_ip}\s+{re_mac}\s{re_hw}")
+
+RE_INTERFACE = re.compile(r"(?:--interface=|-I\s*)(\S+)")
+
 
 def main():
     parser = argparse.ArgumentParser(description="Import devices from settings")
@@ -95,55 +106,79 @@ def main():
     return 0
 
 
-def execute_arpscan(userSubnets):
-    # output of possible multiple interfaces
-    arpscan_output = ""
-    devices_list = []
-
-    # scan each interface
-    mylog("verbose", [f"[{pluginName}] userSubnets: ", userSubnets])
-    for interface in userSubnets:
-
-        arpscan_output = execute_arpscan_on_interface(interface)
-
-        mylog("verbose", [f"[{pluginName}] arpscan_output: ", arpscan_output])
+class DeviceCollector:
+    """
+    Thread-safe MAC -> device map fed line by line by the scan threads.
+
+    The first sighting of a MAC fixes the answering interface (subnet
+    entry); later sightings refresh the IP and vendor, so the freshest IP
+    per MAC wins.
+    """
+
+    def __init__(self):
+        self.devices = {}
+        self.lines = 0
+        self._lock = threading.Lock()
+
+    def add_line(self, line, interface):
+        match = RE_ARPSCAN_LINE.search(line)
+        if not match:
+            return
+        ip, mac, hw = match.group("ip"), match.group("mac"), match.group("hw")
+        with self._lock:
+            self.lines += 1
+            device = self.devices.get(mac)
+            if device is None:
+                self.devices[mac] = {"ip": ip, "mac": mac, "hw": hw, "interface": interface}
+            else:
+                device["ip"] = ip
+                device["hw"] = hw
+
+
+def group_by_interface(userSubnets):
+    """Group SCAN_SUBNETS entries by their interface (entries without one share a group)."""
+    groups = {}
+    for entry in userSubnets:
+        match = RE_INTERFACE.search(entry)
+        groups.setdefault(match.group(1) if match else None, []).append(entry)
+    return groups
 
-        # Search IP + MAC + Vendor as regular expresion
-        re_ip = (
-            r"(?P<ip>((2[0-5]|1[0-9]|[0-9])?[0-9]\.){3}((2[0-5]|1[0-9]|[0-9])?[0-9]))"
-        )
-        re_mac = r"(?P<mac>([0-9a-fA-F]{2}[:-]){5}([0-9a-fA-F]{2}))"
-        re_hw = r"(?P<hw>.*)"
-        re_pattern = re.compile(rf"{re_ip}\s+{re_mac}\s{re_hw}")
 
-        devices_list_tmp = [
-            {**device.groupdict(), "interface": interface}
-            for device in re.finditer(re_pattern, arpscan_output)
-        ]
-
-        devices_list += devices_list_tmp
+def execute_arpscan(userSubnets):
+    mylog("verbose", [f"[{pluginName}] userSubnets: ", userSubnets])
 
-    # mylog('debug', ['[ARP Scan] Found: Devices including duplicates ', len(devices_list) ])
+    collector = DeviceCollector()
 
-    # Delete duplicate MAC
-    unique_mac = []
-    unique_devices = []
+    # One thread per interface; entries on the same interface run in turn so
+    # two arp-scans never compete for the same link
+    groups = group_by_interface(userSubnets)
+    threads = [
+        threading.Thread(target=scan_entries, args=(entries, collector), daemon=True)
+        for entries in groups.values()
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
 
-    for device in devices_list:
-        if device["mac"] not in unique_mac:
-            unique_mac.append(device["mac"])
-            unique_devices.append(device)
+    unique_devices = list(collector.devices.values())
 
-    # return list
-    mylog("verbose", [f"[{pluginName}] All devices List len:", len(devices_list)])
-    mylog("verbose", [f"[{pluginName}] Devices List:", devices_list])
+    mylog("verbose", [f"[{pluginName}] Interfaces scanned in parallel: {len(groups)}"])
+    mylog("verbose", [f"[{pluginName}] All devices List len:", collector.lines])
+    mylog("verbose", [f"[{pluginName}] Devices List:", unique_devices])
 
     mylog("verbose", [f"[{pluginName}] Found: Devices without duplicates ", len(unique_devices)],)
 
     return unique_devices
 
 
-def execute_arpscan_on_interface(interface):
+def scan_entries(entries, collector):
+    for interface in entries:
+        execute_arpscan_on_interface(interface, collector)
+
+
+def execute_arpscan_on_interface(interface, collector):
+    """Run arp-scan for one SCAN_SUBNETS entry and feed its output to *collector* as it streams."""
     # Prepare command arguments
     arpscan_args = get_setting_value("ARPSCAN_ARGS").split() + interface.split()
 
@@ -155,32 +190,49 @@ def execute_arpscan_on_interface(interface):
 
     timeout_seconds = int(get_setting_value("ARPSCAN_RUN_TIMEOUT"))
 
-    results = []
     start_time = time.time()
 
     while True:
-        try:
-            result = subprocess.check_output(
-                arpscan_args,
-                universal_newlines=True,
-                timeout=timeout_seconds,
-                stderr=subprocess.STDOUT
-            )
-            results.append(result)
-
-        except subprocess.CalledProcessError as e:
-            mylog("none", [f"[{pluginName}] Scan failed on {interface}:", e.output])
-            result = ""
-        except subprocess.TimeoutExpired:
-            mylog("warning", [f"[{pluginName}] arp-scan timed out after {timeout_seconds}s"],)
-            result = ""
+        run_arpscan(arpscan_args, interface, timeout_seconds, collector)
+
         # stop looping if duration not set or expired
         if scan_duration == 0 or (time.time() - start_time) > scan_duration:
             break
         time.sleep(2)  # short delay between scans
 
-    # concatenate all outputs (for regex parsing)
-    return "\n".join(results)
+
+def run_arpscan(arpscan_args, interface, timeout_seconds, collector):
+    try:
+        proc = subprocess.Popen(
+            arpscan_args,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            universal_newlines=True,
+        )
+    except OSError as e:
+        mylog("none", [f"[{pluginName}] Scan failed on {interface}:", e])
+        return
+
+    # Kill the scan if it hangs; lines read so far are kept
+    timer = threading.Timer(timeout_seconds, proc.kill)
+    timer.start()
+    output = []
+    try:
+        for line in proc.stdout:
+            output.append(line)
+            collector.add_line(line, interface)
+        proc.wait()
+    finally:
+        timed_out = not timer.is_alive()
+        timer.cancel()
+        proc.stdout.close()
+
+    if timed_out:
+        mylog("warning", [f"[{pluginName}] arp-scan timed out after {timeout_seconds}s"],)
+    elif proc.returncode != 0:
+        mylog("none", [f"[{pluginName}] Scan failed on {interface}:", "".join(output)])
+    else:
+        mylog("verbose", [f"[{pluginName}] arpscan_output: ", "".join(output)])
 
 
 # ===============================================================================
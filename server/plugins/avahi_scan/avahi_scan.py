@@ -3,7 +3,9 @@ import os
 import sys
 import socket
 import ipaddress
-from zeroconf import Zeroconf
+import queue
+import threading
+import time
 
 INSTALL_PATH = os.getenv('NETALERTX_APP', '/app')
 sys.path.extend([f"{INSTALL_PATH}/server/plugins", f"{INSTALL_PATH}/server"])
@@ -13,6 +15,7 @@ from logger import mylog, Logger  # noqa: E402 [flake8 lint suppression]
 from const import logPath  # noqa: E402 [flake8 lint suppression]
 from helper import get_setting_value  # noqa: E402 [flake8 lint suppression]
 from models.device_instance import DeviceInstance  # noqa: E402 [flake8 lint suppression]
+from utils.ttl_cache import TTLCache, MISS  # noqa: E402 [flake8 lint suppression]
 import conf  # noqa: E402 [flake8 lint suppression]
 from pytz import timezone  # noqa: E402 [flake8 lint suppression]
 
@@ -26,6 +29,7 @@ pluginName = "AVAHISCAN"
 LOG_PATH = os.path.join(logPath, "plugins")
 LOG_FILE = os.path.join(LOG_PATH, f"script.{pluginName}.log")
 RESULT_FILE = os.path.join(LOG_PATH, f"last_result.{pluginName}.log")
+CACHE_FILE = os.path.join(LOG_PATH, f"cache.{pluginName}.json")
 
 # Initialize plugin results
 plugin_objects = Plugin_Objects(RESULT_FILE)
@@ -37,11 +41,14 @@ plugin_objects = Plugin_Objects(RESULT_FILE)
 
 def resolve_mdns_name(ip: str, timeout: int = 5) -> str:
     """
-    Attempts to resolve a hostname via multicast DNS using the Zeroconf library.
+    Attempts to resolve a hostname via multicast DNS.
+
+    The lookup goes through the system resolver (nss-mdns / avahi-daemon),
+    which applies its own mDNS timeout.
 
     Args:
         ip (str): The IP address to resolve.
-        timeout (int): Timeout in seconds for mDNS resolution.
+        timeout (int): Kept for compatibility; the resolver's timeout applies.
 
     Returns:
         str: Resolved hostname (or empty string if not found).
@@ -56,29 +63,62 @@ def resolve_mdns_name(ip: str, timeout: int = 5) -> str:
         return ""
 
     # Reverse lookup name, e.g. "121.1.168.192.in-addr.arpa"
-    if addr.version == 4:
-        rev_name = ipaddress.ip_address(ip).reverse_pointer
-    else:
-        rev_name = ipaddress.ip_address(ip).reverse_pointer
+    rev_name = addr.reverse_pointer
 
     try:
-        zeroconf = Zeroconf()
         hostname = socket.getnameinfo((ip, 0), socket.NI_NAMEREQD)[0]
-        zeroconf.close()
         if hostname and hostname != ip:
             mylog("debug", [f"[{pluginName}] Found mDNS name (rev_name): {hostname} ({rev_name})"])
             return hostname
     except Exception as e:
-        mylog("debug", [f"[{pluginName}] Zeroconf lookup failed for {ip}: {e}"])
-    finally:
-        try:
-            zeroconf.close()
-        except Exception:
-            pass
+        mylog("debug", [f"[{pluginName}] mDNS lookup failed for {ip}: {e}"])
 
     return ""
 
 
+def resolve_mdns_names(ips, concurrency, deadline):
+    """
+    Resolve *ips* with up to *concurrency* lookups running at once.
+
+    Worker threads are daemons, so lookups still blocked in the resolver
+    when *deadline* (time.monotonic()) passes are abandoned rather than
+    holding up the plugin.
+
+    Returns:
+        dict: {ip: hostname or ""} for the lookups that completed in time.
+    """
+    results = {}
+    if not ips:
+        return results
+
+    todo = queue.Queue()
+    for ip in ips:
+        todo.put(ip)
+    lock = threading.Lock()
+    done = threading.Event()
+
+    def worker():
+        while True:
+            try:
+                ip = todo.get_nowait()
+            except queue.Empty:
+                return
+            hostname = resolve_mdns_name(ip)
+            with lock:
+                results[ip] = hostname
+                if len(results) == len(ips):
+                    done.set()
+
+    for _ in range(max(min(int(concurrency), len(ips)), 1)):
+        threading.Thread(target=worker, daemon=True).start()
+
+    if not done.wait(max(deadline - time.monotonic(), 0)):
+        mylog("verbose", [f"[{pluginName}] Timeout - {len(ips) - len(results)} lookups abandoned"])
+
+    with lock:
+        return dict(results)
+
+
 # =============================================================================
 # Main logic
 # =============================================================================
@@ -86,7 +126,11 @@ def resolve_mdns_name(ip: str, timeout: int = 5) -> str:
 def main():
     mylog("verbose", [f"[{pluginName}] Script started"])
 
-    timeout = get_setting_value("AVAHISCAN_RUN_TIMEOUT")
+    # Leave a little of the plugin run timeout to write the results
+    timeout = int(get_setting_value("AVAHISCAN_RUN_TIMEOUT") or 10)
+    deadline = time.monotonic() + max(timeout - 2, 1)
+    concurrency = int(get_setting_value("AVAHISCAN_CONCURRENCY") or 16)
+    max_backoff = int(get_setting_value("AVAHISCAN_RETRY_BACKOFF") or 0) * 60
     use_mock = "--mockdata" in sys.argv
 
     if use_mock:
@@ -106,11 +150,38 @@ def main():
 
     mylog("verbose", [f"[{pluginName}] Devices count: {len(devices)}"])
 
+    # Hosts that answered recently are served from the cache, hosts that
+    # stayed silent are skipped until their backoff expires
+    cache = TTLCache(CACHE_FILE, max_negative_ttl=max_backoff) if max_backoff > 0 and not use_mock else None
+
+    hostnames = {}
+    targets = []
+    for ip in dict.fromkeys(d["devLastIP"] for d in devices if d.get("devLastIP")):
+        cached = cache.get(ip) if cache is not None else MISS
+        if cached is MISS:
+            targets.append(ip)
+        elif cached:
+            hostnames[ip] = cached
+
+    mylog("verbose", [f"[{pluginName}] Resolving {len(targets)} IPs ({concurrency} at a time), {len(hostnames)} names from cache"])
+
+    found = resolve_mdns_names(targets, concurrency, deadline)
+    hostnames.update({ip: name for ip, name in found.items() if name})
+
+    if cache is not None:
+        # Lookups abandoned at the deadline are neither answers nor failures
+        for ip, name in found.items():
+            if name:
+                cache.set(ip, name)
+            else:
+                cache.set_failed(ip)
+        cache.save()
+
     for device in devices:
         ip = device["devLastIP"]
         mac = device["devMac"]
 
-        hostname = resolve_mdns_name(ip, timeout)
+        hostname = hostnames.get(ip, "")
 
         if hostname:
             plugin_objects.add_object(
@@ -4,6 +4,14 @@ import os
 import argparse
 import sys
 import csv
+import gzip
+import hashlib
+import io
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
 
 # Register NetAlertX directories
 INSTALL_PATH = os.getenv('NETALERTX_APP', '/app')
@@ -12,6 +20,7 @@ sys.path.extend([f"{INSTALL_PATH}/server/plugins", f"{INSTALL_PATH}/server"])
 from logger import mylog, Logger  # noqa: E402 [flake8 lint suppression]
 from helper import get_setting_value   # noqa: E402 [flake8 lint suppression]
 from const import logPath  # noqa: E402 [flake8 lint suppression]
+from plugin_helper import load_plugin_cache, save_plugin_cache  # noqa: E402 [flake8 lint suppression]
 from utils.datetime_utils import timeNowUTC  # noqa: E402 [flake8 lint suppression]
 import conf  # noqa: E402 [flake8 lint suppression]
 from pytz import timezone  # noqa: E402 [flake8 lint suppression]
@@ -28,6 +37,7 @@ pluginName = 'CSVBCKP'
 LOG_PATH = logPath + '/plugins'
 LOG_FILE = os.path.join(LOG_PATH, f'script.{pluginName}.log')
 RESULT_FILE = os.path.join(LOG_PATH, f'last_result.{pluginName}.log')
+STATE_FILE = os.path.join(LOG_PATH, f'cache.{pluginName}.json')
 
 
 def main():
@@ -47,54 +57,155 @@ def main():
 
     mylog('verbose', ['[CSVBCKP] In script'])
 
+    compression = str(get_setting_value('CSVBCKP_compression') or 'none').lower()
+    incremental = bool(get_setting_value('CSVBCKP_incremental'))
+    location = values.location.split('=')[1]
+
+    timestamp = timeNowUTC(as_string=False).strftime('%Y%m%d%H%M%S')
+
     # Connect to the App database
     conn = get_temp_db_connection()
-    cursor = conn.cursor()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT * FROM Devices")
+
+        if incremental:
+            state = load_plugin_cache(STATE_FILE)
+            if state.get('location') == location and state.get('hashes'):
+                write_delta(cursor, location, timestamp, compression, state)
+                return 0
+            mylog('verbose', ['[CSVBCKP] No previous backup in this location, writing a full backup'])
+
+        filename = 'devices.csv' if overwrite else f'devices_{timestamp}.csv'
+        hashes = write_backup(cursor, os.path.join(location, filename), compression)
+    finally:
+        # Close the database connection
+        conn.close()
+
+    if incremental:
+        save_plugin_cache(STATE_FILE, {'location': location, 'hashes': hashes})
 
-    # Execute your SQL query
-    cursor.execute("SELECT * FROM Devices")
+    return 0
 
-    # Get column names
-    columns = [desc[0] for desc in cursor.description]
 
-    if overwrite:
-        filename = 'devices.csv'
+# ===============================================================================
+# Writers
+# ===============================================================================
+def open_output(path, compression):
+    """
+    Open *path* (plus the compression suffix) for writing CSV text.
+
+    Returns:
+        tuple: ``(text file object, final path)``. The file object writes
+        to ``<final path>.tmp``; call ``commit_output`` once it is closed.
+    """
+    if compression == 'zstd' and zstandard is None:
+        mylog('none', ['[CSVBCKP] ⚠ zstd compression needs the "zstandard" package, using gzip'])
+        compression = 'gzip'
+
+    if compression == 'gzip':
+        path += '.gz'
+        fp = gzip.open(f'{path}.tmp', 'wt', encoding='utf-8', newline='')
+    elif compression == 'zstd':
+        path += '.zst'
+        raw = open(f'{path}.tmp', 'wb')
+        fp = io.TextIOWrapper(zstandard.ZstdCompressor().stream_writer(raw), encoding='utf-8', newline='')
     else:
-        timestamp = timeNowUTC(as_string=False).strftime('%Y%m%d%H%M%S')
-        filename = f'devices_{timestamp}.csv'
+        fp = open(f'{path}.tmp', 'w', encoding='utf-8', newline='')
 
-    fullPath = os.path.join(values.location.split('=')[1], filename)
+    return fp, path
 
-    mylog('verbose', ['[CSVBCKP] Writing file ', fullPath])
 
-    # Create a CSV file in the specified location
-    with open(fullPath, 'w', newline='') as csvfile:
-        # Initialize the CSV writer
-        csv_writer = csv.writer(csvfile, delimiter=',', quoting=csv.QUOTE_MINIMAL)
+def commit_output(path):
+    # Atomic: readers see the previous file or the complete new one
+    os.replace(f'{path}.tmp', path)
 
-        # Wrap the header values in double quotes and write the header row
-        csv_writer.writerow(['"' + col + '"' for col in columns])
 
-        # Fetch and write data rows
-        for row in cursor.fetchall():
-            # Wrap each value in double quotes and write the row
-            csv_writer.writerow(['"' + str(value) + '"' for value in row])
+def csv_writer(fp):
+    # Every field quoted, embedded quotes doubled (the format CSV import reads)
+    return csv.writer(fp, delimiter=',', quoting=csv.QUOTE_ALL, lineterminator='\n')
 
-    # Close the database connection
-    conn.close()
 
-    # Open the CSV file for reading
-    with open(fullPath, 'r') as file:
-        data = file.read()
+def row_values(row):
+    return [str(value) for value in row]
 
-    # Replace all occurrences of """ with "
-    data = data.replace('"""', '"')
 
-    # Open the CSV file for writing
-    with open(fullPath, 'w') as file:
-        file.write(data)
+def row_hash(values):
+    return hashlib.sha1('\x1f'.join(values).encode('utf-8')).hexdigest()
 
-    return 0
+
+def write_backup(cursor, path, compression):
+    """
+    Stream every row of *cursor* into a full backup at *path*.
+
+    Returns:
+        dict: devMac -> row hash, the baseline for incremental backups.
+    """
+    columns = [desc[0] for desc in cursor.description]
+    mac_index = columns.index('devMac')
+    hashes = {}
+
+    fp, path = open_output(path, compression)
+    mylog('verbose', ['[CSVBCKP] Writing file ', path])
+    with fp:
+        writer = csv_writer(fp)
+        writer.writerow(columns)
+        for row in cursor:
+            values = row_values(row)
+            writer.writerow(values)
+            hashes[values[mac_index]] = row_hash(values)
+    commit_output(path)
+
+    mylog('verbose', [f'[CSVBCKP] {len(hashes)} devices backed up'])
+    return hashes
+
+
+def write_delta(cursor, location, timestamp, compression, state):
+    """
+    Write the rows that changed since the last backup to
+    ``devices_delta_<timestamp>.csv``; nothing if no row changed.
+
+    The delta has the Devices columns plus a leading ``backupChange``
+    column (``new``, ``changed`` or ``deleted``; deleted rows only carry
+    their MAC).
+    """
+    columns = [desc[0] for desc in cursor.description]
+    mac_index = columns.index('devMac')
+    previous = state['hashes']
+    hashes = {}
+    counts = {'new': 0, 'changed': 0, 'deleted': 0}
+
+    fp, path = open_output(os.path.join(location, f'devices_delta_{timestamp}.csv'), compression)
+    with fp:
+        writer = csv_writer(fp)
+        writer.writerow(['backupChange'] + columns)
+        for row in cursor:
+            values = row_values(row)
+            mac = values[mac_index]
+            digest = hashes[mac] = row_hash(values)
+            old = previous.get(mac)
+            if old == digest:
+                continue
+            change = 'new' if old is None else 'changed'
+            counts[change] += 1
+            writer.writerow([change] + values)
+
+        for mac in previous.keys() - hashes.keys():
+            counts['deleted'] += 1
+            deleted = [''] * len(columns)
+            deleted[mac_index] = mac
+            writer.writerow(['deleted'] + deleted)
+
+    if not any(counts.values()):
+        os.remove(f'{path}.tmp')
+        mylog('verbose', ['[CSVBCKP] No device changed since the last backup'])
+        return None
+
+    commit_output(path)
+    state['hashes'] = hashes
+    save_plugin_cache(STATE_FILE, state)
+    mylog('verbose', [f'[CSVBCKP] Wrote {path}: {counts["new"]} new, {counts["changed"]} changed, {counts["deleted"]} deleted'])
+    return path
 
 
 # ===============================================================================
@@ -14,6 +14,14 @@ import conf  # noqa: E402 [flake8 lint suppression]
 from pytz import timezone  # noqa: E402 [flake8 lint suppression]
 from database import get_temp_db_connection  # noqa: E402 [flake8 lint suppression]
 from models.device_history_instance import DevicesHistoryInstance  # noqa: E402 [flake8 lint suppression]
+from db.db_maintenance import (  # noqa: E402 [flake8 lint suppression]
+    DELETE_BATCH_SIZE,
+    delete_in_batches,
+    enable_incremental_vacuum,
+    incremental_vacuum,
+    optimize,
+)
+from db.db_partitions import archive_partitions, drop_expired_partitions  # noqa: E402 [flake8 lint suppression]
 
 # Make sure the TIMEZONE for logging is correct
 conf.tz = timezone(get_setting_value("TIMEZONE"))
@@ -36,6 +44,9 @@ def main():
     DAYS_TO_KEEP_EVENTS = int(get_setting_value("DAYS_TO_KEEP_EVENTS"))
     CLEAR_NEW_FLAG = get_setting_value("CLEAR_NEW_FLAG")
     DEV_HIST_DAYS = int(get_setting_value("DEV_HIST_DAYS") or 14)
+    VACUUM_SECS = int(get_setting_value("DBCLNP_VACUUM_SECS", 10) or 0)
+    DELETE_BATCH = int(get_setting_value("DBCLNP_DELETE_BATCH", DELETE_BATCH_SIZE) or DELETE_BATCH_SIZE)
+    PARTITION_MONTHS = int(get_setting_value("DBCLNP_PARTITION_MONTHS", 0) or 0)
 
     mylog("verbose", [f"[{pluginName}] In script"])
 
@@ -48,6 +59,9 @@ def main():
         PLUGINS_KEEP_HIST,
         CLEAR_NEW_FLAG,
         DEV_HIST_DAYS,
+        VACUUM_SECS,
+        DELETE_BATCH,
+        PARTITION_MONTHS,
     )
 
     mylog("verbose", [f"[{pluginName}] Cleanup complete"])
@@ -66,9 +80,16 @@ def cleanup_database(
     PLUGINS_KEEP_HIST,
     CLEAR_NEW_FLAG,
     DEV_HIST_DAYS=14,
+    VACUUM_SECS=10,
+    DELETE_BATCH=DELETE_BATCH_SIZE,
+    PARTITION_MONTHS=0,
 ):
     """
     Cleaning out old records from the tables that don't need to keep all data.
+
+    Large tables are trimmed in rowid-range batches and free space is returned
+    with a time-boxed incremental vacuum, so the UI and scans keep running
+    while the cleanup is in progress.
     """
 
     mylog("verbose", [f"[{pluginName}] Upkeep Database: {dbPath}"])
@@ -76,54 +97,81 @@ def cleanup_database(
     conn = get_temp_db_connection()
     cursor = conn.cursor()
 
-    try:
-        cursor.execute("REINDEX;")
-        mylog("verbose", [f"[{pluginName}] REINDEX completed"])
-    except Exception as e:
-        mylog("none", [f"[{pluginName}] REINDEX failed: {e}"])
-
     # -----------------------------------------------------
     # Cleanup Online History
     mylog("verbose", [f"[{pluginName}] Online_History: Delete all but keep latest 150 entries"])
-    cursor.execute(
-        """DELETE from Online_History where "index" not in (
-                            SELECT "index" from Online_History
-                            order by scanDate desc limit 150)"""
+    deleted = delete_in_batches(
+        conn,
+        "Online_History",
+        """"index" NOT IN (SELECT "index" FROM Online_History ORDER BY scanDate DESC LIMIT 150)""",
+        batch_size=DELETE_BATCH,
     )
-    mylog("verbose", [f"[{pluginName}] Online_History deleted rows: {cursor.rowcount}"])
+    mylog("verbose", [f"[{pluginName}] Online_History deleted rows: {deleted}"])
+
+    # -----------------------------------------------------
+    # Monthly partitions: move closed months out of the live Events table,
+    # then expire whole partitions with a DROP
+    if PARTITION_MONTHS > 0:
+        try:
+            moved = archive_partitions(conn, PARTITION_MONTHS)
+            mylog("verbose", [f"[{pluginName}] Partitions: archived {moved['events']} events, {moved['sessions']} sessions"])
+        except Exception as e:
+            mylog("none", [f"[{pluginName}] Partition archiving failed: {e}"])
+    dropped = drop_expired_partitions(conn, DAYS_TO_KEEP_EVENTS)
+    conn.commit()
+    if dropped:
+        mylog("verbose", [f"[{pluginName}] Partitions: dropped {dropped} expired tables"])
 
     # -----------------------------------------------------
     # Cleanup Events
     mylog("verbose", f"[{pluginName}] Events: Delete all older than {str(DAYS_TO_KEEP_EVENTS)} days (DAYS_TO_KEEP_EVENTS setting)")
-    sql = f"""DELETE FROM Events WHERE eveDateTime <= date('now', '-{str(DAYS_TO_KEEP_EVENTS)} day')"""
-    mylog("verbose", [f"[{pluginName}] SQL : {sql}"])
-    cursor.execute(sql)
-    mylog("verbose", [f"[{pluginName}] Events deleted rows: {cursor.rowcount}"])
+    deleted = delete_in_batches(
+        conn,
+        "Events",
+        "eveDateTime <= date('now', ?)",
+        (f"-{int(DAYS_TO_KEEP_EVENTS)} day",),
+        batch_size=DELETE_BATCH,
+    )
+    mylog("verbose", [f"[{pluginName}] Events deleted rows: {deleted}"])
 
     # -----------------------------------------------------
     # Sessions (derived snapshot — trimmed to the same window as Events so the
     # two tables stay in sync without introducing a separate setting)
     mylog("verbose", f"[{pluginName}] Sessions: Delete all older than {str(DAYS_TO_KEEP_EVENTS)} days (reuses DAYS_TO_KEEP_EVENTS)")
-    sql = f"""DELETE FROM Sessions WHERE sesDateTimeConnection <= date('now', '-{str(DAYS_TO_KEEP_EVENTS)} day')"""
-    mylog("verbose", [f"[{pluginName}] SQL : {sql}"])
-    cursor.execute(sql)
-    mylog("verbose", [f"[{pluginName}] Sessions deleted rows: {cursor.rowcount}"])
+    deleted = delete_in_batches(
+        conn,
+        "Sessions",
+        "sesDateTimeConnection <= date('now', ?)",
+        (f"-{int(DAYS_TO_KEEP_EVENTS)} day",),
+        batch_size=DELETE_BATCH,
+    )
+    mylog("verbose", [f"[{pluginName}] Sessions deleted rows: {deleted}"])
 
     # -----------------------------------------------------
     # Plugins_History
+    # The ranking window query is evaluated once into a temp table instead of
+    # once per batch
     mylog("verbose", f"[{pluginName}] Plugins_History: Trim to {str(PLUGINS_KEEP_HIST)} per Plugin")
-    delete_query = f"""DELETE FROM Plugins_History
-                            WHERE "Index" NOT IN (
-                                SELECT "Index"
-                                FROM (
-                                    SELECT "Index",
-                                        ROW_NUMBER() OVER(PARTITION BY plugin ORDER BY dateTimeChanged DESC) AS row_num
-                                    FROM Plugins_History
-                                ) AS ranked_objects
-                                WHERE row_num <= {str(PLUGINS_KEEP_HIST)}
-                            );"""
-    cursor.execute(delete_query)
-    mylog("verbose", [f"[{pluginName}] Plugins_History deleted rows: {cursor.rowcount}"])
+    cursor.execute("DROP TABLE IF EXISTS temp.keep_plugins_history")
+    cursor.execute(
+        """CREATE TEMP TABLE keep_plugins_history AS
+            SELECT "Index"
+            FROM (
+                SELECT "Index",
+                    ROW_NUMBER() OVER(PARTITION BY plugin ORDER BY dateTimeChanged DESC) AS row_num
+                FROM Plugins_History
+            ) AS ranked_objects
+            WHERE row_num <= ?""",
+        (int(PLUGINS_KEEP_HIST),),
+    )
+    deleted = delete_in_batches(
+        conn,
+        "Plugins_History",
+        """"Index" NOT IN (SELECT "Index" FROM temp.keep_plugins_history)""",
+        batch_size=DELETE_BATCH,
+    )
+    cursor.execute("DROP TABLE temp.keep_plugins_history")
+    mylog("verbose", [f"[{pluginName}] Plugins_History deleted rows: {deleted}"])
 
     # -----------------------------------------------------
     # Notifications
@@ -212,22 +260,25 @@ def cleanup_database(
 
     conn.commit()
 
-    # WAL + Vacuum
+    # Return free pages to the file system in short steps instead of a
+    # blocking full VACUUM. Converting an older database to incremental mode
+    # needs one full VACUUM, after that every run is incremental.
+    if VACUUM_SECS > 0:
+        try:
+            if enable_incremental_vacuum(conn):
+                freed = incremental_vacuum(conn, VACUUM_SECS)
+                mylog("verbose", [f"[{pluginName}] Incremental vacuum released {freed} pages (budget {VACUUM_SECS}s)"])
+        except Exception as e:
+            mylog("none", [f"[{pluginName}] Incremental vacuum failed: {e}"])
+
+    # WAL checkpoint (also shrinks the DB file after the incremental vacuum)
     cursor.execute("PRAGMA wal_checkpoint(TRUNCATE);")
-    cursor.execute("PRAGMA wal_checkpoint(FULL);")
     mylog("verbose", [f"[{pluginName}] WAL checkpoint executed to truncate file."])
 
     # Refresh query-planner statistics after bulk deletes so SQLite chooses
-    # the right indexes on the next scan cycle (fixes CPU scaling with DB size)
-    cursor.execute("ANALYZE;")
-    mylog("verbose", [f"[{pluginName}] ANALYZE completed"])
-
-    mylog("verbose", [f"[{pluginName}] Shrink Database"])
-    cursor.execute("VACUUM;")
-
-    # Lightweight incremental ANALYZE at connection close — near-zero cost,
-    # only re-analyzes tables whose statistics have drifted >25%
-    cursor.execute("PRAGMA optimize;")
+    # the right indexes on the next scan cycle (fixes CPU scaling with DB size).
+    # PRAGMA optimize only re-analyzes tables whose statistics drifted.
+    optimize(conn)
     mylog("verbose", [f"[{pluginName}] PRAGMA optimize completed"])
 
     conn.close()
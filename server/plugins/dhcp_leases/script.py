@@ -10,9 +10,9 @@ import chardet
 INSTALL_PATH = os.getenv('NETALERTX_APP', '/app')
 sys.path.extend([f"{INSTALL_PATH}/server/plugins", f"{INSTALL_PATH}/server"])
 
-from plugin_helper import Plugin_Objects, handleEmpty, is_mac  # noqa: E402 [flake8 lint suppression]
+from plugin_helper import Plugin_Objects, handleEmpty, is_mac, load_plugin_cache, save_plugin_cache  # noqa: E402 [flake8 lint suppression]
 from logger import mylog, Logger  # noqa: E402 [flake8 lint suppression]
-from dhcp_leases import DhcpLeases  # noqa: E402 [flake8 lint suppression]
+from dhcp_leases import DhcpLeases, Lease  # noqa: E402 [flake8 lint suppression]
 from helper import get_setting_value  # noqa: E402 [flake8 lint suppression]
 import conf  # noqa: E402 [flake8 lint suppression]
 from const import logPath  # noqa: E402 [flake8 lint suppression]
@@ -29,6 +29,12 @@ pluginName = 'DHCPLSS'
 LOG_PATH = logPath + '/plugins'
 LOG_FILE = os.path.join(LOG_PATH, f'script.{pluginName}.log')
 RESULT_FILE = os.path.join(LOG_PATH, f'last_result.{pluginName}.log')
+STATE_FILE = os.path.join(LOG_PATH, f'cache.{pluginName}.json')
+
+# Bytes handed to chardet, once per file
+ENCODING_SAMPLE_SIZE = 64 * 1024
+# Bytes kept from before the parsed offset to detect in-place rewrites
+MARKER_SIZE = 64
 
 
 # -------------------------------------------------------------
@@ -47,84 +53,225 @@ def main():
     values = parser.parse_args()
 
     plugin_objects = Plugin_Objects(RESULT_FILE)
+    state = load_plugin_cache(STATE_FILE)
+    paths = []
 
     if values.paths:
-        for path in values.paths.split('=')[1].split(','):
-            plugin_objects = get_entries(path, plugin_objects)
+        paths = values.paths.split('=')[1].split(',')
+        for path in paths:
+            plugin_objects = get_entries(path, plugin_objects, state)
             mylog('verbose', [f'[{pluginName}] {len(plugin_objects)} Entries found in "{path}"'])
 
+    # Forget files that are no longer configured
+    save_plugin_cache(STATE_FILE, {path: entry for path, entry in state.items() if path in paths})
+
     plugin_objects.write_result_file()
 
 
 # -------------------------------------------------------------
-def get_entries(path, plugin_objects):
+def get_entries(path, plugin_objects, state=None):
+
+    if state is None:
+        state = {}
 
     # Check if the path exists
     if not os.path.exists(path):
         mylog('none', [f'[{pluginName}] ⚠ ERROR: "{path}" does not exist.'])
+        state.pop(path, None)
     else:
-        # Detect file encoding
-        with open(path, 'rb') as f:
-            result = chardet.detect(f.read())
-
-        # Use the detected encoding
-        encoding = result['encoding']
-
-        # Order: MAC, IP, IsActive, NAME, Hardware
-        # Handle pihole-specific dhcp.leases files
-        if 'pihole' in path:
-            with open(path, 'r', encoding=encoding, errors='replace') as f:
-                for line in f:
-                    row = line.rstrip().split()
-                    if len(row) == 5:
-                        plugin_objects.add_object(
-                            primaryId   = handleEmpty(row[1]),
-                            secondaryId = handleEmpty(row[2]),
-                            watched1    = handleEmpty('True'),
-                            watched2    = handleEmpty(row[3]),
-                            watched3    = handleEmpty(row[4]),
-                            watched4    = handleEmpty('True'),
-                            extra       = handleEmpty(path),
-                            foreignKey  = handleEmpty(row[1])
-                        )
-        elif 'dnsmasq' in path:
+        entry = read_leases(path, state.get(path))
+        state[path] = entry
+
+        # Order: MAC, IP, IsActive, NAME, Hardware, Binding state
+        for mac, (ip, active, hostname, hardware, binding_state) in entry['leases'].items():
+            plugin_objects.add_object(
+                primaryId   = mac,
+                secondaryId = ip,
+                watched1    = active,
+                watched2    = hostname,
+                watched3    = hardware,
+                watched4    = binding_state,
+                extra       = handleEmpty(path),
+                foreignKey  = mac
+            )
+    return plugin_objects
+
+
+# -------------------------------------------------------------
+def lease_format(path):
+    if 'pihole' in path:
+        return 'pihole'
+    if 'dnsmasq' in path:
+        return 'dnsmasq'
+    return 'isc'
+
+
+# -------------------------------------------------------------
+def detect_encoding(path):
+    # A sample is enough to tell the encoding of a leases file
+    with open(path, 'rb') as f:
+        encoding = chardet.detect(f.read(ENCODING_SAMPLE_SIZE))['encoding']
+    return encoding or 'utf-8'
+
+
+# -------------------------------------------------------------
+def can_resume(encoding):
+    # Byte offsets only line up with block ends in ASCII compatible encodings
+    try:
+        return '\n}'.encode(encoding) == b'\n}'
+    except LookupError:
+        return False
+
+
+# -------------------------------------------------------------
+def read_leases(path, entry):
+    """
+    Return the state of ``path``: inode, size, mtime, parsed offset,
+    encoding and the latest lease per MAC (``leases``: MAC -> [IP, active,
+    hostname, hardware, binding state]).
+
+    ISC lease files are append-only journals: only the lease blocks
+    appended since the previous run are parsed and a later block for a MAC
+    replaces the earlier one. pihole and dnsmasq files are rewritten by
+    their server and are re-read only when their size or mtime changed.
+    A rotated (new inode) or truncated file is parsed again from scratch.
+    """
+    stat = os.stat(path)
+    fmt = lease_format(path)
+
+    if entry and (
+        entry.get('format') != fmt
+        or entry.get('inode') != stat.st_ino
+        or stat.st_size < entry.get('offset', 0)
+        or not _prefix_unchanged(path, entry)
+    ):
+        mylog('verbose', [f'[{pluginName}] "{path}" was rotated or truncated, parsing it again'])
+        entry = None
+
+    if not entry:
+        entry = {
+            'format': fmt,
+            'inode': stat.st_ino,
+            'size': -1,
+            'mtime': 0,
+            'offset': 0,
+            'marker': '',
+            'encoding': detect_encoding(path),
+            'leases': {},
+        }
+
+    if fmt == 'isc':
+        parse_isc_leases(path, entry)
+    elif entry['size'] != stat.st_size or entry['mtime'] != stat.st_mtime_ns:
+        entry['leases'] = parse_line_leases(path, fmt, entry['encoding'])
+
+    entry['size'] = stat.st_size
+    entry['mtime'] = stat.st_mtime_ns
+    return entry
+
+
+# -------------------------------------------------------------
+def _prefix_unchanged(path, entry):
+    # The bytes right before the stored offset must still be there,
+    # otherwise the file was rewritten in place
+    marker = bytes.fromhex(entry.get('marker', ''))
+    if not marker:
+        return True
+    with open(path, 'rb') as f:
+        f.seek(entry['offset'] - len(marker))
+        return f.read(len(marker)) == marker
+
+
+# -------------------------------------------------------------
+def extract_lease_properties(config):
+    """
+    Split the body of an ISC lease block into (properties, options, sets)
+    dicts for dhcp_leases.Lease, the way DhcpLeases.get() does:
+
+        hardware ethernet 12:34:56:78:90:ab;  -> properties['hardware']
+        option agent.circuit-id 0:1:2;        -> options['agent.circuit-id']
+        set vendor-class-identifier = "x";    -> sets['vendor-class-identifier']
+    """
+    properties, options, sets = {}, {}, {}
+    for line in config.splitlines():
+        # skip empty & malformed lines
+        if not line or not line.endswith(';') and '; #' not in line:
+            continue
+        line = line[:-1].lstrip()
+
+        if line.startswith('option'):
+            key, _, value = line[7:].partition(' ')
+            options[key] = value
+        elif line.startswith('set'):
+            key, _, value = line[4:].partition(' = "')
+            sets[key] = value[:-1]
+        else:
+            key, _, value = line.partition(' ')
+            properties[key] = value
+
+    return properties, options, sets
+
+
+# -------------------------------------------------------------
+def parse_isc_leases(path, entry):
+    encoding = entry['encoding']
+
+    if not can_resume(encoding):
+        entry['offset'] = 0
+        entry['leases'] = {}
+
+    with open(path, 'rb') as f:
+        f.seek(entry['offset'])
+        data = f.read()
+
+    # Stop after the last complete block, the server may still be writing the next one
+    end = data.rfind(b'\n}')
+    if end == -1:
+        return
+    end += 2
+
+    leases = entry['leases']
+    text = data[:end].decode(encoding, errors='replace')
+    for match in DhcpLeases.regex_leaseblock.finditer(text):
+        properties, options, sets = extract_lease_properties(match.group('config'))
+
+        # skip backup entries without a client, e.g. {'binding': 'state abandoned', ...}
+        if 'hardware' not in properties:
+            continue
+        try:
+            lease = Lease(match.group('ip'), properties=properties, options=options, sets=sets)
+        except (KeyError, ValueError):
+            continue
+
+        # filter out irrelevant entries (e.g. from OPNsense dhcp.leases files)
+        if is_mac(lease.ethernet):
+            leases[handleEmpty(lease.ethernet)] = [
+                handleEmpty(lease.ip),
+                handleEmpty(lease.active),
+                handleEmpty(lease.hostname),
+                handleEmpty(lease.hardware),
+                handleEmpty(lease.binding_state),
+            ]
+
+    entry['offset'] += end
+    entry['marker'] = data[max(0, end - MARKER_SIZE):end].hex()
+
+
+# -------------------------------------------------------------
+def parse_line_leases(path, fmt, encoding):
+    leases = {}
+    with open(path, 'r', encoding=encoding, errors='replace') as f:
+        for line in f:
+            row = line.rstrip().split()
+            # Handle pihole-specific dhcp.leases files
+            if fmt == 'pihole' and len(row) == 5:
+                leases[handleEmpty(row[1])] = [handleEmpty(row[2]), handleEmpty('True'), handleEmpty(row[3]), handleEmpty(row[4]), handleEmpty('True')]
             # [Lease expiry time] [mac address] [ip address] [hostname] [client id, if known]
             # e.g.
             # 1715932537 01:5c:5c:5c:5c:5c:5c 192.168.1.115 ryans-laptop 01:5c:5c:5c:5c:5c:5c
-            with open(path, 'r', encoding=encoding, errors='replace') as f:
-                for line in f:
-                    row = line.rstrip().split()
-                    if len(row) > 3:
-                        plugin_objects.add_object(
-                            primaryId   = handleEmpty(row[1]),
-                            secondaryId = handleEmpty(row[2]),
-                            watched1    = handleEmpty('True'),
-                            watched2    = handleEmpty(row[3]),
-                            watched3    = '',
-                            watched4    = handleEmpty('True'),
-                            extra       = handleEmpty(path),
-                            foreignKey  = handleEmpty(row[1])
-                        )
-        else:
-            #  Handle generic dhcp.leases files
-            leases = DhcpLeases(path)
-            leasesList = leases.get()
-            for lease in leasesList:
-
-                # filter out irrelevant entries (e.g. from OPNsense dhcp.leases files)
-                if is_mac(lease.ethernet):
-
-                    plugin_objects.add_object(
-                        primaryId   = handleEmpty(lease.ethernet),
-                        secondaryId = handleEmpty(lease.ip),
-                        watched1    = handleEmpty(lease.active),
-                        watched2    = handleEmpty(lease.hostname),
-                        watched3    = handleEmpty(lease.hardware),
-                        watched4    = handleEmpty(lease.binding_state),
-                        extra       = handleEmpty(path),
-                        foreignKey  = handleEmpty(lease.ethernet)
-                    )
-    return plugin_objects
+            elif fmt == 'dnsmasq' and len(row) > 3:
+                leases[handleEmpty(row[1])] = [handleEmpty(row[2]), handleEmpty('True'), handleEmpty(row[3]), '', handleEmpty('True')]
+    return leases
 
 
 if __name__ == '__main__':
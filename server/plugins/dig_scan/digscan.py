@@ -12,6 +12,8 @@ from logger import mylog, Logger  # noqa: E402 [flake8 lint suppression]
 from const import logPath  # noqa: E402 [flake8 lint suppression]
 from helper import get_setting_value   # noqa: E402 [flake8 lint suppression]
 from models.device_instance import DeviceInstance  # noqa: E402 [flake8 lint suppression]
+from utils.reverse_dns import ReverseResolver, DEFAULT_CONCURRENCY, DEFAULT_TIMEOUT  # noqa: E402 [flake8 lint suppression]
+from utils.ttl_cache import TTLCache  # noqa: E402 [flake8 lint suppression]
 import conf  # noqa: E402 [flake8 lint suppression]
 from pytz import timezone  # noqa: E402 [flake8 lint suppression]
 
@@ -27,6 +29,7 @@ pluginName = 'DIGSCAN'
 LOG_PATH = logPath + '/plugins'
 LOG_FILE = os.path.join(LOG_PATH, f'script.{pluginName}.log')
 RESULT_FILE = os.path.join(LOG_PATH, f'last_result.{pluginName}.log')
+CACHE_FILE = os.path.join(LOG_PATH, f'cache.{pluginName}.json')
 
 # Initialize the Plugin obj output file
 plugin_objects = Plugin_Objects(RESULT_FILE)
@@ -54,8 +57,20 @@ def main():
     # TEST - below is a WINDOWS host IP
     # execute_name_lookup('192.168.1.121', timeout)
 
+    # Resolve all devices at once in-process, the dig subprocess path is
+    # kept as a fallback
+    native_results = None
+    if (get_setting_value('DIGSCAN_ENGINE') or 'native') == 'native':
+        native_results = resolve_native(devices)
+
     for device in devices:
-        domain_name, dns_server = execute_name_lookup(device['devLastIP'], timeout)
+        if native_results is not None:
+            # dig +short prints one name per line and no server
+            names, _ = native_results.get(device['devLastIP'], ([], ''))
+            domain_name = '\n'.join(names)
+            dns_server = ''
+        else:
+            domain_name, dns_server = execute_name_lookup(device['devLastIP'], timeout)
 
         if domain_name != '':
             plugin_objects.add_object(
@@ -76,6 +91,36 @@ def main():
     return 0
 
 
+# ===============================================================================
+# Native resolver
+# ===============================================================================
+def resolve_native(devices):
+    """
+    Resolve the PTR records of all device IPs concurrently over UDP.
+
+    Returns:
+        dict: {ip: (names, dns_server)}, or None if the native resolver
+        could not be used (the caller then falls back to dig).
+    """
+    ips = [d['devLastIP'] for d in devices if d.get('devLastIP')]
+
+    try:
+        resolver = ReverseResolver(
+            concurrency=get_setting_value('DIGSCAN_CONCURRENCY') or DEFAULT_CONCURRENCY,
+            timeout=get_setting_value('DIGSCAN_QUERY_TIMEOUT') or DEFAULT_TIMEOUT,
+            cache=TTLCache(CACHE_FILE),
+        )
+        results = resolver.resolve_many(ips)
+    except Exception as e:
+        mylog('verbose', [f'[{pluginName}] Native resolver unavailable ({e}), falling back to dig'])
+        return None
+
+    resolver.cache.save()
+    mylog('verbose', [f'[{pluginName}] Native resolver: {len(ips)} IPs, stats: {resolver.stats}'])
+
+    return results
+
+
 # ===============================================================================
 # Execute scan
 # ===============================================================================
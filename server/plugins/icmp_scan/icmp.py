@@ -7,6 +7,8 @@ import subprocess
 import sys
 import re
 import ipaddress
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 # Register NetAlertX directories
 INSTALL_PATH = os.getenv('NETALERTX_APP', '/app')
@@ -18,6 +20,7 @@ from helper import get_setting_value  # noqa: E402 [flake8 lint suppression]
 from const import logPath  # noqa: E402 [flake8 lint suppression]
 from models.device_instance import DeviceInstance  # noqa: E402 [flake8 lint suppression]
 from utils.crypto_utils import string_to_fake_mac  # noqa: E402 [flake8 lint suppression]
+from utils.icmp_sweep import IcmpSweeper, SweepUnavailable, DEFAULT_RATE, DEFAULT_TIMEOUT  # noqa: E402 [flake8 lint suppression]
 import conf  # noqa: E402 [flake8 lint suppression]
 from pytz import timezone  # noqa: E402 [flake8 lint suppression]
 
@@ -33,6 +36,23 @@ LOG_PATH = logPath + '/plugins'
 LOG_FILE = os.path.join(LOG_PATH, f'script.{pluginName}.log')
 RESULT_FILE = os.path.join(LOG_PATH, f'last_result.{pluginName}.log')
 
+# ping statistics, parsed in a single pass. Handles iputils and busybox:
+#   3 packets transmitted, 3 received, 0% packet loss, time 2003ms
+#   3 packets transmitted, 3 packets received, 0% packet loss
+#   rtt min/avg/max/mdev = 0.045/0.056/0.070/0.010 ms
+#   round-trip min/avg/max = 0.080/0.083/0.089 ms
+PING_STATS_RE = re.compile(
+    r"(?P<tx>\d+) packets transmitted, (?P<rx>\d+) (?:packets )?received"
+    r"|(?:rtt|round-trip) min/avg/max(?:/mdev)? = [\d.]+/(?P<avg>[\d.]+)/"
+    r"|(?P<bad>bad address|unknown host|not known)",
+    re.IGNORECASE,
+)
+
+# fping RTT: "(0.10 avg, 0% loss)" with -c, "(0.05 ms)" with -e
+FPING_RTT_RE = re.compile(r"\(([\d.]+) (?:avg|ms)")
+
+DEFAULT_CONCURRENCY = 32
+
 
 def get_device_by_ip(ip, all_devices):
     """Get existing device based on IP"""
@@ -52,11 +72,13 @@ def main():
     regex  = get_setting_value('ICMP_IN_REGEX')
     mode = get_setting_value('ICMP_MODE')
     fakeMac = get_setting_value('ICMP_FAKE_MAC')
+    concurrency = int(get_setting_value('ICMP_CONCURRENCY') or DEFAULT_CONCURRENCY)
     scan_subnets = get_setting_value("SCAN_SUBNETS")
 
     parsed = parse_scan_subnets(scan_subnets)
 
     subnets = [x.subnet for x in parsed]
+    subnet_interfaces = [(x.subnet, x.resolved_interface) for x in parsed]
     interfaces = [
         x.resolved_interface
         for x in parsed
@@ -76,7 +98,14 @@ def main():
     regex_pattern = re.compile(regex)
 
     if mode == "ping":
-        plugin_objects = execute_ping(timeout, args, all_devices, regex_pattern, plugin_objects)
+        plugin_objects = execute_ping(timeout, args, all_devices, regex_pattern, plugin_objects, concurrency)
+
+    elif mode == "native":
+        try:
+            plugin_objects = execute_native(timeout, all_devices, plugin_objects, subnet_interfaces, fakeMac)
+        except SweepUnavailable as e:
+            mylog('none', [f'[{pluginName}] Native sweep unavailable ({e}), falling back to fping'])
+            plugin_objects = execute_fping(timeout, args, all_devices, plugin_objects, subnets, interfaces, fakeMac)
 
     elif mode == "fping":
         plugin_objects = execute_fping(timeout, args, all_devices, plugin_objects, subnets, interfaces, fakeMac)
@@ -91,9 +120,63 @@ def main():
 # ===============================================================================
 # Execute scan
 # ===============================================================================
-def execute_ping(timeout, args, all_devices, regex_pattern, plugin_objects):
+def parse_ping_output(output):
+    """
+    Parse the statistics of a ping run in one pass.
+
+    Returns:
+        tuple: (received, avg_rtt) — received is None if the output has no
+        statistics, 0 for a bad address; avg_rtt is the average round-trip
+        time in ms as a string, or '' if not reported.
+    """
+    received = None
+    avg_rtt = ''
+
+    for match in PING_STATS_RE.finditer(output):
+        if match.group('rx') is not None:
+            received = int(match.group('rx'))
+        elif match.group('avg') is not None:
+            avg_rtt = match.group('avg')
+        elif match.group('bad') is not None:
+            received = 0
+
+    return received, avg_rtt
+
+
+def ping_device(ip, args, timeout):
+    """
+    Ping one IP.
+
+    Returns:
+        tuple: (is_online, avg_rtt, output)
+    """
+    cmd = ["ping"] + args.split() + [ip]
+
+    try:
+        output = subprocess.check_output(
+            cmd, universal_newlines=True, stderr=subprocess.STDOUT, timeout=timeout, text=True
+        )
+        exit_ok = True
+    except subprocess.CalledProcessError as e:
+        # ping exits non-zero when no reply was received
+        output = e.output or ''
+        exit_ok = False
+    except subprocess.TimeoutExpired:
+        mylog("verbose", [f"[{pluginName}] TIMEOUT - process terminated ({ip})"])
+        return False, '', ''
+    except OSError as e:
+        mylog("verbose", [f"[{pluginName}] ⚠ ERROR - {e}"])
+        return False, '', ''
+
+    received, avg_rtt = parse_ping_output(output)
+    is_online = received > 0 if received is not None else exit_ok
+
+    return is_online, avg_rtt, output
+
+
+def execute_ping(timeout, args, all_devices, regex_pattern, plugin_objects, concurrency=DEFAULT_CONCURRENCY):
     """
-    Execute ICMP command on filtered devices.
+    Execute ICMP command on filtered devices, up to *concurrency* at a time.
     """
 
     # Filter devices based on the regex match
@@ -102,68 +185,55 @@ def execute_ping(timeout, args, all_devices, regex_pattern, plugin_objects):
         if regex_pattern.match(device['devLastIP'])
     ]
 
-    mylog('verbose', [f'[{pluginName}] Devices to PING: {len(filtered_devices)}'])
+    mylog('verbose', [f'[{pluginName}] Devices to PING: {len(filtered_devices)} ({concurrency} at a time)'])
 
-    for device in filtered_devices:
+    if not filtered_devices:
+        return plugin_objects
 
-        cmd = ["ping"] + args.split() + [device['devLastIP']]
+    # Parse output using case-insensitive regular expressions
+    # Synology-NAS:/# ping -i 0.5 -c 3 -W 8 -w 9 192.168.1.82
+    # PING 192.168.1.82 (192.168.1.82): 56 data bytes
+    # 64 bytes from 192.168.1.82: seq=0 ttl=64 time=0.080 ms
+    # 64 bytes from 192.168.1.82: seq=1 ttl=64 time=0.081 ms
+    # 64 bytes from 192.168.1.82: seq=2 ttl=64 time=0.089 ms
 
-        output = ""
+    # --- 192.168.1.82 ping statistics ---
+    # 3 packets transmitted, 3 packets received, 0% packet loss
+    # round-trip min/avg/max = 0.080/0.083/0.089 ms
+    # Synology-NAS:/# ping -i 0.5 -c 3 -W 8 -w 9 192.168.1.82a
+    # ping: bad address '192.168.1.82a'
+    # Synology-NAS:/# ping -i 0.5 -c 3 -W 8 -w 9 192.168.1.92
+    # PING 192.168.1.92 (192.168.1.92): 56 data bytes
 
-        # Parse output using case-insensitive regular expressions
-        # Synology-NAS:/# ping -i 0.5 -c 3 -W 8 -w 9 192.168.1.82
-        # PING 192.168.1.82 (192.168.1.82): 56 data bytes
-        # 64 bytes from 192.168.1.82: seq=0 ttl=64 time=0.080 ms
-        # 64 bytes from 192.168.1.82: seq=1 ttl=64 time=0.081 ms
-        # 64 bytes from 192.168.1.82: seq=2 ttl=64 time=0.089 ms
+    # --- 192.168.1.92 ping statistics ---
+    # 3 packets transmitted, 0 packets received, 100% packet loss
 
-        # --- 192.168.1.82 ping statistics ---
-        # 3 packets transmitted, 3 packets received, 0% packet loss
-        # round-trip min/avg/max = 0.080/0.083/0.089 ms
-        # Synology-NAS:/# ping -i 0.5 -c 3 -W 8 -w 9 192.168.1.82a
-        # ping: bad address '192.168.1.82a'
-        # Synology-NAS:/# ping -i 0.5 -c 3 -W 8 -w 9 192.168.1.92
-        # PING 192.168.1.92 (192.168.1.92): 56 data bytes
+    # Each worker only waits on its ping process
+    with ThreadPoolExecutor(max_workers=max(min(int(concurrency), len(filtered_devices)), 1)) as executor:
+        results = executor.map(
+            lambda device: ping_device(device['devLastIP'], args, timeout),
+            filtered_devices
+        )
 
-        # --- 192.168.1.92 ping statistics ---
-        # 3 packets transmitted, 0 packets received, 100% packet loss
+        for device, (is_online, avg_rtt, output) in zip(filtered_devices, results):
 
-        try:
-            output = subprocess.check_output(
-                cmd, universal_newlines=True, stderr=subprocess.STDOUT, timeout=timeout, text=True
-            )
-
-            mylog("verbose", [f"[{pluginName}] DEBUG OUTPUT : {output}"])
-
-            is_online = True
-            if re.search(r"0% packet loss", output, re.IGNORECASE):
-                is_online = True
-            elif re.search(r"bad address", output, re.IGNORECASE):
-                is_online = False
-            elif re.search(r"100% packet loss", output, re.IGNORECASE):
-                is_online = False
+            mylog("debug", [f"[{pluginName}] DEBUG OUTPUT : {output}"])
 
             if is_online:
 
                 plugin_objects.add_object(
-                    # "MAC", "IP", "Name", "Output"
+                    # "MAC", "IP", "Name", "Output", "Mode", "RTT (ms)"
                     primaryId   = device['devMac'],
                     secondaryId = device['devLastIP'],
                     watched1    = device['devName'],
                     watched2    = output.replace('\n', ''),
                     watched3    = 'ping',  # mode
-                    watched4    = '',
+                    watched4    = avg_rtt,
                     extra       = '',
                     foreignKey  = device['devMac']
                 )
 
-            mylog('verbose', [f"[{pluginName}] ip: {device['devLastIP']} is_online: {is_online}"])
-
-        except subprocess.CalledProcessError as e:
-            mylog("verbose", [f"[{pluginName}] ⚠ ERROR - check logs"])
-            mylog("verbose", [f"[{pluginName}]", e.output])
-        except subprocess.TimeoutExpired:
-            mylog("verbose", [f"[{pluginName}] TIMEOUT - process terminated"])
+            mylog('verbose', [f"[{pluginName}] ip: {device['devLastIP']} is_online: {is_online} rtt: {avg_rtt}"])
 
     return plugin_objects
 
@@ -179,7 +249,7 @@ def execute_fping(timeout, args, all_devices, plugin_objects, subnets, interface
 
     device_map = {d["devLastIP"]: d for d in all_devices if d.get("devLastIP")}
     known_ips = list(device_map.keys())
-    online_results = []  # list of tuples (ip, full_line)
+    online_results = []  # list of tuples (ip, full_line, rtt)
 
     # Regex patterns
     ipv4_pattern = r'\d{1,3}(?:\.\d{1,3}){3}'
@@ -217,8 +287,9 @@ def execute_fping(timeout, args, all_devices, plugin_objects, subnets, interface
 
             interface_list = interfaces if interfaces else [None]
 
-            all_results = []
-            seen_ips = set()
+            # ip -> [first line, rtt]; with -c every probe prints a line and
+            # the running average on the last one covers all probes
+            all_results = {}
 
             for interface in interface_list:
 
@@ -271,14 +342,13 @@ def execute_fping(timeout, args, all_devices, plugin_objects, subnets, interface
 
                     if match:
                         ip = match.group(0)
+                        rtt = FPING_RTT_RE.search(line)
 
-                        if ip in seen_ips:
-                            continue
-
-                        seen_ips.add(ip)
-                        all_results.append((ip, line))
+                        result = all_results.setdefault(ip, [line, ''])
+                        if rtt:
+                            result[1] = rtt.group(1)
 
-            return all_results
+            return [(ip, line, rtt) for ip, (line, rtt) in all_results.items()]
 
         return run_family(ipv4_targets, ipv6=False) + run_family(ipv6_targets, ipv6=True)
 
@@ -293,13 +363,13 @@ def execute_fping(timeout, args, all_devices, plugin_objects, subnets, interface
     # Remove duplicates by IP
     seen = set()
     online_results_unique = []
-    for ip, full_line in online_results:
+    for ip, full_line, rtt in online_results:
         if ip not in seen:
             seen.add(ip)
-            online_results_unique.append((ip, full_line))
+            online_results_unique.append((ip, full_line, rtt))
 
     # Process all online IPs
-    for onlineIp, full_line in online_results_unique:
+    for onlineIp, full_line, rtt in online_results_unique:
         if onlineIp in device_map:
             device = device_map[onlineIp]
             plugin_objects.add_object(
@@ -308,7 +378,7 @@ def execute_fping(timeout, args, all_devices, plugin_objects, subnets, interface
                 watched1    = device['devName'],
                 watched2    = full_line,
                 watched3    = 'fping',  # mode
-                watched4    = '',
+                watched4    = rtt,
                 extra       = '',
                 foreignKey  = device['devMac']
             )
@@ -320,7 +390,7 @@ def execute_fping(timeout, args, all_devices, plugin_objects, subnets, interface
                 watched1    = "(unknown)",
                 watched2    = full_line,
                 watched3    = 'fping',  # mode
-                watched4    = '',
+                watched4    = rtt,
                 extra       = '',
                 foreignKey  = fakeMacFromIp
             )
@@ -328,7 +398,86 @@ def execute_fping(timeout, args, all_devices, plugin_objects, subnets, interface
             mylog('verbose', [f"[{pluginName}] Skipping: {onlineIp}, as new IP and ICMP_FAKE_MAC not enabled"])
 
     # log only the IPs
-    mylog('verbose', [f"[{pluginName}] online_ips: {[ip for ip, _ in online_results_unique]}"])
+    mylog('verbose', [f"[{pluginName}] online_ips: {[ip for ip, _, _ in online_results_unique]}"])
+
+    return plugin_objects
+
+
+def execute_native(timeout, all_devices, plugin_objects, subnet_interfaces, fakeMac):
+    """
+    Sweep the subnets and known device IPs with the built-in ICMP sweeper.
+
+    Each subnet is probed on its own interface (if one is configured);
+    known IPs outside every subnet are probed without binding. Targets are
+    generated lazily, so large subnets are never expanded into lists.
+    """
+
+    rate = int(get_setting_value('ICMP_RATE') or DEFAULT_RATE)
+    probe_timeout = float(get_setting_value('ICMP_PROBE_TIMEOUT') or DEFAULT_TIMEOUT)
+    # Leave a little of the plugin run timeout to write the results
+    deadline = time.monotonic() + max(int(timeout) - 2, 1)
+
+    device_map = {d["devLastIP"]: d for d in all_devices if d.get("devLastIP")}
+
+    # Group subnets by interface; known IPs outside every subnet are probed
+    # without binding to an interface
+    groups = {}
+    networks = []
+    for subnet, interface in subnet_interfaces:
+        groups.setdefault(interface, []).append(subnet)
+        try:
+            networks.append(ipaddress.ip_network(subnet, strict=False))
+        except ValueError:
+            pass
+
+    for ip in device_map:
+        try:
+            addr = ipaddress.ip_address(ip)
+        except ValueError:
+            continue
+        if not any(addr.version == net.version and addr in net for net in networks):
+            groups.setdefault(None, []).append(ip)
+
+    alive = {}
+    for interface, targets in groups.items():
+        if not targets:
+            continue
+        sweeper = IcmpSweeper(rate=rate, timeout=probe_timeout, interface=interface)
+        mylog('verbose', [f'[{pluginName}] Native sweep on {interface or "default route"}: {targets[:10]}{" ..." if len(targets) > 10 else ""} at {rate} pps'])
+        for ip, rtt in sweeper.sweep(targets, deadline).items():
+            alive.setdefault(ip, rtt)
+        mylog('verbose', [f'[{pluginName}] Native sweep stats: {sweeper.stats}'])
+
+    for onlineIp, rtt in alive.items():
+        full_line = f"{onlineIp} : {rtt:.3f} ms (native)"
+        if onlineIp in device_map:
+            device = device_map[onlineIp]
+            plugin_objects.add_object(
+                primaryId   = device['devMac'],
+                secondaryId = device['devLastIP'],
+                watched1    = device['devName'],
+                watched2    = full_line,
+                watched3    = 'native',  # mode
+                watched4    = f"{rtt:.3f}",
+                extra       = '',
+                foreignKey  = device['devMac']
+            )
+        elif fakeMac:
+            fakeMacFromIp = string_to_fake_mac(onlineIp)
+            plugin_objects.add_object(
+                primaryId   = fakeMacFromIp,
+                secondaryId = onlineIp,
+                watched1    = "(unknown)",
+                watched2    = full_line,
+                watched3    = 'native',  # mode
+                watched4    = f"{rtt:.3f}",
+                extra       = '',
+                foreignKey  = fakeMacFromIp
+            )
+        else:
+            mylog('verbose', [f"[{pluginName}] Skipping: {onlineIp}, as new IP and ICMP_FAKE_MAC not enabled"])
+
+    mylog('verbose', [f"[{pluginName}] online_ips: {list(alive)}"])
 
     return plugin_objects
 
@@ -13,6 +13,7 @@ from logger import mylog, Logger  # noqa: E402 [flake8 lint suppression]
 from const import logPath  # noqa: E402 [flake8 lint suppression]
 from helper import get_setting_value   # noqa: E402 [flake8 lint suppression]
 from models.device_instance import DeviceInstance  # noqa: E402 [flake8 lint suppression]
+from utils.ttl_cache import TTLCache, MISS  # noqa: E402 [flake8 lint suppression]
 import conf  # noqa: E402 [flake8 lint suppression]
 from pytz import timezone  # noqa: E402 [flake8 lint suppression]
 
@@ -28,6 +29,7 @@ pluginName = 'NBTSCAN'
 LOG_PATH = logPath + '/plugins'
 LOG_FILE = os.path.join(LOG_PATH, f'script.{pluginName}.log')
 RESULT_FILE = os.path.join(LOG_PATH, f'last_result.{pluginName}.log')
+CACHE_FILE = os.path.join(LOG_PATH, f'cache.{pluginName}.json')
 
 # Initialize the Plugin obj output file
 plugin_objects = Plugin_Objects(RESULT_FILE)
@@ -36,8 +38,10 @@ plugin_objects = Plugin_Objects(RESULT_FILE)
 def main():
     mylog('verbose', [f'[{pluginName}] In script'])
 
-    # timeout = get_setting_value('NBLOOKUP_RUN_TIMEOUT')
-    timeout = 20
+    # Leave a little of the plugin run timeout to write the results
+    timeout = max(int(get_setting_value('NBTSCAN_RUN_TIMEOUT') or 10) - 2, 1)
+    query_timeout = int(get_setting_value('NBTSCAN_QUERY_TIMEOUT') or 1000)
+    max_backoff = int(get_setting_value('NBTSCAN_RETRY_BACKOFF') or 0) * 60
 
     # Initialize the Plugin obj output file
     plugin_objects = Plugin_Objects(RESULT_FILE)
@@ -53,18 +57,48 @@ def main():
 
     mylog('verbose', [f'[{pluginName}] Devices count: {len(devices)}'])
 
-    # TEST - below is a WINDOWS host IP
-    # execute_name_lookup('192.168.1.121', timeout)
+    # Hosts that answered recently are served from the cache, hosts that
+    # stayed silent are skipped until their backoff expires
+    cache = TTLCache(CACHE_FILE, max_negative_ttl=max_backoff) if max_backoff > 0 else None
+
+    names = {}
+    targets = []
+    skipped = 0
+    for ip in dict.fromkeys(d['devLastIP'] for d in devices if d.get('devLastIP')):
+        cached = cache.get(ip) if cache is not None else MISS
+        if cached is MISS:
+            targets.append(ip)
+        elif cached:
+            names[ip] = cached
+        else:
+            skipped += 1
+
+    mylog('verbose', [f'[{pluginName}] Querying {len(targets)} IPs, {len(names)} names from cache, {skipped} skipped (backoff)'])
+
+    # One nbtscan run queries all targets in parallel
+    found, completed = execute_batch_lookup(targets, timeout, query_timeout) if targets else ({}, False)
+    names.update(found)
+
+    if cache is not None:
+        for ip, name in found.items():
+            cache.set(ip, name)
+        # Silence only counts when nbtscan ran to the end: after a timeout
+        # or an error the unanswered hosts may not have been queried at all
+        if completed:
+            for ip in targets:
+                if ip not in found:
+                    cache.set_failed(ip)
+        cache.save()
 
     for device in devices:
-        domain_name, dns_server = execute_name_lookup(device['devLastIP'], timeout)
+        domain_name = names.get(device['devLastIP'], '')
 
         if domain_name != '':
             plugin_objects.add_object(
                 # "MAC", "IP", "Server", "Name"
                 primaryId   = device['devMac'],
                 secondaryId = device['devLastIP'],
-                watched1    = dns_server,
+                watched1    = '',
                 watched2    = domain_name,
                 watched3    = '',
                 watched4    = '',
@@ -82,66 +116,84 @@ def main():
 # ===============================================================================
 # Execute scan
 # ===============================================================================
-def execute_name_lookup(ip, timeout):
+def execute_batch_lookup(ips, timeout, query_timeout):
     """
-    Execute the NBTSCAN command on IP.
+    Execute one NBTSCAN command for all IPs (read from stdin).
+
+    nbtscan sends the NetBIOS status queries to all targets at once and
+    waits up to *query_timeout* ms for the answers, so silent hosts cost
+    one timeout in total instead of one each.
+
+    Returns:
+        tuple: ({ip: netbios_name} for the hosts that answered,
+                True if nbtscan ran to completion).
     """
 
-    args = ['nbtscan', ip]
+    args = ['nbtscan', '-t', str(query_timeout), '-f', '-']
 
     # Execute command
     output = ""
+    completed = False
 
     try:
-        mylog('verbose', [f'[{pluginName}] DEBUG CMD :', args])
+        mylog('verbose', [f'[{pluginName}] DEBUG CMD :', args, f'({len(ips)} IPs)'])
 
         # try runnning a subprocess with a forced (timeout)  in case the subprocess hangs
         output = subprocess.check_output(
             args,
-            universal_newlines=True,
+            input='\n'.join(ips) + '\n',
             stderr=subprocess.STDOUT,
             timeout=(timeout),
             text=True
         )
-
-        mylog('verbose', [f'[{pluginName}] DEBUG OUTPUT : {output}'])
-
-        domain_name = ''
-        dns_server = ''
-
-        # Split the output into lines
-        lines = output.splitlines()
-
-        # Look for the first line containing a valid NetBIOS name entry
-        for line in lines:
-            if 'Doing NBT name scan' not in line and ip in line:
-                # Split the line and extract the primary NetBIOS name
-                parts = line.split()
-                if len(parts) > 1:
-                    domain_name = parts[1]
-                else:
-                    mylog('verbose', [f'[{pluginName}] ⚠ ERROR - Unexpected output format: {line}'])
-
-        mylog('verbose', [f'[{pluginName}] Domain Name: {domain_name}'])
-
-        return domain_name, dns_server
+        completed = True
 
     except subprocess.CalledProcessError as e:
-        # An error occurred, handle it
-        # if "NXDOMAIN" in e.output:
-        #     mylog('verbose', [f'[{pluginName}]', f"No PTR record found for IP: {ip}"])
-        # else:
         mylog('verbose', [f'[{pluginName}] ⚠ ERROR - {e.output}'])
+        output = e.output or ''
 
-    except subprocess.TimeoutExpired:
+    except subprocess.TimeoutExpired as e:
         mylog('verbose', [f'[{pluginName}] TIMEOUT - the process forcefully terminated as timeout reached'])
+        # Keep what was printed before the process was killed
+        output = e.output or ''
+        if isinstance(output, bytes):
+            output = output.decode('utf-8', errors='replace')
+
+    except OSError as e:
+        mylog('verbose', [f'[{pluginName}] ⚠ ERROR - {e}'])
+
+    mylog('debug', [f'[{pluginName}] DEBUG OUTPUT : {output}'])
+
+    names = parse_nbtscan_output(output, ips)
 
     if output == "":  # check if the subprocess failed
         mylog('verbose', [f'[{pluginName}] Scan: FAIL - check logs'])
     else:
-        mylog('verbose', [f'[{pluginName}] Scan: SUCCESS'])
+        mylog('verbose', [f'[{pluginName}] Scan: SUCCESS - {len(names)} names'])
+
+    return names, completed
 
-    return '', ''
+
+def parse_nbtscan_output(output, ips):
+    """
+    Parse the nbtscan result table in one pass.
+
+    Result lines start with the IP followed by the primary NetBIOS name;
+    the banner, the table header and lines for other IPs are ignored.
+    """
+    wanted = set(ips)
+    names = {}
+
+    for line in output.splitlines():
+        parts = line.split()
+        if not parts or parts[0] not in wanted:
+            continue
+        if len(parts) > 1:
+            names.setdefault(parts[0], parts[1])
+        else:
+            mylog('verbose', [f'[{pluginName}] ⚠ ERROR - Unexpected output format: {line}'])
+
+    return names
 
 
 # ===============================================================================
@@ -4,14 +4,16 @@ import os
 import argparse
 import sys
 import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 # Register NetAlertX directories
 INSTALL_PATH = os.getenv('NETALERTX_APP', '/app')
 sys.path.extend([f"{INSTALL_PATH}/server/plugins", f"{INSTALL_PATH}/server"])
 
-from plugin_helper import Plugin_Objects  # noqa: E402 [flake8 lint suppression]
+from plugin_helper import Plugin_Objects, load_plugin_cache, save_plugin_cache  # noqa: E402 [flake8 lint suppression]
 from logger import mylog, Logger, append_line_to_file  # noqa: E402 [flake8 lint suppression]
-from utils.datetime_utils import timeNowUTC  # noqa: E402 [flake8 lint suppression]
+from utils.datetime_utils import timeNowUTC, parse_datetime  # noqa: E402 [flake8 lint suppression]
 from helper import get_setting_value   # noqa: E402 [flake8 lint suppression]
 from const import logPath  # noqa: E402 [flake8 lint suppression]
 import conf  # noqa: E402 [flake8 lint suppression]
@@ -28,9 +30,11 @@ pluginName = 'NMAP'
 LOG_PATH = logPath + '/plugins'
 LOG_FILE = os.path.join(LOG_PATH, f'script.{pluginName}.log')
 RESULT_FILE = os.path.join(LOG_PATH, f'last_result.{pluginName}.log')
+# Must not start with "last_result." or the app would read it as a result file
+RESULT_TMP_FILE = os.path.join(LOG_PATH, f'tmp.last_result.{pluginName}.log')
+CACHE_FILE = os.path.join(LOG_PATH, f'cache.{pluginName}.json')
 
-# Initialize the Plugin obj output file
-plugin_objects = Plugin_Objects(RESULT_FILE)
+DEFAULT_CONCURRENCY = 4
 
 
 # -------------------------------------------------------------------------------
@@ -67,39 +71,73 @@ def main():
         ])
         sys.exit(1)
 
+    # Optional: last (re)connection time per device, same order as ips/macs
+    connected_list = safe_split_list(args['connected'], "connected") if 'connected' in args else []
+    if connected_list and len(connected_list) != len(mac_list):
+        mylog('verbose', [f"[{pluginName}] Ignoring connected times: {len(connected_list)} values for {len(mac_list)} MACs"])
+        connected_list = []
+
     # Optional
     timeout = int(args.get("timeout", get_setting_value("NMAP_RUN_TIMEOUT")))
 
     NMAP_ARGS = get_setting_value("NMAP_ARGS")
+    concurrency = int(get_setting_value("NMAP_CONCURRENCY") or DEFAULT_CONCURRENCY)
+    rescan_ttl = int(get_setting_value("NMAP_RESCAN_TTL") or 0)
 
     mylog('debug', [f'[{pluginName}] Parsed IPs: {ip_list}'])
     mylog('debug', [f'[{pluginName}] Parsed MACs: {mac_list}'])
     mylog('debug', [f'[{pluginName}] Timeout: {timeout}'])
     mylog('debug', [f'[{pluginName}] NMAP_ARGS: {NMAP_ARGS}'])
 
-    entries = performNmapScan(
-        ip_list,
-        mac_list,
-        timeout,
-        NMAP_ARGS
+    scheduler = NmapScheduler(
+        cache=load_plugin_cache(CACHE_FILE),
+        nmap_args=NMAP_ARGS,
+        timeout=timeout,
+        concurrency=concurrency,
+        rescan_ttl=rescan_ttl * 60,
     )
 
-    mylog('verbose', [f'[{pluginName}] Total number of ports found by NMAP: ', len(entries)])
+    targets = [
+        (ip, mac, connected_list[i] if connected_list else '')
+        for i, (ip, mac) in enumerate(zip(ip_list, mac_list))
+    ]
 
-    for entry in entries:
+    def on_update(results):
+        # Cache saved with every result update, so a run killed by the
+        # plugin timeout keeps the scans that already completed
+        write_results(results)
+        save_plugin_cache(CACHE_FILE, scheduler.cache)
 
-        plugin_objects.add_object(
-            primaryId   = entry.mac,    # MAC (Device Name)
-            secondaryId = entry.port,   # IP Address (always 0.0.0.0)
-            watched1    = entry.state,  # Device Name
-            watched2    = entry.service,
-            watched3    = entry.ip + ":" + entry.port,
-            watched4    = "",
-            extra       = entry.extra,
-            foreignKey  = entry.mac
-        )
+    scheduler.run(targets, on_update=on_update)
 
-    plugin_objects.write_result_file()
+    mylog('verbose', [f'[{pluginName}] Total number of ports found by NMAP: ', sum(len(e) for e in scheduler.results.values())])
+
+
+# -------------------------------------------------------------------------------
+def write_results(results):
+    """
+    (Re)write the result file with the current ports of every device.
+
+    Written to a temporary file and renamed, so the file the app reads after
+    the run (even one killed by NMAP_RUN_TIMEOUT) is always complete.
+    """
+    objects = Plugin_Objects(RESULT_TMP_FILE)
+
+    for entries in results.values():
+        for entry in entries:
+            objects.add_object(
+                primaryId   = entry.mac,    # MAC (Device Name)
+                secondaryId = entry.port,   # IP Address (always 0.0.0.0)
+                watched1    = entry.state,  # Device Name
+                watched2    = entry.service,
+                watched3    = entry.ip + ":" + entry.port,
+                watched4    = "",
+                extra       = entry.extra,
+                foreignKey  = entry.mac
+            )
+
+    objects.write_result_file()
+    os.replace(RESULT_TMP_FILE, RESULT_FILE)
 
 
 # -------------------------------------------------------------------------------
@@ -148,82 +186,177 @@ def safe_split_list(value, keyname):
 
 
 # -------------------------------------------------------------------------------
-def performNmapScan(deviceIPs, deviceMACs, timeoutSec, args):
+def parse_nmap_output(output):
+    """
+    Extract the ``(port, state, service)`` rows of the port table of an nmap run.
+
+    Returns:
+        tuple: ``(rows, duration)``; duration is the "scanned in" text or "".
+    """
+    rows = []
+    duration = ""
+    startCollecting = False
+    lines = output.split('\n')
+
+    for index, line in enumerate(lines):
+        if 'Starting Nmap' in line:
+            if len(lines) > index + 1 and 'Note: Host seems down' in lines[index + 1]:
+                break  # this entry is empty
+        elif 'PORT' in line and 'STATE' in line and 'SERVICE' in line:
+            startCollecting = True
+        elif startCollecting and len(line.split()) == 3:
+            rows.append(tuple(line.split()))
+        elif 'Nmap done' in line and 'scanned in ' in line:
+            duration = line.split('scanned in ')[1]
+
+    return rows, duration
+
+
+# -------------------------------------------------------------------------------
+def run_nmap(ip, timeoutSec, args):
+    """
+    Run nmap against one host.
+
+    Returns:
+        str: nmap output, "" if nmap failed or timed out.
+    """
+    # prepare arguments from user supplied ones
+    nmapArgs = ['nmap'] + args.split() + [ip]
+
+    try:
+        # try runnning a subprocess with a forced (timeout)  in case the subprocess hangs
+        return subprocess.check_output(
+            nmapArgs,
+            universal_newlines=True,
+            stderr=subprocess.STDOUT,
+            timeout=(float(timeoutSec))
+        )
+    except subprocess.CalledProcessError as e:
+        # An error occured, handle it
+        mylog('none', ["[NMAP Scan] ", e.output])
+        mylog('none', ["[NMAP Scan] ⚠ ERROR - Nmap Scan - check logs ", ip])
+    except subprocess.TimeoutExpired:
+        mylog('verbose', [f'[{pluginName}] Nmap TIMEOUT - the process forcefully terminated as timeout reached for ', ip])
+    except OSError as e:
+        mylog('none', [f'[{pluginName}] ⚠ ERROR - could not run nmap: {e}'])
+    return ""
+
+
+# ===============================================================================
+# Scan cache
+# ===============================================================================
+# ===============================================================================
+# Scheduler
+# ===============================================================================
+class NmapScheduler:
     """
-    run nmap scan on a list of devices
-    discovers open ports and keeps track existing and new open ports
+    Scans devices with up to ``concurrency`` nmap processes at a time.
+
+    The open ports found for each device are cached (``cache``: MAC ->
+    ``{"ip", "scanned", "args", "ports"}``). A device is only scanned again
+    when its cached result is older than ``rescan_ttl`` seconds, or sooner
+    when its IP changed, it (re)connected after the last scan or NMAP_ARGS
+    changed. Devices that are not due report their cached ports, so the
+    app does not mark them as missing.
     """
 
-    # collect ports / new Nmap Entries
-    newEntriesTmp = []
-
-    if len(deviceIPs) > 0:
-
-        devTotal = len(deviceIPs)
-
-        mylog('verbose', [f'[{pluginName}] Scan: Nmap for max ', str(timeoutSec), 's (' + str(round(int(timeoutSec) / 60, 1)) + 'min) per device'])
-        mylog('verbose', ["[NMAP Scan] Estimated max delay: ", (devTotal * int(timeoutSec)), 's ', '(', round((devTotal * int(timeoutSec)) / 60, 1) , 'min)'])
-
-        devIndex = 0
-        for ip in deviceIPs:
-            # Execute command
-            output = ""
-            # prepare arguments from user supplied ones
-            nmapArgs = ['nmap'] + args.split() + [ip]
-
-            progress = ' (' + str(devIndex + 1) + '/' + str(devTotal) + ')'
-
-            try:
-                # try runnning a subprocess with a forced (timeout)  in case the subprocess hangs
-                output = subprocess.check_output(
-                    nmapArgs,
-                    universal_newlines=True,
-                    stderr=subprocess.STDOUT,
-                    timeout=(float(timeoutSec))
-                )
-            except subprocess.CalledProcessError as e:
-                # An error occured, handle it
-                mylog('none', ["[NMAP Scan] ", e.output])
-                mylog('none', ["[NMAP Scan] ⚠ ERROR - Nmap Scan - check logs", progress])
-            except subprocess.TimeoutExpired:
-                mylog('verbose', [f'[{pluginName}] Nmap TIMEOUT - the process forcefully terminated as timeout reached for ', ip, progress])
-
-            if output == "":  # check if the subprocess failed
-                mylog('minimal', [f'[{pluginName}] Nmap FAIL for ', ip, progress, ' check logs for details'])
-            else:
-                mylog('verbose', [f'[{pluginName}] Nmap SUCCESS for ', ip, progress])
-
-            #  check the last run output
-            newLines = output.split('\n')
-
-            # regular logging
-            for line in newLines:
-                append_line_to_file(logPath + '/app_nmap.log', line + '\n')
-
-            index = 0
-            startCollecting = False
-            duration = ""
-            newPortsPerDevice = 0
-            for line in newLines:
-                if 'Starting Nmap' in line:
-                    if len(newLines) > index + 1 and 'Note: Host seems down' in newLines[index + 1]:
-                        break  # this entry is empty
-                elif 'PORT' in line and 'STATE' in line and 'SERVICE' in line:
-                    startCollecting = True
-                elif 'PORT' in line and 'STATE' in line and 'SERVICE' in line:
-                    startCollecting = False  # end reached
-                elif startCollecting and len(line.split()) == 3:
-                    newEntriesTmp.append(nmap_entry(ip, deviceMACs[devIndex], timeNowUTC(), line.split()[0], line.split()[1], line.split()[2]))
-                    newPortsPerDevice += 1
-                elif 'Nmap done' in line:
-                    duration = line.split('scanned in ')[1]
-
-            mylog('verbose', [f'[{pluginName}] {newPortsPerDevice} ports found on {deviceMACs[devIndex]} after {duration}'])
-
-            index += 1
-            devIndex += 1
-
-        return newEntriesTmp
+    def __init__(self, cache, nmap_args, timeout, concurrency=DEFAULT_CONCURRENCY, rescan_ttl=0):
+        self.cache = cache
+        self.nmap_args = nmap_args
+        self.timeout = timeout
+        self.concurrency = max(int(concurrency), 1)
+        self.rescan_ttl = max(int(rescan_ttl), 0)
+        # MAC -> [nmap_entry]; what the result file currently contains
+        self.results = {}
+
+    def is_due(self, ip, mac, connected, now):
+        """True if *mac* has to be scanned in this run (``now``: 'YYYY-MM-DD HH:MM:SS' UTC)."""
+        cached = self.cache.get(mac)
+        if not cached or not self.rescan_ttl:
+            return True
+        if cached.get('ip') != ip or cached.get('args') != self.nmap_args:
+            return True
+        scanned = cached.get('scanned', '')
+        # Reconnected since the last scan: open ports may have changed
+        if connected and connected > scanned:
+            return True
+        try:
+            age = (parse_datetime(now) - parse_datetime(scanned)).total_seconds()
+        except (TypeError, ValueError):
+            return True
+        return age >= self.rescan_ttl
+
+    def _cached_entries(self, ip, mac):
+        cached = self.cache.get(mac) or {}
+        return [
+            nmap_entry(ip, mac, cached.get('scanned', ''), port, state, service)
+            for port, state, service in cached.get('ports', [])
+        ]
+
+    def run(self, targets, on_update=None):
+        """
+        Scan the due devices of *targets* (``(ip, mac, connected)`` tuples).
+
+        ``on_update(results)`` is called with the cached ports first, then
+        as scans complete (at most once a second) and once at the end, so
+        the results are merged into the result file incrementally.
+        """
+        now = timeNowUTC()
+        due = []
+        for ip, mac, connected in targets:
+            if self.is_due(ip, mac, connected, now):
+                due.append((ip, mac))
+            # Until (unless) a fresh scan replaces them
+            self.results[mac] = self._cached_entries(ip, mac)
+
+        # Forget devices that are gone
+        macs = {mac for _, mac, _ in targets}
+        for mac in list(self.cache):
+            if mac not in macs:
+                del self.cache[mac]
+
+        mylog('verbose', [f'[{pluginName}] Scan: {len(due)} of {len(targets)} devices due, up to {self.concurrency} at a time, max {self.timeout}s per device'])
+
+        if on_update:
+            on_update(self.results)
+
+        if not due:
+            return self.results
+
+        devTotal = len(due)
+        done = 0
+        last_update = time.monotonic()
+        with ThreadPoolExecutor(max_workers=min(self.concurrency, devTotal)) as executor:
+            futures = {executor.submit(run_nmap, ip, self.timeout, self.nmap_args): (ip, mac) for ip, mac in due}
+            for future in as_completed(futures):
+                ip, mac = futures[future]
+                output = future.result()
+                done += 1
+                progress = ' (' + str(done) + '/' + str(devTotal) + ')'
+
+                if output == "":  # check if the subprocess failed
+                    # Keep reporting the cached ports; retried next run
+                    mylog('minimal', [f'[{pluginName}] Nmap FAIL for ', ip, progress, ' check logs for details'])
+                    continue
+
+                # regular logging
+                for line in output.split('\n'):
+                    append_line_to_file(logPath + '/app_nmap.log', line + '\n')
+
+                rows, duration = parse_nmap_output(output)
+                scanned = timeNowUTC()
+                self.results[mac] = [nmap_entry(ip, mac, scanned, port, state, service) for port, state, service in rows]
+                self.cache[mac] = {'ip': ip, 'scanned': scanned, 'args': self.nmap_args, 'ports': [list(r) for r in rows]}
+
+                mylog('verbose', [f'[{pluginName}] Nmap SUCCESS for ', ip, progress, f': {len(rows)} ports found on {mac} after {duration}'])
+
+                if on_update and time.monotonic() - last_update >= 1:
+                    on_update(self.results)
+                    last_update = time.monotonic()
+
+        if on_update:
+            on_update(self.results)
+        return self.results
 
 
 # ===============================================================================
@@ -16,6 +16,7 @@ from logger import mylog, Logger  # noqa: E402 [flake8 lint suppression]
 from utils.datetime_utils import timeNowUTC  # noqa: E402 [flake8 lint suppression]
 from const import default_tz, fullConfPath  # noqa: E402 [flake8 lint suppression]
 from helper import get_setting_value  # noqa: E402 [flake8 lint suppression]
+from utils.plugin_results import encode_result_row, encode_text_row  # noqa: E402 [flake8 lint suppression]
 
 # Make sure log level is initialized correctly
 Logger(get_setting_value('LOG_LEVEL'))
@@ -264,6 +265,43 @@ def normalize_mac(mac):
     return ':'.join(normalized_parts)
 
 
+# -------------------------------------------------------------------
+# JSON state a plugin keeps between runs (e.g. log/plugins/cache.<PREFIX>.json)
+def load_plugin_cache(path):
+    """
+    Load the dict saved at *path*; {} if the file is missing or unreadable.
+    """
+    try:
+        with open(path) as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def save_plugin_cache(path, data):
+    """
+    Atomically replace the file at *path* with *data* as JSON. A failure is
+    logged and leaves the previous file in place.
+
+    :return: True if the file was written.
+    """
+    # Unique per process, so concurrent runs never write to the same temp file
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    try:
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+        return True
+    except (OSError, TypeError, ValueError) as e:
+        mylog('verbose', [f'[Plugins] Could not save {path}: {e}'])
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        return False
+
+
 # -------------------------------------------------------------------
 class Plugin_Object:
     """
@@ -305,12 +343,9 @@ class Plugin_Object:
         self.helpVal3 = helpVal3 or ""
         self.helpVal4 = helpVal4 or ""
 
-    def write(self):
-        """
-        Write the object details as a string in the
-        format required to write the result file.
-        """
-        line = "{}|{}|{}|{}|{}|{}|{}|{}|{}|{}|{}|{}|{}\n".format(
+    def columns(self):
+        """The object's values in the order of the result file columns."""
+        return [
             self.primaryId,
             self.secondaryId,
             self.created,
@@ -323,9 +358,15 @@ class Plugin_Object:
             self.helpVal1,
             self.helpVal2,
             self.helpVal3,
-            self.helpVal4
-        )
-        return line
+            self.helpVal4,
+        ]
+
+    def write(self):
+        """
+        Write the object details as a string in the
+        pipe-delimited text format of the result file.
+        """
+        return encode_text_row(self.columns())
 
 
 class Plugin_Objects:
@@ -372,9 +413,10 @@ class Plugin_Objects:
         )
 
     def write_result_file(self):
+        # JSON lines, see utils/plugin_results.py
         with open(self.result_file, mode="w") as fp:
             for obj in self.objects:
-                fp.write(obj.write())
+                fp.write(encode_result_row(obj.columns()))
 
     def __add__(self, other):
         if isinstance(other, Plugin_Objects):
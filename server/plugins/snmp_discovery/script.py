@@ -5,12 +5,15 @@ import subprocess
 import argparse
 import os
 import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 # Register NetAlertX directories
 INSTALL_PATH = os.getenv('NETALERTX_APP', '/app')
 sys.path.extend([f"{INSTALL_PATH}/server/plugins", f"{INSTALL_PATH}/server"])
 
-from plugin_helper import Plugin_Objects, handleEmpty, normalize_mac  # noqa: E402 [flake8 lint suppression]
+from plugin_helper import Plugin_Objects, handleEmpty, normalize_mac, load_plugin_cache, save_plugin_cache  # noqa: E402 [flake8 lint suppression]
 from logger import mylog, Logger  # noqa: E402 [flake8 lint suppression]
 from helper import get_setting_value   # noqa: E402 [flake8 lint suppression]
 from const import logPath  # noqa: E402 [flake8 lint suppression]
@@ -27,6 +30,11 @@ pluginName = "SNMPDSC"
 
 LOG_PATH = logPath + '/plugins'
 RESULT_FILE = os.path.join(LOG_PATH, f'last_result.{pluginName}.log')
+BACKOFF_FILE = os.path.join(LOG_PATH, f'cache.{pluginName}.json')
+
+# Unreachable routers are skipped for 5 min, doubling up to 6 h
+BACKOFF_BASE = 300
+BACKOFF_MAX = 6 * 3600
 
 
 def main():
@@ -45,6 +53,8 @@ def main():
     values = parser.parse_args()
 
     timeoutSetting = get_setting_value("SNMPDSC_RUN_TIMEOUT")
+    concurrency = get_setting_value("SNMPDSC_concurrency")
+    use_bulk = get_setting_value("SNMPDSC_bulkwalk")
 
     plugin_objects = Plugin_Objects(RESULT_FILE)
 
@@ -56,110 +66,187 @@ def main():
         else:
             commands = [snmpWalkCmds]
 
-        for cmd in commands:
-            mylog('verbose', [f"[{pluginName}] Router snmpwalk command: ", cmd])
-            # split the string, remove white spaces around each item, and exclude any empty strings
-            snmpwalkArgs = [arg.strip() for arg in cmd.split(' ') if arg.strip()]
-
-            # Execute N probes and insert in list
-            probes = 1  # N probes
-
-            for _ in range(probes):
-                output = subprocess.check_output(
-                    snmpwalkArgs,
-                    universal_newlines=True,
-                    stderr=subprocess.STDOUT,
-                    timeout=(timeoutSetting)
-                )
-
-                mylog('verbose', [f"[{pluginName}] output: ", output])
-
-                lines = output.split('\n')
-
-                for line in lines:
-
-                    tmpSplt = line.split('"')
-
-                    # Expected Format:
-                    # mib-2.3.1.1.2.15.1.192.168.1.14 "2C F4 32 18 61 43 "
-                    if len(tmpSplt) == 3:
-
-                        ipStr = tmpSplt[0].split('.')[-4:]  # Get the last 4 elements to extract the IP
-                        macStr = tmpSplt[1].strip().split(' ')  # Remove leading/trailing spaces from MAC
-
-                        if len(ipStr) == 4:
-                            macAddress = ':'.join(macStr)
-                            ipAddress = '.'.join(ipStr)
-
-                            mylog('verbose', [f"[{pluginName}] IP: {ipAddress} MAC: {macAddress}"])
-
-                            plugin_objects.add_object(
-                                primaryId   = handleEmpty(macAddress),
-                                secondaryId = handleEmpty(ipAddress.strip()),  # Remove leading/trailing spaces from IP
-                                watched1    = '(unknown)',
-                                watched2    = handleEmpty(snmpwalkArgs[6]),  # router IP
-                                extra       = handleEmpty(line),
-                                foreignKey  = handleEmpty(macAddress)  # Use the primary ID as the foreign key
-                            )
-                        else:
-                            mylog('verbose', [f"[{pluginName}] ipStr does not seem to contain a valid IP:", ipStr])
-
-                    # Expected Format:
-                    # IP-MIB::ipNetToMediaPhysAddress.17.10.10.3.202 = STRING: f8:81:1a:ef:ef:ef
-                    elif "ipNetToMediaPhysAddress" in line and "=" in line and "STRING:" in line:
-
-                        # Split on "=" → ["IP-MIB::ipNetToMediaPhysAddress.xxx.xxx.xxx.xxx ", " STRING: aa:bb:cc:dd:ee:ff"]
-                        left, right = line.split("=", 1)
-
-                        # Extract the MAC (right side)
-                        macAddress = right.split("STRING:")[-1].strip()
-                        macAddress = normalize_mac(macAddress)
-
-                        # Extract IP address from the left side
-                        # tail of the OID: last 4 integers = IPv4 address
-                        oid_parts = left.strip().split('.')
-                        ip_parts  = oid_parts[-4:]
-                        ipAddress = ".".join(ip_parts)
-
-                        mylog('verbose', [f"[{pluginName}] (fallback) IP: {ipAddress} MAC: {macAddress}"])
-
-                        plugin_objects.add_object(
-                            primaryId   = handleEmpty(macAddress),
-                            secondaryId = handleEmpty(ipAddress),
-                            watched1    = '(unknown)',
-                            watched2    = handleEmpty(snmpwalkArgs[6]),
-                            extra       = handleEmpty(line),
-                            foreignKey  = handleEmpty(macAddress)
-                        )
-
-                        continue
-
-                    # Expected Format:
-                    # ipNetToMediaPhysAddress[3][192.168.1.9] 6C:6C:6C:6C:6C:b6C1
-                    elif line.startswith('ipNetToMediaPhysAddress'):
-                        # Format: snmpwalk -OXsq output
-                        parts = line.split()
-                        if len(parts) == 2:
-
-                            ipAddress  = parts[0].split('[')[-1][:-1]
-                            macAddress = normalize_mac(parts[1])
-
-                            mylog('verbose', [f"[{pluginName}] IP: {ipAddress} MAC: {macAddress}"])
-
-                            plugin_objects.add_object(
-                                primaryId   = handleEmpty(macAddress),
-                                secondaryId = handleEmpty(ipAddress.strip()),
-                                watched1    = '(unknown)',
-                                watched2    = handleEmpty(snmpwalkArgs[6]),
-                                extra       = handleEmpty(line),
-                                foreignKey  = handleEmpty(macAddress)
-                            )
+        backoff = load_plugin_cache(BACKOFF_FILE)
+        entries = walk_routers(commands, timeoutSetting, concurrency, backoff, use_bulk)
+        save_plugin_cache(BACKOFF_FILE, backoff)
+
+        for macAddress, ipAddress, router, line in entries:
+            plugin_objects.add_object(
+                primaryId   = handleEmpty(macAddress),
+                secondaryId = handleEmpty(ipAddress.strip()),  # Remove leading/trailing spaces from IP
+                watched1    = '(unknown)',
+                watched2    = handleEmpty(router),  # router IP
+                extra       = handleEmpty(line),
+                foreignKey  = handleEmpty(macAddress)  # Use the primary ID as the foreign key
+            )
 
     mylog('verbose', [f"[{pluginName}] Entries found: ", len(plugin_objects)])
 
     plugin_objects.write_result_file()
 
 
+# -------------------------------------------------------------------------------
+def parse_line(line):
+    """Return (MAC, IP) for an ARP table line of snmp(bulk)walk, None otherwise."""
+
+    tmpSplt = line.split('"')
+
+    # Expected Format:
+    # mib-2.3.1.1.2.15.1.192.168.1.14 "2C F4 32 18 61 43 "
+    if len(tmpSplt) == 3:
+
+        ipStr = tmpSplt[0].split('.')[-4:]  # Get the last 4 elements to extract the IP
+        macStr = tmpSplt[1].strip().split(' ')  # Remove leading/trailing spaces from MAC
+
+        if len(ipStr) == 4:
+            return ':'.join(macStr), '.'.join(ipStr).strip()
+
+        mylog('verbose', [f"[{pluginName}] ipStr does not seem to contain a valid IP:", ipStr])
+
+    # Expected Format:
+    # IP-MIB::ipNetToMediaPhysAddress.17.10.10.3.202 = STRING: f8:81:1a:ef:ef:ef
+    elif "ipNetToMediaPhysAddress" in line and "=" in line and "STRING:" in line:
+
+        # Split on "=" → ["IP-MIB::ipNetToMediaPhysAddress.xxx.xxx.xxx.xxx ", " STRING: aa:bb:cc:dd:ee:ff"]
+        left, right = line.split("=", 1)
+
+        # Extract the MAC (right side)
+        macAddress = normalize_mac(right.split("STRING:")[-1].strip())
+
+        # Extract IP address from the left side
+        # tail of the OID: last 4 integers = IPv4 address
+        ip_parts = left.strip().split('.')[-4:]
+        return macAddress, ".".join(ip_parts)
+
+    # Expected Format:
+    # ipNetToMediaPhysAddress[3][192.168.1.9] 6C:6C:6C:6C:6C:b6C1
+    elif line.startswith('ipNetToMediaPhysAddress'):
+        # Format: snmpwalk -OXsq output
+        parts = line.split()
+        if len(parts) == 2:
+            return normalize_mac(parts[1]), parts[0].split('[')[-1][:-1].strip()
+
+    return None
+
+
+# -------------------------------------------------------------------------------
+def walk_args(cmd, use_bulk=True):
+    # split the string, remove white spaces around each item, and exclude any empty strings
+    args = [arg.strip() for arg in cmd.split(' ') if arg.strip()]
+
+    # GETBULK fetches many table rows per request; SNMPv1 has no GETBULK
+    if use_bulk and args and os.path.basename(args[0]) == 'snmpwalk' and '1' not in _snmp_versions(args):
+        args[0] = os.path.join(os.path.dirname(args[0]), 'snmpbulkwalk')
+
+    return args
+
+
+def _snmp_versions(args):
+    versions = [args[i + 1] for i, arg in enumerate(args[:-1]) if arg == '-v']
+    versions += [arg[2:] for arg in args if arg.startswith('-v') and len(arg) > 2]
+    return versions
+
+
+def router_of(args):
+    # Position of the agent address in the documented command layout
+    return args[6] if len(args) > 6 else args[-1]
+
+
+# -------------------------------------------------------------------------------
+def walk(args, timeout):
+    """
+    Run one walk and parse its output line by line while it streams in.
+
+    Returns (entries, error): the (MAC, IP, line) tuples found and None, or
+    the tuples found before the walk failed or timed out and the error.
+    """
+    entries = []
+    try:
+        proc = subprocess.Popen(args, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, universal_newlines=True)
+    except OSError as e:
+        return entries, e
+
+    timed_out = threading.Event()
+
+    def kill():
+        timed_out.set()
+        proc.kill()
+
+    timer = threading.Timer(timeout, kill)
+    timer.start()
+    try:
+        for line in proc.stdout:
+            line = line.rstrip('\n')
+            parsed = parse_line(line)
+            if parsed:
+                entries.append((parsed[0], parsed[1], line))
+        returncode = proc.wait()
+    finally:
+        timer.cancel()
+        proc.stdout.close()
+
+    if timed_out.is_set():
+        return entries, subprocess.TimeoutExpired(args, timeout)
+    if returncode != 0:
+        return entries, subprocess.CalledProcessError(returncode, args)
+    return entries, None
+
+
+# -------------------------------------------------------------------------------
+def walk_routers(commands, timeout, concurrency=4, backoff=None, use_bulk=True, now=None):
+    """
+    Walk the ARP tables of all routers, up to ``concurrency`` at a time.
+
+    ``backoff`` (router -> ``{"failures", "retry_after"}``) is updated in
+    place: a router that fails or times out is skipped until
+    ``retry_after``, which doubles with each consecutive failure. A
+    successful walk clears its entry.
+
+    Returns a list of (MAC, IP, router, line) tuples.
+    """
+    backoff = {} if backoff is None else backoff
+    now = time.time() if now is None else now
+
+    jobs = []
+    for cmd in commands:
+        args = walk_args(cmd, use_bulk)
+        if not args:
+            continue
+        router = router_of(args)
+        retry_after = backoff.get(router, {}).get('retry_after', 0)
+        if retry_after > now:
+            mylog('verbose', [f"[{pluginName}] Skipping unreachable router {router} for {int(retry_after - now)}s"])
+            continue
+        jobs.append((router, args))
+
+    results = []
+    if not jobs:
+        return results
+
+    with ThreadPoolExecutor(max_workers=max(1, min(int(concurrency or 1), len(jobs)))) as executor:
+        futures = {executor.submit(walk, args, timeout): (router, args) for router, args in jobs}
+
+        for future in as_completed(futures):
+            router, args = futures[future]
+            entries, error = future.result()
+
+            mylog('verbose', [f"[{pluginName}] Router {' '.join(args)}: {len(entries)} entries"])
+
+            if error is None:
+                backoff.pop(router, None)
+            else:
+                failures = backoff.get(router, {}).get('failures', 0) + 1
+                delay = min(BACKOFF_BASE * 2 ** (failures - 1), BACKOFF_MAX)
+                backoff[router] = {'failures': failures, 'retry_after': now + delay}
+                mylog('none', [f"[{pluginName}] ⚠ ERROR: Walking {router} failed ({error}), retrying in {delay}s"])
+
+            for macAddress, ipAddress, line in entries:
+                mylog('verbose', [f"[{pluginName}] IP: {ipAddress} MAC: {macAddress}"])
+                results.append((macAddress, ipAddress, router, line))
+
+    return results
+
+
 # BEGIN
 if __name__ == '__main__':
     main()
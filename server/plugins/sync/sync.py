@@ -6,19 +6,26 @@ import requests
 import json
 import base64
 import binascii
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 
 # Define the installation path and extend the system path for plugin imports
 INSTALL_PATH = os.getenv('NETALERTX_APP', '/app')
 sys.path.extend([f"{INSTALL_PATH}/server/plugins", f"{INSTALL_PATH}/server"])
 
-from plugin_helper import Plugin_Objects  # noqa: E402 [flake8 lint suppression]
+from plugin_helper import Plugin_Objects, load_plugin_cache, save_plugin_cache  # noqa: E402 [flake8 lint suppression]
 from utils.plugin_utils import get_plugins_configs, decode_and_rename_files  # noqa: E402 [flake8 lint suppression]
 from logger import mylog, Logger  # noqa: E402 [flake8 lint suppression]
 from const import logPath  # noqa: E402 [flake8 lint suppression]
 from helper import get_setting_value  # noqa: E402 [flake8 lint suppression]
 from utils.datetime_utils import timeNowUTC  # noqa: E402 [flake8 lint suppression]
 from utils.crypto_utils import encrypt_data  # noqa: E402 [flake8 lint suppression]
+from utils.plugin_results import to_text_format  # noqa: E402 [flake8 lint suppression]
+from utils.sync_delta import (  # noqa: E402 [flake8 lint suppression]
+    apply_payload, compress_text, delta_payload, diff_rows, full_payload, load_payload
+)
 from messaging.in_app import write_notification  # noqa: E402 [flake8 lint suppression]
 import conf  # noqa: E402 [flake8 lint suppression]
 from pytz import timezone  # noqa: E402 [flake8 lint suppression]
@@ -38,6 +45,17 @@ LOG_PATH = logPath + '/plugins'
 LOG_FILE = os.path.join(LOG_PATH, f'script.{pluginName}.log')
 RESULT_FILE = os.path.join(LOG_PATH, f'last_result.{pluginName}.log')
 
+# Delta sync state (see utils/sync_delta.py)
+#   NODE: hub_url -> {"version", "digests", "protocol"} last acknowledged by the hub
+#   HUB:  {"nodes": node_name -> {"version", "rows"} mirror of each node's devices,
+#          "pulled": node_url -> node_name}
+NODE_STATE_FILE = os.path.join(LOG_PATH, f'cache.{pluginName}.json')
+HUB_STATE_FILE = os.path.join(LOG_PATH, f'cache.{pluginName}.nodes.json')
+RECEIVED_STATE_FILE = os.path.join(LOG_PATH, f'cache.{pluginName}.received.json')
+
+# Pull latencies kept per node (SyncNodes table) for the p50/p95
+LATENCY_SAMPLES = 50
+
 # Initialize the Plugin obj output file
 plugin_objects = Plugin_Objects(RESULT_FILE)
 
@@ -94,7 +112,8 @@ def main():
                 if os.path.exists(file_path):
                     # Read the content of the log file
                     with open(file_path, 'r') as f:
-                        file_content = f.read()
+                        # Hubs on an older version only read the text format
+                        file_content = to_text_format(f.read())
 
                         mylog('verbose', [f'[{pluginName}] Sending file_content: "{file_content}"'])
 
@@ -107,15 +126,13 @@ def main():
         # PUSHING/SENDING devices
         if send_devices:
             file_path = f"{API_PATH}/table_devices.json"
-            pref = 'SYNC'
 
             if os.path.exists(file_path):
-                # Read the content of the log file
+                # Read the devices of the API file
                 with open(file_path, 'r') as f:
-                    file_content = f.read()
+                    rows = json.load(f).get('data', [])
 
-                    mylog('verbose', [f'[{pluginName}] Sending file_content: "{file_content}"'])
-                    send_data(api_token, file_content, encryption_key, file_path, node_name, pref, hub_url)
+                send_devices(api_token, rows, encryption_key, file_path, node_name, hub_url)
             else:
                 mylog('none', [f'[{pluginName}] ERROR Could not open: "{file_path}"'])
         else:
@@ -128,56 +145,82 @@ def main():
     # PULLING DEVICES
     file_prefix = 'last_result'
 
-    # pull data from nodes if specified
+    # Mirrors of the devices of each node, kept up to date with deltas
+    receiver = HubReceiver(load_plugin_cache(HUB_STATE_FILE), is_hub)
+
+    # pull data from nodes if specified, ingesting each node as soon as it answered
     if is_hub:
-        for node_url in pull_nodes:
-            response_json = get_data(api_token, node_url)
+        pull_from_nodes(api_token, pull_nodes, receiver,
+                        concurrency=get_setting_value('SYNC_pull_concurrency') or 1,
+                        timeout=get_setting_value('SYNC_pull_timeout') or 5)
 
-            if not isinstance(response_json, dict):
-                mylog('none', [f'[{pluginName}] Skipping node "{node_url}" due to failed or invalid response'])
-                continue
+    # Process any received data for the Device DB table (ONLY JSON)
+    # Create the file path
 
-            # Extract node_name and base64 data
-            node_name = response_json.get('node_name', 'unknown_node')
-            data_base64 = response_json.get('data_base64', '')
+    # Get all "last_result" files from the sync folder, decode, rename them, and get the list of files
+    # Pushed files of a node are numbered in the order they arrived: deltas must be applied in that order
+    files_to_process = sorted(decode_and_rename_files(LOG_PATH, file_prefix), key=_file_order)
+    receiver.ingest(files_to_process)
 
-            # Decode base64 data
-            try:
-                decoded_data = base64.b64decode(data_base64)
-            except (binascii.Error, ValueError, TypeError) as e:
-                mylog('none', [f'[{pluginName}] Skipping node "{node_name}": base64 decode failed for data_base64="{data_base64}": {e}'])
-                continue
+    receiver.close()
 
-            # Create log file name using node name
-            log_file_name = f'{file_prefix}.{node_name}.log'
+    return 0
 
-            # Write decoded data to log file
-            with open(os.path.join(LOG_PATH, log_file_name), 'wb') as log_file:
-                log_file.write(decoded_data)
 
-            message = f'[{pluginName}] Device data from node "{node_name}" written to {log_file_name}'
-            mylog('verbose', [message])
-            if lggr.isAbove('verbose'):
-                write_notification(message, 'info', timeNowUTC())
+# -------------------------------------------------------------------------------
+class HubReceiver:
+    """
+    Ingests device data received from nodes (pulled or pushed) into the hub.
 
-    # Process any received data for the Device DB table (ONLY JSON)
-    # Create the file path
+    Files are ingested in batches, e.g. as soon as the pull of one node
+    finished, and committed per batch. A MAC is only taken from the first
+    node reporting it during a run. ``close()`` saves the node mirrors and
+    writes the plugin result file if anything was ingested.
+    """
 
-    # Get all "last_result" files from the sync folder, decode, rename them, and get the list of files
-    files_to_process = decode_and_rename_files(LOG_PATH, file_prefix)
+    def __init__(self, hub_state, is_hub=False):
+        self.hub_state = hub_state
+        self.mirrors = hub_state.setdefault('nodes', {})
+        self.pulled_nodes = hub_state.setdefault('pulled', {})
+        self.is_hub = is_hub
+        self.unique_mac_addresses = set()
+        self.resync_nodes = set()
+        self.ingested = False
+        self.conn = None
+
+    def cursor(self):
+        # Connect to the App database
+        if self.conn is None:
+            self.conn = get_temp_db_connection()
+        return self.conn.cursor()
+
+    def ingest(self, files_to_process):
+        if not files_to_process:
+            return
 
-    if len(files_to_process) > 0:
+        self.ingested = True
 
         mylog('verbose', [f'[{pluginName}] Mode 3: RECEIVE (HUB) - This is a HUB as received data found'])
 
-        # Connect to the App database
-        conn = get_temp_db_connection()
-        cursor = conn.cursor()
+        cursor = self.cursor()
 
         # Collect all unique devMac values from the JSON files
-        unique_mac_addresses = set()
+        # (across batches: a MAC is taken from the first node reporting it)
+        unique_mac_addresses = self.unique_mac_addresses
+        mirrors = self.mirrors
         device_data = []
 
+        def collect(device, syncHubNodeName):
+            device['devMac'] = str(device['devMac']).lower()
+            if device['devMac'] not in unique_mac_addresses:
+                device['devSyncHubNode'] = syncHubNodeName
+                unique_mac_addresses.add(device['devMac'])
+                device_data.append(device)
+
+        # Nodes whose mirror received a versioned payload, and nodes that must resync
+        mirrored_nodes = []
+        resync_nodes = self.resync_nodes
+
         mylog('verbose', [f'[{pluginName}] Devices files to process: "{files_to_process}"'])
 
         for file_name in files_to_process:
@@ -190,7 +233,7 @@ def main():
                 #   PUSH mode (decoded): last_result.PLUGIN.decoded.NodeName.N.log (6 parts)
                 #   PULL mode:           last_result.NodeName.log                  (3 parts, valid JSON)
                 # Local plugin result files (last_result.ARPSCAN.log) are also 3 parts but
-                # are pipe-delimited — catch and skip them via the JSONDecodeError guard below.
+                # are no sync payload — catch and skip them via the JSONDecodeError guard below.
                 parts = file_name.split('.')
                 if len(parts) > 2:
                     # PUSH artifacts:
@@ -221,14 +264,24 @@ def main():
 
                     try:
                         with open(file_path, 'r') as f:
-                            data = json.load(f)
-                        for device in data['data']:
-                            device['devMac'] = str(device['devMac']).lower()
-                            if device['devMac'].lower() not in unique_mac_addresses:
-                                device['devSyncHubNode'] = syncHubNodeName
-                                unique_mac_addresses.add(device['devMac'].lower())
-                                device_data.append(device)
-                    except (json.JSONDecodeError, KeyError):
+                            data = load_payload(f.read())
+
+                        if isinstance(data, dict) and 'version' in data:
+                            # Versioned payload: a full copy or the changes since the mirrored version
+                            mirror = apply_payload(mirrors.get(syncHubNodeName), data)
+                            if mirror is None:
+                                mylog('none', [f'[{pluginName}] Delta from "{syncHubNodeName}" does not apply to the mirrored version, requesting a full resync'])
+                                mirrors.pop(syncHubNodeName, None)
+                                resync_nodes.add(syncHubNodeName)
+                            else:
+                                mirrors[syncHubNodeName] = mirror
+                                resync_nodes.discard(syncHubNodeName)
+                                if syncHubNodeName not in mirrored_nodes:
+                                    mirrored_nodes.append(syncHubNodeName)
+                        else:
+                            for device in data['data']:
+                                collect(device, syncHubNodeName)
+                    except (json.JSONDecodeError, KeyError, ValueError, OSError, TypeError):
                         mylog('verbose', [f'[{pluginName}] Skipping "{file_name}" - not a valid sync JSON payload'])
                         continue
 
@@ -242,10 +295,17 @@ def main():
 
                     os.rename(file_path, new_file_path)
 
+        # Every device of a mirrored node is reported, not only the changed ones
+        for syncHubNodeName in mirrored_nodes:
+            if syncHubNodeName in mirrors:
+                for device in mirrors[syncHubNodeName]['rows'].values():
+                    collect(dict(device), syncHubNodeName)
+
         if len(device_data) > 0:
             # Retrieve existing devMac values from the Devices table
-            placeholders = ', '.join('?' for _ in unique_mac_addresses)
-            cursor.execute(f'SELECT devMac FROM Devices WHERE devMac IN ({placeholders})', tuple(unique_mac_addresses))
+            batch_macs = tuple(device['devMac'] for device in device_data)
+            placeholders = ', '.join('?' for _ in batch_macs)
+            cursor.execute(f'SELECT devMac FROM Devices WHERE devMac IN ({placeholders})', batch_macs)
             existing_mac_addresses = set(row[0].lower() for row in cursor.fetchall())
 
             # insert devices into the last_result.log and thus CurrentScan table to manage state
@@ -366,14 +426,166 @@ def main():
                     if lggr.isAbove('verbose'):
                         write_notification(message, 'info', timeNowUTC())
 
+
+        self.conn.commit()
+
+    def close(self):
+        if self.ingested or self.is_hub:
+            save_plugin_cache(HUB_STATE_FILE, self.hub_state)
+
+        # Lost track of a pushing node: its next delta is refused, so it sends everything again
+        if self.resync_nodes:
+            received = load_plugin_cache(RECEIVED_STATE_FILE)
+            for syncHubNodeName in self.resync_nodes:
+                received.pop(syncHubNodeName, None)
+            save_plugin_cache(RECEIVED_STATE_FILE, received)
+
         # Commit and close the connection
-        conn.commit()
-        conn.close()
+        if self.conn is not None:
+            self.conn.commit()
+            self.conn.close()
+            self.conn = None
 
         # log result
-        plugin_objects.write_result_file()
+        if self.ingested:
+            plugin_objects.write_result_file()
 
-    return 0
+
+# -------------------------------------------------------------------------------
+def pull_from_nodes(api_token, pull_nodes, receiver, concurrency=4, timeout=5):
+    """
+    Pull the devices of all nodes, ``concurrency`` nodes at a time.
+
+    Each node's answer is written to last_result.<node>.log and ingested as
+    soon as it arrived, so a slow node does not hold back the others. The
+    version mirrored last (watermark) and the pull latency of every node are
+    kept in the SyncNodes table.
+    """
+    file_prefix = 'last_result'
+    cursor = receiver.cursor()
+
+    forget_nodes(cursor, pull_nodes)
+
+    def pull(node_url):
+        # Ask for the changes since the version mirrored last
+        since = receiver.mirrors.get(receiver.pulled_nodes.get(node_url), {}).get('version')
+        start = time.monotonic()
+        response_json = get_data(api_token, node_url, since, timeout=timeout)
+        return response_json, (time.monotonic() - start) * 1000
+
+    workers = max(1, min(int(concurrency), len(pull_nodes)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(pull, node_url): node_url for node_url in pull_nodes}
+
+        for future in as_completed(futures):
+            node_url = futures[future]
+            try:
+                response_json, latency_ms = future.result()
+            except Exception as e:
+                response_json, latency_ms = None, None
+                mylog('none', [f'[{pluginName}] Pulling node "{node_url}" failed: {e}'])
+
+            if not isinstance(response_json, dict):
+                mylog('none', [f'[{pluginName}] Skipping node "{node_url}" due to failed or invalid response'])
+                record_pull(cursor, node_url, None, latency_ms, error='failed or invalid response')
+                receiver.conn.commit()
+                continue
+
+            # Extract node_name and base64 data
+            node_name = response_json.get('node_name', 'unknown_node')
+
+            if 'version' in response_json:
+                # Versioned payload (full or delta), applied to the mirror when ingested
+                receiver.pulled_nodes[node_url] = node_name
+                decoded_data = json.dumps(response_json).encode('utf-8')
+            else:
+                data_base64 = response_json.get('data_base64', '')
+
+                # Decode base64 data
+                try:
+                    decoded_data = base64.b64decode(data_base64)
+                except (binascii.Error, ValueError, TypeError) as e:
+                    mylog('none', [f'[{pluginName}] Skipping node "{node_name}": base64 decode failed for data_base64="{data_base64}": {e}'])
+                    record_pull(cursor, node_url, node_name, latency_ms, error='invalid data_base64')
+                    receiver.conn.commit()
+                    continue
+
+            # Create log file name using node name
+            log_file_name = f'{file_prefix}.{node_name}.log'
+
+            # Write decoded data to log file
+            with open(os.path.join(LOG_PATH, log_file_name), 'wb') as log_file:
+                log_file.write(decoded_data)
+
+            message = f'[{pluginName}] Device data from node "{node_name}" written to {log_file_name}'
+            mylog('verbose', [message])
+            if lggr.isAbove('verbose'):
+                write_notification(message, 'info', timeNowUTC())
+
+            receiver.ingest([log_file_name])
+
+            watermark = receiver.mirrors.get(node_name, {}).get('version')
+            record_pull(cursor, node_url, node_name, latency_ms, watermark=watermark)
+            receiver.conn.commit()
+
+
+def forget_nodes(cursor, pull_nodes):
+    """Drop the pull stats of nodes that are not configured anymore."""
+    placeholders = ', '.join('?' for _ in pull_nodes)
+    cursor.execute(f'DELETE FROM SyncNodes WHERE syncNodeUrl NOT IN ({placeholders})', tuple(pull_nodes))
+
+
+def record_pull(cursor, node_url, node_name, latency_ms, watermark=None, error=None, now=None):
+    """
+    Record the outcome of pulling a node in the SyncNodes table.
+
+    A successful pull moves the watermark and adds its latency to the last
+    LATENCY_SAMPLES samples the p50/p95 are computed from. A failed pull
+    only records the attempt and the error.
+    """
+    now = now or timeNowUTC()
+    cursor.execute('SELECT * FROM SyncNodes WHERE syncNodeUrl = ?', (node_url,))
+    row = cursor.fetchone()
+    names = [d[0] for d in cursor.description]
+    node = dict(zip(names, row)) if row else {'syncNodeUrl': node_url}
+
+    node['syncLastAttempt'] = now
+    node['syncLastError'] = error
+    if node_name:
+        node['syncNodeName'] = node_name
+
+    if error is None:
+        node['syncLastSuccess'] = now
+        node['syncWatermark'] = watermark
+        try:
+            samples = json.loads(node.get('syncLatencySamples') or '[]')
+        except ValueError:
+            samples = []
+        samples = (samples + [round(latency_ms, 1)])[-LATENCY_SAMPLES:]
+        node['syncLatencySamples'] = json.dumps(samples)
+        node['syncLatencyLastMs'] = samples[-1]
+        node['syncLatencyP50Ms'] = percentile(samples, 50)
+        node['syncLatencyP95Ms'] = percentile(samples, 95)
+
+    columns = ', '.join(node)
+    placeholders = ', '.join('?' for _ in node)
+    cursor.execute(f'INSERT OR REPLACE INTO SyncNodes ({columns}) VALUES ({placeholders})', tuple(node.values()))
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of a non-empty list of numbers."""
+    ordered = sorted(samples)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+# -------------------------------------------------------------------------------
+def _file_order(file_name):
+    # last_result.PLUGIN.decoded.NodeName.N.log -> (last_result.PLUGIN.decoded.NodeName, N)
+    parts = file_name.rsplit('.', 2)
+    if len(parts) == 3 and parts[1].isdigit():
+        return parts[0], int(parts[1])
+    return file_name, 0
 
 
 # Data retrieval methods
@@ -469,18 +681,111 @@ def send_data(api_token, file_content, encryption_key, file_path, node_name, pre
     return False
 
 
+# send devices to the HUB, only the changes once the HUB acknowledged a version
+def send_devices(api_token, rows, encryption_key, file_path, node_name, hub_url):
+    """
+    Sends the devices from NODE → HUB using the versioned delta protocol
+    (utils/sync_delta.py).
+
+    Flow:
+    1. Diff the device rows against the digests the HUB acknowledged last
+    2. HUB known to support deltas → send the changes (compressed)
+    3. HUB refuses the delta (409, it lost track) → send everything
+    4. Otherwise → send everything, uncompressed for HUBs without delta support
+    5. On success remember the acknowledged version, digests and HUB protocol
+    """
+    state = load_plugin_cache(NODE_STATE_FILE)
+    acked = state.get(hub_url, {})
+    version = acked.get('version', 0) + 1
+
+    upserts, deletes, digests = diff_rows(rows, acked.get('digests', {}))
+    supports_delta = bool(acked.get('protocol')) and acked.get('version') is not None
+
+    if supports_delta:
+        mylog('verbose', [f'[{pluginName}] Sending devices delta v{version}: {len(upserts)} changed, {len(deletes)} deleted'])
+        status, reply = post_payload(api_token, delta_payload(upserts, deletes, version, acked['version']), encryption_key, file_path, node_name, hub_url, compress=True)
+
+        if status == 409:
+            mylog('verbose', [f'[{pluginName}] HUB requested a full resync'])
+            status, reply = post_payload(api_token, full_payload(rows, version), encryption_key, file_path, node_name, hub_url, compress=True)
+    else:
+        mylog('verbose', [f'[{pluginName}] Sending all {len(rows)} devices v{version}'])
+        status, reply = post_payload(api_token, full_payload(rows, version), encryption_key, file_path, node_name, hub_url, compress=False)
+
+    if status != 200:
+        message = f'[{pluginName}] Sending devices to the HUB failed for "{file_path}"'
+        mylog('none', [message])
+        write_notification(message, 'alert', timeNowUTC())
+        return False
+
+    state[hub_url] = {'version': version, 'digests': digests, 'protocol': reply.get('sync_protocol', 0)}
+    save_plugin_cache(NODE_STATE_FILE, state)
+
+    message = f'[{pluginName}] Sync success for "{file_path}" (v{version})'
+    mylog('verbose', [message])
+    if lggr.isAbove('verbose'):
+        write_notification(message, 'info', timeNowUTC())
+    return True
+
+
+def post_payload(api_token, payload, encryption_key, file_path, node_name, hub_url, compress):
+    """POST one versioned devices payload, returns (status code or None, response JSON)."""
+    content = json.dumps(payload)
+    if compress:
+        content = compress_text(content)
+
+    data = {
+        'data': encrypt_data(content, encryption_key),
+        'file_path': file_path,
+        'plugin': pluginName,
+        'node_name': node_name,
+        'version': payload['version'],
+        'base_version': payload['base_version'],
+    }
+    headers = {'Authorization': f'Bearer {api_token}'}
+
+    for endpoint in api_endpoints:
+        final_endpoint = hub_url + endpoint
+        try:
+            response = requests.post(final_endpoint, json=data, headers=headers, timeout=5)
+            try:
+                reply = response.json()
+            except ValueError:
+                reply = {}
+            if not isinstance(reply, dict):
+                reply = {}
+
+            if response.status_code not in (200, 409):
+                error_msg = reply.get("error") or reply.get("message") or response.text
+                mylog('none', [f'[{pluginName}] HUB error on {final_endpoint} [{response.status_code}]: {error_msg}'])
+
+            return response.status_code, reply
+        except requests.RequestException as e:
+            mylog('verbose', [f'[{pluginName}] Request exception calling {final_endpoint} error={type(e).__name__}: {e}'])
+
+    return None, {}
+
+
 # get data from the nodes to the HUB
-def get_data(api_token, node_url):
-    """Get data from NODE, preferring /sync endpoint and falling back to PHP version."""
+def get_data(api_token, node_url, since=None, timeout=5):
+    """
+    Get data from NODE, preferring /sync endpoint and falling back to PHP version.
+
+    ``since`` is the devices version mirrored from this node: current nodes
+    answer with a compressed, versioned payload (only the changes if they
+    served that version last), older ones with the base64 encoded file.
+    ``timeout`` (seconds) applies to each endpoint tried.
+    """
     mylog('verbose', [f'[{pluginName}] Getting data from node: "{node_url}"'])
     headers = {'Authorization': f'Bearer {api_token}'}
+    params = {'since': '' if since is None else since}
 
     for endpoint in api_endpoints:
 
         final_endpoint = node_url + endpoint
 
         try:
-            response = requests.get(final_endpoint, headers=headers, timeout=5)
+            response = requests.get(final_endpoint, headers=headers, params=params, timeout=timeout)
             mylog('verbose', [f'[{pluginName}] Tried endpoint: {final_endpoint}, status: {response.status_code}'])
 
             if response.status_code == 200:
@@ -1,5 +1,6 @@
 #!/usr/bin/env python
 
+import hashlib
 import os
 import sys
 import subprocess
@@ -8,11 +9,12 @@ import subprocess
 INSTALL_PATH = os.getenv('NETALERTX_APP', '/app')
 sys.path.extend([f"{INSTALL_PATH}/server/plugins", f"{INSTALL_PATH}/server"])
 
-from plugin_helper import Plugin_Objects, handleEmpty  # noqa: E402 [flake8 lint suppression]
+from plugin_helper import Plugin_Objects, handleEmpty, load_plugin_cache, save_plugin_cache  # noqa: E402 [flake8 lint suppression]
 from logger import mylog, Logger  # noqa: E402 [flake8 lint suppression]
 from helper import get_setting_value  # noqa: E402 [flake8 lint suppression]
-from const import logPath, applicationPath, NULL_EQUIVALENTS_SQL  # noqa: E402 [flake8 lint suppression]
+from const import logPath, applicationPath, NULL_EQUIVALENTS_SQL, vendorsPath, vendorsPathNewest, vendorsIndexPath  # noqa: E402 [flake8 lint suppression]
 from scan.device_handling import query_MAC_vendor  # noqa: E402 [flake8 lint suppression]
+from utils.oui_index import write_index  # noqa: E402 [flake8 lint suppression]
 import conf  # noqa: E402 [flake8 lint suppression]
 from pytz import timezone  # noqa: E402 [flake8 lint suppression]
 from database import get_temp_db_connection  # noqa: E402 [flake8 lint suppression]
@@ -28,6 +30,8 @@ pluginName = 'VNDRPDT'
 LOG_PATH = logPath + '/plugins'
 LOG_FILE = os.path.join(LOG_PATH, f'script.{pluginName}.log')
 RESULT_FILE = os.path.join(LOG_PATH, f'last_result.{pluginName}.log')
+# MAC -> hash of the vendors file the last unsuccessful lookup used
+ATTEMPTS_FILE = os.path.join(LOG_PATH, f'cache.{pluginName}.json')
 
 
 def main():
@@ -37,6 +41,9 @@ def main():
     # Get newest DB
     update_vendor_database()
 
+    # Compile it into the shared prefix index used for lookups
+    update_vendor_index()
+
     # Resolve missing vendors
     plugin_objects = Plugin_Objects(RESULT_FILE)
 
@@ -68,6 +75,39 @@ def update_vendor_database():
         mylog('verbose', [e.output])
 
 
+# ------------------------------------------------------------------------------
+# Build the binary prefix index (MA-L / MA-M / MA-S) from the vendors file
+def update_vendor_index():
+
+    source = vendor_source()
+
+    try:
+        count = write_index(source, vendorsIndexPath)
+        mylog('verbose', [f'    Vendor index rebuilt: {vendorsIndexPath} ({count} prefixes)'])
+    except OSError as e:
+        # Lookups fall back to building the index in memory
+        mylog('verbose', [f'    FAILED: Building vendor index {vendorsIndexPath}: {e}'])
+
+
+# ------------------------------------------------------------------------------
+# Vendors file used for lookups (same choice as scan.device_handling)
+def vendor_source():
+    return vendorsPathNewest if os.path.isfile(vendorsPathNewest) else vendorsPath
+
+
+# ------------------------------------------------------------------------------
+# Version of the vendors DB: hash of the vendors file content
+def vendor_db_version(path):
+    sha = hashlib.sha256()
+    try:
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                sha.update(chunk)
+    except OSError:
+        return ''
+    return sha.hexdigest()
+
+
 # ------------------------------------------------------------------------------
 # resolve missing vendors
 def update_vendors(plugin_objects):
@@ -79,6 +119,7 @@ def update_vendors(plugin_objects):
     # Initialize variables
     ignored = 0
     notFound = 0
+    skipped = 0
 
     mylog('verbose', ['    Searching devices vendor'])
 
@@ -99,14 +140,27 @@ def update_vendors(plugin_objects):
     # Close the database connection
     conn.close()
 
+    # Devices whose lookup already failed against this vendors DB are not
+    # looked up again until the DB changes
+    db_version = vendor_db_version(vendor_source())
+    previous_attempts = load_plugin_cache(ATTEMPTS_FILE)
+    attempts = {}
+
     # All devices loop
     for device in devices:
+        if db_version and previous_attempts.get(device[0]) == db_version:
+            attempts[device[0]] = db_version
+            skipped += 1
+            continue
+
         # Search vendor in HW Vendors DB
         vendor = query_MAC_vendor(device[0])
         if vendor == -1 :
             notFound += 1
+            attempts[device[0]] = db_version
         elif vendor == -2 :
             ignored += 1
+            attempts[device[0]] = db_version
         else :
             plugin_objects.add_object(
                 primaryId   = handleEmpty(device[0]),    # MAC (Device Name)
@@ -119,9 +173,14 @@ def update_vendors(plugin_objects):
                 foreignKey  = handleEmpty(device[0])
             )
 
+    # Only devices still missing a vendor are kept
+    if db_version:
+        save_plugin_cache(ATTEMPTS_FILE, attempts)
+
     # Print log
     mylog('verbose', ["    Devices Ignored             : ", ignored])
     mylog('verbose', ["    Devices with missing vendor : ", len(devices)])
+    mylog('verbose', ["    Already tried with this DB  : ", skipped])
     mylog('verbose', ["    Vendors Not Found           : ", notFound])
     mylog('verbose', ["    Vendors updated             : ", len(plugin_objects)])
 
@@ -2,17 +2,26 @@
 # Based on the work of https://github.com/leiweibau/Pi.Alert
 
 import requests
+from requests.adapters import HTTPAdapter
 from requests.exceptions import SSLError, Timeout, RequestException
+import socket
 import sys
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
 import urllib3
-from urllib3.exceptions import InsecureRequestWarning
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import InsecureRequestWarning, ConnectTimeoutError
+from urllib3.util.connection import allowed_gai_family
 
 # Register NetAlertX directories
 INSTALL_PATH = os.getenv('NETALERTX_APP', '/app')
 sys.path.extend([f"{INSTALL_PATH}/server/plugins", f"{INSTALL_PATH}/server"])
 
-from plugin_helper import Plugin_Objects  # noqa: E402 [flake8 lint suppression]
+from plugin_helper import Plugin_Objects, load_plugin_cache, save_plugin_cache  # noqa: E402 [flake8 lint suppression]
 from const import logPath  # noqa: E402 [flake8 lint suppression]
 from helper import get_setting_value   # noqa: E402 [flake8 lint suppression]
 import conf  # noqa: E402 [flake8 lint suppression]
@@ -29,6 +38,12 @@ pluginName = 'WEBMON'
 
 LOG_PATH = logPath + '/plugins'
 RESULT_FILE = os.path.join(LOG_PATH, f'last_result.{pluginName}.log')
+STATS_FILE = os.path.join(LOG_PATH, f'latency.{pluginName}.json')
+
+# Latency samples kept per site for the rolling percentiles
+LATENCY_WINDOW = 100
+DEFAULT_CONCURRENCY = 10
+DEFAULT_HOST_CONNECTIONS = 2
 
 mylog('verbose', [f'[{pluginName}] In script'])
 
@@ -48,16 +63,140 @@ def main():
         return
 
 
-def check_services_health(site):
+# ===============================================================================
+# Connection phase timing
+# ===============================================================================
+# Phase durations (seconds) of the connections opened by the current thread's
+# request; reset before each check
+_phases = threading.local()
+
+
+def _record_phase(name, seconds):
+    timings = getattr(_phases, 'timings', None)
+    if timings is not None:
+        timings[name] = timings.get(name, 0.0) + seconds
+
+
+class _TimedConnectionMixin:
+    """Records DNS, TCP connect and TLS handshake time of new connections."""
+
+    def _new_conn(self):
+        started = time.perf_counter()
+        try:
+            infos = socket.getaddrinfo(self._dns_host, self.port, allowed_gai_family(), socket.SOCK_STREAM)
+        except OSError:
+            # Let urllib3 raise its own resolution error
+            return super()._new_conn()
+        resolved = time.perf_counter()
+        _record_phase('dns', resolved - started)
+
+        # Connect to the resolved addresses in order, as create_connection does
+        host = self._dns_host
+        error = None
+        try:
+            for info in infos:
+                self._dns_host = info[4][0]
+                try:
+                    sock = super()._new_conn()
+                    break
+                except ConnectTimeoutError as e:  # also NewConnectionError
+                    error = e
+            else:
+                # getaddrinfo() may succeed with an empty list
+                raise error or socket.gaierror(socket.EAI_NONAME, f'No address found for {host}')
+        finally:
+            self._dns_host = host
+
+        _record_phase('connect', time.perf_counter() - resolved)
+        return sock
+
+    def connect(self):
+        started = time.perf_counter()
+        timings = getattr(_phases, 'timings', None)
+        before = sum(timings.values()) if timings is not None else 0.0
+        super().connect()
+        if timings is not None and isinstance(self, HTTPSConnection):
+            # Whatever connect() spent beyond DNS + TCP is the TLS handshake
+            spent = sum(timings.values()) - before
+            _record_phase('tls', max(time.perf_counter() - started - spent, 0.0))
+
+
+class _TimedHTTPConnection(_TimedConnectionMixin, HTTPConnection):
+    pass
+
+
+class _TimedHTTPSConnection(_TimedConnectionMixin, HTTPSConnection):
+    pass
+
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+
+class TimedHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter whose connections report their phase timings."""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': _TimedHTTPConnectionPool,
+            'https': _TimedHTTPSConnectionPool,
+        }
+
+
+def make_session(urls, host_connections):
+    """One Session for all checks: keep-alive connections, at most *host_connections* per host."""
+    hosts = {urlsplit(u).netloc for u in urls}
+    adapter = TimedHTTPAdapter(
+        pool_connections=max(len(hosts), 1),
+        pool_maxsize=max(int(host_connections), 1),
+        pool_block=True,
+    )
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.headers['User-Agent'] = 'NetAlertX'
+    session.verify = False
+    return session
+
+
+# ===============================================================================
+# Checks
+# ===============================================================================
+def check_services_health(site, session=None, timeout=None):
+    """
+    Request *site* once.
+
+    Returns:
+        tuple: (status, latency, phases) — latency in seconds (99999 on
+        failure), phases a dict of dns / connect / tls / ttfb seconds.
+        DNS, connect and TLS are 0 when a kept-alive connection was reused.
+    """
 
     mylog('verbose', [f'[{pluginName}] Checking {site}'])
 
     urllib3.disable_warnings(InsecureRequestWarning)
 
+    if session is None:
+        session = make_session([site], 1)
+    if timeout is None:
+        timeout = get_setting_value('WEBMON_RUN_TIMEOUT')
+
+    _phases.timings = {}
+    phases = {}
+
     try:
-        resp = requests.get(site, verify=False, timeout=get_setting_value('WEBMON_RUN_TIMEOUT'), headers={"User-Agent": "NetAlertX"})
+        resp = session.get(site, timeout=timeout)
         latency = resp.elapsed.total_seconds()
         status = resp.status_code
+        phases = dict(_phases.timings)
+        # elapsed runs from sending the request to the parsed headers and
+        # includes the connection setup
+        phases['ttfb'] = max(latency - sum(phases.values()), 0.0)
     except SSLError:
         status = 495  # SSL Certificate Error (non-standard, but more meaningful than 503)
         latency = 99999
@@ -74,15 +213,51 @@ def check_services_health(site):
         status = 500  # Internal Server Error (fallback)
         latency = 99999
         mylog('debug', [f'[{pluginName}] Unexpected error while checking {site}: {e}'])
+    finally:
+        _phases.timings = None
 
     mylog('verbose', [f'[{pluginName}] Result for {site} (status|latency) : {status}|{latency}'])
 
-    return status, latency
+    return status, latency, phases
+
+
+# ===============================================================================
+# Rolling latency percentiles
+# ===============================================================================
+def percentile(samples, pct):
+    """Nearest-rank percentile of *samples* (non-empty)."""
+    ordered = sorted(samples)
+    rank = max(int(-(-pct * len(ordered) // 100)), 1)  # ceil
+    return ordered[rank - 1]
+
+
+def format_phases(phases):
+    """'dns/connect/tls/ttfb' in ms, e.g. '1.2/3.4/10.1/25.0'."""
+    if not phases:
+        return ''
+    return '/'.join(f"{phases.get(k, 0.0) * 1000:.1f}" for k in ('dns', 'connect', 'tls', 'ttfb'))
 
 
 def service_monitoring(urls, plugin_objects):
-    for site in urls:
-        status, latency = check_services_health(site)
+    concurrency = int(get_setting_value('WEBMON_CONCURRENCY') or DEFAULT_CONCURRENCY)
+    host_connections = int(get_setting_value('WEBMON_HOST_CONNECTIONS') or DEFAULT_HOST_CONNECTIONS)
+    # Leave a moment of the plugin run timeout to write the results
+    timeout = max(int(get_setting_value('WEBMON_RUN_TIMEOUT') or 5) - 1, 1)
+
+    session = make_session(urls, host_connections)
+    with ThreadPoolExecutor(max_workers=max(min(concurrency, len(urls)), 1)) as executor:
+        results = list(executor.map(lambda site: check_services_health(site, session, timeout), urls))
+    session.close()
+
+    stats = load_plugin_cache(STATS_FILE)
+
+    for site, (status, latency, phases) in zip(urls, results):
+        samples = stats.get(site, [])
+        # Failed checks (latency 99999) would swamp the percentiles
+        if latency != 99999:
+            samples = (samples + [round(latency * 1000, 1)])[-LATENCY_WINDOW:]
+        stats[site] = samples
+
         plugin_objects.add_object(
             primaryId=site,
             secondaryId='null',
@@ -91,8 +266,16 @@ def service_monitoring(urls, plugin_objects):
             watched3='null',
             watched4='null',
             extra='null',
-            foreignKey='null'
+            foreignKey='null',
+            helpVal1=percentile(samples, 50) if samples else '',  # p50 (ms)
+            helpVal2=percentile(samples, 95) if samples else '',  # p95 (ms)
+            helpVal3=format_phases(phases),  # dns/connect/tls/ttfb (ms)
+            helpVal4=len(samples),  # samples in the window
         )
+
+    # Forget sites that are no longer monitored
+    save_plugin_cache(STATS_FILE, {site: stats[site] for site in urls})
+
     return plugin_objects
 
 
@@ -5,10 +5,11 @@ import ipaddress
 from helper import get_setting_value, check_IP_format
 from utils.datetime_utils import timeNowUTC, normalizeTimeStamp
 from logger import mylog, Logger
-from const import vendorsPath, vendorsPathNewest, sql_generateGuid, NULL_EQUIVALENTS, NULL_EQUIVALENTS_SQL
+from const import vendorsPath, vendorsPathNewest, vendorsIndexPath, sql_generateGuid, NULL_EQUIVALENTS, NULL_EQUIVALENTS_SQL
 from models.device_instance import DeviceInstance
 from scan.name_resolution import NameResolver
-from scan.device_heuristics import guess_icon, guess_type
+from scan.device_heuristics import guess_device_attributes
+from utils.oui_index import load_index
 from db.db_helper import sanitize_SQL_input, list_to_where, safe_int
 from db.db_upgrade import PARENT_MAC_SENTINELS
 from db.authoritative_handler import (
@@ -395,61 +396,51 @@ def update_ipv4_ipv6(db):
 
 def update_icons_and_types(db):
     sql = db.sql
-    # Guess ICONS
-    recordsToUpdate = []
 
     default_icon = get_setting_value("NEWDEV_devIcon")
+    default_type = get_setting_value("NEWDEV_devType")
 
     if get_setting_value("NEWDEV_replace_preset_icon"):
-        query = f"""SELECT * FROM Devices
-                    WHERE devIcon in ({NULL_EQUIVALENTS_SQL}, '{default_icon}')
-                        OR devIcon IS NULL"""
+        icon_clause = f"devIcon IN ({NULL_EQUIVALENTS_SQL}, '{default_icon}') OR devIcon IS NULL"
     else:
-        query = f"""SELECT * FROM Devices
-                    WHERE devIcon in ({NULL_EQUIVALENTS_SQL})
-                        OR devIcon IS NULL"""
+        icon_clause = f"devIcon IN ({NULL_EQUIVALENTS_SQL}) OR devIcon IS NULL"
+    type_clause = f"devType IN ({NULL_EQUIVALENTS_SQL}) OR devType IS NULL"
 
-    for device in sql.execute(query):
-        # Conditional logic for devIcon guessing
-        devIcon = guess_icon(
+    # Guess ICONS and TYPES in one pass over the devices missing either
+    query = f"""SELECT devMac, devVendor, devLastIP, devName,
+                       ({icon_clause}) AS needsIcon,
+                       ({type_clause}) AS needsType
+                FROM Devices
+                WHERE ({icon_clause}) OR ({type_clause})"""
+
+    iconsToUpdate = []
+    typesToUpdate = []
+
+    for device in sql.execute(query).fetchall():
+        devIcon, devType = guess_device_attributes(
             device["devVendor"],
             device["devMac"],
             device["devLastIP"],
             device["devName"],
             default_icon,
+            default_type,
         )
 
-        recordsToUpdate.append([devIcon, device["devMac"]])
+        if device["needsIcon"]:
+            iconsToUpdate.append([devIcon, device["devMac"]])
+        if device["needsType"]:
+            typesToUpdate.append([devType, device["devMac"]])
 
-    mylog("debug", f"[Update Devices] recordsToUpdate: {recordsToUpdate}")
+    mylog("debug", f"[Update Devices] iconsToUpdate: {iconsToUpdate}")
 
-    if len(recordsToUpdate) > 0:
+    if len(iconsToUpdate) > 0:
         sql.executemany(
-            "UPDATE Devices SET devIcon = ? WHERE devMac = ? ", recordsToUpdate
+            "UPDATE Devices SET devIcon = ? WHERE devMac = ? ", iconsToUpdate
         )
 
-    # Guess Type
-    recordsToUpdate = []
-    query = f"""SELECT * FROM Devices
-                    WHERE devType in ({NULL_EQUIVALENTS_SQL})
-                OR devType IS NULL"""
-    default_type = get_setting_value("NEWDEV_devType")
-
-    for device in sql.execute(query):
-        # Conditional logic for devIcon guessing
-        devType = guess_type(
-            device["devVendor"],
-            device["devMac"],
-            device["devLastIP"],
-            device["devName"],
-            default_type,
-        )
-
-        recordsToUpdate.append([devType, device["devMac"]])
-
-    if len(recordsToUpdate) > 0:
+    if len(typesToUpdate) > 0:
         sql.executemany(
-            "UPDATE Devices SET devType = ? WHERE devMac = ? ", recordsToUpdate
+            "UPDATE Devices SET devType = ? WHERE devMac = ? ", typesToUpdate
         )
 
 
@@ -1394,67 +1385,53 @@ def check_mac_or_internet(input_str):
 
 
 # ------------------------------------------------------------------------------
-# Vendor database cache
+# Vendor database index
 #
-# The IEEE OUI database is loaded into memory on first use to avoid repeatedly
-# opening and linearly scanning the vendors file for every MAC address lookup.
-# The cache is automatically rebuilt if the selected vendors file changes or is
-# updated on disk.
+# The IEEE vendors file is compiled into a sorted binary prefix index
+# (utils/oui_index.py) that is memory-mapped read-only, so all processes share
+# one copy and lookups do a longest-prefix match over the 36-bit (MA-S),
+# 28-bit (MA-M) and 24-bit (MA-L) registries. The index is rebuilt if the
+# selected vendors file changes or is updated on disk.
 # ------------------------------------------------------------------------------
-_vendor_cache = None
-_vendor_cache_path = None
-_vendor_cache_mtime = None
+_vendor_index = None
+_vendor_index_source = None
 
 
 # ------------------------------------------------------------------------------
-def _load_vendor_cache():
+def _load_vendor_index():
     """
-    Load the MAC vendor database into an in-memory dictionary.
-
-    The cache maps the first six hexadecimal characters of a MAC address
-    (the OUI prefix) to the corresponding vendor name.
+    Open (and if needed build) the vendor prefix index.
 
-    The cache is only rebuilt when:
+    The index is only reopened when:
       - It has not been loaded yet.
       - The selected vendors file changes.
-      - The vendors file modification time changes.
+      - The vendors file was updated after the index was built.
 
     Returns:
-        None
+        OuiIndex or None if no vendors file is available.
     """
-    global _vendor_cache, _vendor_cache_path, _vendor_cache_mtime
+    global _vendor_index, _vendor_index_source
 
     file_path = vendorsPathNewest if os.path.isfile(vendorsPathNewest) else vendorsPath
 
-    try:
-        mtime = os.path.getmtime(file_path)
-    except OSError:
-        mtime = None
-
-    # Cache is already up-to-date.
-    if (
-        _vendor_cache is not None and _vendor_cache_path == file_path and _vendor_cache_mtime == mtime
-    ):
-        return
+    # Index is already up-to-date (or the missing file was already reported).
+    if _vendor_index_source == file_path:
+        if _vendor_index is None and not os.path.isfile(file_path):
+            return None
+        if _vendor_index is not None and _vendor_index.is_current(file_path):
+            return _vendor_index
 
-    cache = {}
+    if _vendor_index is not None:
+        _vendor_index.close()
+        _vendor_index = None
 
     try:
-        with open(file_path, "r") as f:
-            for line in f:
-                parts = line.rstrip("\n").split("\t", 1)
-
-                # Expected format:
-                #   <OUI>\t<Vendor Name>
-                if len(parts) == 2:
-                    cache[parts[0].lower()] = parts[1]
-
+        _vendor_index = load_index(file_path, vendorsIndexPath)
     except FileNotFoundError:
         mylog("none", [f"[Vendor Check] ⚠ ERROR: Vendors file '{file_path}' not found."])
 
-    _vendor_cache = cache
-    _vendor_cache_path = file_path
-    _vendor_cache_mtime = mtime
+    _vendor_index_source = file_path
+    return _vendor_index
 
 
 # ------------------------------------------------------------------------------
@@ -1462,9 +1439,9 @@ def query_MAC_vendor(pMAC):
     """
     Look up the hardware vendor for a MAC address.
 
-    The lookup uses an in-memory cache of the IEEE OUI database for O(1)
-    performance. The vendor database is loaded on first use and automatically
-    reloaded if the underlying file changes.
+    The lookup is a longest-prefix match (MA-S, MA-M, then MA-L) in the
+    memory-mapped vendor index. The index is opened on first use and
+    automatically rebuilt if the underlying file changes.
 
     Args:
         pMAC (str): MAC address in the format 'AA:BB:CC:DD:EE:FF'.
@@ -1481,9 +1458,15 @@ def query_MAC_vendor(pMAC):
     if len(pMACstr) != 17 or len(mac) != 12:
         return -2
 
-    _load_vendor_cache()
+    index = _load_vendor_index()
+    if index is None:
+        return -1
 
-    vendor = _vendor_cache.get(mac[:6])
+    try:
+        vendor = index.lookup(mac)
+    except ValueError:
+        # Not hexadecimal
+        return -2
 
     if vendor:
         mylog("debug", [f"[Vendor Check] Found '{vendor}' for '{pMAC}'"])
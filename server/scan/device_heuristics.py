@@ -2,6 +2,7 @@ import os
 import re
 import json
 import base64
+from functools import lru_cache
 from pathlib import Path
 from typing import Optional, Tuple
 from logger import mylog
@@ -29,6 +30,191 @@ except Exception as e:
     mylog("none", f"[guess_device_attributes] Failed to load device_heuristics_rules.json: {e}",)
 
 
+# -----------------------------------------
+# Compiled rules
+#
+# The rules are compiled once into lookup structures instead of walking every
+# rule and pattern for every device:
+#   - a MAC-prefix trie returning the patterns whose prefix starts the MAC
+#   - an Aho-Corasick automaton finding every vendor pattern contained in a
+#     vendor name in one pass over the name (results memoized per vendor)
+#   - precompiled name / IP regexes
+# Every pattern keeps its position in the rules file, and where several
+# patterns match the first one wins, exactly like the sequential walk.
+class _VendorAutomaton:
+    """Aho-Corasick automaton over lowercase vendor patterns."""
+
+    def __init__(self, patterns):
+        # Node 0 is the root; goto[node] maps a character to the next node
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [()]
+        for pattern in patterns:
+            node = 0
+            for ch in pattern:
+                nxt = self._goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[node][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append(())
+                node = nxt
+            self._out[node] = self._out[node] + (pattern,)
+
+        # Breadth-first: fail links point at the longest proper suffix that
+        # is also a trie path; outputs inherit the outputs of that suffix
+        queue = list(self._goto[0].values())
+        for node in queue:
+            for ch, nxt in self._goto[node].items():
+                queue.append(nxt)
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def search(self, text):
+        """Return the set of patterns that occur in *text*."""
+        goto, fail, out = self._goto, self._fail, self._out
+        found = set()
+        node = 0
+        for ch in text:
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if out[node]:
+                found.update(out[node])
+        return found
+
+
+class CompiledRules:
+    """device_heuristics_rules.json compiled for one-pass type / icon guessing."""
+
+    def __init__(self, rules):
+        # Every matching_pattern as (dev_type, icon_base64, vendor pattern),
+        # indexed by its position in the rules file
+        self._patterns = []
+        self._mac_trie = {}
+        # Lowest pattern index per vendor pattern, for the vendor-only fallback
+        self._vendor_first = {}
+        self._name_patterns = []
+        self._ip_patterns = []
+
+        for rule in rules:
+            dev_type = rule.get("dev_type")
+            base64_icon = rule.get("icon_base64", "")
+
+            for pattern in rule.get("matching_pattern", []):
+                index = len(self._patterns)
+                vendor_pattern = pattern.get("vendor", "").lower()
+                self._patterns.append((dev_type, base64_icon, vendor_pattern))
+
+                node = self._mac_trie
+                for ch in pattern.get("mac_prefix", "").upper():
+                    node = node.setdefault(ch, {})
+                # None cannot clash with a MAC character
+                node.setdefault(None, []).append(index)
+
+                if vendor_pattern:
+                    self._vendor_first.setdefault(vendor_pattern, index)
+
+            for regex in rule.get("name_pattern", []):
+                compiled = self._compile(regex, re.IGNORECASE)
+                if compiled is not None:
+                    self._name_patterns.append((compiled, dev_type, base64_icon))
+
+            for regex in rule.get("ip_pattern", []):
+                compiled = self._compile(regex)
+                if compiled is not None:
+                    self._ip_patterns.append((compiled, dev_type, base64_icon))
+
+        self._automaton = _VendorAutomaton(self._vendor_first)
+        self._any_name = self._alternation(p.pattern for p, _, _ in self._name_patterns)
+        self.vendor_matches = lru_cache(maxsize=4096)(self._automaton.search)
+
+    @staticmethod
+    def _compile(regex, flags=0):
+        try:
+            return re.compile(regex, flags)
+        except re.error as e:
+            mylog("none", f"[guess_device_attributes] Skipping invalid pattern '{regex}': {e}")
+            return None
+
+    @classmethod
+    def _alternation(cls, regexes):
+        """
+        One regex matching wherever any of *regexes* matches, used to skip
+        the ordered walk for names that match none (most of them). None if
+        the patterns cannot be combined (backreferences, inline flags).
+        """
+        regexes = list(regexes)
+        if not regexes or any(re.search(r"\\\d|\(\?P=", r) for r in regexes):
+            return None
+        try:
+            return re.compile("|".join(f"(?:{r})" for r in regexes), re.IGNORECASE)
+        except re.error:
+            return None
+
+    def _result(self, index, default_icon):
+        dev_type, base64_icon, _ = self._patterns[index]
+        return dev_type, base64_icon or default_icon
+
+    def match_mac_and_vendor(self, mac_clean, vendor, default_type, default_icon):
+        found = None
+        best = None
+        node = self._mac_trie
+        for ch in mac_clean + "\0":
+            for index in node.get(None, ()):
+                if best is not None and index >= best:
+                    break
+                vendor_pattern = self._patterns[index][2]
+                if vendor_pattern:
+                    if found is None:
+                        found = self.vendor_matches(vendor)
+                    if vendor_pattern not in found:
+                        continue
+                best = index
+            node = node.get(ch)
+            if node is None:
+                break
+
+        if best is None:
+            return default_type, default_icon
+        mylog("debug", "[guess_device_attributes] Matched via MAC+Vendor")
+        return self._result(best, default_icon)
+
+    def match_vendor(self, vendor, default_type, default_icon):
+        found = self.vendor_matches(vendor.lower())
+        if not found:
+            return default_type, default_icon
+        mylog("debug", "[guess_device_attributes] Matched via Vendor")
+        return self._result(min(self._vendor_first[p] for p in found), default_icon)
+
+    def match_name(self, name, default_type, default_icon):
+        name_lower = name.lower() if name else ""
+        if self._any_name is not None and not self._any_name.search(name_lower):
+            return default_type, default_icon
+        for regex, dev_type, base64_icon in self._name_patterns:
+            # Use regex search to allow pattern substrings
+            if regex.search(name_lower):
+                mylog("debug", "[guess_device_attributes] Matched via Name")
+                return dev_type, base64_icon or default_icon
+        return default_type, default_icon
+
+    def match_ip(self, ip, default_type, default_icon):
+        if not ip:
+            return default_type, default_icon
+        for regex, dev_type, base64_icon in self._ip_patterns:
+            if regex.match(ip):
+                mylog("debug", "[guess_device_attributes] Matched via IP")
+                return dev_type, base64_icon or default_icon
+        return default_type, default_icon
+
+
+COMPILED_RULES = CompiledRules(MAC_TYPE_ICON_RULES)
+
+
 # -----------------------------------------
 # Match device type and base64-encoded icon using MAC prefix and vendor patterns.
 def match_mac_and_vendor(
@@ -46,49 +232,13 @@ def match_mac_and_vendor(
     Returns:
         Tuple containing (device_type, base64_icon)
     """
-    for rule in MAC_TYPE_ICON_RULES:
-        dev_type = rule.get("dev_type")
-        base64_icon = rule.get("icon_base64", "")
-        patterns = rule.get("matching_pattern", [])
-
-        for pattern in patterns:
-            mac_prefix = pattern.get("mac_prefix", "").upper()
-            vendor_pattern = pattern.get("vendor", "").lower()
-
-            if mac_clean.startswith(mac_prefix):
-                if not vendor_pattern or vendor_pattern in vendor:
-                    mylog("debug", "[guess_device_attributes] Matched via MAC+Vendor")
-
-                    type_ = dev_type
-                    icon = base64_icon or default_icon
-                    return type_, icon
-
-    return default_type, default_icon
+    return COMPILED_RULES.match_mac_and_vendor(mac_clean, vendor, default_type, default_icon)
 
 
 # ---------------------------------------------------
 # Match device type and base64-encoded icon using vendor patterns.
 def match_vendor(vendor: str, default_type: str, default_icon: str) -> Tuple[str, str]:
-    vendor_lc = vendor.lower()
-
-    for rule in MAC_TYPE_ICON_RULES:
-        dev_type = rule.get("dev_type")
-        base64_icon = rule.get("icon_base64", "")
-        patterns = rule.get("matching_pattern", [])
-
-        for pattern in patterns:
-            # Only apply fallback when no MAC prefix is specified
-            # mac_prefix = pattern.get("mac_prefix", "")
-            vendor_pattern = pattern.get("vendor", "").lower()
-
-            if vendor_pattern and vendor_pattern in vendor_lc:
-                mylog("debug", "[guess_device_attributes] Matched via Vendor")
-
-                icon = base64_icon or default_icon
-
-                return dev_type, icon
-
-    return default_type, default_icon
+    return COMPILED_RULES.match_vendor(vendor, default_type, default_icon)
 
 
 # ---------------------------------------------------
@@ -105,23 +255,7 @@ def match_name(name: str, default_type: str, default_icon: str) -> Tuple[str, st
     Returns:
         Tuple containing (device_type, base64_icon)
     """
-    name_lower = name.lower() if name else ""
-
-    for rule in MAC_TYPE_ICON_RULES:
-        dev_type = rule.get("dev_type")
-        base64_icon = rule.get("icon_base64", "")
-        name_patterns = rule.get("name_pattern", [])
-
-        for pattern in name_patterns:
-            # Use regex search to allow pattern substrings
-            if re.search(pattern, name_lower, re.IGNORECASE):
-                mylog("debug", "[guess_device_attributes] Matched via Name")
-
-                type_ = dev_type
-                icon = base64_icon or default_icon
-                return type_, icon
-
-    return default_type, default_icon
+    return COMPILED_RULES.match_name(name, default_type, default_icon)
 
 
 # -------------------------------------------------------------------------------
@@ -138,23 +272,7 @@ def match_ip(ip: str, default_type: str, default_icon: str) -> Tuple[str, str]:
     Returns:
         Tuple containing (device_type, base64_icon)
     """
-    if not ip:
-        return default_type, default_icon
-
-    for rule in MAC_TYPE_ICON_RULES:
-        ip_patterns = rule.get("ip_pattern", [])
-        dev_type = rule.get("dev_type")
-        base64_icon = rule.get("icon_base64", "")
-
-        for pattern in ip_patterns:
-            if re.match(pattern, ip):
-                mylog("debug", "[guess_device_attributes] Matched via IP")
-
-                type_ = dev_type
-                icon = base64_icon or default_icon
-                return type_, icon
-
-    return default_type, default_icon
+    return COMPILED_RULES.match_ip(ip, default_type, default_icon)
 
 
 # -------------------------------------------------------------------------------
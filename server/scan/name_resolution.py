@@ -1,7 +1,23 @@
 import re
+from functools import lru_cache
+
 from logger import mylog
 from helper import get_setting_value
 
+_TRAILING_DOT = re.compile(r"\.$")
+
+
+@lru_cache(maxsize=8)
+def _compile_cleanup_regexes(patterns: tuple) -> tuple:
+    """Compile the NEWDEV_NAME_CLEANUP_REGEX patterns once per distinct setting value."""
+    compiled = []
+    for rgx in patterns:
+        try:
+            compiled.append(re.compile(rgx))
+        except re.error as e:
+            mylog("none", [f"[cleanDeviceName] Ignoring invalid NEWDEV_NAME_CLEANUP_REGEX '{rgx}': {e}"])
+    return tuple(compiled)
+
 
 class ResolvedName:
     def __init__(
@@ -15,38 +31,55 @@ class ResolvedName:
 
 
 class NameResolver:
+    """
+    Looks up device names reported by the name-resolution plugins.
+
+    Each plugin's Plugins_Objects rows are read once, on first use, into
+    MAC -> name and IP -> name maps; every device lookup after that is a
+    dictionary lookup. Create a new resolver for each update pass so new
+    plugin results are picked up.
+    """
+
     def __init__(self, db):
         self.db = db
+        # plugin -> (names by objectPrimaryId, names by objectSecondaryId)
+        self._names = {}
+        self._match_ip = get_setting_value('NEWDEV_IP_MATCH_NAME')
+        self._cleanup_regexes = _compile_cleanup_regexes(tuple(get_setting_value('NEWDEV_NAME_CLEANUP_REGEX') or []))
+
+    def _plugin_names(self, plugin: str):
+        names = self._names.get(plugin)
+        if names is None:
+            by_mac = {}
+            by_ip = {}
+            rows = self.db.sql.execute("""
+                SELECT objectPrimaryId, objectSecondaryId, watchedValue2 FROM Plugins_Objects
+                WHERE plugin = ?
+            """, (plugin,)).fetchall()
+            # self.db.commitDB() # Issue #1251: Optimize name resolution lookup
+            for mac, ip, raw in rows:
+                # First row wins, as with the former per-device SELECT
+                by_mac.setdefault(mac, raw)
+                by_ip.setdefault(ip, raw)
+            names = self._names[plugin] = (by_mac, by_ip)
+            mylog("debug", [f"[NameResolver] Loaded {len(rows)} {plugin} names"])
+        return names
 
     def resolve_from_plugin(self, plugin: str, pMAC: str, pIP: str) -> ResolvedName:
-        sql = self.db.sql
-        nameNotFound = ResolvedName()
+        by_mac, by_ip = self._plugin_names(plugin)
 
         # Check by MAC
-        sql.execute("""
-            SELECT watchedValue2 FROM Plugins_Objects
-            WHERE plugin = ? AND objectPrimaryId = ?
-        """, (plugin, pMAC))
-        result = sql.fetchall()
-        # self.db.commitDB() # Issue #1251: Optimize name resolution lookup
-        if result:
-            raw = result[0][0]
+        raw = by_mac.get(pMAC)
+        if raw is not None:
             return ResolvedName(raw, self.clean_device_name(raw, False))
 
         # Check name by IP if enabled
-        if get_setting_value('NEWDEV_IP_MATCH_NAME'):
-
-            sql.execute("""
-                SELECT watchedValue2 FROM Plugins_Objects
-                WHERE plugin = ? AND objectSecondaryId = ?
-            """, (plugin, pIP))
-            result = sql.fetchall()
-            # self.db.commitDB() # Issue #1251: Optimize name resolution lookup
-            if result:
-                raw = result[0][0]
+        if self._match_ip:
+            raw = by_ip.get(pIP)
+            if raw is not None:
                 return ResolvedName(raw, self.clean_device_name(raw, True))
 
-        return nameNotFound
+        return ResolvedName()
 
     def resolve_mdns(self, pMAC, pIP) -> ResolvedName:
         return self.resolve_from_plugin("AVAHISCAN", pMAC, pIP)
@@ -66,13 +99,11 @@ class NameResolver:
         if match_ip:
             name += " (IP match)"
 
-        regexes = get_setting_value('NEWDEV_NAME_CLEANUP_REGEX') or []
-        mylog('trace', [f"[cleanDeviceName] applying regexes: {regexes}"])
-        for rgx in regexes:
-            mylog("trace", [f"[cleanDeviceName] applying regex: {rgx}"])
-            name = re.sub(rgx, "", name)
+        for rgx in self._cleanup_regexes:
+            mylog("trace", [f"[cleanDeviceName] applying regex: {rgx.pattern}"])
+            name = rgx.sub("", name)
 
-        name = re.sub(r"\.$", "", name)
+        name = _TRAILING_DOT.sub("", name)
         name = name.replace(". (IP match)", " (IP match)")
 
         mylog("debug", [f"[cleanDeviceName] output: {name}"])
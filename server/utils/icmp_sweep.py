@@ -0,0 +1,317 @@
+"""
+icmp_sweep.py — built-in ICMP echo sweeper (no ping / fping processes).
+
+The ICMP plugin's ``fping`` mode expands every subnet into a Python list of
+host strings and passes them all on one command line; ``ping`` mode starts a
+process per device. ``IcmpSweeper`` sends the echo requests itself:
+
+  - targets are streamed lazily from ``ipaddress`` network iterators, so a
+    /16 never exists as a list of 65k strings
+  - requests go out at a fixed packets-per-second ``rate`` from a single
+    non-blocking socket per address family; replies are read in between
+    and matched to the request by source address and sequence number (and
+    identifier on raw sockets, which also see other processes' replies)
+  - the round-trip time of the first reply per host is reported in ms
+
+Unprivileged datagram ICMP sockets are used when the kernel allows them
+(``net.ipv4.ping_group_range``), raw sockets otherwise (CAP_NET_RAW).
+"""
+
+import ipaddress
+import os
+import select
+import socket
+import struct
+import time
+
+from logger import mylog
+
+ICMP_ECHO_REPLY = 0
+ICMP_ECHO_REQUEST = 8
+ICMPV6_ECHO_REQUEST = 128
+ICMPV6_ECHO_REPLY = 129
+
+DEFAULT_RATE = 500          # echo requests per second
+DEFAULT_TIMEOUT = 1.0       # seconds to wait for a reply
+DEFAULT_RETRIES = 1         # extra rounds for hosts that did not answer
+
+PAYLOAD = b"NetAlertX-sweep\x00"
+
+
+class SweepUnavailable(OSError):
+    """Raised when no ICMP socket (datagram or raw) can be opened."""
+
+
+# -------------------------------------------------------------------------------
+# Targets
+# -------------------------------------------------------------------------------
+def iter_targets(targets):
+    """
+    Lazily yield the host addresses (str) of *targets*.
+
+    Entries may be CIDR subnets or single addresses. Single addresses that
+    fall inside one of the listed subnets are skipped, so known device IPs
+    can be passed alongside the subnets without being probed twice.
+    Invalid entries are logged and skipped.
+    """
+    networks = []
+    hosts = []
+    for t in targets:
+        t = str(t).strip()
+        if not t:
+            continue
+        try:
+            if "/" in t:
+                networks.append(ipaddress.ip_network(t, strict=False))
+            else:
+                hosts.append(ipaddress.ip_address(t))
+        except ValueError:
+            mylog("verbose", [f"[IcmpSweep] Skipping invalid target: {t}"])
+
+    for net in networks:
+        # /32 and /128 have no "hosts" in older Python versions
+        if net.num_addresses == 1:
+            yield str(net.network_address)
+        else:
+            for ip in net.hosts():
+                yield str(ip)
+
+    for ip in dict.fromkeys(hosts):
+        if not any(ip.version == net.version and ip in net for net in networks):
+            yield str(ip)
+
+
+# -------------------------------------------------------------------------------
+# Wire format
+# -------------------------------------------------------------------------------
+def checksum(data):
+    """RFC 1071 internet checksum."""
+    if len(data) % 2:
+        data += b"\x00"
+    total = sum(struct.unpack(f"!{len(data) // 2}H", data))
+    total = (total >> 16) + (total & 0xFFFF)
+    total += total >> 16
+    return ~total & 0xFFFF
+
+
+def build_echo_request(ident, seq, v6=False, payload=PAYLOAD):
+    """Build an ICMP (or ICMPv6) echo request."""
+    icmp_type = ICMPV6_ECHO_REQUEST if v6 else ICMP_ECHO_REQUEST
+    header = struct.pack("!BBHHH", icmp_type, 0, 0, ident, seq)
+    if v6:
+        # The kernel computes the ICMPv6 checksum (it covers a pseudo header)
+        return header + payload
+    return struct.pack("!BBHHH", icmp_type, 0, checksum(header + payload), ident, seq) + payload
+
+
+def parse_echo_reply(data, v6=False, has_ip_header=False):
+    """
+    Return ``(ident, seq)`` if *data* is an echo reply, else None.
+
+    Raw IPv4 sockets deliver the IP header in front of the ICMP message.
+    """
+    if has_ip_header:
+        if len(data) < 20:
+            return None
+        data = data[(data[0] & 0x0F) * 4:]
+    if len(data) < 8:
+        return None
+    icmp_type, _, _, ident, seq = struct.unpack("!BBHHH", data[:8])
+    if icmp_type != (ICMPV6_ECHO_REPLY if v6 else ICMP_ECHO_REPLY):
+        return None
+    return ident, seq
+
+
+# -------------------------------------------------------------------------------
+# Sockets
+# -------------------------------------------------------------------------------
+class _IcmpSocket:
+    """One non-blocking ICMP socket for an address family."""
+
+    def __init__(self, v6, interface=None):
+        self.v6 = v6
+        family = socket.AF_INET6 if v6 else socket.AF_INET
+        proto = socket.IPPROTO_ICMPV6 if v6 else socket.IPPROTO_ICMP
+
+        self.raw = False
+        try:
+            self.sock = socket.socket(family, socket.SOCK_DGRAM, proto)
+        except OSError:
+            try:
+                self.sock = socket.socket(family, socket.SOCK_RAW, proto)
+                self.raw = True
+            except OSError as e:
+                raise SweepUnavailable(
+                    f"no ICMP{'v6' if v6 else ''} socket: unprivileged ping sockets are disabled "
+                    f"(net.ipv4.ping_group_range) and raw sockets need CAP_NET_RAW ({e})"
+                )
+
+        self.sock.setblocking(False)
+        # Large receive buffer: replies arrive in bursts at high rates
+        try:
+            self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1 << 20)
+        except OSError:
+            pass
+        if interface:
+            try:
+                self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_BINDTODEVICE, interface.encode() + b"\x00")
+            except (OSError, AttributeError) as e:
+                mylog("verbose", [f"[IcmpSweep] Could not bind to interface {interface}: {e}"])
+
+        # Datagram sockets: the kernel replaces the identifier with the
+        # socket's port and only delivers our own replies
+        self.ident = os.getpid() & 0xFFFF if self.raw else 0
+
+    def fileno(self):
+        return self.sock.fileno()
+
+    def close(self):
+        self.sock.close()
+
+
+# -------------------------------------------------------------------------------
+# Sweeper
+# -------------------------------------------------------------------------------
+class IcmpSweeper:
+    """Rate-limited ICMP echo sweep over lazily generated targets."""
+
+    def __init__(self, rate=DEFAULT_RATE, timeout=DEFAULT_TIMEOUT, retries=DEFAULT_RETRIES, interface=None):
+        """
+        Args:
+            rate (int): echo requests per second.
+            timeout (float): seconds to wait for each reply.
+            retries (int): extra rounds for hosts that did not answer.
+            interface (str): bind the sockets to this interface (optional).
+        """
+        self.rate = max(float(rate), 1.0)
+        self.timeout = float(timeout)
+        self.retries = max(int(retries), 0)
+        self.interface = interface
+        self.stats = {"sent": 0, "received": 0, "send_errors": 0}
+        self._sockets = {}
+        self._seq = 0
+
+    def _socket(self, v6):
+        sock = self._sockets.get(v6)
+        if sock is None:
+            sock = self._sockets[v6] = _IcmpSocket(v6, self.interface)
+        return sock
+
+    def close(self):
+        for sock in self._sockets.values():
+            sock.close()
+        self._sockets = {}
+
+    def sweep(self, targets, deadline=None):
+        """
+        Probe every host of *targets* (subnets and/or addresses).
+
+        Args:
+            targets: iterable of CIDR subnets / IP strings.
+            deadline (float): time.monotonic() value after which no more
+                requests are sent; hosts not probed yet are not reported.
+
+        Returns:
+            dict: ``{ip: rtt_ms}`` for every host that answered.
+        """
+        alive = {}
+        try:
+            missing = self._round(iter_targets(targets), alive, deadline, collect_missing=self.retries > 0)
+            for _ in range(self.retries):
+                if not missing:
+                    break
+                missing = self._round(iter(missing), alive, deadline, collect_missing=True)
+        finally:
+            self.close()
+        return alive
+
+    def _round(self, targets, alive, deadline, collect_missing):
+        # (ip, seq) -> (send time, socket); entries leave on reply or timeout
+        outstanding = {}
+        missing = []
+        interval = 1.0 / self.rate
+        next_send = time.monotonic()
+        exhausted = False
+
+        while True:
+            now = time.monotonic()
+            if deadline is not None and now >= deadline:
+                exhausted = True
+
+            # Send every request that is due at the configured rate
+            while not exhausted and now >= next_send:
+                ip = next(targets, None)
+                if ip is None:
+                    exhausted = True
+                    break
+                self._send(ip, outstanding, now)
+                next_send += interval
+                if next_send < now - 1.0:
+                    # Do not burst to catch up after a stall
+                    next_send = now
+
+            # Expire requests that were not answered in time
+            # (requests are inserted in send order, so stop at the first live one)
+            cutoff = now - self.timeout
+            expired = []
+            for key, (sent, _) in outstanding.items():
+                if sent >= cutoff:
+                    break
+                expired.append(key)
+            for key in expired:
+                del outstanding[key]
+                if collect_missing and key[0] not in alive:
+                    missing.append(key[0])
+
+            if exhausted and not outstanding:
+                return missing
+
+            wait = self.timeout if exhausted else max(next_send - now, 0)
+            socks = {s for _, s in outstanding.values()}
+            if not socks:
+                if wait:
+                    time.sleep(min(wait, 0.05))
+                continue
+            readable, _, _ = select.select(list(socks), [], [], min(wait, 0.05))
+            for sock in readable:
+                self._receive(sock, outstanding, alive)
+
+    def _send(self, ip, outstanding, now):
+        v6 = ":" in ip
+        sock = self._socket(v6)
+        self._seq = (self._seq + 1) & 0xFFFF
+        packet = build_echo_request(sock.ident, self._seq, v6)
+        try:
+            sock.sock.sendto(packet, (ip, 0))
+        except OSError as e:
+            # Unreachable network, full send buffer, ...: count as no reply
+            self.stats["send_errors"] += 1
+            mylog("trace", [f"[IcmpSweep] send to {ip} failed: {e}"])
+            return
+        self.stats["sent"] += 1
+        outstanding[(ip, self._seq)] = (now, sock)
+
+    def _receive(self, sock, outstanding, alive):
+        while True:
+            try:
+                data, addr = sock.sock.recvfrom(2048)
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError as e:
+                mylog("trace", [f"[IcmpSweep] receive failed: {e}"])
+                return
+
+            received = time.monotonic()
+            reply = parse_echo_reply(data, sock.v6, has_ip_header=sock.raw and not sock.v6)
+            if reply is None:
+                continue
+            ident, seq = reply
+            if sock.raw and ident != sock.ident:
+                continue  # another process' ping
+
+            ip = addr[0].split("%")[0]
+            entry = outstanding.pop((ip, seq), None)
+            if entry is None:
+                continue
+            self.stats["received"] += 1
+            alive.setdefault(ip, round((received - entry[0]) * 1000, 3))
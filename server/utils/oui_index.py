@@ -0,0 +1,254 @@
+"""
+oui_index.py — compact, mmap-able MAC vendor index with longest-prefix match.
+
+The IEEE assigns vendor blocks of three sizes:
+
+  - MA-L (OUI)   24-bit prefix, 6 hex digits   ``00000C``
+  - MA-M         28-bit prefix, 7 hex digits   ``70B3D5C``
+  - MA-S / IAB   36-bit prefix, 9 hex digits   ``70B3D5F00``
+
+MA-M and MA-S blocks are carved out of OUIs registered to the IEEE itself, so
+a lookup keyed only on the first 24 bits reports "IEEE Registration Authority"
+for them. ``OuiIndex.lookup`` tries the 36-, 28- and 24-bit prefix in that
+order and returns the first (longest) match.
+
+The index is a single binary file, built from the ``<prefix>\\t<vendor>``
+text file written by ``update_vendors.sh``:
+
+  header   magic, entry count per prefix length, source mtime/size
+  tables   one table per prefix length of ``(prefix: u64, name offset: u32)``
+           records, sorted by prefix, searched with a binary search
+  names    NUL-terminated UTF-8 vendor names, each stored once
+
+Lookups read the file through ``mmap``, so every process (server and plugin
+subprocesses) shares the same read-only pages from the page cache instead of
+parsing the text file into a private dict.
+"""
+
+import mmap
+import os
+import re
+import struct
+import tempfile
+
+from logger import mylog
+
+MAGIC = b"NAXOUI\x00\x01"
+
+# magic, count24, count28, count36, source mtime (ns), source size
+_HEADER = struct.Struct("<8sIIIqq")
+_RECORD = struct.Struct("<QI")
+_KEY = struct.Struct("<Q")
+
+# Prefix length in bits, longest first
+PREFIX_BITS = (36, 28, 24)
+_BITS_BY_DIGITS = {9: 36, 7: 28, 6: 24}
+
+_HEX_RE = re.compile(r"^[0-9a-fA-F]+$")
+
+
+class OuiIndexError(ValueError):
+    """Raised for a missing, truncated or foreign index file."""
+
+
+# -------------------------------------------------------------------------------
+# Building
+# -------------------------------------------------------------------------------
+def parse_vendor_line(line):
+    """
+    Parse one ``<prefix>\\t<vendor>`` line.
+
+    ``-`` / ``:`` separators in the prefix are ignored. Lines whose prefix is
+    not 6, 7 or 9 hex digits (comments, stray address lines of older
+    downloads) are skipped.
+
+    Returns:
+        tuple: ``(bits, prefix_value, vendor)`` or None.
+    """
+    parts = line.rstrip("\r\n").split("\t", 1)
+    if len(parts) != 2:
+        return None
+    prefix = parts[0].strip().replace("-", "").replace(":", "")
+    vendor = parts[1].strip()
+    bits = _BITS_BY_DIGITS.get(len(prefix))
+    if bits is None or not vendor or not _HEX_RE.match(prefix):
+        return None
+    return bits, int(prefix, 16), vendor
+
+
+def build_index(source_path):
+    """
+    Build the binary index of the vendors text file *source_path*.
+
+    When a prefix is listed more than once the last line wins, as it did
+    for the in-memory dict this index replaces.
+
+    Returns:
+        bytes: the index image (see ``write_index`` / ``OuiIndex``).
+    """
+    stat = os.stat(source_path)
+    tables = {bits: {} for bits in PREFIX_BITS}
+    with open(source_path, "r", encoding="utf-8", errors="replace") as f:
+        for line in f:
+            entry = parse_vendor_line(line)
+            if entry is not None:
+                bits, prefix, vendor = entry
+                tables[bits][prefix] = vendor
+
+    names = bytearray()
+    name_offsets = {}
+    records = bytearray()
+    for bits in PREFIX_BITS:
+        for prefix, vendor in sorted(tables[bits].items()):
+            offset = name_offsets.get(vendor)
+            if offset is None:
+                offset = name_offsets[vendor] = len(names)
+                names += vendor.encode("utf-8") + b"\x00"
+            records += _RECORD.pack(prefix, offset)
+
+    header = _HEADER.pack(
+        MAGIC, len(tables[24]), len(tables[28]), len(tables[36]), stat.st_mtime_ns, stat.st_size
+    )
+    return header + bytes(records) + bytes(names)
+
+
+def write_index(source_path, index_path):
+    """
+    Build the index of *source_path* and atomically replace *index_path*.
+
+    Readers that still have the previous file mapped keep using it until
+    they reopen, so the swap is safe while other processes do lookups.
+
+    Returns:
+        int: number of prefixes in the index.
+    """
+    data = build_index(source_path)
+    # Unique temp file, processes rebuilding at the same time don't mix their writes
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(index_path) or ".", prefix=".oui_index.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            os.fchmod(f.fileno(), 0o644)
+            f.write(data)
+        os.replace(tmp_path, index_path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+    counts = _HEADER.unpack_from(data)[1:4]
+    return sum(counts)
+
+
+# -------------------------------------------------------------------------------
+# Lookup
+# -------------------------------------------------------------------------------
+class OuiIndex:
+    """Read-only view of a vendor index (mmap of a file or bytes in memory)."""
+
+    def __init__(self, buf, mapped=None):
+        if len(buf) < _HEADER.size:
+            raise OuiIndexError("index is truncated")
+        magic, count24, count28, count36, self.source_mtime_ns, self.source_size = _HEADER.unpack_from(buf)
+        if magic != MAGIC:
+            raise OuiIndexError("not a vendor index (bad magic)")
+
+        self._buf = buf
+        self._mapped = mapped
+        # bits -> (table offset, record count); tables are stored longest first
+        self._tables = {}
+        offset = _HEADER.size
+        for bits, count in ((36, count36), (28, count28), (24, count24)):
+            self._tables[bits] = (offset, count)
+            offset += count * _RECORD.size
+        self._names_offset = offset
+        if offset > len(buf):
+            raise OuiIndexError("index is truncated")
+
+    @classmethod
+    def open(cls, index_path):
+        """Map *index_path* read-only."""
+        with open(index_path, "rb") as f:
+            try:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                # Empty file
+                raise OuiIndexError(f"{index_path} is empty")
+        try:
+            return cls(mapped, mapped)
+        except OuiIndexError:
+            mapped.close()
+            raise
+
+    def close(self):
+        if self._mapped is not None:
+            self._mapped.close()
+            self._mapped = None
+
+    def __len__(self):
+        return sum(count for _, count in self._tables.values())
+
+    def is_current(self, source_path):
+        """True if the index was built from the current version of *source_path*."""
+        try:
+            stat = os.stat(source_path)
+        except OSError:
+            return False
+        return stat.st_mtime_ns == self.source_mtime_ns and stat.st_size == self.source_size
+
+    def _find(self, bits, key):
+        offset, count = self._tables[bits]
+        lo, hi = 0, count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            value = _KEY.unpack_from(self._buf, offset + mid * _RECORD.size)[0]
+            if value < key:
+                lo = mid + 1
+            elif value > key:
+                hi = mid
+            else:
+                return _RECORD.unpack_from(self._buf, offset + mid * _RECORD.size)[1]
+        return None
+
+    def lookup(self, mac):
+        """
+        Return the vendor of the longest registered prefix of *mac*, or None.
+
+        Args:
+            mac (str): 12 hex digits, separators already removed.
+        """
+        value = int(mac, 16)
+        for bits in PREFIX_BITS:
+            name_offset = self._find(bits, value >> (48 - bits))
+            if name_offset is not None:
+                start = self._names_offset + name_offset
+                end = self._buf.find(b"\x00", start)
+                return bytes(self._buf[start:end]).decode("utf-8", errors="replace")
+        return None
+
+
+def load_index(source_path, index_path):
+    """
+    Return an ``OuiIndex`` that is current for *source_path*.
+
+    Maps *index_path* if it was built from the current source file, else
+    rebuilds it there. When the index cannot be written (read-only
+    location) it is built in memory for this process only.
+    """
+    try:
+        index = OuiIndex.open(index_path)
+        if index.is_current(source_path):
+            return index
+        index.close()
+    except (OSError, OuiIndexError):
+        pass
+
+    try:
+        count = write_index(source_path, index_path)
+        mylog("verbose", [f"[Vendor Check] Built vendor index {index_path} ({count} prefixes)"])
+        return OuiIndex.open(index_path)
+    except OSError as e:
+        if not os.path.isfile(source_path):
+            raise
+        mylog("verbose", [f"[Vendor Check] Could not write vendor index {index_path} ({e}), building it in memory"])
+        return OuiIndex(build_index(source_path))
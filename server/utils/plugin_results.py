@@ -0,0 +1,127 @@
+"""
+Plugin result files (last_result.<PREFIX>.log).
+
+Python plugins write their objects through Plugin_Objects as JSON lines, one
+JSON array of RESULT_COLUMNS per object. JSON escapes newlines, so every line
+is exactly one record and values may contain pipes or line breaks. Plugins
+written in other languages, and older SYNC nodes, write the pipe-delimited
+text format, which is still read. The format is detected per file from its
+first record.
+
+Columns are written as strings, as in the text format: the values are stored
+as TEXT and compared with the stored values to detect changes.
+"""
+
+import json
+
+RESULT_COLUMNS = [
+    "objectPrimaryId",
+    "objectSecondaryId",
+    "dateTimeChanged",
+    "watchedValue1",
+    "watchedValue2",
+    "watchedValue3",
+    "watchedValue4",
+    "extra",
+    "foreignKey",
+    "helpVal1",
+    "helpVal2",
+    "helpVal3",
+    "helpVal4",
+]
+
+
+# -------------------------------------------------------------------------------
+def encode_result_row(values):
+    """One JSON line for a result row, ASCII only whatever the locale."""
+    return json.dumps([str(value) for value in values]) + "\n"
+
+
+def encode_text_row(values):
+    """One pipe-delimited line for a result row (text format)."""
+    return "|".join(str(value) for value in values) + "\n"
+
+
+# JSON lines decoded with one json.loads call, bounds the memory held per batch
+DECODE_BATCH_SIZE = 1000
+
+
+def _structured_row(line):
+    """The row of a JSON line, or None if the line is not one."""
+    if not line.startswith("["):
+        return None
+    try:
+        row = json.loads(line)
+    except ValueError:
+        return None
+    return row if isinstance(row, list) else None
+
+
+def _decode_batch(lines, on_error):
+    try:
+        rows = json.loads("[" + ",".join(lines) + "]")
+        if all(isinstance(row, list) for row in rows):
+            return rows
+    except ValueError:
+        pass
+
+    # Find the broken lines
+    rows = []
+    for line in lines:
+        row = _structured_row(line)
+        if row is not None:
+            rows.append(row)
+        elif on_error is not None:
+            on_error(line)
+    return rows
+
+
+# -------------------------------------------------------------------------------
+def iter_result_rows(lines, on_error=None):
+    """
+    Yield the rows (lists of column values) of a result file, read line by
+    line from ``lines`` (an open file or any iterable of lines).
+
+    JSON lines and the text format are both accepted, lines that are no
+    record (e.g. output of the plugin) are skipped. ``on_error(line)`` is
+    called for JSON lines that cannot be decoded.
+    """
+    structured = None
+    batch = []
+
+    for line in lines:
+        line = line.rstrip("\r\n")
+        if not line:
+            continue
+
+        if structured is None:
+            row = _structured_row(line)
+            structured = row is not None
+            if structured:
+                yield row
+                continue
+
+        if structured:
+            batch.append(line)
+            if len(batch) >= DECODE_BATCH_SIZE:
+                yield from _decode_batch(batch, on_error)
+                batch = []
+        elif "|" in line:
+            yield line.split("|")
+
+    if batch:
+        yield from _decode_batch(batch, on_error)
+
+
+def read_result_rows(path, on_error=None):
+    """All rows of the result file at ``path``."""
+    with open(path, "r") as f:
+        return list(iter_result_rows(f, on_error))
+
+
+def to_text_format(content):
+    """
+    ``content`` of a result file in the text format, for receivers that only
+    read the text format (e.g. SYNC hubs on an older version).
+    """
+    return "".join(encode_text_row(row) for row in iter_result_rows(content.splitlines()))
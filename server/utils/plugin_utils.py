@@ -4,7 +4,7 @@ from collections import namedtuple
 import conf
 from logger import mylog
 from utils.crypto_utils import decrypt_data
-from const import pluginsPath, apiPath
+from const import pluginsPath, apiPath, applicationPath
 from helper import (
     get_file_content,
     get_setting_value,
@@ -53,6 +53,16 @@ def get_plugin_setting_obj(plugin, function_key):
     return result
 
 
+# -------------------------------------------------------------------------------
+# Replace the hardcoded /app paths of a plugin CMD with the environment-aware ones
+def resolve_app_paths(cmd):
+    if "/app/server/plugins" in cmd:
+        cmd = cmd.replace("/app/server/plugins", str(pluginsPath))
+    if "/app/" in cmd:
+        cmd = cmd.replace("/app/", f"{applicationPath}/")
+    return cmd
+
+
 # -------------------------------------------------------------------------------
 # Gets the setting value for a plugin from the default JSON
 def get_plugin_setting_value(plugin, function_key):
@@ -278,6 +288,28 @@ def getPluginObject(keyValues):
         return {}
 
 
+# -------------------------------------------------------------------------------
+# Get and return all plugin objects matching the key-value pairs, reading the
+# objects file once (instead of once per lookup with getPluginObject)
+# keyValues example: getPluginObjects({"plugin":"MQTT"})
+def getPluginObjects(keyValues):
+    plugins_objects = apiPath + "table_plugins_objects.json"
+
+    try:
+        with open(plugins_objects, "r") as json_file:
+            data = json.load(json_file)
+
+        return [
+            item for item in data.get("data", [])
+            if all(item.get(key) == value for key, value in keyValues.items())
+        ]
+
+    except (FileNotFoundError, json.JSONDecodeError, ValueError, AttributeError):
+        mylog("verbose", f"[{module_name}] ⚠ ERROR - JSONDecodeError or FileNotFoundError for file {plugins_objects}")
+
+        return []
+
+
 # ------------------------------------------------------------------
 # decode any encoded last_result files
 def decode_and_rename_files(file_dir, file_prefix):
@@ -0,0 +1,313 @@
+"""
+reverse_dns.py — in-process, asyncio-based reverse DNS (PTR) resolver.
+
+NSLOOKUP and DIGSCAN used to spawn one ``nslookup`` / ``dig`` process per
+device and wait for it with a blocking timeout, so a few thousand hosts
+without a PTR record took tens of minutes. This module sends the PTR queries
+itself over UDP:
+
+  - every configured nameserver gets one connected UDP socket; queries are
+    matched to replies by transaction id and question name
+  - up to ``concurrency`` queries are in flight at once, each with its own
+    ``timeout`` and ``retries`` (rotating through the nameservers)
+  - answers are cached for their DNS TTL, NXDOMAIN / empty answers for the
+    SOA negative TTL and timeouts for the cache's ``negative_ttl``
+    (see utils.ttl_cache.TTLCache)
+
+Only the standard library is used.
+"""
+
+import asyncio
+import ipaddress
+import random
+import struct
+
+from logger import mylog
+from utils.ttl_cache import MISS
+
+DNS_PORT = 53
+QTYPE_PTR = 12
+QTYPE_SOA = 6
+QCLASS_IN = 1
+
+RCODE_NOERROR = 0
+RCODE_NXDOMAIN = 3
+
+# Defaults for the plugins' native engine settings
+DEFAULT_CONCURRENCY = 64
+DEFAULT_TIMEOUT = 2.0
+DEFAULT_RETRIES = 1
+
+# Bounds applied to TTLs taken from DNS answers (seconds)
+MIN_CACHE_TTL = 60
+MAX_CACHE_TTL = 86400
+
+
+class DNSFormatError(ValueError):
+    """Raised for a malformed DNS message."""
+
+
+# -------------------------------------------------------------------------------
+# Wire format
+# -------------------------------------------------------------------------------
+def ptr_name(ip):
+    """Return the PTR query name for an IPv4/IPv6 address (``4.3.2.1.in-addr.arpa``)."""
+    return ipaddress.ip_address(ip).reverse_pointer
+
+
+def _encode_name(name):
+    out = bytearray()
+    for label in name.rstrip(".").split("."):
+        raw = label.encode("ascii")
+        if not 0 < len(raw) < 64:
+            raise DNSFormatError(f"invalid label in {name!r}")
+        out.append(len(raw))
+        out += raw
+    out.append(0)
+    return bytes(out)
+
+
+def build_query(qid, name, qtype=QTYPE_PTR):
+    """Build a recursive DNS query for *name*."""
+    header = struct.pack("!HHHHHH", qid, 0x0100, 1, 0, 0, 0)
+    return header + _encode_name(name) + struct.pack("!HH", qtype, QCLASS_IN)
+
+
+def _read_name(data, offset):
+    """Decode a (possibly compressed) name; returns ``(name, next_offset)``."""
+    labels = []
+    end = None
+    jumps = 0
+    while True:
+        if offset >= len(data):
+            raise DNSFormatError("name runs past end of message")
+        length = data[offset]
+        if length & 0xC0 == 0xC0:
+            if offset + 1 >= len(data):
+                raise DNSFormatError("truncated compression pointer")
+            if end is None:
+                end = offset + 2
+            offset = ((length & 0x3F) << 8) | data[offset + 1]
+            jumps += 1
+            if jumps > 64:
+                raise DNSFormatError("compression loop")
+            continue
+        if length == 0:
+            offset += 1
+            break
+        offset += 1
+        labels.append(data[offset:offset + length].decode("ascii", errors="replace"))
+        offset += length
+    return ".".join(labels) + ".", (end if end is not None else offset)
+
+
+def parse_response(data):
+    """
+    Parse a DNS reply to a PTR query.
+
+    Returns:
+        dict: ``qid``, ``rcode``, ``truncated``, ``question`` (name),
+        ``names`` (PTR targets, with trailing dot), ``ttl`` (lowest PTR TTL)
+        and ``negative_ttl`` (from the SOA in the authority section, or None).
+    """
+    if len(data) < 12:
+        raise DNSFormatError("short message")
+    qid, flags, qdcount, ancount, nscount, _ = struct.unpack("!HHHHHH", data[:12])
+    if not flags & 0x8000:
+        raise DNSFormatError("not a response")
+
+    offset = 12
+    question = None
+    for _ in range(qdcount):
+        name, offset = _read_name(data, offset)
+        offset += 4
+        question = question or name
+
+    names = []
+    ttl = None
+    negative_ttl = None
+    for section, count in (("an", ancount), ("ns", nscount)):
+        for _ in range(count):
+            _, offset = _read_name(data, offset)
+            if offset + 10 > len(data):
+                raise DNSFormatError("truncated resource record")
+            rtype, _rclass, rttl, rdlength = struct.unpack("!HHIH", data[offset:offset + 10])
+            offset += 10
+            rdata_offset = offset
+            offset += rdlength
+            if section == "an" and rtype == QTYPE_PTR:
+                target, _ = _read_name(data, rdata_offset)
+                names.append(target)
+                ttl = rttl if ttl is None else min(ttl, rttl)
+            elif section == "ns" and rtype == QTYPE_SOA:
+                _, pos = _read_name(data, rdata_offset)
+                _, pos = _read_name(data, pos)
+                minimum = struct.unpack("!I", data[pos + 16:pos + 20])[0]
+                negative_ttl = min(rttl, minimum)
+
+    return {
+        "qid": qid,
+        "rcode": flags & 0x000F,
+        "truncated": bool(flags & 0x0200),
+        "question": question,
+        "names": names,
+        "ttl": ttl,
+        "negative_ttl": negative_ttl,
+    }
+
+
+def read_nameservers(path="/etc/resolv.conf"):
+    """Return the ``nameserver`` entries of resolv.conf (may be empty)."""
+    servers = []
+    try:
+        with open(path) as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 2 and parts[0] == "nameserver":
+                    servers.append(parts[1].split("%")[0])
+    except OSError:
+        pass
+    return servers
+
+
+# -------------------------------------------------------------------------------
+# Resolver
+# -------------------------------------------------------------------------------
+class _DNSClientProtocol(asyncio.DatagramProtocol):
+    """Delivers replies to the future registered for their transaction id."""
+
+    def __init__(self, pending):
+        self.pending = pending
+
+    def datagram_received(self, data, addr):
+        if len(data) < 2:
+            return
+        fut = self.pending.get(struct.unpack("!H", data[:2])[0])
+        if fut is not None and not fut.done():
+            fut.set_result(data)
+
+    def error_received(self, exc):
+        # ICMP port unreachable etc. — the query simply times out
+        mylog("trace", [f"[ReverseDNS] socket error: {exc}"])
+
+
+class ReverseResolver:
+    """Concurrent PTR resolver over UDP."""
+
+    def __init__(self, nameservers=None, concurrency=DEFAULT_CONCURRENCY, timeout=DEFAULT_TIMEOUT,
+                 retries=DEFAULT_RETRIES, cache=None):
+        """
+        Args:
+            nameservers: list of ``"ip"`` or ``(ip, port)``; defaults to
+                resolv.conf.
+            concurrency (int): max queries in flight.
+            timeout (float): seconds to wait for each reply.
+            retries (int): extra attempts after a timeout / server failure.
+            cache: optional utils.ttl_cache.TTLCache.
+        """
+        servers = nameservers if nameservers else read_nameservers()
+        if not servers:
+            raise RuntimeError("[ReverseDNS] no nameserver configured")
+        self.nameservers = [s if isinstance(s, tuple) else (s, DNS_PORT) for s in servers]
+        self.concurrency = max(int(concurrency), 1)
+        self.timeout = float(timeout)
+        self.retries = max(int(retries), 0)
+        self.cache = cache
+        self.stats = {"queries": 0, "answers": 0, "negative": 0, "timeouts": 0, "cached": 0}
+
+    # -- public API -----------------------------------------------------------
+    def resolve_many(self, ips):
+        """Resolve *ips*; returns ``{ip: (names, server)}`` (names may be empty)."""
+        return asyncio.run(self.resolve_many_async(ips))
+
+    async def resolve_many_async(self, ips):
+        results = {}
+        todo = []
+        for ip in dict.fromkeys(ips):
+            cached = self.cache.get(ip) if self.cache is not None else MISS
+            if cached is MISS:
+                todo.append(ip)
+            else:
+                self.stats["cached"] += 1
+                results[ip] = (cached[0], cached[1]) if cached else ([], "")
+
+        if todo:
+            loop = asyncio.get_running_loop()
+            pending = {}
+            transports = []
+            try:
+                for host, port in self.nameservers:
+                    transport, _ = await loop.create_datagram_endpoint(
+                        lambda: _DNSClientProtocol(pending), remote_addr=(host, port)
+                    )
+                    transports.append(transport)
+
+                sem = asyncio.Semaphore(self.concurrency)
+
+                async def _one(index, ip):
+                    async with sem:
+                        results[ip] = await self._resolve(ip, index, transports, pending)
+
+                await asyncio.gather(*(_one(i, ip) for i, ip in enumerate(todo)))
+            finally:
+                for transport in transports:
+                    transport.close()
+
+        return results
+
+    # -- internals ------------------------------------------------------------
+    async def _resolve(self, ip, index, transports, pending):
+        try:
+            qname = ptr_name(ip)
+        except ValueError:
+            return [], ""
+
+        loop = asyncio.get_running_loop()
+        for attempt in range(self.retries + 1):
+            # Spread queries over the servers, move on to the next on retry
+            server_index = (index + attempt) % len(transports)
+            qid = random.randrange(1, 0x10000)
+            while qid in pending:
+                qid = random.randrange(1, 0x10000)
+            fut = loop.create_future()
+            pending[qid] = fut
+            self.stats["queries"] += 1
+            try:
+                transports[server_index].sendto(build_query(qid, qname))
+                data = await asyncio.wait_for(fut, self.timeout)
+            except asyncio.TimeoutError:
+                self.stats["timeouts"] += 1
+                continue
+            except OSError as e:
+                mylog("trace", [f"[ReverseDNS] send to {self.nameservers[server_index][0]} failed: {e}"])
+                continue
+            finally:
+                pending.pop(qid, None)
+
+            try:
+                reply = parse_response(data)
+            except (DNSFormatError, struct.error, UnicodeError):
+                continue
+            if reply["question"] and reply["question"].lower() != qname.lower() + ".":
+                continue  # not the answer to our question
+
+            server = self.nameservers[server_index][0]
+            if reply["rcode"] == RCODE_NOERROR and reply["names"]:
+                self.stats["answers"] += 1
+                self._cache(ip, (reply["names"], server), reply["ttl"])
+                return reply["names"], server
+            if reply["rcode"] in (RCODE_NOERROR, RCODE_NXDOMAIN):
+                self.stats["negative"] += 1
+                self._cache(ip, None, reply["negative_ttl"])
+                return [], server
+            # SERVFAIL / REFUSED: try the next server
+
+        self._cache(ip, None, None)
+        return [], ""
+
+    def _cache(self, ip, value, ttl):
+        if self.cache is None:
+            return
+        if ttl is not None:
+            ttl = min(max(ttl, MIN_CACHE_TTL), MAX_CACHE_TTL)
+        self.cache.set(ip, list(value) if value else None, ttl)
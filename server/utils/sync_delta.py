@@ -0,0 +1,159 @@
+"""
+sync_delta.py — versioned delta payloads for the SYNC plugin.
+
+A node keeps the content digest of every device row it last had
+acknowledged by the hub (``{devMac: digest}``) and only sends the rows
+inserted, changed or deleted since then. Payloads are JSON envelopes:
+
+    full:   {"version": 7, "base_version": null, "data": [row, ...]}
+    delta:  {"version": 8, "base_version": 7, "delta": true,
+             "upserts": [row, ...], "deletes": [mac, ...]}
+
+A full envelope keeps the ``data`` key of the original payload, so hubs that
+do not know about versions still read it. The hub keeps a mirror of each
+node's rows and applies a delta only if its ``base_version`` is the version
+the mirror is at; otherwise the node has to send a full payload again.
+
+Pushed payloads are gzip compressed and base64 encoded behind
+``GZIP_PREFIX`` before they are encrypted.
+"""
+
+import base64
+import gzip
+import hashlib
+import json
+import zlib
+
+# Version of the delta protocol, advertised by hubs that understand it
+SYNC_PROTOCOL = 1
+
+# Marks a gzip compressed, base64 encoded payload
+GZIP_PREFIX = "gzip:"
+
+
+# -------------------------------------------------------------------------------
+def row_key(row):
+    return str(row.get("devMac", "")).lower()
+
+
+def row_digest(row):
+    """Content digest of a device row, independent of key order."""
+    encoded = json.dumps(row, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha1(encoded.encode("utf-8")).hexdigest()
+
+
+# -------------------------------------------------------------------------------
+def diff_rows(rows, digests):
+    """
+    Compare device rows with the digests of the last acknowledged state.
+
+    Returns (upserts, deletes, new_digests): the rows that are new or
+    changed, the MACs that disappeared and the digests of ``rows``.
+    """
+    new_digests = {}
+    upserts = []
+    for row in rows:
+        key = row_key(row)
+        digest = row_digest(row)
+        new_digests[key] = digest
+        if digests.get(key) != digest:
+            upserts.append(row)
+
+    deletes = [key for key in digests if key not in new_digests]
+    return upserts, deletes, new_digests
+
+
+def full_payload(rows, version):
+    return {"version": version, "base_version": None, "data": rows}
+
+
+def delta_payload(upserts, deletes, version, base_version):
+    return {
+        "version": version,
+        "base_version": base_version,
+        "delta": True,
+        "upserts": upserts,
+        "deletes": deletes,
+    }
+
+
+def is_delta(payload):
+    return isinstance(payload, dict) and payload.get("delta") is True
+
+
+# -------------------------------------------------------------------------------
+def apply_payload(mirror, payload):
+    """
+    Apply a full or delta payload to a node mirror
+    (``{"version": int, "rows": {devMac: row}}``).
+
+    Returns the updated mirror, or None when a delta does not apply to the
+    mirror's version and the node has to resync.
+    """
+    if not is_delta(payload):
+        return {
+            "version": payload.get("version"),
+            "rows": {row_key(row): row for row in payload.get("data", [])},
+        }
+
+    if mirror is None or mirror.get("version") is None or mirror["version"] != payload.get("base_version"):
+        return None
+
+    rows = mirror["rows"]
+    for key in payload.get("deletes", []):
+        rows.pop(key, None)
+    for row in payload.get("upserts", []):
+        rows[row_key(row)] = row
+
+    return {"version": payload.get("version"), "rows": rows}
+
+
+# -------------------------------------------------------------------------------
+def compress_text(text):
+    """gzip + base64 a payload, so it survives the text-only encryption."""
+    return GZIP_PREFIX + base64.b64encode(gzip.compress(text.encode("utf-8"))).decode("ascii")
+
+
+def decompress_text(text):
+    """Inverse of compress_text; other text is returned unchanged."""
+    if not text.startswith(GZIP_PREFIX):
+        return text
+    return gzip.decompress(base64.b64decode(text[len(GZIP_PREFIX):])).decode("utf-8")
+
+
+def load_payload(text):
+    return json.loads(decompress_text(text))
+
+
+# -------------------------------------------------------------------------------
+def iter_json_gzip(head, rows_key, rows, tail=None, chunk_size=64 * 1024):
+    """
+    Stream ``head`` plus a ``rows_key`` list built from ``rows`` (and
+    optionally more keys from ``tail``) as gzip compressed JSON chunks,
+    one row at a time, without building the whole document.
+    """
+    compressor = zlib.compressobj(wbits=31)  # gzip container
+    pending = []
+    size = 0
+
+    def pieces():
+        yield json.dumps(head)[:-1]
+        yield f'{"," if head else ""}{json.dumps(rows_key)}:['
+        for i, row in enumerate(rows):
+            yield ("," if i else "") + json.dumps(row)
+        yield "]"
+        for key, value in (tail or {}).items():
+            yield f",{json.dumps(key)}:{json.dumps(value)}"
+        yield "}"
+
+    for piece in pieces():
+        data = compressor.compress(piece.encode("utf-8"))
+        if data:
+            pending.append(data)
+            size += len(data)
+        if size >= chunk_size:
+            yield b"".join(pending)
+            pending, size = [], 0
+
+    pending.append(compressor.flush())
+    yield b"".join(pending)
@@ -0,0 +1,125 @@
+"""
+ttl_cache.py — small TTL cache for name lookups, optionally persisted as JSON.
+
+Plugins run as short-lived subprocesses, so an in-memory cache alone would be
+empty on every run. ``TTLCache`` loads its entries from a JSON file next to
+the plugin's result file and writes them back at the end of the run.
+
+Both answers and non-answers are cached:
+
+  - positive entries keep the resolved value for ``positive_ttl`` seconds
+    (or the TTL the lookup returned)
+  - negative entries (``value=None``: NXDOMAIN, timeout, no reply) are kept
+    for ``negative_ttl`` seconds so hosts that never answer are not queried
+    on every run
+  - ``set_failed`` records a negative entry with exponential backoff: every
+    consecutive failure doubles its lifetime, up to ``max_negative_ttl``,
+    so hosts that stay silent are retried less and less often
+"""
+
+import json
+import os
+import time
+
+from logger import mylog
+
+# Returned by TTLCache.get() when a key is unknown or expired
+MISS = object()
+
+
+class TTLCache:
+    """Positive / negative TTL cache keyed by string."""
+
+    def __init__(self, path=None, positive_ttl=3600, negative_ttl=900, max_entries=50000,
+                 max_negative_ttl=86400):
+        """
+        Args:
+            path (str): JSON file to load from / save to. None = memory only.
+            positive_ttl (int): default lifetime of a cached answer (seconds).
+            negative_ttl (int): lifetime of a cached non-answer (seconds).
+            max_entries (int): entries kept on save (soonest-expiring dropped).
+            max_negative_ttl (int): backoff cap for ``set_failed`` (seconds).
+        """
+        self.path = path
+        self.positive_ttl = positive_ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self.max_negative_ttl = max(max_negative_ttl, negative_ttl)
+        # key -> [value or None, expires_at (epoch seconds)] or, for entries
+        # written by set_failed, [None, expires_at, consecutive_failures]
+        self._entries = {}
+        self.hits = 0
+        self.misses = 0
+        if path:
+            self.load()
+
+    def load(self):
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            mylog("verbose", [f"[TTLCache] Ignoring unreadable cache {self.path}: {e}"])
+            return
+
+        now = time.time()
+        self._entries = {
+            k: v for k, v in data.items()
+            if isinstance(v, list) and len(v) in (2, 3) and self._keep(v, now)
+        }
+
+    def _keep(self, entry, now):
+        # Expired failure entries are kept a while longer so the failure
+        # count survives until the host is retried
+        if len(entry) == 3:
+            return entry[1] + self.max_negative_ttl > now
+        return entry[1] > now
+
+    def save(self):
+        if not self.path:
+            return
+        now = time.time()
+        live = [(k, v) for k, v in self._entries.items() if self._keep(v, now)]
+        if len(live) > self.max_entries:
+            live.sort(key=lambda kv: kv[1][1], reverse=True)
+            live = live[:self.max_entries]
+
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump(dict(live), f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            mylog("verbose", [f"[TTLCache] Could not save cache {self.path}: {e}"])
+
+    def get(self, key):
+        """Return the cached value (None for a negative entry) or ``MISS``."""
+        entry = self._entries.get(key)
+        if entry is None or entry[1] <= time.time():
+            self.misses += 1
+            return MISS
+        self.hits += 1
+        return entry[0]
+
+    def set(self, key, value, ttl=None):
+        """Cache *value* (None = negative) for *ttl* seconds or the default TTL."""
+        if ttl is None:
+            ttl = self.positive_ttl if value is not None else self.negative_ttl
+        self._entries[key] = [value, time.time() + ttl]
+
+    def set_failed(self, key):
+        """
+        Record a failed lookup of *key* with exponential backoff.
+
+        Returns:
+            int: seconds until the key is looked up again.
+        """
+        entry = self._entries.get(key)
+        failures = entry[2] + 1 if entry is not None and len(entry) == 3 else 1
+        ttl = min(self.negative_ttl * 2 ** min(failures - 1, 32), self.max_negative_ttl)
+        self._entries[key] = [None, time.time() + ttl, failures]
+        return ttl
+
+    def __len__(self):
+        return len(self._entries)
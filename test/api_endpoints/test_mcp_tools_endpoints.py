@@ -50,7 +50,7 @@ def delete_dummy(client, api_token, test_mac):
 # --- Device Search Tests ---
 
 
-@patch("models.device_instance.get_temp_db_connection")
+@patch("models.device_instance.get_read_db_connection")
 def test_get_device_info_ip_partial(mock_db_conn, client, api_token):
     """Test device search with partial IP search."""
     # Mock database connection - DeviceInstance._fetchall calls conn.execute().fetchall()
@@ -107,8 +107,8 @@ def test_trigger_scan_invalid_type(mock_queue_class, client, api_token):
 # --- get_open_ports Tests ---
 
 
-@patch("models.plugin_object_instance.get_temp_db_connection")
-@patch("models.device_instance.get_temp_db_connection")
+@patch("models.plugin_object_instance.get_read_db_connection")
+@patch("models.device_instance.get_read_db_connection")
 def test_get_open_ports_ip(mock_device_db_conn, mock_plugin_db_conn, client, api_token):
     """Test get_open_ports with an IP address."""
     # Mock database connections for both device lookup and plugin objects
@@ -135,7 +135,7 @@ def test_get_open_ports_ip(mock_device_db_conn, mock_plugin_db_conn, client, api
     assert data["open_ports"][1]["service"] == "http"
 
 
-@patch("models.plugin_object_instance.get_temp_db_connection")
+@patch("models.plugin_object_instance.get_read_db_connection")
 def test_get_open_ports_mac_resolve(mock_plugin_db_conn, client, api_token):
     """Test get_open_ports with a MAC address that resolves to an IP."""
     # Mock database connection for MAC-based open ports query
@@ -157,7 +157,7 @@ def test_get_open_ports_mac_resolve(mock_plugin_db_conn, client, api_token):
 
 
 # --- get_network_topology Tests ---
-@patch("models.device_instance.get_temp_db_connection")
+@patch("models.device_instance.get_read_db_connection")
 def test_get_network_topology(mock_db_conn, client, api_token):
     """Test get_network_topology."""
     # Mock database connection for topology query
@@ -182,8 +182,9 @@ def test_get_network_topology(mock_db_conn, client, api_token):
 
 
 # --- get_recent_alerts Tests ---
-@patch("models.event_instance.get_temp_db_connection")
-def test_get_recent_alerts(mock_db_conn, client, api_token):
+@patch("models.event_instance.partition_source", return_value="Events")
+@patch("models.event_instance.get_read_db_connection")
+def test_get_recent_alerts(mock_db_conn, mock_source, client, api_token):
     """Test get_recent_alerts."""
     # Mock database connection for events query
     mock_conn = MagicMock()
@@ -266,7 +267,7 @@ def test_wol_wake_device_invalid_mac(client, api_token):
 # --- Latest Device Tests ---
 
 
-@patch("models.device_instance.get_temp_db_connection")
+@patch("models.device_instance.get_read_db_connection")
 def test_get_latest_device(mock_db_conn, client, api_token):
     """Test get_latest_device endpoint."""
     # Mock database connection for latest device query
@@ -314,7 +315,7 @@ def test_openapi_spec(client, api_token):
 # --- MCP Device Export Tests ---
 
 
-@patch("models.device_instance.get_temp_db_connection")
+@patch("models.device_instance.get_read_db_connection")
 def test_mcp_devices_export_csv(mock_db_conn, client, api_token):
     """Test MCP devices export in CSV format."""
     mock_conn = MagicMock()
@@ -352,13 +353,10 @@ def test_mcp_devices_export_json(mock_export, client, api_token):
 # --- MCP Device Import Tests ---
 
 
-@patch("models.device_instance.get_temp_db_connection")
-def test_mcp_devices_import_json(mock_db_conn, client, api_token):
+@patch("models.device_instance.get_db_writer")
+def test_mcp_devices_import_json(mock_db_writer, client, api_token):
     """Test MCP devices import from JSON content."""
-    mock_conn = MagicMock()
-    mock_execute_result = MagicMock()
-    mock_conn.execute.return_value = mock_execute_result
-    mock_db_conn.return_value = mock_conn
+    mock_db_writer.return_value = MagicMock()
 
     # Mock successful import
     with patch("models.device_instance.DeviceInstance.importCSV") as mock_import:
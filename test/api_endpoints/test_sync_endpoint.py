@@ -5,8 +5,12 @@ Covers:
   - Content-type enforcement on POST (regression for data= vs json= bug)
   - Happy-path POST returns 200
   - GET auth enforcement
+  - Versioned (delta) POSTs are refused when not based on the received version
+  - GET with ``since`` streams a gzip envelope, a delta once the hub is up to date
 """
 
+import gzip
+import json
 import os
 import sys
 import pytest
@@ -119,3 +123,72 @@ def test_sync_get_no_token_is_forbidden(client):
 def test_sync_get_invalid_token_is_forbidden(client):
     resp = client.get("/sync", headers=auth_headers("INVALID-TOKEN"))
     assert resp.status_code == 403
+
+
+# ========================================================================
+# Delta sync
+# ========================================================================
+
+def test_sync_post_delta_requires_received_version(client, api_token, tmp_path, monkeypatch):
+    plugins_dir = tmp_path / "log" / "plugins"
+    plugins_dir.mkdir(parents=True)
+    monkeypatch.setenv("NETALERTX_PLUGINS_LOG", str(plugins_dir))
+
+    def post(version, base_version):
+        return client.post(
+            "/sync",
+            headers=auth_headers(api_token),
+            json={"data": "blob", "plugin": "SYNC", "node_name": "Node1", "version": version, "base_version": base_version},
+        )
+
+    # Nothing received yet: a delta is refused, a full payload accepted
+    resp = post(2, 1)
+    assert resp.status_code == 409
+    assert resp.get_json()["error"] == "resync required"
+    assert list(plugins_dir.glob("last_result.*")) == []
+
+    resp = post(1, None)
+    assert resp.status_code == 200
+    assert resp.get_json()["sync_protocol"] == 1
+
+    assert post(2, 1).status_code == 200
+    assert post(3, 1).status_code == 409
+    assert len(list(plugins_dir.glob("last_result.SYNC.encoded.Node1.*.log"))) == 2
+
+
+def test_sync_get_since_streams_delta(client, api_token, tmp_path, monkeypatch):
+    api_dir = tmp_path / "api"
+    api_dir.mkdir()
+    plugins_dir = tmp_path / "log" / "plugins"
+    plugins_dir.mkdir(parents=True)
+    monkeypatch.setenv("NETALERTX_API", str(api_dir))
+    monkeypatch.setenv("NETALERTX_PLUGINS_LOG", str(plugins_dir))
+
+    def publish(rows):
+        (api_dir / "table_devices.json").write_text(json.dumps({"data": rows}))
+
+    def pull(since):
+        resp = client.get(f"/sync?since={since}", headers=auth_headers(api_token))
+        assert resp.status_code == 200
+        assert resp.headers["Content-Encoding"] == "gzip"
+        return json.loads(gzip.decompress(resp.data))
+
+    rows = [{"devMac": "aa:00:00:00:00:01", "devName": "a"}, {"devMac": "aa:00:00:00:00:02", "devName": "b"}]
+    publish(rows)
+
+    full = pull("")
+    assert full["base_version"] is None and full["data"] == rows
+    assert "delta" not in full
+
+    publish([rows[0], {"devMac": "aa:00:00:00:00:03", "devName": "c"}])
+    delta = pull(full["version"])
+    assert delta["delta"] is True and delta["base_version"] == full["version"]
+    assert delta["upserts"] == [{"devMac": "aa:00:00:00:00:03", "devName": "c"}]
+    assert delta["deletes"] == ["aa:00:00:00:00:02"]
+
+    # A hub holding another version gets everything
+    assert len(pull(full["version"])["data"]) == 2
+
+    # Without since: the original base64 response
+    resp = client.get("/sync", headers=auth_headers(api_token))
+    assert "data_base64" in resp.get_json()
@@ -174,9 +174,9 @@ class TestDevicesHistoryInstance(unittest.TestCase):
     def setUp(self):
         self.conn = make_history_db(tracked=_TRACKED)
 
-        # `device_history_instance` uses `from database import get_temp_db_connection`
-        # which creates a local reference.  We must patch THAT namespace, not the
-        # database module attribute.
+        # `device_history_instance` uses `from database import get_read_db_connection,
+        # get_db_writer` which creates local references.  We must patch
+        # THAT namespace, not the database module attribute.
         import models.device_history_instance as _mod
 
         _real = self.conn
@@ -188,10 +188,21 @@ class TestDevicesHistoryInstance(unittest.TestCase):
             def rollback(self): _real.rollback()
             def close(self): pass  # intentional no-op
 
+        class _Writer:
+            # Applies each write right away, on the test connection
+            def execute(self, query, params=()):
+                cur = _real.execute(query, params)
+                _real.commit()
+                return cur
+
         self._patcher = unittest.mock.patch.object(
-            _mod, "get_temp_db_connection", return_value=_NoClose()
+            _mod, "get_db_writer", return_value=_Writer()
         )
         self._patcher.start()
+        self._read_patcher = unittest.mock.patch.object(
+            _mod, "get_read_db_connection", return_value=_NoClose()
+        )
+        self._read_patcher.start()
 
         _insert_device(self.conn, "bb:cc:dd:00:00:01", "guid-q-1",
                        name="Alpha", vendor="Cisco")
@@ -207,6 +218,7 @@ class TestDevicesHistoryInstance(unittest.TestCase):
         self.h = DevicesHistoryInstance()
 
     def tearDown(self):
+        self._read_patcher.stop()
         self._patcher.stop()
         self.conn.close()
 
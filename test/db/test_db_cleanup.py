@@ -157,11 +157,14 @@ class TestSessionsTrim:
         with open(script_path) as fh:
             source = fh.read()
 
-        events_expr = "DELETE FROM Events WHERE eveDateTime <= date('now', '-{str(DAYS_TO_KEEP_EVENTS)} day')"
-        sessions_expr = "DELETE FROM Sessions WHERE sesDateTimeConnection <= date('now', '-{str(DAYS_TO_KEEP_EVENTS)} day')"
+        # Both are deleted in batches with the same bound day-offset parameter
+        events_expr = "\"eveDateTime <= date('now', ?)\""
+        sessions_expr = "\"sesDateTimeConnection <= date('now', ?)\""
+        offset_param = "(f\"-{int(DAYS_TO_KEEP_EVENTS)} day\",)"
 
         assert events_expr in source, "Events DELETE expression changed unexpectedly"
         assert sessions_expr in source, "Sessions DELETE is not aligned with Events DELETE"
+        assert source.count(offset_param) == 2, "Sessions DELETE is not aligned with Events DELETE"
 
 
 # ---------------------------------------------------------------------------
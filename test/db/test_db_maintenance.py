@@ -0,0 +1,145 @@
+"""
+Unit tests for the online maintenance helpers (db/db_maintenance.py).
+
+Tests verify that:
+- delete_in_batches removes exactly the matching rows, one range per commit.
+- Sparse rowids do not leave rows behind.
+- enable_incremental_vacuum converts an existing database once.
+- incremental_vacuum releases free pages and respects its time budget.
+- optimize creates planner statistics on first run.
+"""
+
+import sys
+import os
+import sqlite3
+import tempfile
+
+import pytest
+
+INSTALL_PATH = os.getenv('NETALERTX_APP', '/app')
+sys.path.extend([f"{INSTALL_PATH}/server/plugins", f"{INSTALL_PATH}/server"])
+
+from db.db_maintenance import (  # noqa: E402
+    delete_in_batches,
+    enable_incremental_vacuum,
+    incremental_vacuum,
+    optimize,
+)
+
+
+@pytest.fixture
+def db_path():
+    fd, path = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+    os.unlink(path)
+
+    yield path
+
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.unlink(path + suffix)
+
+
+def _seed_events(conn, count):
+    conn.execute("CREATE TABLE Events (eveMac TEXT, eveDateTime DATETIME, evePayload TEXT)")
+    conn.executemany(
+        "INSERT INTO Events VALUES (?, date('now', ?), ?)",
+        [(f"mac{i}", "-100 day" if i % 2 else "-1 day", "x" * 200) for i in range(count)],
+    )
+    conn.commit()
+
+
+class _CountingConnection:
+    """Wraps a connection and counts commit() calls."""
+
+    def __init__(self, conn):
+        self._conn = conn
+        self.commits = 0
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def commit(self):
+        self.commits += 1
+        self._conn.commit()
+
+
+def test_delete_in_batches_removes_only_matching_rows(db_path):
+    conn = sqlite3.connect(db_path)
+    _seed_events(conn, 1000)
+    counting = _CountingConnection(conn)
+
+    deleted = delete_in_batches(counting, "Events", "eveDateTime <= date('now', ?)", ("-30 day",), batch_size=100)
+
+    assert deleted == 500
+    assert conn.execute("SELECT COUNT(*) FROM Events").fetchone()[0] == 500
+    # one commit before starting + one per range of 100 rows
+    assert counting.commits == 11
+    conn.close()
+
+
+def test_delete_in_batches_handles_sparse_rowids(db_path):
+    conn = sqlite3.connect(db_path)
+    _seed_events(conn, 1000)
+    conn.execute("DELETE FROM Events WHERE rowid % 7 != 0")
+    conn.execute("INSERT INTO Events (rowid, eveMac, eveDateTime) VALUES (1000000, 'far', date('now', '-100 day'))")
+    conn.commit()
+
+    deleted = delete_in_batches(conn, "Events", "1 = 1", batch_size=10)
+
+    assert deleted == 143
+    assert conn.execute("SELECT COUNT(*) FROM Events").fetchone()[0] == 0
+    conn.close()
+
+
+def test_delete_in_batches_on_empty_table(db_path):
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE Events (eveDateTime DATETIME)")
+
+    assert delete_in_batches(conn, "Events", "1 = 1") == 0
+    conn.close()
+
+
+def test_incremental_vacuum_releases_free_pages(db_path):
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA journal_mode=WAL;")
+    _seed_events(conn, 5000)
+
+    assert enable_incremental_vacuum(conn) is True
+    assert conn.execute("PRAGMA auto_vacuum;").fetchone()[0] == 2
+
+    conn.execute("DELETE FROM Events")
+    conn.commit()
+    free_before = conn.execute("PRAGMA freelist_count;").fetchone()[0]
+    assert free_before > 0
+
+    freed = incremental_vacuum(conn, budget_secs=30, step_pages=16)
+
+    assert freed == free_before
+    assert conn.execute("PRAGMA freelist_count;").fetchone()[0] == 0
+    conn.close()
+
+
+def test_incremental_vacuum_respects_zero_budget(db_path):
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA auto_vacuum=INCREMENTAL;")
+    _seed_events(conn, 2000)
+    conn.execute("DELETE FROM Events")
+    conn.commit()
+
+    assert incremental_vacuum(conn, budget_secs=0) == 0
+    assert conn.execute("PRAGMA freelist_count;").fetchone()[0] > 0
+    conn.close()
+
+
+def test_optimize_creates_statistics(db_path):
+    conn = sqlite3.connect(db_path)
+    _seed_events(conn, 200)
+    conn.execute("CREATE INDEX IDX_eve_DateTime ON Events (eveDateTime)")
+    conn.commit()
+
+    optimize(conn)
+
+    rows = conn.execute("SELECT COUNT(*) FROM sqlite_stat1").fetchone()[0]
+    assert rows >= 1
+    conn.close()
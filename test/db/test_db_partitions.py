@@ -0,0 +1,199 @@
+"""
+Unit tests for the optional monthly Events / Sessions partitions
+(db/db_partitions.py).
+
+Tests verify that:
+- Closed events older than the hot window move into Events_pYYYYMM and their
+  sessions into Sessions_pYYYYMM; open sessions and pending alerts stay live.
+- A failed archive run is rolled back as a whole, also on an autocommit connection.
+- partition_source only unions partitions overlapping the requested period,
+  including sessions connected before it and disconnected within it.
+- Retention drops whole expired partitions.
+- Events_All / Sessions_All span live and archived rows.
+- A column added to the live table reaches existing partitions, so the
+  unions and views keep working.
+"""
+
+import sys
+import os
+
+INSTALL_PATH = os.getenv('NETALERTX_APP', '/app')
+sys.path.extend([f"{INSTALL_PATH}/server/plugins", f"{INSTALL_PATH}/server"])
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from db_test_helpers import make_db  # noqa: E402
+from db.db_upgrade import ensure_views  # noqa: E402
+from db.db_partitions import (  # noqa: E402
+    archive_partitions,
+    delete_from_partitions,
+    drop_expired_partitions,
+    list_partitions,
+    partition_source,
+    sync_partition_columns,
+)
+
+CREATE_SESSIONS = """
+    CREATE TABLE Sessions (
+        sesMac TEXT, sesIp TEXT, sesEventTypeConnection TEXT, sesDateTimeConnection TEXT,
+        sesEventTypeDisconnection TEXT, sesDateTimeDisconnection TEXT,
+        sesStillConnected INTEGER, sesAdditionalInfo TEXT
+    )
+"""
+
+
+def _db():
+    conn = make_db()
+    conn.execute(CREATE_SESSIONS)
+    conn.commit()
+    return conn
+
+
+def _event(conn, mac, when, event_type, pending=0, pair=None):
+    cur = conn.execute(
+        "INSERT INTO Events (eveMac, eveIp, eveDateTime, eveEventType, eveAdditionalInfo, evePendingAlertEmail, evePairEventRowid) "
+        "VALUES (?, '10.0.0.1', datetime('now', ?), ?, '', ?, ?)",
+        (mac, when, event_type, pending, pair),
+    )
+    return cur.lastrowid
+
+
+def _session(conn, connected, disconnected, mac="aa:aa:aa:aa:aa:01"):
+    conn_id = _event(conn, mac, connected, "Connected")
+    disc_id = _event(conn, mac, disconnected, "Disconnected", pair=conn_id)
+    conn.execute("UPDATE Events SET evePairEventRowid = ? WHERE rowid = ?", (disc_id, conn_id))
+    return conn_id, disc_id
+
+
+def _count(conn, source):
+    return conn.execute(f"SELECT COUNT(*) FROM {source}").fetchone()[0]
+
+
+def test_closed_months_are_archived():
+    conn = _db()
+    _session(conn, "-100 day", "-99 day")
+    _event(conn, "aa:aa:aa:aa:aa:02", "-100 day", "Connected")        # still connected
+    _event(conn, "aa:aa:aa:aa:aa:03", "-100 day", "Device Down", 1)   # alert pending
+    _session(conn, "-1 minute", "-0 minute", mac="aa:aa:aa:aa:aa:04")  # current month
+    conn.commit()
+
+    result = archive_partitions(conn, hot_months=1)
+
+    assert result == {"events": 2, "sessions": 1}
+    assert len(list_partitions(conn, "Events")) == 1
+    assert _count(conn, "Events") == 4
+    # live snapshot rebuilt without the archived session
+    assert conn.execute("SELECT COUNT(*) FROM Sessions WHERE sesMac = 'aa:aa:aa:aa:aa:01'").fetchone()[0] == 0
+    assert _count(conn, "Events_All") == 6
+
+    # idempotent
+    assert archive_partitions(conn, hot_months=1) == {"events": 0, "sessions": 0}
+
+
+def test_partition_source_prunes_by_period():
+    conn = _db()
+    _session(conn, "-100 day", "-99 day")
+    conn.commit()
+    archive_partitions(conn, hot_months=1)
+
+    assert partition_source(conn, "Events", "date('now', '-7 day')") == "Events"
+    source = partition_source(conn, "Events", "date('now', '-365 day')")
+    assert "UNION ALL" in source
+    assert _count(conn, source) == 2
+
+    source = partition_source(conn, "Sessions", "Date(?)", ("2000-01-01",))
+    assert _count(conn, source) == 1
+    # usable with a table alias, as in the sessions calendar query
+    assert _count(conn, f"{source} AS SES1") == 1
+
+
+def test_partition_source_without_partitions_is_the_table():
+    conn = _db()
+    assert partition_source(conn, "Events", "date('now', '-7 day')") == "Events"
+
+
+def test_expired_partitions_are_dropped():
+    conn = _db()
+    _session(conn, "-100 day", "-99 day")
+    conn.commit()
+    archive_partitions(conn, hot_months=1)
+
+    assert drop_expired_partitions(conn, days=30) == 2
+    assert list_partitions(conn, "Events") == []
+    assert list_partitions(conn, "Sessions") == []
+    assert _count(conn, "Events_All") == 0
+
+
+def test_delete_from_partitions():
+    conn = _db()
+    _session(conn, "-100 day", "-99 day")
+    conn.commit()
+    archive_partitions(conn, hot_months=1)
+
+    assert delete_from_partitions(conn, "Events", "eveMac = ?", ("aa:aa:aa:aa:aa:01",)) == 2
+
+
+def test_failed_archive_is_rolled_back():
+    conn = _db()
+    # Autocommit, as get_temp_db_connection() in production
+    conn.isolation_level = None
+    _session(conn, "-100 day", "-99 day")
+    conn.execute("INSERT INTO Sessions SELECT * FROM Convert_Events_to_Sessions")
+    # The live Sessions rebuild, the last step, fails
+    conn.execute("DROP VIEW Convert_Events_to_Sessions")
+
+    try:
+        archive_partitions(conn, hot_months=1)
+        assert False, "archive_partitions should have failed"
+    except Exception as e:
+        assert "Convert_Events_to_Sessions" in str(e)
+
+    assert not conn.in_transaction
+    assert _count(conn, "Events") == 2
+    assert _count(conn, "Sessions") == 1
+    assert list_partitions(conn, "Events") == []
+    assert list_partitions(conn, "Sessions") == []
+
+
+def test_partition_source_includes_sessions_ending_in_period():
+    conn = _db()
+    conn.isolation_level = None
+    # Connected two months ago, disconnected last month
+    conn_id = _event(conn, "aa:aa:aa:aa:aa:01", "-1 day", "Connected")
+    disc_id = _event(conn, "aa:aa:aa:aa:aa:01", "-1 day", "Disconnected", pair=conn_id)
+    conn.execute("UPDATE Events SET evePairEventRowid = ?, eveDateTime = datetime('now', 'start of month', '-2 month', '+27 day') "
+                 "WHERE rowid = ?", (disc_id, conn_id))
+    conn.execute("UPDATE Events SET eveDateTime = datetime('now', 'start of month', '-1 month', '+2 day') WHERE rowid = ?", (disc_id,))
+    archive_partitions(conn, hot_months=1)
+    assert len(list_partitions(conn, "Sessions")) == 1
+
+    last_month = "date('now', 'start of month', '-1 month')"
+    assert _count(conn, partition_source(conn, "Sessions", last_month)) == 1
+    assert partition_source(conn, "Sessions", "date('now', 'start of month')") == "Sessions"
+
+
+def test_new_live_column_reaches_partitions():
+    conn = _db()
+    _session(conn, "-100 day", "-99 day")
+    conn.commit()
+    archive_partitions(conn, hot_months=1)
+
+    # Schema migration adds a column to the live table only
+    conn.execute("ALTER TABLE Events ADD COLUMN eveExtra TEXT DEFAULT 'x'")
+    assert sync_partition_columns(conn) == 1
+    assert sync_partition_columns(conn) == 0
+    ensure_views(conn.cursor())
+
+    source = partition_source(conn, "Events", "date('now', '-365 day')")
+    assert [r[0] for r in conn.execute(f"SELECT eveExtra FROM {source}")] == ["x", "x"]
+    assert _count(conn, "Events_All") == 2
+
+
+def test_device_views_include_archived_rows():
+    conn = _db()
+    _session(conn, "-100 day", "-99 day")
+    conn.commit()
+    archive_partitions(conn, hot_months=1)
+    ensure_views(conn.cursor())
+
+    assert _count(conn, "Events_Devices") == 2
+    assert _count(conn, "Sessions_Devices") == 1
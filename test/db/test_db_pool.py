@@ -0,0 +1,120 @@
+"""
+Unit tests for the read-only connection pool (db/db_pool.py).
+
+Tests verify that:
+- Pooled connections reject writes (mode=ro + query_only).
+- close() returns the connection to the pool and it is reused.
+- Nested acquires on the same thread share one connection.
+- The pool is bounded and times out when exhausted.
+- Leases held by exited threads are reclaimed.
+"""
+
+import sys
+import os
+import sqlite3
+import tempfile
+import threading
+
+import pytest
+
+INSTALL_PATH = os.getenv('NETALERTX_APP', '/app')
+sys.path.extend([f"{INSTALL_PATH}/server/plugins", f"{INSTALL_PATH}/server"])
+
+from db.db_pool import ReadConnectionPool  # noqa: E402
+
+
+@pytest.fixture
+def db_path():
+    """Create a temporary WAL database with a single seeded table."""
+    fd, path = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL;")
+    conn.execute("CREATE TABLE Devices (devMac TEXT PRIMARY KEY, devName TEXT)")
+    conn.execute("INSERT INTO Devices VALUES ('aa:bb:cc:dd:ee:ff', 'Router')")
+    conn.commit()
+
+    yield path
+
+    conn.close()
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.unlink(path + suffix)
+
+
+def test_pooled_connection_reads_rows(db_path):
+    pool = ReadConnectionPool(db_path, size=2)
+    conn = pool.acquire()
+    row = conn.execute("SELECT devName FROM Devices").fetchone()
+    conn.close()
+
+    assert row["devName"] == "Router"
+
+
+def test_pooled_connection_rejects_writes(db_path):
+    pool = ReadConnectionPool(db_path, size=2)
+    conn = pool.acquire()
+    with pytest.raises(sqlite3.OperationalError):
+        conn.execute("UPDATE Devices SET devName = 'x'")
+    conn.close()
+
+
+def test_released_connection_is_reused(db_path):
+    pool = ReadConnectionPool(db_path, size=2)
+
+    first = pool.acquire()
+    raw = first._conn
+    first.close()
+
+    second = pool.acquire()
+    assert second._conn is raw
+    second.close()
+
+    assert pool.stats()["open"] == 1
+
+
+def test_nested_acquire_shares_connection(db_path):
+    pool = ReadConnectionPool(db_path, size=1, timeout=0.1)
+
+    outer = pool.acquire()
+    inner = pool.acquire()  # would time out if it needed a second slot
+    assert inner._conn is outer._conn
+
+    inner.close()
+    assert pool.stats()["leased"] == 1
+    outer.close()
+    assert pool.stats()["idle"] == 1
+
+
+def test_pool_is_bounded(db_path):
+    pool = ReadConnectionPool(db_path, size=1, timeout=0.1)
+    held = pool.acquire()
+    errors = []
+
+    def worker():
+        try:
+            pool.acquire()
+        except TimeoutError as e:
+            errors.append(e)
+
+    t = threading.Thread(target=worker)
+    t.start()
+    t.join()
+    held.close()
+
+    assert len(errors) == 1
+
+
+def test_lease_of_exited_thread_is_reclaimed(db_path):
+    pool = ReadConnectionPool(db_path, size=1, timeout=0.1)
+    leaked = []
+
+    # Simulate a request thread that exits without closing its connection
+    t = threading.Thread(target=lambda: leaked.append(pool.acquire()))
+    t.start()
+    t.join()
+
+    conn = pool.acquire()
+    assert conn._conn is leaked[0]._conn
+    conn.close()
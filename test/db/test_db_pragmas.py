@@ -0,0 +1,100 @@
+"""
+Unit tests for the SQLite PRAGMA profiles (db/db_pragmas.py).
+
+Tests verify that:
+- Each profile sets its cache_size / mmap_size on a connection.
+- Unknown profile names fall back to the default profile.
+- Read-only connections skip the write PRAGMAs.
+- Per-connection setup leaves the database-wide PRAGMAs (WAL, page size) alone.
+- apply_page_size rebuilds an idle database with the profile's page size.
+"""
+
+import sys
+import os
+import sqlite3
+import tempfile
+
+import pytest
+
+INSTALL_PATH = os.getenv('NETALERTX_APP', '/app')
+sys.path.extend([f"{INSTALL_PATH}/server/plugins", f"{INSTALL_PATH}/server"])
+
+from db.db_pragmas import (  # noqa: E402
+    PRAGMA_PROFILES,
+    DEFAULT_PRAGMA_PROFILE,
+    apply_pragmas,
+    apply_database_pragmas,
+    apply_page_size,
+    get_effective_pragmas,
+    get_pragma_profile,
+)
+
+
+@pytest.fixture
+def db_path():
+    fd, path = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+    os.unlink(path)  # let sqlite create the file so page_size can still change
+
+    yield path
+
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.unlink(path + suffix)
+
+
+@pytest.mark.parametrize("profile", sorted(PRAGMA_PROFILES))
+def test_profile_is_applied(db_path, profile):
+    conn = sqlite3.connect(db_path)
+    assert apply_database_pragmas(conn, profile=profile) == profile
+    assert apply_pragmas(conn, profile=profile) == profile
+
+    effective = get_effective_pragmas(conn)
+    conn.close()
+
+    assert effective["cache_size"] == PRAGMA_PROFILES[profile]["cache_size"]
+    assert effective["journal_mode"] == "wal"
+    assert effective["temp_store"] == 2  # MEMORY
+
+
+def test_unknown_profile_falls_back_to_default():
+    name, pragmas = get_pragma_profile("turbo")
+
+    assert name == DEFAULT_PRAGMA_PROFILE
+    assert pragmas == PRAGMA_PROFILES[DEFAULT_PRAGMA_PROFILE]
+
+
+def test_read_only_connection_skips_write_pragmas(db_path):
+    sqlite3.connect(db_path).execute("CREATE TABLE t (x)").connection.close()
+
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    apply_pragmas(conn, read_only=True, profile="performance")
+    effective = get_effective_pragmas(conn)
+    conn.close()
+
+    assert effective["journal_mode"] == "delete"
+    assert effective["cache_size"] == PRAGMA_PROFILES["performance"]["cache_size"]
+
+
+def test_connection_pragmas_leave_database_pragmas_alone(db_path):
+    conn = sqlite3.connect(db_path)
+    apply_pragmas(conn, profile="performance")
+    effective = get_effective_pragmas(conn)
+    conn.close()
+
+    assert effective["journal_mode"] == "delete"
+    assert effective["page_size"] != PRAGMA_PROFILES["performance"]["page_size"]
+    assert effective["mmap_size"] == PRAGMA_PROFILES["performance"]["mmap_size"]
+
+
+def test_apply_page_size_rebuilds_idle_database(db_path):
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    apply_database_pragmas(conn, profile="balanced")
+    conn.execute("CREATE TABLE t (x)")
+    conn.execute("INSERT INTO t VALUES (1)")
+
+    assert apply_page_size(conn, profile="performance") is True
+    assert conn.execute("PRAGMA page_size;").fetchone()[0] == PRAGMA_PROFILES["performance"]["page_size"]
+    assert conn.execute("PRAGMA journal_mode;").fetchone()[0] == "wal"
+    assert conn.execute("SELECT x FROM t").fetchone()[0] == 1
+    conn.close()
@@ -0,0 +1,100 @@
+"""
+Unit tests for the single-writer queue (db/db_writer.py).
+
+Tests verify that:
+- Queued statements are committed and report rowcount / lastrowid.
+- Concurrent submitters are group-committed into fewer transactions.
+- A failing unit is rolled back alone; the rest of its batch commits.
+- Units of work run atomically (all statements or none).
+"""
+
+import sys
+import os
+import sqlite3
+import tempfile
+import threading
+
+import pytest
+
+INSTALL_PATH = os.getenv('NETALERTX_APP', '/app')
+sys.path.extend([f"{INSTALL_PATH}/server/plugins", f"{INSTALL_PATH}/server"])
+
+from db.db_writer import DBWriter  # noqa: E402
+
+
+@pytest.fixture
+def db_path():
+    fd, path = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL;")
+    conn.execute("CREATE TABLE Sessions (sesMac TEXT NOT NULL, sesIp TEXT)")
+    conn.commit()
+    conn.close()
+
+    yield path
+
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.unlink(path + suffix)
+
+
+@pytest.fixture
+def writer(db_path):
+    w = DBWriter(lambda: sqlite3.connect(db_path), batch_window=0.05)
+    yield w
+    w.stop()
+
+
+def _count(db_path):
+    conn = sqlite3.connect(db_path)
+    n = conn.execute("SELECT COUNT(*) FROM Sessions").fetchone()[0]
+    conn.close()
+    return n
+
+
+def test_execute_commits_and_reports_rowcount(writer, db_path):
+    result = writer.execute("INSERT INTO Sessions VALUES (?, ?)", ("aa", "1.1.1.1"))
+
+    assert result.rowcount == 1
+    assert result.lastrowid == 1
+    assert _count(db_path) == 1
+
+
+def test_concurrent_writes_are_group_committed(writer, db_path):
+    threads = [
+        threading.Thread(target=writer.execute, args=("INSERT INTO Sessions VALUES (?, ?)", (f"m{i}", "ip")))
+        for i in range(50)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    stats = writer.stats()
+    assert _count(db_path) == 50
+    assert stats["units"] == 50
+    assert stats["batches"] < 50
+
+
+def test_failing_unit_does_not_poison_batch(writer, db_path):
+    good = writer.submit(lambda c: c.execute("INSERT INTO Sessions VALUES ('ok', 'ip')").rowcount)
+    bad = writer.submit(lambda c: c.execute("INSERT INTO Sessions VALUES (NULL, 'ip')"))
+
+    assert good.result(timeout=5) == 1
+    with pytest.raises(sqlite3.IntegrityError):
+        bad.result(timeout=5)
+    assert _count(db_path) == 1
+    assert writer.stats()["failed"] == 1
+
+
+def test_unit_of_work_is_atomic(writer, db_path):
+    def _unit(conn):
+        conn.execute("INSERT INTO Sessions VALUES ('first', 'ip')")
+        raise ValueError("abort")
+
+    with pytest.raises(ValueError):
+        writer.run(_unit)
+
+    assert _count(db_path) == 0
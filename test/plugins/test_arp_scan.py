@@ -0,0 +1,128 @@
+"""
+Tests for the ARPSCAN plugin (arp_scan/script.py).
+
+Tests verify that:
+- SCAN_SUBNETS entries are grouped by interface and scanned concurrently
+- output is parsed line by line and MACs are de-duplicated, keeping the
+  freshest IP and the interface that answered first
+- a hanging arp-scan is killed and the lines read so far are kept
+"""
+
+import importlib.util
+import os
+import sys
+import threading
+import time
+from unittest.mock import patch
+
+_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+_SERVER = os.path.join(_ROOT, 'server')
+_PLUGINS = os.path.join(_ROOT, 'server', 'plugins')
+
+for _p in [_ROOT, _SERVER, _PLUGINS]:
+    if _p not in sys.path:
+        sys.path.insert(0, _p)
+
+# Loaded under its own name: several plugins ship a module called "script"
+with patch('helper.get_setting_value', return_value='UTC'), \
+     patch('logger.Logger'), \
+     patch('plugin_helper.Plugin_Objects'):
+    _spec = importlib.util.spec_from_file_location('arp_scan_script', os.path.join(_PLUGINS, 'arp_scan', 'script.py'))
+    arp_scan = importlib.util.module_from_spec(_spec)
+    _spec.loader.exec_module(arp_scan)
+
+
+SETTINGS = {'ARPSCAN_ARGS': 'sudo arp-scan --ignoredups --retry=6', 'ARPSCAN_DURATION': 0, 'ARPSCAN_RUN_TIMEOUT': 5}
+
+
+class FakePopen:
+    """Streams canned output per interface, with an optional delay per line."""
+
+    outputs = {}
+    delay = 0.0
+    running = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def __init__(self, args, **kwargs):
+        self.interface = next(a.split('=')[1] for a in args if a.startswith('--interface='))
+        self.returncode = None
+        self.stdout = self._lines()
+
+    def _lines(self):
+        cls = FakePopen
+        with cls.lock:
+            cls.running += 1
+            cls.peak = max(cls.peak, cls.running)
+        try:
+            for line in cls.outputs[self.interface]:
+                time.sleep(cls.delay)
+                yield line + '\n'
+        finally:
+            with cls.lock:
+                cls.running -= 1
+        self.returncode = 0
+
+    def wait(self):
+        return self.returncode
+
+    def kill(self):
+        self.stdout.close()
+
+
+def _scan(entries, outputs, delay=0.0):
+    FakePopen.outputs = outputs
+    FakePopen.delay = delay
+    FakePopen.peak = 0
+    with patch.object(arp_scan, 'get_setting_value', side_effect=lambda k: SETTINGS[k]), \
+         patch.object(arp_scan.subprocess, 'Popen', FakePopen):
+        return arp_scan.execute_arpscan(entries)
+
+
+def test_group_by_interface():
+    groups = arp_scan.group_by_interface([
+        '192.168.1.0/24 --interface=eth0',
+        '192.168.2.0/24 --interface=eth0',
+        '10.0.0.0/24 --interface=eth1',
+    ])
+    assert list(groups) == ['eth0', 'eth1']
+    assert len(groups['eth0']) == 2
+
+
+def test_interfaces_scanned_concurrently_and_deduplicated():
+    outputs = {
+        'eth0': ['192.168.1.10\t00:11:22:33:44:55\tVendor A',
+                 '192.168.1.11\t00:11:22:33:44:66\tVendor B'],
+        'eth1': ['Interface: eth1, type: EN10MB',
+                 '192.168.1.99\t00:11:22:33:44:55\tVendor A',
+                 '10.0.0.5\taa:bb:cc:dd:ee:ff\t(Unknown)',
+                 '', '3 packets received by filter, 0 packets dropped by kernel'],
+    }
+    started = time.monotonic()
+    devices = _scan(['192.168.1.0/24 --interface=eth0', '10.0.0.0/24 --interface=eth1'], outputs, delay=0.1)
+    elapsed = time.monotonic() - started
+
+    assert FakePopen.peak == 2
+    assert elapsed < 0.7
+    by_mac = {d['mac']: d for d in devices}
+    assert len(devices) == 3
+    assert by_mac['aa:bb:cc:dd:ee:ff']['hw'] == '(Unknown)'
+    # eth0 answered first for the shared MAC, eth1 reported it last
+    assert by_mac['00:11:22:33:44:55']['interface'] == '192.168.1.0/24 --interface=eth0'
+    assert by_mac['00:11:22:33:44:55']['ip'] == '192.168.1.99'
+
+
+def test_hanging_scan_is_killed():
+    script = (
+        "import sys, time\n"
+        "print('192.168.1.10\\t00:11:22:33:44:55\\tVendor A', flush=True)\n"
+        "time.sleep(10)\n"
+        "print('192.168.1.11\\t00:11:22:33:44:66\\tVendor B', flush=True)\n"
+    )
+    collector = arp_scan.DeviceCollector()
+
+    started = time.monotonic()
+    arp_scan.run_arpscan([sys.executable, '-c', script], 'eth0', 0.5, collector)
+
+    assert time.monotonic() - started < 5
+    assert list(collector.devices) == ['00:11:22:33:44:55']
@@ -0,0 +1,100 @@
+"""
+Tests for the CSVBCKP plugin (csv_backup/script.py).
+
+Tests verify that:
+- rows are streamed into a fully quoted CSV, embedded quotes are escaped
+- gzip output round-trips and no temporary file is left behind
+- incremental backups only write rows whose hash changed, and nothing when
+  no row changed
+"""
+
+import csv
+import gzip
+import importlib.util
+import os
+import sqlite3
+import sys
+from unittest.mock import patch
+
+_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+_SERVER = os.path.join(_ROOT, 'server')
+_PLUGINS = os.path.join(_ROOT, 'server', 'plugins')
+
+for _p in [_ROOT, _SERVER, _PLUGINS]:
+    if _p not in sys.path:
+        sys.path.insert(0, _p)
+
+# Loaded under its own name: several plugins ship a module called "script"
+with patch('helper.get_setting_value', return_value='UTC'), \
+     patch('logger.Logger'):
+    _spec = importlib.util.spec_from_file_location('csv_backup_script', os.path.join(_PLUGINS, 'csv_backup', 'script.py'))
+    csvbckp = importlib.util.module_from_spec(_spec)
+    _spec.loader.exec_module(csvbckp)
+
+
+def _db(rows):
+    conn = sqlite3.connect(':memory:')
+    conn.execute('CREATE TABLE Devices (devMac TEXT, devName TEXT, devVendor TEXT)')
+    conn.executemany('INSERT INTO Devices VALUES (?, ?, ?)', rows)
+    return conn
+
+
+def _cursor(conn):
+    cur = conn.cursor()
+    cur.execute('SELECT * FROM Devices')
+    return cur
+
+
+ROWS = [
+    ('aa:01', 'Printer', 'HP'),
+    ('aa:02', 'TV "living room"', None),
+]
+
+
+def test_full_backup_is_quoted_and_streamed(tmp_path):
+    path = str(tmp_path / 'devices.csv')
+    hashes = csvbckp.write_backup(_cursor(_db(ROWS)), path, 'none')
+
+    with open(path, newline='') as f:
+        text = f.read()
+    assert text.splitlines()[:2] == ['"devMac","devName","devVendor"', '"aa:01","Printer","HP"']
+    with open(path, newline='') as f:
+        assert list(csv.reader(f))[2] == ['aa:02', 'TV "living room"', 'None']
+    assert set(hashes) == {'aa:01', 'aa:02'}
+    assert os.listdir(tmp_path) == ['devices.csv']
+
+
+def test_gzip_backup(tmp_path):
+    csvbckp.write_backup(_cursor(_db(ROWS)), str(tmp_path / 'devices.csv'), 'gzip')
+
+    assert os.listdir(tmp_path) == ['devices.csv.gz']
+    with gzip.open(tmp_path / 'devices.csv.gz', 'rt', newline='') as f:
+        assert len(list(csv.reader(f))) == 3
+
+
+def test_incremental_delta(tmp_path):
+    conn = _db(ROWS + [('aa:03', 'Laptop', 'Dell')])
+    state = {'location': str(tmp_path), 'hashes': csvbckp.write_backup(_cursor(conn), str(tmp_path / 'devices.csv'), 'none')}
+
+    with patch.object(csvbckp, 'STATE_FILE', str(tmp_path / 'state.json')):
+        # Nothing changed: no delta file
+        assert csvbckp.write_delta(_cursor(conn), str(tmp_path), '1', 'none', state) is None
+        assert sorted(os.listdir(tmp_path)) == ['devices.csv']
+
+        conn.execute("UPDATE Devices SET devName = 'Office Printer' WHERE devMac = 'aa:01'")
+        conn.execute("DELETE FROM Devices WHERE devMac = 'aa:03'")
+        conn.execute("INSERT INTO Devices VALUES ('aa:04', 'Phone', 'Apple')")
+        path = csvbckp.write_delta(_cursor(conn), str(tmp_path), '2', 'none', state)
+
+        with open(path, newline='') as f:
+            rows = list(csv.reader(f))
+        assert rows[0] == ['backupChange', 'devMac', 'devName', 'devVendor']
+        assert sorted(rows[1:]) == [
+            ['changed', 'aa:01', 'Office Printer', 'HP'],
+            ['deleted', 'aa:03', '', ''],
+            ['new', 'aa:04', 'Phone', 'Apple'],
+        ]
+
+        # The delta became the new baseline
+        assert csvbckp.load_plugin_cache(csvbckp.STATE_FILE)['hashes'] == state['hashes']
+        assert csvbckp.write_delta(_cursor(conn), str(tmp_path), '3', 'none', state) is None
@@ -0,0 +1,158 @@
+"""
+Tests for the DHCPLSS plugin (dhcp_leases/script.py).
+
+Tests verify that:
+- ISC lease files report the latest lease per MAC
+- only blocks appended since the last run are parsed, an unfinished block waits
+- a rotated, truncated or rewritten file is parsed again from scratch
+- pihole and dnsmasq files are only re-read when they changed
+- lease block lines are split into properties, options and sets
+"""
+
+import importlib.util
+import os
+import sys
+from unittest.mock import patch
+
+_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+_SERVER = os.path.join(_ROOT, 'server')
+_PLUGINS = os.path.join(_ROOT, 'server', 'plugins')
+
+for _p in [_ROOT, _SERVER, _PLUGINS]:
+    if _p not in sys.path:
+        sys.path.insert(0, _p)
+
+# Loaded under its own name: several plugins ship a module called "script"
+with patch('helper.get_setting_value', return_value='UTC'), \
+     patch('logger.Logger'):
+    _spec = importlib.util.spec_from_file_location('dhcp_leases_script', os.path.join(_PLUGINS, 'dhcp_leases', 'script.py'))
+    dhcplss = importlib.util.module_from_spec(_spec)
+    _spec.loader.exec_module(dhcplss)
+
+
+def _lease(ip, mac, state='active', hostname='host'):
+    return (
+        f'lease {ip} {{\n'
+        f'  starts 4 2026/10/15 10:00:00;\n'
+        f'  ends 4 2026/10/15 22:00:00;\n'
+        f'  binding state {state};\n'
+        f'  hardware ethernet {mac};\n'
+        f'  client-hostname "{hostname}";\n'
+        f'}}\n'
+    )
+
+
+HEADER = '# The format of this file is documented in the dhcpd.leases(5) manual page.\n'
+
+
+def _append(path, text):
+    with open(path, 'a') as f:
+        f.write(text)
+
+
+def test_isc_latest_lease_per_mac(tmp_path):
+    path = str(tmp_path / 'dhcpd.leases')
+    _append(path, HEADER + _lease('10.0.0.1', 'aa:bb:cc:00:00:01') + _lease('10.0.0.2', 'aa:bb:cc:00:00:02')
+            + _lease('10.0.0.3', 'aa:bb:cc:00:00:01', state='free', hostname='moved')
+            + 'lease 10.0.0.9 {\n  binding state abandoned;\n}\n')
+
+    entry = dhcplss.read_leases(path, None)
+
+    assert entry['leases'] == {
+        'aa:bb:cc:00:00:01': ['10.0.0.3', 'null', 'moved', 'ethernet', 'free'],
+        'aa:bb:cc:00:00:02': ['10.0.0.2', True, 'host', 'ethernet', 'active'],
+    }
+    assert entry['offset'] == os.path.getsize(path) - 1
+
+
+def test_isc_parses_appended_blocks_only(tmp_path):
+    path = str(tmp_path / 'dhcpd.leases')
+    _append(path, HEADER + _lease('10.0.0.1', 'aa:bb:cc:00:00:01'))
+    entry = dhcplss.read_leases(path, None)
+
+    # Half written block: left for the next run
+    block = _lease('10.0.0.2', 'aa:bb:cc:00:00:02')
+    _append(path, block[:40])
+    with patch.object(dhcplss, 'detect_encoding') as detect, \
+         patch.object(dhcplss, 'Lease', wraps=dhcplss.Lease) as lease:
+        entry = dhcplss.read_leases(path, entry)
+        assert lease.call_count == 0
+        assert list(entry['leases']) == ['aa:bb:cc:00:00:01']
+
+        _append(path, block[40:])
+        entry = dhcplss.read_leases(path, entry)
+        assert lease.call_count == 1
+        detect.assert_not_called()
+
+    assert list(entry['leases']) == ['aa:bb:cc:00:00:01', 'aa:bb:cc:00:00:02']
+
+
+def test_isc_rotation_and_truncation(tmp_path):
+    path = str(tmp_path / 'dhcpd.leases')
+    _append(path, HEADER + _lease('10.0.0.1', 'aa:bb:cc:00:00:01') + _lease('10.0.0.2', 'aa:bb:cc:00:00:02'))
+    entry = dhcplss.read_leases(path, None)
+
+    # Truncated and rewritten with fewer leases
+    with open(path, 'w') as f:
+        f.write(HEADER + _lease('10.0.0.5', 'aa:bb:cc:00:00:05'))
+    entry = dhcplss.read_leases(path, entry)
+    assert list(entry['leases']) == ['aa:bb:cc:00:00:05']
+
+    # Rewritten in place to a larger size: the bytes before the offset changed
+    with open(path, 'w') as f:
+        f.write(HEADER + _lease('10.0.0.6', 'aa:bb:cc:00:00:06') + _lease('10.0.0.7', 'aa:bb:cc:00:00:07'))
+    entry = dhcplss.read_leases(path, entry)
+    assert list(entry['leases']) == ['aa:bb:cc:00:00:06', 'aa:bb:cc:00:00:07']
+
+    # Rotated: dhcpd writes a new file and renames it over the old one
+    new_path = str(tmp_path / 'dhcpd.leases.new')
+    _append(new_path, HEADER + _lease('10.0.0.8', 'aa:bb:cc:00:00:08'))
+    os.replace(new_path, path)
+    entry = dhcplss.read_leases(path, entry)
+    assert list(entry['leases']) == ['aa:bb:cc:00:00:08']
+
+
+def test_dnsmasq_reread_on_change_only(tmp_path):
+    os.makedirs(tmp_path / 'dnsmasq')
+    path = str(tmp_path / 'dnsmasq' / 'dhcp.leases')
+    _append(path, '1715932537 aa:bb:cc:00:00:01 192.168.1.115 laptop 01:aa:bb:cc:00:00:01\n')
+    entry = dhcplss.read_leases(path, None)
+    assert entry['leases'] == {'aa:bb:cc:00:00:01': ['192.168.1.115', 'True', 'laptop', '', 'True']}
+
+    with patch.object(dhcplss, 'parse_line_leases') as parse:
+        dhcplss.read_leases(path, entry)
+        parse.assert_not_called()
+
+    _append(path, '1715932538 aa:bb:cc:00:00:02 192.168.1.116 phone *\n')
+    entry = dhcplss.read_leases(path, entry)
+    assert len(entry['leases']) == 2
+
+
+def test_get_entries_reports_state(tmp_path):
+    path = str(tmp_path / 'dhcpd.leases')
+    _append(path, HEADER + _lease('10.0.0.1', 'aa:bb:cc:00:00:01'))
+    state = {}
+
+    with patch.object(dhcplss, 'Plugin_Objects', autospec=True) as objects:
+        plugin_objects = dhcplss.get_entries(path, objects('last_result.DHCPLSS.log'), state)
+        dhcplss.get_entries(str(tmp_path / 'missing.leases'), plugin_objects, state)
+
+    kwargs = plugin_objects.add_object.call_args.kwargs
+    assert (kwargs['primaryId'], kwargs['secondaryId'], kwargs['watched4'], kwargs['extra']) == ('aa:bb:cc:00:00:01', '10.0.0.1', 'active', path)
+    assert list(state) == [path]
+
+
+def test_extract_lease_properties():
+    config = (
+        '\n  starts 4 2026/10/15 10:00:00;'
+        '\n  hardware ethernet aa:bb:cc:00:00:01;'
+        '\n  option agent.circuit-id 0:1:2;'
+        '\n  set vendor-class-identifier = "android-dhcp-13";'
+        '\n  malformed line without semicolon'
+    )
+
+    assert dhcplss.extract_lease_properties(config) == (
+        {'starts': '4 2026/10/15 10:00:00', 'hardware': 'ethernet aa:bb:cc:00:00:01'},
+        {'agent.circuit-id': '0:1:2'},
+        {'vendor-class-identifier': 'android-dhcp-13'},
+    )
@@ -0,0 +1,128 @@
+"""
+Tests for the ICMP plugin (icmp_scan/icmp.py).
+
+Tests verify that:
+- ping statistics (iputils and busybox) are parsed in one pass, with RTT
+- ping mode runs devices concurrently and records the RTT in watched4
+- fping mode records the per-host RTT from the running average
+"""
+
+import os
+import re
+import subprocess
+import sys
+import threading
+import time
+from unittest.mock import patch, MagicMock
+
+_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+_SERVER = os.path.join(_ROOT, 'server')
+_PLUGINS = os.path.join(_ROOT, 'server', 'plugins')
+_PLUGIN_DIR = os.path.join(_PLUGINS, 'icmp_scan')
+
+for _p in [_ROOT, _SERVER, _PLUGINS, _PLUGIN_DIR]:
+    if _p not in sys.path:
+        sys.path.insert(0, _p)
+
+with patch('helper.get_setting_value', return_value='UTC'), \
+     patch('logger.Logger'), \
+     patch('plugin_helper.Plugin_Objects'):
+    import icmp  # noqa: E402
+
+
+IPUTILS_OK = """PING 192.168.1.82 (192.168.1.82) 56(84) bytes of data.
+64 bytes from 192.168.1.82: icmp_seq=1 ttl=64 time=0.045 ms
+
+--- 192.168.1.82 ping statistics ---
+3 packets transmitted, 3 received, 0% packet loss, time 2003ms
+rtt min/avg/max/mdev = 0.045/0.056/0.070/0.010 ms
+"""
+
+BUSYBOX_DOWN = """PING 192.168.1.92 (192.168.1.92): 56 data bytes
+
+--- 192.168.1.92 ping statistics ---
+3 packets transmitted, 0 packets received, 100% packet loss
+"""
+
+
+def _devices(n):
+    return [{'devMac': f'aa:bb:cc:dd:ee:{i:02x}', 'devLastIP': f'192.168.1.{i}', 'devName': f'dev{i}'} for i in range(1, n + 1)]
+
+
+def test_parse_ping_output():
+    assert icmp.parse_ping_output(IPUTILS_OK) == (3, '0.056')
+    assert icmp.parse_ping_output(BUSYBOX_DOWN) == (0, '')
+    busybox_ok = "3 packets transmitted, 2 packets received, 33% packet loss\nround-trip min/avg/max = 0.080/0.083/0.089 ms\n"
+    assert icmp.parse_ping_output(busybox_ok) == (2, '0.083')
+    assert icmp.parse_ping_output("ping: bad address '192.168.1.82a'") == (0, '')
+    assert icmp.parse_ping_output('') == (None, '')
+
+
+def test_execute_ping_concurrent():
+    active = []
+    peak = []
+    lock = threading.Lock()
+
+    def fake_ping(cmd, **kwargs):
+        with lock:
+            active.append(cmd[-1])
+            peak.append(len(active))
+        time.sleep(0.05)
+        with lock:
+            active.remove(cmd[-1])
+        if cmd[-1].endswith('.3'):
+            raise subprocess.CalledProcessError(1, cmd, output=BUSYBOX_DOWN)
+        return IPUTILS_OK
+
+    plugin_objects = MagicMock()
+    with patch.object(icmp.subprocess, 'check_output', side_effect=fake_ping):
+        started = time.monotonic()
+        icmp.execute_ping(5, '-c 3', _devices(20), re.compile('.*'), plugin_objects, concurrency=10)
+        elapsed = time.monotonic() - started
+
+    assert 1 < max(peak) <= 10
+    assert elapsed < 0.5
+    added = [c.kwargs for c in plugin_objects.add_object.call_args_list]
+    assert len(added) == 19
+    assert '192.168.1.3' not in [a['secondaryId'] for a in added]
+    assert all(a['watched4'] == '0.056' for a in added)
+
+
+def test_execute_fping_rtt():
+    output = (
+        "192.168.1.1 : [0], 84 bytes, 0.50 ms (0.50 avg, 0% loss)\n"
+        "192.168.1.2 : [0], timed out (NaN avg, 100% loss)\n"
+        "192.168.1.1 : [1], 84 bytes, 0.30 ms (0.40 avg, 0% loss)\n"
+    )
+    plugin_objects = MagicMock()
+    with patch.object(icmp.subprocess, 'check_output', return_value=output):
+        icmp.execute_fping(5, '-c 2', _devices(2), plugin_objects, [], [], False)
+
+    added = [c.kwargs for c in plugin_objects.add_object.call_args_list]
+    assert [(a['secondaryId'], a['watched4']) for a in added] == [('192.168.1.1', '0.40')]
+    assert added[0]['watched2'].startswith('192.168.1.1 : [0]')
+
+
+def test_execute_native_groups_targets_by_interface():
+    swept = []
+
+    class FakeSweeper:
+        def __init__(self, rate, timeout, interface=None):
+            self.interface = interface
+            self.stats = {}
+
+        def sweep(self, targets, deadline=None):
+            swept.append((self.interface, list(targets)))
+            return {'192.168.1.1': 0.25, '10.9.9.9': 1.5}
+
+    devices = _devices(1) + [{'devMac': 'aa:aa:aa:aa:aa:aa', 'devLastIP': '172.16.0.7', 'devName': 'remote'}]
+    plugin_objects = MagicMock()
+    with patch.object(icmp, 'IcmpSweeper', FakeSweeper), \
+         patch.object(icmp, 'get_setting_value', return_value=None):
+        icmp.execute_native(10, devices, plugin_objects, [('192.168.1.0/24', 'eth0')], True)
+
+    assert swept == [('eth0', ['192.168.1.0/24']), (None, ['172.16.0.7'])]
+    added = {c.kwargs['secondaryId']: c.kwargs for c in plugin_objects.add_object.call_args_list}
+    assert added['192.168.1.1']['watched4'] == '0.250'
+    assert added['192.168.1.1']['watched3'] == 'native'
+    assert added['10.9.9.9']['watched1'] == '(unknown)'
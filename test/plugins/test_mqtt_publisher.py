@@ -0,0 +1,182 @@
+"""
+Tests for the change-only publishing of the MQTT plugin (_publisher_mqtt/mqtt.py).
+
+Tests verify that:
+- an unchanged payload is not published again until MQTT_REPUBLISH_HOURS passed
+- only delivered payloads are remembered, topics not published anymore are forgotten
+- a device run reads the existing sensors once, resolves the parent name and
+  publishes nothing on a second run without changes
+"""
+
+import importlib.util
+import json
+import os
+import sys
+from unittest.mock import patch
+
+_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+_SERVER = os.path.join(_ROOT, 'server')
+_PLUGINS = os.path.join(_ROOT, 'server', 'plugins')
+
+for _p in [_ROOT, _SERVER, _PLUGINS]:
+    if _p not in sys.path:
+        sys.path.insert(0, _p)
+
+# Loaded under its own name, module level code reads settings
+with patch('helper.get_setting_value', return_value='UTC'), \
+     patch('logger.Logger'), \
+     patch('plugin_helper.Plugin_Objects'):
+    _spec = importlib.util.spec_from_file_location('mqtt_script', os.path.join(_PLUGINS, '_publisher_mqtt', 'mqtt.py'))
+    mqtt = importlib.util.module_from_spec(_spec)
+    _spec.loader.exec_module(mqtt)
+
+
+SETTINGS = {
+    'MQTT_QOS': 1,
+    'MQTT_REPUBLISH_HOURS': 24,
+    'MQTT_DELAY_SEC': 0,
+    'MQTT_SEND_STATS': False,
+    'MQTT_SEND_NOTIFICATIONS': False,
+    'MQTT_SEND_DEVICES': True,
+    'MQTT_DEVICES_SQL': 'SELECT * FROM Devices',
+    'MQTT_DEVICE_NAME': 'netalertx',
+    'MQTT_DEVICE_ID': 'netalertx',
+}
+
+
+class FakeInfo:
+    def __init__(self, delivered):
+        self.delivered = delivered
+
+    def __getitem__(self, index):
+        return 0
+
+    def wait_for_publish(self, timeout=None):
+        pass
+
+    def is_published(self):
+        return self.delivered
+
+
+class FakeClient:
+    def __init__(self):
+        self.published = []
+        self.deliver = True
+
+    def publish(self, topic, payload, qos, retain):
+        self.published.append((topic, payload))
+        return FakeInfo(self.deliver)
+
+
+class FakeDB:
+    def __init__(self, devices):
+        self.devices = devices
+
+    def read(self, sql):
+        return self.devices
+
+
+def _run_state(tmp_path, settings=None):
+    """Fresh per-run globals of the plugin, as in a new process."""
+    values = dict(SETTINGS, **(settings or {}))
+    return [
+        patch.object(mqtt, 'DIGEST_FILE', str(tmp_path / 'cache.MQTT.json')),
+        patch.object(mqtt, 'topic_digests', {}),
+        patch.object(mqtt, 'pending_publishes', []),
+        patch.object(mqtt, 'seen_topics', set()),
+        patch.object(mqtt, 'known_sensors', None),
+        patch.object(mqtt, 'mqtt_connected_to_broker', True),
+        patch.object(mqtt, 'get_setting_value', side_effect=lambda key: values.get(key, '')),
+    ]
+
+
+def _in_run(tmp_path, func, settings=None):
+    patches = _run_state(tmp_path, settings)
+    for p in patches:
+        p.start()
+    try:
+        mqtt.load_topic_digests()
+        func()
+        mqtt.flush_publishes(timeout=1)
+    finally:
+        for p in reversed(patches):
+            p.stop()
+
+
+def test_unchanged_payloads_are_skipped(tmp_path):
+    client = FakeClient()
+
+    def publish(message):
+        return lambda: mqtt.publish_mqtt(client, 'nax/state', message)
+
+    _in_run(tmp_path, publish({'a': 1}))
+    _in_run(tmp_path, publish({'a': 1}))
+    assert len(client.published) == 1
+
+    _in_run(tmp_path, publish({'a': 2}))
+    assert client.published[-1] == ('nax/state', '{"a": 2}')
+
+    # Always republished with 0, otherwise once older than MQTT_REPUBLISH_HOURS
+    _in_run(tmp_path, publish({'a': 2}), settings={'MQTT_REPUBLISH_HOURS': 0})
+    assert len(client.published) == 3
+    with patch.object(mqtt.time, 'time', return_value=mqtt.time.time() + 25 * 3600):
+        _in_run(tmp_path, publish({'a': 2}))
+    assert len(client.published) == 4
+
+
+def test_only_delivered_payloads_are_remembered(tmp_path):
+    client = FakeClient()
+    client.deliver = False
+
+    def run():
+        mqtt.publish_mqtt(client, 'nax/a', 'x')
+        mqtt.publish_mqtt(client, 'nax/b', 'y')
+
+    _in_run(tmp_path, run)
+    client.deliver = True
+    _in_run(tmp_path, run)
+    _in_run(tmp_path, lambda: mqtt.publish_mqtt(client, 'nax/a', 'x'))
+
+    assert [t for t, _ in client.published] == ['nax/a', 'nax/b', 'nax/a', 'nax/b']
+    # nax/b was not published in the last run
+    with open(tmp_path / 'cache.MQTT.json') as f:
+        assert list(json.load(f)) == ['nax/a']
+
+
+def _device(mac, name, parent='', present=1):
+    return {
+        'devMac': mac, 'devName': name, 'devLastIP': '10.0.0.1', 'devIsNew': 0, 'devAlertDown': 0,
+        'devVendor': 'Acme', 'devLastConnection': '2026-10-19 10:00:00', 'devFirstConnection': '2026-10-18 10:00:00',
+        'devSyncHubNode': '', 'devGroup': '', 'devLocation': '', 'devParentMAC': parent, 'devPresentLastScan': present,
+    }
+
+
+def test_device_run_publishes_changes_only(tmp_path):
+    client = FakeClient()
+    devices = [_device('aa:00:00:00:00:01', 'Router'), _device('aa:00:00:00:00:02', 'Laptop', parent='aa:00:00:00:00:01')]
+    sensors = []
+
+    def run():
+        with patch.object(mqtt, 'getPluginObjects', return_value=list(sensors)) as objects, \
+             patch.object(mqtt, 'mqtt_client', client):
+            mqtt.mqtt_start(FakeDB(devices))
+        assert objects.call_count == 1
+
+    _in_run(tmp_path, run)
+    states = {t: json.loads(p) for t, p in client.published if t.endswith('/sensor/mac_aa_00_00_00_00_02/state')}
+    assert list(states.values())[0]['network_parent_name'] == 'Router'
+    first_run = len(client.published)
+    assert first_run == 2 * (8 + 4)  # 8 sensor configs + 4 state messages per device
+
+    # Second run: the sensors are known plugin objects now and nothing changed
+    sensors.extend({'plugin': 'MQTT', 'watchedValue3': obj.kwargs['watched3']} for obj in mqtt.plugin_objects.add_object.call_args_list)
+    _in_run(tmp_path, run)
+    assert len(client.published) == first_run
+
+    # The laptop went offline: only its state topics are published
+    devices[1]['devPresentLastScan'] = 0
+    _in_run(tmp_path, run)
+    assert sorted(t for t, _ in client.published[first_run:]) == [
+        f'{mqtt.topic_root}/binary_sensor/mac_aa_00_00_00_00_02/state',
+        f'{mqtt.topic_root}/device_tracker/mac_aa_00_00_00_00_02/state',
+    ]
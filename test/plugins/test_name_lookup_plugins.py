@@ -0,0 +1,147 @@
+"""
+Tests for the NBTSCAN and AVAHISCAN name lookup plugins.
+
+Tests verify that:
+- the nbtscan result table is parsed in one pass for all targets
+- one nbtscan run queries all devices and silent hosts are backed off
+- hosts are only backed off after an nbtscan run that completed
+- mDNS lookups run in parallel and are abandoned at the deadline
+"""
+
+import os
+import subprocess
+import sys
+import threading
+import time
+from unittest.mock import patch, MagicMock
+
+_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+_SERVER = os.path.join(_ROOT, 'server')
+_PLUGINS = os.path.join(_ROOT, 'server', 'plugins')
+
+for _p in [_ROOT, _SERVER, _PLUGINS,
+           os.path.join(_PLUGINS, 'nbtscan_scan'), os.path.join(_PLUGINS, 'avahi_scan')]:
+    if _p not in sys.path:
+        sys.path.insert(0, _p)
+
+with patch('helper.get_setting_value', return_value='UTC'), \
+     patch('logger.Logger'), \
+     patch('plugin_helper.Plugin_Objects'):
+    import nbtscan  # noqa: E402
+    import avahi_scan  # noqa: E402
+
+
+NBTSCAN_OUTPUT = """Doing NBT name scan for addresses from -
+
+IP address       NetBIOS Name     Server    User             MAC address
+------------------------------------------------------------------------------
+192.168.1.10     DESKTOP-A        <server>  <unknown>        00:11:22:33:44:55
+192.168.1.12     NAS              <server>  NAS              00:11:22:33:44:66
+192.168.1.99     OTHER            <server>  <unknown>        00:11:22:33:44:77
+"""
+
+
+def _devices(*ips):
+    return [{'devMac': f'aa:bb:cc:dd:ee:{i:02x}', 'devLastIP': ip} for i, ip in enumerate(ips)]
+
+
+def test_parse_nbtscan_output():
+    names = nbtscan.parse_nbtscan_output(NBTSCAN_OUTPUT, ['192.168.1.10', '192.168.1.11', '192.168.1.12'])
+    assert names == {'192.168.1.10': 'DESKTOP-A', '192.168.1.12': 'NAS'}
+
+
+def test_nbtscan_single_run_and_backoff(tmp_path):
+    settings = {'NBTSCAN_RUN_TIMEOUT': 10, 'NBTSCAN_QUERY_TIMEOUT': 500, 'NBTSCAN_RETRY_BACKOFF': 60, 'REFRESH_FQDN': False}
+    handler = MagicMock()
+    handler.getUnknown.return_value = _devices('192.168.1.10', '192.168.1.11', '192.168.1.12')
+    calls = []
+
+    def fake_check_output(args, input=None, **kwargs):
+        calls.append((args, input.split()))
+        return NBTSCAN_OUTPUT
+
+    with patch.object(nbtscan, 'get_setting_value', side_effect=lambda k, *a: settings.get(k)), \
+         patch.object(nbtscan, 'DeviceInstance', return_value=handler), \
+         patch.object(nbtscan, 'Plugin_Objects'), \
+         patch.object(nbtscan, 'CACHE_FILE', str(tmp_path / 'cache.json')), \
+         patch.object(nbtscan.subprocess, 'check_output', side_effect=fake_check_output):
+        nbtscan.main()
+        nbtscan.main()
+
+    # First run: one nbtscan for all three IPs; second run: nothing left to query
+    assert len(calls) == 1
+    args, targets = calls[0]
+    assert args[:3] == ['nbtscan', '-t', '500']
+    assert targets == ['192.168.1.10', '192.168.1.11', '192.168.1.12']
+
+    cache = nbtscan.TTLCache(str(tmp_path / 'cache.json'), max_negative_ttl=3600)
+    assert cache.get('192.168.1.10') == 'DESKTOP-A'
+    assert cache.get('192.168.1.11') is None
+
+
+def test_nbtscan_timeout_keeps_partial_output():
+    err = subprocess.TimeoutExpired(['nbtscan'], 1, output=NBTSCAN_OUTPUT.splitlines()[4] + '\n')
+    with patch.object(nbtscan.subprocess, 'check_output', side_effect=err):
+        names, completed = nbtscan.execute_batch_lookup(['192.168.1.10', '192.168.1.12'], 1, 500)
+    assert names == {'192.168.1.10': 'DESKTOP-A'}
+    assert not completed
+
+
+def test_nbtscan_failed_run_backs_off_nobody(tmp_path):
+    settings = {'NBTSCAN_RUN_TIMEOUT': 10, 'NBTSCAN_QUERY_TIMEOUT': 500, 'NBTSCAN_RETRY_BACKOFF': 60, 'REFRESH_FQDN': False}
+    handler = MagicMock()
+    handler.getUnknown.return_value = _devices('192.168.1.10', '192.168.1.11')
+    err = subprocess.TimeoutExpired(['nbtscan'], 1, output=NBTSCAN_OUTPUT.splitlines()[4] + '\n')
+
+    with patch.object(nbtscan, 'get_setting_value', side_effect=lambda k, *a: settings.get(k)), \
+         patch.object(nbtscan, 'DeviceInstance', return_value=handler), \
+         patch.object(nbtscan, 'Plugin_Objects'), \
+         patch.object(nbtscan, 'CACHE_FILE', str(tmp_path / 'cache.json')), \
+         patch.object(nbtscan.subprocess, 'check_output', side_effect=err):
+        nbtscan.main()
+
+    cache = nbtscan.TTLCache(str(tmp_path / 'cache.json'), max_negative_ttl=3600)
+    assert cache.get('192.168.1.10') == 'DESKTOP-A'
+    assert cache.get('192.168.1.11') is nbtscan.MISS
+
+
+def test_mdns_lookups_run_in_parallel():
+    active = []
+    peak = []
+    lock = threading.Lock()
+
+    def slow_lookup(ip, timeout=5):
+        with lock:
+            active.append(ip)
+            peak.append(len(active))
+        time.sleep(0.05)
+        with lock:
+            active.remove(ip)
+        return '' if ip.endswith('.3') else f'host-{ip}.local'
+
+    ips = [f'192.168.1.{i}' for i in range(1, 21)]
+    with patch.object(avahi_scan, 'resolve_mdns_name', side_effect=slow_lookup):
+        started = time.monotonic()
+        results = avahi_scan.resolve_mdns_names(ips, 10, time.monotonic() + 5)
+        elapsed = time.monotonic() - started
+
+    assert len(results) == 20
+    assert results['192.168.1.3'] == ''
+    assert results['192.168.1.4'] == 'host-192.168.1.4.local'
+    assert max(peak) <= 10
+    assert elapsed < 0.5
+
+
+def test_mdns_lookups_abandoned_at_deadline():
+    release = threading.Event()
+
+    def lookup(ip, timeout=5):
+        if ip.endswith('.2'):
+            release.wait(2)
+        return 'host.local'
+
+    with patch.object(avahi_scan, 'resolve_mdns_name', side_effect=lookup):
+        results = avahi_scan.resolve_mdns_names(['192.168.1.1', '192.168.1.2'], 2, time.monotonic() + 0.2)
+    release.set()
+
+    assert results == {'192.168.1.1': 'host.local'}
@@ -0,0 +1,180 @@
+"""
+Tests for the NMAP plugin scheduler (nmap_scan/script.py).
+
+Tests verify that:
+- the port table of an nmap run is parsed
+- devices are scanned concurrently, up to the configured cap
+- recently scanned devices are skipped and report their cached ports
+- an IP change, a reconnection or new NMAP_ARGS trigger a rescan before the TTL
+- a failed scan keeps reporting the cached ports
+- results are written incrementally through a temporary file
+"""
+
+import importlib.util
+import os
+import sys
+import threading
+import time
+from unittest.mock import patch
+
+_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+_SERVER = os.path.join(_ROOT, 'server')
+_PLUGINS = os.path.join(_ROOT, 'server', 'plugins')
+
+for _p in [_ROOT, _SERVER, _PLUGINS]:
+    if _p not in sys.path:
+        sys.path.insert(0, _p)
+
+# Loaded under its own name: several plugins ship a module called "script"
+with patch('helper.get_setting_value', return_value='UTC'), \
+     patch('logger.Logger'), \
+     patch('plugin_helper.Plugin_Objects'):
+    _spec = importlib.util.spec_from_file_location('nmap_scan_script', os.path.join(_PLUGINS, 'nmap_scan', 'script.py'))
+    nmap = importlib.util.module_from_spec(_spec)
+    _spec.loader.exec_module(nmap)
+
+from plugin_helper import Plugin_Objects  # noqa: E402
+
+NMAP_OUTPUT = """Starting Nmap 7.94 ( https://nmap.org ) at 2026-10-19 10:00 UTC
+Nmap scan report for 192.168.1.10
+Host is up (0.0010s latency).
+Not shown: 997 closed tcp ports (reset)
+PORT    STATE SERVICE
+22/tcp  open  ssh
+80/tcp  open  http
+443/tcp open  https
+
+Nmap done: 1 IP address (1 host up) scanned in 0.52 seconds
+"""
+
+NOW = '2026-10-19 10:00:00'
+
+
+def _fake_nmap(outputs=None, delay=0.0, calls=None, active=None):
+    lock = threading.Lock()
+
+    def run(ip, timeout, args):
+        with lock:
+            if calls is not None:
+                calls.append(ip)
+            if active is not None:
+                active['now'] += 1
+                active['max'] = max(active['max'], active['now'])
+        time.sleep(delay)
+        with lock:
+            if active is not None:
+                active['now'] -= 1
+        return (outputs or {}).get(ip, NMAP_OUTPUT)
+
+    return run
+
+
+def _cached(ip, scanned, ports=(('22/tcp', 'open', 'ssh'),), args='-p -10000'):
+    return {'ip': ip, 'scanned': scanned, 'args': args, 'ports': [list(p) for p in ports]}
+
+
+def test_parse_nmap_output():
+    rows, duration = nmap.parse_nmap_output(NMAP_OUTPUT)
+
+    assert rows == [('22/tcp', 'open', 'ssh'), ('80/tcp', 'open', 'http'), ('443/tcp', 'open', 'https')]
+    assert duration == '0.52 seconds'
+    assert nmap.parse_nmap_output("Starting Nmap 7.94\nNote: Host seems down.\n")[0] == []
+
+
+def test_scans_concurrently_up_to_cap(tmp_path):
+    targets = [(f'10.0.0.{i}', f'aa:00:00:00:00:{i:02x}', '') for i in range(8)]
+    active = {'now': 0, 'max': 0}
+    scheduler = nmap.NmapScheduler({}, '-p -10000', timeout=5, concurrency=3)
+
+    with patch.object(nmap, 'run_nmap', _fake_nmap(delay=0.1, active=active)), \
+         patch.object(nmap, 'append_line_to_file'):
+        start = time.monotonic()
+        results = scheduler.run(targets)
+        elapsed = time.monotonic() - start
+
+    assert active['max'] == 3
+    assert elapsed < 0.8 * 0.1 * len(targets)
+    assert all(len(results[mac]) == 3 for _, mac, _ in targets)
+    assert scheduler.cache['aa:00:00:00:00:00']['ports'][0] == ['22/tcp', 'open', 'ssh']
+
+
+def test_skips_fresh_devices_and_rescans_changed_ones():
+    cache = {
+        'aa:01': _cached('10.0.0.1', '2026-10-19 09:00:00'),                    # fresh
+        'aa:02': _cached('10.0.0.99', '2026-10-19 09:00:00'),                   # IP changed
+        'aa:03': _cached('10.0.0.3', '2026-10-19 09:00:00'),                    # reconnected
+        'aa:04': _cached('10.0.0.4', '2026-10-18 09:00:00'),                    # expired
+        'aa:05': _cached('10.0.0.5', '2026-10-19 09:00:00', args='-F'),         # other args
+        'aa:gone': _cached('10.0.0.9', '2026-10-19 09:00:00'),
+    }
+    targets = [
+        ('10.0.0.1', 'aa:01', '2026-10-19 08:00:00'),
+        ('10.0.0.2', 'aa:02', '0'),
+        ('10.0.0.3', 'aa:03', '2026-10-19 09:30:00'),
+        ('10.0.0.4', 'aa:04', '0'),
+        ('10.0.0.5', 'aa:05', '0'),
+        ('10.0.0.6', 'aa:06', '0'),                                             # never scanned
+    ]
+    calls = []
+    scheduler = nmap.NmapScheduler(cache, '-p -10000', timeout=5, concurrency=2, rescan_ttl=12 * 3600)
+
+    with patch.object(nmap, 'run_nmap', _fake_nmap(calls=calls)), \
+         patch.object(nmap, 'append_line_to_file'), \
+         patch.object(nmap, 'timeNowUTC', return_value=NOW):
+        results = scheduler.run(targets)
+
+    assert sorted(calls) == ['10.0.0.2', '10.0.0.3', '10.0.0.4', '10.0.0.5', '10.0.0.6']
+    # The skipped device reports its cached ports
+    assert [(e.ip, e.port) for e in results['aa:01']] == [('10.0.0.1', '22/tcp')]
+    assert len(results['aa:02']) == 3
+    assert 'aa:gone' not in scheduler.cache
+
+
+def test_ttl_zero_scans_everything():
+    cache = {'aa:01': _cached('10.0.0.1', NOW)}
+    calls = []
+    scheduler = nmap.NmapScheduler(cache, '-p -10000', timeout=5, rescan_ttl=0)
+
+    with patch.object(nmap, 'run_nmap', _fake_nmap(calls=calls)), \
+         patch.object(nmap, 'append_line_to_file'):
+        scheduler.run([('10.0.0.1', 'aa:01', '0')])
+
+    assert calls == ['10.0.0.1']
+
+
+def test_failed_scan_keeps_cached_ports():
+    cache = {'aa:01': _cached('10.0.0.1', '2026-10-18 09:00:00')}
+    scheduler = nmap.NmapScheduler(cache, '-p -10000', timeout=5, rescan_ttl=3600)
+
+    with patch.object(nmap, 'run_nmap', _fake_nmap(outputs={'10.0.0.1': ''})), \
+         patch.object(nmap, 'timeNowUTC', return_value=NOW):
+        results = scheduler.run([('10.0.0.1', 'aa:01', '0')])
+
+    assert [e.port for e in results['aa:01']] == ['22/tcp']
+    assert scheduler.cache['aa:01']['scanned'] == '2026-10-18 09:00:00'
+
+
+def test_results_written_incrementally(tmp_path):
+    result_file = str(tmp_path / 'last_result.NMAP.log')
+    tmp_file = str(tmp_path / 'tmp.last_result.NMAP.log')
+    snapshots = []
+
+    def on_update(results):
+        nmap.write_results(results)
+        with open(result_file) as f:
+            snapshots.append(len(f.read().splitlines()))
+
+    cache = {'aa:01': _cached('10.0.0.1', '2026-10-18 09:00:00')}
+    scheduler = nmap.NmapScheduler(cache, '-p -10000', timeout=5, rescan_ttl=3600)
+
+    with patch.object(nmap, 'Plugin_Objects', Plugin_Objects), \
+         patch.object(nmap, 'RESULT_FILE', result_file), \
+         patch.object(nmap, 'RESULT_TMP_FILE', tmp_file), \
+         patch.object(nmap, 'run_nmap', _fake_nmap()), \
+         patch.object(nmap, 'append_line_to_file'), \
+         patch.object(nmap, 'timeNowUTC', return_value=NOW):
+        scheduler.run([('10.0.0.1', 'aa:01', '0')], on_update=on_update)
+
+    # Cached port first, then the three ports of the fresh scan
+    assert snapshots == [1, 3]
+    assert not os.path.exists(tmp_file)
@@ -0,0 +1,107 @@
+"""
+Tests for the SNMPDSC plugin (snmp_discovery/script.py).
+
+Tests verify that:
+- the three supported ARP table output formats are parsed
+- snmpwalk commands run as snmpbulkwalk, except for SNMPv1
+- a walk is parsed while it streams, a timed out walk keeps the rows read so far
+- routers are walked concurrently and unreachable ones are backed off exponentially
+"""
+
+import importlib.util
+import os
+import sys
+import threading
+import time
+from unittest.mock import patch
+
+_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+_SERVER = os.path.join(_ROOT, 'server')
+_PLUGINS = os.path.join(_ROOT, 'server', 'plugins')
+
+for _p in [_ROOT, _SERVER, _PLUGINS]:
+    if _p not in sys.path:
+        sys.path.insert(0, _p)
+
+# Loaded under its own name: several plugins ship a module called "script"
+with patch('helper.get_setting_value', return_value='UTC'), \
+     patch('logger.Logger'), \
+     patch('plugin_helper.Plugin_Objects'):
+    _spec = importlib.util.spec_from_file_location('snmp_discovery_script', os.path.join(_PLUGINS, 'snmp_discovery', 'script.py'))
+    snmpdsc = importlib.util.module_from_spec(_spec)
+    _spec.loader.exec_module(snmpdsc)
+
+CMD = 'snmpwalk -v 2c -c public -OXsq {} .1.3.6.1.2.1.3.1.1.2'
+
+
+def test_parse_line_formats():
+    assert snmpdsc.parse_line('mib-2.3.1.1.2.15.1.192.168.1.14 "2C F4 32 18 61 43 "') == ('2C:F4:32:18:61:43', '192.168.1.14')
+    assert snmpdsc.parse_line('IP-MIB::ipNetToMediaPhysAddress.17.10.10.3.202 = STRING: f8:81:1a:ef:ef:ef') == ('f8:81:1a:ef:ef:ef', '10.10.3.202')
+    assert snmpdsc.parse_line('ipNetToMediaPhysAddress[3][192.168.1.9] 6c:6c:6c:6c:6c:b6') == ('6c:6c:6c:6c:6c:b6', '192.168.1.9')
+    assert snmpdsc.parse_line('End of MIB') is None
+
+
+def test_walk_args_use_bulk():
+    args = snmpdsc.walk_args(CMD.format('192.168.1.1'))
+    assert args[0] == 'snmpbulkwalk'
+    assert snmpdsc.router_of(args) == '192.168.1.1'
+
+    assert snmpdsc.walk_args('/usr/bin/snmpwalk -v 2c -c public 10.0.0.1 .1')[0] == '/usr/bin/snmpbulkwalk'
+    assert snmpdsc.walk_args('snmpwalk -v 1 -c public 10.0.0.1 .1')[0] == 'snmpwalk'
+    assert snmpdsc.walk_args('snmpwalk -v1 -c public 10.0.0.1 .1')[0] == 'snmpwalk'
+    assert snmpdsc.walk_args(CMD.format('10.0.0.1'), use_bulk=False)[0] == 'snmpwalk'
+
+
+def test_walk_streams_and_times_out():
+    script = (
+        "import sys, time\n"
+        "print('ipNetToMediaPhysAddress[3][192.168.1.9] 6c:6c:6c:6c:6c:b6', flush=True)\n"
+        "time.sleep(float(sys.argv[1]))\n"
+        "print('ipNetToMediaPhysAddress[3][192.168.1.10] 6c:6c:6c:6c:6c:b7')\n"
+    )
+    entries, error = snmpdsc.walk([sys.executable, '-c', script, '0'], timeout=5)
+    assert error is None
+    assert [e[1] for e in entries] == ['192.168.1.9', '192.168.1.10']
+
+    entries, error = snmpdsc.walk([sys.executable, '-c', script, '10'], timeout=0.5)
+    assert isinstance(error, snmpdsc.subprocess.TimeoutExpired)
+    assert [e[1] for e in entries] == ['192.168.1.9']
+
+    assert snmpdsc.walk(['/nonexistent/snmpbulkwalk'], timeout=1)[1] is not None
+
+
+def test_walk_routers_concurrently_with_backoff():
+    active = {'now': 0, 'max': 0}
+    lock = threading.Lock()
+
+    def fake_walk(args, timeout):
+        router = snmpdsc.router_of(args)
+        with lock:
+            active['now'] += 1
+            active['max'] = max(active['max'], active['now'])
+        time.sleep(0.1)
+        with lock:
+            active['now'] -= 1
+        if router == '10.0.0.9':
+            return [], snmpdsc.subprocess.TimeoutExpired(args, timeout)
+        return [('aa:bb:cc:00:00:01', '192.168.1.2', 'line')], None
+
+    commands = [CMD.format(f'10.0.0.{i}') for i in range(1, 10)]
+    backoff = {'10.0.0.1': {'failures': 2, 'retry_after': 50}}
+
+    with patch.object(snmpdsc, 'walk', fake_walk):
+        start = time.monotonic()
+        results = snmpdsc.walk_routers(commands, 5, concurrency=4, backoff=backoff, now=100)
+        elapsed = time.monotonic() - start
+
+        assert active['max'] == 4
+        assert elapsed < 0.8 * 0.1 * len(commands)
+        # 10.0.0.1 succeeded again, 10.0.0.9 failed
+        assert len(results) == 8
+        assert backoff == {'10.0.0.9': {'failures': 1, 'retry_after': 100 + snmpdsc.BACKOFF_BASE}}
+
+        # Backed off: not walked before retry_after, then waits twice as long
+        results = snmpdsc.walk_routers([CMD.format('10.0.0.9')], 5, backoff=backoff, now=200)
+        assert results == [] and backoff['10.0.0.9']['failures'] == 1
+        snmpdsc.walk_routers([CMD.format('10.0.0.9')], 5, backoff=backoff, now=500)
+        assert backoff['10.0.0.9'] == {'failures': 2, 'retry_after': 500 + 2 * snmpdsc.BACKOFF_BASE}
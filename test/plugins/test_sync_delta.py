@@ -0,0 +1,166 @@
+"""
+Tests for the versioned delta SYNC protocol (utils/sync_delta.py and the
+node side of sync.py).
+
+Tests verify that:
+- only inserted, changed and deleted rows end up in a delta
+- a hub mirror applies full payloads and deltas on top of its own version only
+- compressed payloads and streamed gzip envelopes round-trip
+- a node sends everything until the hub advertises deltas, then only the
+  changes, and everything again when the hub asks for a resync
+"""
+
+import gzip
+import importlib.util
+import json
+import os
+import sys
+from unittest.mock import MagicMock, patch
+
+_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+_SERVER = os.path.join(_ROOT, 'server')
+_PLUGINS = os.path.join(_ROOT, 'server', 'plugins')
+
+for _p in [_ROOT, _SERVER, _PLUGINS]:
+    if _p not in sys.path:
+        sys.path.insert(0, _p)
+
+from utils.crypto_utils import decrypt_data  # noqa: E402
+from utils.sync_delta import (  # noqa: E402
+    apply_payload, compress_text, decompress_text, delta_payload, diff_rows, full_payload, iter_json_gzip, load_payload
+)
+
+# Loaded under its own name, module level code reads settings
+with patch('helper.get_setting_value', return_value='UTC'), \
+     patch('logger.Logger'), \
+     patch('plugin_helper.Plugin_Objects'):
+    _spec = importlib.util.spec_from_file_location('sync_script', os.path.join(_PLUGINS, 'sync', 'sync.py'))
+    sync = importlib.util.module_from_spec(_spec)
+    _spec.loader.exec_module(sync)
+
+
+def _row(mac, name='dev', present=1):
+    return {'devMac': mac, 'devName': name, 'devPresentLastScan': present}
+
+
+ROWS = [_row('AA:00:00:00:00:01'), _row('aa:00:00:00:00:02'), _row('aa:00:00:00:00:03')]
+
+
+def test_diff_rows():
+    upserts, deletes, digests = diff_rows(ROWS, {})
+    assert upserts == ROWS and deletes == []
+    assert list(digests) == ['aa:00:00:00:00:01', 'aa:00:00:00:00:02', 'aa:00:00:00:00:03']
+
+    changed = [dict(ROWS[0]), _row('aa:00:00:00:00:02', name='renamed'), _row('aa:00:00:00:00:04')]
+    # Key order does not matter
+    changed[0] = dict(reversed(list(changed[0].items())))
+    upserts, deletes, _ = diff_rows(changed, digests)
+    assert [r['devMac'] for r in upserts] == ['aa:00:00:00:00:02', 'aa:00:00:00:00:04']
+    assert deletes == ['aa:00:00:00:00:03']
+
+
+def test_apply_payload():
+    mirror = apply_payload(None, full_payload(ROWS, 1))
+    assert mirror['version'] == 1 and len(mirror['rows']) == 3
+
+    mirror = apply_payload(mirror, delta_payload([_row('aa:00:00:00:00:02', name='renamed')], ['aa:00:00:00:00:03'], 2, 1))
+    assert mirror['version'] == 2
+    assert sorted(mirror['rows']) == ['aa:00:00:00:00:01', 'aa:00:00:00:00:02']
+    assert mirror['rows']['aa:00:00:00:00:02']['devName'] == 'renamed'
+
+    # A delta based on another version, or without a mirror, needs a resync
+    assert apply_payload(mirror, delta_payload([], [], 4, 3)) is None
+    assert apply_payload(None, delta_payload([], [], 2, 1)) is None
+
+
+def test_compression_round_trip():
+    text = json.dumps(full_payload(ROWS * 100, 1))
+    packed = compress_text(text)
+
+    assert packed.startswith('gzip:') and len(packed) < len(text) / 10
+    assert decompress_text(packed) == text
+    assert decompress_text('{"data": []}') == '{"data": []}'
+    assert load_payload(packed)['version'] == 1
+
+
+def test_iter_json_gzip():
+    body = b''.join(iter_json_gzip({'version': 2, 'delta': True}, 'upserts', iter(ROWS), tail={'deletes': ['x']}, chunk_size=16))
+    assert json.loads(gzip.decompress(body)) == {'version': 2, 'delta': True, 'upserts': ROWS, 'deletes': ['x']}
+
+    body = b''.join(iter_json_gzip({}, 'data', []))
+    assert json.loads(gzip.decompress(body)) == {'data': []}
+
+
+def _hub(replies):
+    """Fake requests.post answering with the given (status, json) in turn."""
+    posted = []
+
+    def post(url, json=None, headers=None, timeout=None):
+        posted.append(json)
+        status, body = replies.pop(0)
+        response = MagicMock(status_code=status)
+        response.json.return_value = body
+        return response
+
+    return post, posted
+
+
+def _content(data):
+    return load_payload(decrypt_data(data['data'], 'key'))
+
+
+def test_node_sends_changes_once_the_hub_supports_deltas(tmp_path):
+    post, posted = _hub([
+        (200, {'message': 'ok', 'sync_protocol': 1}),
+        (200, {'message': 'ok', 'sync_protocol': 1}),
+        (409, {'error': 'resync required'}),
+        (200, {'message': 'ok', 'sync_protocol': 1}),
+    ])
+
+    with patch.object(sync, 'NODE_STATE_FILE', str(tmp_path / 'state.json')), \
+         patch.object(sync.requests, 'post', post), \
+         patch.object(sync, 'write_notification'):
+        # First sync: everything, uncompressed so older hubs can read it
+        assert sync.send_devices('token', ROWS, 'key', 'table_devices.json', 'node1', 'http://hub')
+        assert posted[0]['version'] == 1 and posted[0]['base_version'] is None
+        assert decrypt_data(posted[0]['data'], 'key').startswith('{')
+        assert _content(posted[0])['data'] == ROWS
+
+        # Second sync: only the change, compressed
+        rows = ROWS[:2] + [_row('aa:00:00:00:00:03', present=0)]
+        assert sync.send_devices('token', rows, 'key', 'table_devices.json', 'node1', 'http://hub')
+        assert (posted[1]['version'], posted[1]['base_version']) == (2, 1)
+        assert decrypt_data(posted[1]['data'], 'key').startswith('gzip:')
+        delta = _content(posted[1])
+        assert delta['delta'] is True and delta['upserts'] == [rows[2]] and delta['deletes'] == []
+
+        # The hub lost track: the refused delta is followed by everything
+        assert sync.send_devices('token', rows[:1], 'key', 'table_devices.json', 'node1', 'http://hub')
+        assert _content(posted[2])['deletes'] == ['aa:00:00:00:00:02', 'aa:00:00:00:00:03']
+        assert posted[3]['base_version'] is None and _content(posted[3])['data'] == rows[:1]
+
+    with open(tmp_path / 'state.json') as f:
+        assert json.load(f)['http://hub']['version'] == 3
+
+
+def test_node_keeps_sending_everything_to_older_hubs(tmp_path):
+    post, posted = _hub([(200, {'message': 'ok'}), (500, {'error': 'boom'}), (200, {'message': 'ok'})])
+
+    with patch.object(sync, 'NODE_STATE_FILE', str(tmp_path / 'state.json')), \
+         patch.object(sync.requests, 'post', post), \
+         patch.object(sync, 'write_notification'):
+        assert sync.send_devices('token', ROWS, 'key', 'f', 'node1', 'http://hub')
+        # A failed send is not acknowledged: same version again
+        assert not sync.send_devices('token', ROWS, 'key', 'f', 'node1', 'http://hub')
+        assert sync.send_devices('token', ROWS, 'key', 'f', 'node1', 'http://hub')
+
+    assert [p['base_version'] for p in posted] == [None, None, None]
+    assert [p['version'] for p in posted] == [1, 2, 2]
+    assert all('data' in _content(p) for p in posted)
+
+
+def test_file_order():
+    files = ['last_result.SYNC.decoded.node1.10.log', 'last_result.SYNC.decoded.node1.2.log', 'last_result.node2.log']
+    assert sorted(files, key=sync._file_order) == [
+        'last_result.SYNC.decoded.node1.2.log', 'last_result.SYNC.decoded.node1.10.log', 'last_result.node2.log'
+    ]
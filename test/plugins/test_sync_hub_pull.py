@@ -0,0 +1,157 @@
+"""
+Tests for the parallel hub pulls of the SYNC plugin (sync.py).
+
+Tests verify that:
+- nodes are pulled concurrently, up to the configured cap
+- each node is ingested as soon as it answered, not after the slowest one
+- the watermark and latency percentiles of each node land in SyncNodes,
+  failed pulls only record the attempt, removed nodes are forgotten
+"""
+
+import importlib.util
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from unittest.mock import patch
+
+_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+_SERVER = os.path.join(_ROOT, 'server')
+_PLUGINS = os.path.join(_ROOT, 'server', 'plugins')
+
+for _p in [_ROOT, _SERVER, _PLUGINS]:
+    if _p not in sys.path:
+        sys.path.insert(0, _p)
+
+from db.db_upgrade import ensure_SyncNodes  # noqa: E402
+
+# Loaded under its own name, module level code reads settings
+with patch('helper.get_setting_value', return_value='UTC'), \
+     patch('logger.Logger'), \
+     patch('plugin_helper.Plugin_Objects'):
+    _spec = importlib.util.spec_from_file_location('sync_hub_script', os.path.join(_PLUGINS, 'sync', 'sync.py'))
+    sync = importlib.util.module_from_spec(_spec)
+    _spec.loader.exec_module(sync)
+
+
+def _db():
+    conn = sqlite3.connect(':memory:', check_same_thread=False)
+    conn.execute('CREATE TABLE Devices (devMac TEXT PRIMARY KEY, devName TEXT, devLastIP TEXT, devSyncHubNode TEXT)')
+    conn.execute('CREATE TABLE Events (eveMac TEXT, eveIp TEXT, eveDateTime TEXT, eveEventType TEXT, '
+                 'eveAdditionalInfo TEXT, evePendingAlertEmail INTEGER)')
+    ensure_SyncNodes(conn)
+    return conn
+
+
+def _receiver(conn, hub_state=None):
+    receiver = sync.HubReceiver(hub_state or {}, is_hub=True)
+    receiver.conn = conn
+    return receiver
+
+
+def _answer(node_name, macs, version=1):
+    rows = [{'devMac': mac, 'devName': mac, 'devLastIP': '10.0.0.1', 'devVendor': '', 'devGUID': '',
+             'devPresentLastScan': 1} for mac in macs]
+    return {'node_name': node_name, 'version': version, 'base_version': None, 'data': rows}
+
+
+def _nodes(conn):
+    conn.row_factory = sqlite3.Row
+    return {r['syncNodeUrl']: dict(r) for r in conn.execute('SELECT * FROM SyncNodes')}
+
+
+def test_pulls_concurrently_up_to_cap(tmp_path):
+    active = {'now': 0, 'max': 0}
+    lock = threading.Lock()
+
+    def get_data(api_token, node_url, since=None, timeout=5):
+        with lock:
+            active['now'] += 1
+            active['max'] = max(active['max'], active['now'])
+        time.sleep(0.1)
+        with lock:
+            active['now'] -= 1
+        return _answer(node_url.rsplit('/', 1)[1], [])
+
+    urls = [f'http://hub/node{i}' for i in range(6)]
+    receiver = _receiver(_db())
+
+    with patch.object(sync, 'get_data', get_data), \
+         patch.object(sync, 'LOG_PATH', str(tmp_path)), \
+         patch.object(receiver, 'ingest'):
+        start = time.monotonic()
+        sync.pull_from_nodes('token', urls, receiver, concurrency=2, timeout=1)
+        elapsed = time.monotonic() - start
+
+    assert active['max'] == 2
+    assert elapsed < 0.8 * 0.1 * len(urls)
+    assert receiver.pulled_nodes == {url: url.rsplit('/', 1)[1] for url in urls}
+
+
+def test_each_node_ingested_when_it_answered(tmp_path):
+    conn = _db()
+    receiver = _receiver(conn, {'nodes': {'slow': {'version': 3, 'rows': {}}}, 'pulled': {'http://slow': 'slow'}})
+    slow_done = threading.Event()
+    calls = {}
+
+    def get_data(api_token, node_url, since=None, timeout=5):
+        calls[node_url] = (since, timeout)
+        if node_url == 'http://slow':
+            time.sleep(0.3)
+            slow_done.set()
+            return _answer('slow', ['aa:00:00:00:00:02'], version=4)
+        return _answer('fast', ['aa:00:00:00:00:01'], version=7)
+
+    ingested = []
+    real_ingest = receiver.ingest
+
+    def ingest(files):
+        ingested.append((files, slow_done.is_set()))
+        real_ingest(files)
+
+    with patch.object(sync, 'get_data', get_data), \
+         patch.object(sync, 'LOG_PATH', str(tmp_path)), \
+         patch.object(sync, 'get_setting_value', return_value='copy-new'), \
+         patch.object(receiver, 'ingest', ingest):
+        sync.pull_from_nodes('token', ['http://slow', 'http://fast'], receiver, concurrency=2, timeout=3)
+
+    # The slow node asked for the changes since its mirrored version
+    assert calls == {'http://slow': (3, 3), 'http://fast': (None, 3)}
+    assert ingested == [(['last_result.fast.log'], False), (['last_result.slow.log'], True)]
+    assert sorted(r[0] for r in conn.execute('SELECT devMac, devSyncHubNode FROM Devices')) == \
+        ['aa:00:00:00:00:01', 'aa:00:00:00:00:02']
+
+    nodes = _nodes(conn)
+    assert nodes['http://fast']['syncWatermark'] == 7
+    assert nodes['http://slow']['syncWatermark'] == 4
+    assert nodes['http://slow']['syncLatencyLastMs'] >= 300
+
+
+def test_record_pull_stats_and_forget_nodes():
+    conn = _db()
+    cursor = conn.cursor()
+
+    for i, latency in enumerate([10, 20, 30, 40, 1000]):
+        sync.record_pull(cursor, 'http://a', 'a', latency, watermark=i, now=f'2026-10-19 10:00:0{i}')
+    sync.record_pull(cursor, 'http://a', None, None, error='failed or invalid response', now='2026-10-19 10:01:00')
+    sync.record_pull(cursor, 'http://b', None, None, error='failed or invalid response', now='2026-10-19 10:01:00')
+
+    node = _nodes(conn)['http://a']
+    assert node['syncNodeName'] == 'a'
+    assert node['syncWatermark'] == 4
+    assert node['syncLastSuccess'] == '2026-10-19 10:00:04'
+    assert node['syncLastAttempt'] == '2026-10-19 10:01:00'
+    assert node['syncLastError'] == 'failed or invalid response'
+    assert (node['syncLatencyLastMs'], node['syncLatencyP50Ms'], node['syncLatencyP95Ms']) == (1000, 30, 1000)
+    assert json.loads(node['syncLatencySamples']) == [10, 20, 30, 40, 1000]
+    assert _nodes(conn)['http://b']['syncLastSuccess'] is None
+
+    # Only the last LATENCY_SAMPLES samples are kept
+    with patch.object(sync, 'LATENCY_SAMPLES', 3):
+        sync.record_pull(cursor, 'http://a', 'a', 50, watermark=5)
+    assert json.loads(_nodes(conn)['http://a']['syncLatencySamples']) == [40, 1000, 50]
+
+    sync.forget_nodes(cursor, ['http://b'])
+    assert list(_nodes(conn)) == ['http://b']
@@ -0,0 +1,99 @@
+"""
+Tests for the VNDRPDT plugin (vendor_update/script.py).
+
+Tests verify that:
+- devices without a vendor are looked up, failed lookups are recorded with the DB version
+- recorded devices are skipped until the vendors file changes
+- records of devices that no longer miss a vendor are dropped
+"""
+
+import importlib.util
+import json
+import os
+import sqlite3
+import sys
+from unittest.mock import Mock, patch
+
+_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+_SERVER = os.path.join(_ROOT, 'server')
+_PLUGINS = os.path.join(_ROOT, 'server', 'plugins')
+
+for _p in [_ROOT, _SERVER, _PLUGINS]:
+    if _p not in sys.path:
+        sys.path.insert(0, _p)
+
+# Loaded under its own name: several plugins ship a module called "script"
+with patch('helper.get_setting_value', return_value='UTC'), \
+     patch('logger.Logger'):
+    _spec = importlib.util.spec_from_file_location('vendor_update_script', os.path.join(_PLUGINS, 'vendor_update', 'script.py'))
+    vndrpdt = importlib.util.module_from_spec(_spec)
+    _spec.loader.exec_module(vndrpdt)
+
+
+def _db(path, rows):
+    conn = sqlite3.connect(path)
+    conn.execute('CREATE TABLE Devices (devMac TEXT, devLastIP TEXT, devName TEXT, devVendor TEXT)')
+    conn.executemany('INSERT INTO Devices VALUES (?, ?, ?, ?)', rows)
+    conn.commit()
+    conn.close()
+
+
+def _run(tmp_path, vendors):
+    lookup = Mock(side_effect=lambda mac: vendors.get(mac, -1))
+    objects = Mock()
+    objects.__len__ = Mock(return_value=0)
+
+    with patch.object(vndrpdt, 'get_temp_db_connection', lambda: sqlite3.connect(str(tmp_path / 'app.db'))), \
+         patch.object(vndrpdt, 'vendor_source', return_value=str(tmp_path / 'oui.txt')), \
+         patch.object(vndrpdt, 'ATTEMPTS_FILE', str(tmp_path / 'attempts.json')), \
+         patch.object(vndrpdt, 'query_MAC_vendor', lookup):
+        vndrpdt.update_vendors(objects)
+
+    return [c.args[0] for c in lookup.call_args_list], [c.kwargs['primaryId'] for c in objects.add_object.call_args_list]
+
+
+def _attempts(tmp_path):
+    with open(tmp_path / 'attempts.json') as f:
+        return json.load(f)
+
+
+def test_only_new_macs_and_new_db_are_looked_up(tmp_path):
+    (tmp_path / 'oui.txt').write_text('AABBCC\tAcme\n')
+    _db(str(tmp_path / 'app.db'), [
+        ('aa:bb:cc:00:00:01', '10.0.0.1', 'a', None),
+        ('11:22:33:00:00:01', '10.0.0.2', 'b', '(unknown)'),
+        ('11:22:33:00:00:02', '10.0.0.3', 'c', 'Known'),
+    ])
+
+    looked_up, found = _run(tmp_path, {'aa:bb:cc:00:00:01': 'Acme'})
+    assert sorted(looked_up) == ['11:22:33:00:00:01', 'aa:bb:cc:00:00:01']
+    assert found == ['aa:bb:cc:00:00:01']
+    assert list(_attempts(tmp_path)) == ['11:22:33:00:00:01']
+
+    # Same DB: the unknown OUI is not looked up again, a new device is
+    conn = sqlite3.connect(str(tmp_path / 'app.db'))
+    conn.execute("INSERT INTO Devices VALUES ('22:33:44:00:00:01', '10.0.0.4', 'd', '')")
+    conn.commit()
+    conn.close()
+    looked_up, _ = _run(tmp_path, {'aa:bb:cc:00:00:01': 'Acme'})
+    assert sorted(looked_up) == ['22:33:44:00:00:01', 'aa:bb:cc:00:00:01']
+
+    # A new vendors file: every device missing a vendor is tried again
+    (tmp_path / 'oui.txt').write_text('AABBCC\tAcme\n112233\tNew Vendor\n')
+    looked_up, found = _run(tmp_path, {'aa:bb:cc:00:00:01': 'Acme', '11:22:33:00:00:01': 'New Vendor'})
+    assert sorted(looked_up) == ['11:22:33:00:00:01', '22:33:44:00:00:01', 'aa:bb:cc:00:00:01']
+    assert sorted(found) == ['11:22:33:00:00:01', 'aa:bb:cc:00:00:01']
+
+
+def test_resolved_devices_are_forgotten(tmp_path):
+    (tmp_path / 'oui.txt').write_text('AABBCC\tAcme\n')
+    _db(str(tmp_path / 'app.db'), [('11:22:33:00:00:01', '10.0.0.2', 'b', None)])
+    _run(tmp_path, {})
+    assert list(_attempts(tmp_path)) == ['11:22:33:00:00:01']
+
+    conn = sqlite3.connect(str(tmp_path / 'app.db'))
+    conn.execute("UPDATE Devices SET devVendor = 'Set by user'")
+    conn.commit()
+    conn.close()
+    _run(tmp_path, {})
+    assert _attempts(tmp_path) == {}
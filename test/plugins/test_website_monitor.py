@@ -0,0 +1,127 @@
+"""
+Tests for the WEBMON plugin (website_monitor/script.py).
+
+Tests verify that:
+- URLs are checked concurrently over one pooled Session
+- DNS / connect / TTFB phases are reported, and connections are reused
+- rolling p50/p95 latencies are kept per site in the helper values
+- a host resolving to no address fails as a connection error
+"""
+
+import importlib.util
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch, MagicMock
+
+import pytest
+
+_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+_SERVER = os.path.join(_ROOT, 'server')
+_PLUGINS = os.path.join(_ROOT, 'server', 'plugins')
+
+for _p in [_ROOT, _SERVER, _PLUGINS]:
+    if _p not in sys.path:
+        sys.path.insert(0, _p)
+
+# Loaded under its own name: several plugins ship a module called "script"
+with patch('helper.get_setting_value', return_value='UTC'), \
+     patch('logger.Logger'), \
+     patch('plugin_helper.Plugin_Objects'):
+    _spec = importlib.util.spec_from_file_location('website_monitor_script', os.path.join(_PLUGINS, 'website_monitor', 'script.py'))
+    webmon = importlib.util.module_from_spec(_spec)
+    _spec.loader.exec_module(webmon)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        if self.path.startswith('/slow'):
+            time.sleep(0.3)
+        body = b'ok'
+        self.send_response(404 if self.path == '/missing' else 200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def http_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://localhost:{server.server_address[1]}'
+    server.shutdown()
+    server.server_close()
+
+
+def _monitor(urls, tmp_path):
+    settings = {'WEBMON_CONCURRENCY': 10, 'WEBMON_HOST_CONNECTIONS': 5, 'WEBMON_RUN_TIMEOUT': 5}
+    plugin_objects = MagicMock()
+    with patch.object(webmon, 'get_setting_value', side_effect=lambda k: settings.get(k)), \
+         patch.object(webmon, 'STATS_FILE', str(tmp_path / 'latency.json')):
+        webmon.service_monitoring(urls, plugin_objects)
+    return [c.kwargs for c in plugin_objects.add_object.call_args_list]
+
+
+def test_percentile():
+    samples = list(range(1, 101))
+    assert webmon.percentile(samples, 50) == 50
+    assert webmon.percentile(samples, 95) == 95
+    assert webmon.percentile([7], 95) == 7
+
+
+def test_checks_run_concurrently(http_server, tmp_path):
+    urls = [f'{http_server}/slow/{i}' for i in range(5)] + [f'{http_server}/missing']
+
+    started = time.monotonic()
+    results = _monitor(urls, tmp_path)
+    elapsed = time.monotonic() - started
+
+    assert elapsed < 1.0  # 5 x 0.3 s sequentially
+    assert [r['primaryId'] for r in results] == urls
+    assert [r['watched1'] for r in results] == [200] * 5 + [404]
+
+
+def test_phases_and_connection_reuse(http_server):
+    session = webmon.make_session([http_server], 1)
+
+    _, latency, first = webmon.check_services_health(f'{http_server}/a', session, 5)
+    _, _, second = webmon.check_services_health(f'{http_server}/b', session, 5)
+
+    assert {'dns', 'connect', 'ttfb'} <= set(first)
+    assert 'tls' not in first
+    assert first['ttfb'] <= latency
+    # Keep-alive: the second request opens no new connection
+    assert set(second) == {'ttfb'}
+    assert webmon.format_phases(second).startswith('0.0/0.0/0.0/')
+
+
+def test_rolling_percentiles(http_server, tmp_path):
+    url = f'{http_server}/a'
+    for _ in range(3):
+        results = _monitor([url], tmp_path)
+
+    result = results[0]
+    assert result['helpVal4'] == 3
+    assert 0 < result['helpVal1'] <= result['helpVal2']
+    assert result['helpVal3'].count('/') == 3
+
+    failing = _monitor(['http://127.0.0.1:9/'], tmp_path)[0]
+    assert failing['watched2'] == 99999
+    assert failing['helpVal1'] == '' and failing['helpVal4'] == 0
+
+
+def test_empty_address_list_is_a_connection_error():
+    session = webmon.make_session(['http://nowhere.invalid'], 1)
+    with patch.object(webmon.socket, 'getaddrinfo', return_value=[]):
+        status, latency, _ = webmon.check_services_health('http://nowhere.invalid/', session, 1)
+
+    assert status == 520
+    assert latency == 99999
@@ -2,9 +2,15 @@
 Unit tests for authoritative field update handler.
 """
 
+import sqlite3
+
+import pytest
+
 from server.db.authoritative_handler import (
     can_overwrite_field,
     get_source_for_field_update_with_value,
+    lock_field,
+    unlock_fields,
     FIELD_SOURCE_MAP,
 )
 
@@ -142,3 +148,24 @@ class TestFieldSourceMapping:
         for field, source in expected_fields.items():
             assert field in FIELD_SOURCE_MAP
             assert FIELD_SOURCE_MAP[field] == source
+
+
+class TestLockWriteFailures:
+    """A failed lock/unlock write must reach the caller's write unit, not be reported as a result."""
+
+    @pytest.fixture
+    def conn(self):
+        conn = sqlite3.connect(":memory:")
+        conn.row_factory = sqlite3.Row
+        conn.execute("CREATE TABLE Devices (devMac TEXT, devNameSource TEXT)")
+        conn.execute("INSERT INTO Devices VALUES ('aa:bb:cc:dd:ee:ff', 'USER')")
+        conn.execute("CREATE TRIGGER no_updates BEFORE UPDATE ON Devices BEGIN SELECT RAISE(ABORT, 'read-only'); END")
+        return conn
+
+    def test_lock_field_raises(self, conn):
+        with pytest.raises(sqlite3.IntegrityError):
+            lock_field("aa:bb:cc:dd:ee:ff", "devName", conn)
+
+    def test_unlock_fields_raises(self, conn):
+        with pytest.raises(sqlite3.IntegrityError):
+            unlock_fields(conn, mac="aa:bb:cc:dd:ee:ff", fields=["devName"])
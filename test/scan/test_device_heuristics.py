@@ -0,0 +1,107 @@
+"""
+Tests for the compiled rules of scan.device_heuristics.
+
+Tests verify that:
+- the vendor automaton finds overlapping and nested patterns in one pass
+- MAC prefix + vendor patterns resolve to the first matching pattern in file order
+- the vendor-only, name and IP fallbacks keep the file order, invalid regexes are skipped
+- update_icons_and_types guesses icon and type with one call per device
+"""
+
+import sys
+import os
+from unittest.mock import Mock, patch
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from server.scan import device_handling  # noqa: E402
+from server.scan.device_heuristics import CompiledRules, _VendorAutomaton  # noqa: E402
+
+RULES = [
+    {
+        "dev_type": "Router",
+        "icon_base64": "router-icon",
+        "matching_pattern": [
+            {"mac_prefix": "AABBCC", "vendor": "Acme"},
+            {"mac_prefix": "", "vendor": "RouterCorp"},
+        ],
+        "name_pattern": ["gateway", "("],
+        "ip_pattern": [r"^192\.168\.1\.1$"],
+    },
+    {
+        "dev_type": "Phone",
+        "icon_base64": "",
+        "matching_pattern": [
+            {"mac_prefix": "AABB", "vendor": ""},
+            {"mac_prefix": "112233", "vendor": "acme phones"},
+        ],
+        "name_pattern": ["phone", "gate"],
+    },
+]
+
+
+def test_vendor_automaton_finds_overlapping_patterns():
+    automaton = _VendorAutomaton(["he", "she", "his", "hers"])
+
+    assert automaton.search("ushers") == {"she", "he", "hers"}
+    assert automaton.search("this") == {"his"}
+    assert automaton.search("nothing") == set()
+
+
+def test_mac_and_vendor_first_pattern_wins():
+    rules = CompiledRules(RULES)
+
+    # AABBCC+Acme comes first; AABB (any vendor) matches otherwise
+    assert rules.match_mac_and_vendor("AABBCC000001", "acme inc", "t", "i") == ("Router", "router-icon")
+    assert rules.match_mac_and_vendor("AABBCC000001", "other", "t", "i") == ("Phone", "i")
+    # Empty prefix: vendor alone decides
+    assert rules.match_mac_and_vendor("000000000001", "routercorp ltd", "t", "i") == ("Router", "router-icon")
+    assert rules.match_mac_and_vendor("112233000001", "acme phones", "t", "i") == ("Phone", "i")
+    assert rules.match_mac_and_vendor("000000000001", "other", "t", "i") == ("t", "i")
+
+
+def test_fallbacks_keep_file_order():
+    rules = CompiledRules(RULES)
+
+    assert rules.match_vendor("Big ACME Phones", "t", "i") == ("Router", "router-icon")
+    assert rules.match_vendor("unknown", "t", "i") == ("t", "i")
+    # "gateway" also contains the later "gate"; the invalid "(" is skipped
+    assert rules.match_name("Main-Gateway", "t", "i") == ("Router", "router-icon")
+    assert rules.match_name("my phone", "t", "i") == ("Phone", "i")
+    assert rules.match_name("laptop", "t", "i") == ("t", "i")
+    assert rules.match_ip("192.168.1.1", "t", "i") == ("Router", "router-icon")
+    assert rules.match_ip("192.168.1.10", "t", "i") == ("t", "i")
+
+
+def test_update_icons_and_types_guesses_once_per_device(scan_db):
+    cur = scan_db.cursor()
+    cur.executemany(
+        "INSERT INTO Devices (devMac, devVendor, devLastIP, devName, devIcon, devType) VALUES (?, ?, ?, ?, ?, ?)",
+        [
+            ("AA:00:00:00:00:01", "Acme", "10.0.0.1", "a", "", ""),
+            ("AA:00:00:00:00:02", "Acme", "10.0.0.2", "b", "set-icon", ""),
+            ("AA:00:00:00:00:03", "Acme", "10.0.0.3", "c", "", "Laptop"),
+            ("AA:00:00:00:00:04", "Acme", "10.0.0.4", "d", "set-icon", "Laptop"),
+        ],
+    )
+    guess = Mock(return_value=("new-icon", "new-type"))
+
+    with patch.multiple(
+        device_handling,
+        guess_device_attributes=guess,
+        get_setting_value=Mock(side_effect=lambda key: {
+            "NEWDEV_replace_preset_icon": 0,
+            "NEWDEV_devIcon": "default-icon",
+            "NEWDEV_devType": "default-type",
+        }.get(key, "")),
+    ):
+        device_handling.update_icons_and_types(Mock(sql=cur))
+
+    assert guess.call_count == 3
+    rows = {r["devMac"]: (r["devIcon"], r["devType"]) for r in cur.execute("SELECT devMac, devIcon, devType FROM Devices")}
+    assert rows == {
+        "AA:00:00:00:00:01": ("new-icon", "new-type"),
+        "AA:00:00:00:00:02": ("set-icon", "new-type"),
+        "AA:00:00:00:00:03": ("new-icon", "Laptop"),
+        "AA:00:00:00:00:04": ("set-icon", "Laptop"),
+    }
@@ -11,8 +11,7 @@ def mock_ip_handlers():
         update_devPresentLastScan_based_on_nics=Mock(return_value=0),
         update_devPresentLastScan_based_on_force_status=Mock(return_value=0),
         query_MAC_vendor=Mock(return_value=-1),
-        guess_icon=Mock(return_value="icon"),
-        guess_type=Mock(return_value="type"),
+        guess_device_attributes=Mock(return_value=("icon", "type")),
         get_setting_value=Mock(return_value=""),
         get_plugin_authoritative_settings=Mock(return_value={})
     ):
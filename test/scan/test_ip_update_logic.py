@@ -15,8 +15,7 @@ def mock_device_handling():
         update_devPresentLastScan_based_on_nics=Mock(return_value=0),
         update_devPresentLastScan_based_on_force_status=Mock(return_value=0),
         query_MAC_vendor=Mock(return_value=-1),
-        guess_icon=Mock(return_value="icon"),
-        guess_type=Mock(return_value="type"),
+        guess_device_attributes=Mock(return_value=("icon", "type")),
         get_setting_value=Mock(side_effect=lambda key: {
             "NEWDEV_replace_preset_icon": 0,
             "NEWDEV_devIcon": "icon",
@@ -0,0 +1,89 @@
+"""
+Tests for scan.name_resolution.NameResolver.
+
+Tests verify that:
+- each plugin's names are read from Plugins_Objects once per resolver
+- MAC matches win over IP matches, and IP matching follows NEWDEV_IP_MATCH_NAME
+- the first row wins when several objects share a MAC or IP
+- NEWDEV_NAME_CLEANUP_REGEX patterns are applied precompiled, invalid ones skipped
+"""
+
+import sqlite3
+import sys
+import os
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from db_test_helpers import CREATE_PLUGINS_OBJECTS, DummyDB  # noqa: E402
+
+from server.scan import name_resolution  # noqa: E402
+from server.scan.name_resolution import NameResolver  # noqa: E402
+
+
+class CountingDB(DummyDB):
+    """DummyDB that counts the statements run on its cursor."""
+
+    def __init__(self, conn):
+        super().__init__(conn)
+        self.statements = []
+        conn.set_trace_callback(self.statements.append)
+
+
+def _make_db(rows):
+    conn = sqlite3.connect(":memory:")
+    conn.execute(CREATE_PLUGINS_OBJECTS)
+    conn.executemany(
+        """INSERT INTO Plugins_Objects
+           (plugin, objectPrimaryId, objectSecondaryId, dateTimeCreated, dateTimeChanged,
+            watchedValue1, watchedValue2, watchedValue3, watchedValue4, status, extra, userData, foreignKey)
+           VALUES (?, ?, ?, '', '', '', ?, '', '', '', '', '', '')""",
+        rows,
+    )
+    conn.commit()
+    return CountingDB(conn)
+
+
+def _resolver(db, settings):
+    with patch.object(name_resolution, "get_setting_value", side_effect=lambda k: settings.get(k)):
+        return NameResolver(db)
+
+
+def test_names_loaded_once_per_plugin():
+    rows = [("DIGSCAN", f"aa:00:00:00:00:{i:02x}", f"10.0.0.{i}", f"host{i}.lan.") for i in range(50)]
+    db = _make_db(rows)
+    resolver = _resolver(db, {"NEWDEV_IP_MATCH_NAME": True})
+
+    db.statements.clear()
+    for i in range(50):
+        assert resolver.resolve_dig(f"aa:00:00:00:00:{i:02x}", f"10.0.0.{i}").cleaned == f"host{i}.lan"
+    for i in range(50):
+        assert str(resolver.resolve_nbtlookup(f"aa:00:00:00:00:{i:02x}", f"10.0.0.{i}")) == "(name not found)"
+
+    selects = [s for s in db.statements if s.lstrip().startswith("SELECT")]
+    assert len(selects) == 2
+
+
+def test_mac_before_ip_and_ip_match_setting():
+    db = _make_db([
+        ("NSLOOKUP", "aa:aa:aa:aa:aa:01", "10.0.0.1", "first.lan."),
+        ("NSLOOKUP", "aa:aa:aa:aa:aa:01", "10.0.0.1", "second.lan."),
+        ("NSLOOKUP", "aa:aa:aa:aa:aa:02", "10.0.0.2", "by-ip.lan."),
+    ])
+
+    resolver = _resolver(db, {"NEWDEV_IP_MATCH_NAME": True})
+    assert resolver.resolve_nslookup("aa:aa:aa:aa:aa:01", "10.0.0.9").raw == "first.lan."
+    by_ip = resolver.resolve_nslookup("bb:bb:bb:bb:bb:bb", "10.0.0.2")
+    assert (by_ip.raw, by_ip.cleaned) == ("by-ip.lan.", "by-ip.lan (IP match)")
+
+    resolver = _resolver(db, {"NEWDEV_IP_MATCH_NAME": False})
+    assert resolver.resolve_nslookup("bb:bb:bb:bb:bb:bb", "10.0.0.2").raw == "(name not found)"
+
+
+def test_cleanup_regexes():
+    resolver = _resolver(_make_db([]), {
+        "NEWDEV_NAME_CLEANUP_REGEX": [r"\.lan", r"([", r"^android-"],
+    })
+
+    assert resolver.clean_device_name("android-pixel.lan.", False) == "pixel"
+    assert resolver.clean_device_name("nas.lan.", True) == "nas (IP match)"
@@ -0,0 +1,81 @@
+"""
+Unit tests for the built-in ICMP sweeper (utils/icmp_sweep.py).
+
+Tests verify that:
+- targets are generated lazily and known IPs inside subnets are not repeated
+- echo requests carry a valid checksum and replies are matched by id/seq
+- a sweep of loopback addresses reports every host with its RTT
+  (skipped when neither ping sockets nor raw sockets are permitted)
+"""
+
+import itertools
+import os
+import socket
+import struct
+import sys
+import time
+
+import pytest
+
+INSTALL_PATH = os.getenv('NETALERTX_APP', '/app')
+sys.path.extend([f"{INSTALL_PATH}/server"])
+
+from utils.icmp_sweep import (  # noqa: E402
+    IcmpSweeper,
+    build_echo_request,
+    checksum,
+    iter_targets,
+    parse_echo_reply,
+)
+
+
+def _icmp_allowed():
+    for kind in (socket.SOCK_DGRAM, socket.SOCK_RAW):
+        try:
+            socket.socket(socket.AF_INET, kind, socket.IPPROTO_ICMP).close()
+            return True
+        except OSError:
+            pass
+    return False
+
+
+def test_iter_targets_is_lazy_and_deduplicated():
+    gen = iter_targets(["10.0.0.0/8"])
+    assert list(itertools.islice(gen, 3)) == ["10.0.0.1", "10.0.0.2", "10.0.0.3"]
+
+    targets = list(iter_targets(["192.168.1.0/30", "192.168.1.1", "10.0.0.5", "10.0.0.5", "bogus", "192.168.1.9/32"]))
+    assert targets == ["192.168.1.1", "192.168.1.2", "192.168.1.9", "10.0.0.5"]
+
+
+def test_echo_request_and_reply():
+    packet = build_echo_request(0x1234, 7)
+    assert checksum(packet) == 0
+
+    reply = bytes([0, 0]) + packet[2:]
+    assert parse_echo_reply(reply) == (0x1234, 7)
+    assert parse_echo_reply(packet) is None  # a request, not a reply
+
+    ip_header = struct.pack("!BBHHHBBH4s4s", 0x45, 0, 20 + len(reply), 0, 0, 64, 1, 0,
+                            socket.inet_aton("127.0.0.1"), socket.inet_aton("127.0.0.1"))
+    assert parse_echo_reply(ip_header + reply, has_ip_header=True) == (0x1234, 7)
+
+
+@pytest.mark.skipif(not _icmp_allowed(), reason="ICMP sockets not permitted")
+def test_loopback_sweep():
+    sweeper = IcmpSweeper(rate=1000, timeout=0.5, retries=0)
+    started = time.monotonic()
+    alive = sweeper.sweep(["127.0.0.0/28", "127.0.0.3"])
+    elapsed = time.monotonic() - started
+
+    assert sorted(alive, key=lambda ip: int(ip.split(".")[-1])) == [f"127.0.0.{i}" for i in range(1, 15)]
+    assert all(rtt >= 0 for rtt in alive.values())
+    assert sweeper.stats["sent"] == 14
+    assert elapsed < 1.0
+
+
+@pytest.mark.skipif(not _icmp_allowed(), reason="ICMP sockets not permitted")
+def test_sweep_stops_at_deadline():
+    sweeper = IcmpSweeper(rate=100, timeout=0.2, retries=0)
+    sweeper.sweep(["127.0.0.0/16"], deadline=time.monotonic() + 0.2)
+
+    assert 0 < sweeper.stats["sent"] < 100
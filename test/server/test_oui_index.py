@@ -0,0 +1,130 @@
+"""
+Unit tests for utils/oui_index.py and the vendor lookup built on it.
+
+Tests verify that:
+- MA-S and MA-M blocks win over the IEEE-owned OUI they are carved from
+- stray lines of older vendor files are ignored, the last duplicate wins
+- the index is rebuilt when the vendors file changes
+- the index is written through a unique temp file, removed on failure
+- an unwritable index location falls back to an in-memory index
+- query_MAC_vendor keeps its -1 / -2 contract
+"""
+
+import os
+import sys
+import time
+from unittest.mock import patch
+
+import pytest
+
+INSTALL_PATH = os.getenv('NETALERTX_APP', '/app')
+sys.path.extend([f"{INSTALL_PATH}/server"])
+
+from utils import oui_index  # noqa: E402
+from utils.oui_index import OuiIndex, build_index, load_index, parse_vendor_line, write_index  # noqa: E402
+
+VENDORS = (
+    "00000C\tCisco Systems, Inc\n"
+    "70B3D5\tIEEE Registration Authority\n"
+    "70B3D5C\tMA-M Vendor\n"
+    "70B3D5F00\tMA-S Vendor\n"
+    "70-B3-D5-F01\tOther MA-S Vendor\n"
+    "100089\t100089 100089\n"
+    "100089\tReal Vendor\n"
+    "#04-01,\tSolaris, 1 Fusionopolis Walk\n"
+    "0711-0712\tTower D\n"
+    "\n"
+)
+
+
+def _write(path, text):
+    with open(path, "w") as f:
+        f.write(text)
+
+
+def test_parse_vendor_line():
+    assert parse_vendor_line("00000C\tCisco\n") == (24, 0x00000C, "Cisco")
+    assert parse_vendor_line("70B3D5C\tX") == (28, 0x70B3D5C, "X")
+    assert parse_vendor_line("70:B3:D5:F0:0\tX") == (36, 0x70B3D5F00, "X")
+    assert parse_vendor_line("0711-0712\tTower D") is None
+    assert parse_vendor_line("no tab here") is None
+
+
+def test_longest_prefix_match(tmp_path):
+    source = tmp_path / "oui.txt"
+    _write(source, VENDORS)
+    index = OuiIndex(build_index(str(source)))
+
+    assert len(index) == 6
+    assert index.lookup("00000c123456") == "Cisco Systems, Inc"
+    assert index.lookup("70b3d5f00abc") == "MA-S Vendor"
+    assert index.lookup("70b3d5f01abc") == "Other MA-S Vendor"
+    assert index.lookup("70b3d5f02abc") == "IEEE Registration Authority"
+    assert index.lookup("70b3d5c12345") == "MA-M Vendor"
+    assert index.lookup("70b3d5a12345") == "IEEE Registration Authority"
+    assert index.lookup("100089000000") == "Real Vendor"
+    assert index.lookup("ffffff000000") is None
+
+
+def test_mmap_round_trip_and_rebuild(tmp_path):
+    source = tmp_path / "oui.txt"
+    index_path = str(tmp_path / "oui.idx")
+    _write(source, VENDORS)
+    assert write_index(str(source), index_path) == 6
+
+    index = OuiIndex.open(index_path)
+    assert index.is_current(str(source))
+    assert index.lookup("70b3d5c00001") == "MA-M Vendor"
+
+    # The vendors file is updated: load_index notices and rebuilds
+    _write(source, VENDORS + "AABBCC\tNew Vendor\n")
+    os.utime(source, ns=(time.time_ns() + 10**9,) * 2)
+    assert not index.is_current(str(source))
+    index.close()
+
+    index = load_index(str(source), index_path)
+    assert index.is_current(str(source))
+    assert index.lookup("aabbcc000000") == "New Vendor"
+    index.close()
+
+
+def test_write_index_uses_unique_temp_file(tmp_path):
+    source = tmp_path / "oui.txt"
+    index_path = str(tmp_path / "oui.idx")
+    _write(source, VENDORS)
+
+    with patch.object(oui_index.os, "replace", side_effect=OSError("disk full")) as replace, pytest.raises(OSError):
+        write_index(str(source), index_path)
+    tmp_file = replace.call_args[0][0]
+    assert os.path.dirname(tmp_file) == str(tmp_path) and tmp_file != f"{index_path}.tmp"
+    assert sorted(os.listdir(tmp_path)) == ["oui.txt"]
+
+    write_index(str(source), index_path)
+    assert sorted(os.listdir(tmp_path)) == ["oui.idx", "oui.txt"]
+    assert oct(os.stat(index_path).st_mode & 0o777) == oct(0o644)
+
+
+def test_unwritable_index_builds_in_memory(tmp_path):
+    source = tmp_path / "oui.txt"
+    _write(source, VENDORS)
+
+    with patch.object(oui_index, "write_index", side_effect=PermissionError("read-only")):
+        index = load_index(str(source), str(tmp_path / "oui.idx"))
+
+    assert index.lookup("70b3d5f00000") == "MA-S Vendor"
+
+
+def test_query_mac_vendor(tmp_path):
+    from scan import device_handling
+
+    source = tmp_path / "oui.txt"
+    _write(source, VENDORS)
+    with patch.object(device_handling, "vendorsPathNewest", str(source)), \
+            patch.object(device_handling, "vendorsIndexPath", str(tmp_path / "oui.idx")), \
+            patch.object(device_handling, "_vendor_index", None), \
+            patch.object(device_handling, "_vendor_index_source", None):
+        assert device_handling.query_MAC_vendor("70:B3:D5:C1:23:45") == "MA-M Vendor"
+        assert device_handling.query_MAC_vendor("FF:FF:FF:00:00:00") == -1
+        assert device_handling.query_MAC_vendor("70B3D5C12345") == -2
+        assert device_handling.query_MAC_vendor("zz:zz:zz:zz:zz:zz") == -2
+        assert os.path.isfile(tmp_path / "oui.idx")
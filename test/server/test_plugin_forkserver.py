@@ -0,0 +1,158 @@
+"""
+Tests for the plugin fork-server (plugin_forkserver.py).
+
+Tests verify that:
+- forked scripts get their arguments and their output, exit codes and
+  exceptions are reported like for a subprocess
+- a script past its timeout is killed together with its children
+- the fork-server is restarted when app.conf changes
+- children are forked from a single-threaded process and log without
+  starting a log writer thread
+- run_plugin uses the fork-server only when enabled and falls back to a
+  subprocess when it fails
+"""
+
+import os
+import sys
+import time
+from unittest.mock import patch
+
+import pytest
+
+INSTALL_PATH = os.getenv("NETALERTX_APP", "/app")
+sys.path.extend([f"{INSTALL_PATH}/server/plugins", f"{INSTALL_PATH}/server"])
+
+import plugin_forkserver  # noqa: E402
+from plugin_forkserver import ForkServer, ForkServerError, can_fork  # noqa: E402
+import plugin  # noqa: E402
+
+SCRIPT = """
+import subprocess
+import sys
+import threading
+import time
+
+print("args", sys.argv[1:], __name__)
+if "fail" in sys.argv:
+    sys.exit(3)
+if "raise" in sys.argv:
+    raise ValueError("broken plugin")
+if "hang" in sys.argv:
+    child = subprocess.Popen(["sleep", "30"])
+    print("child", child.pid, flush=True)
+    time.sleep(30)
+if "log" in sys.argv:
+    import logger
+    logger.mylog("none", ["[Test] logged from the child"])
+    print("threads", threading.active_count())
+"""
+
+
+@pytest.fixture(scope="module")
+def server():
+    server = ForkServer()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def script(tmp_path):
+    path = tmp_path / "script.py"
+    path.write_text(SCRIPT)
+    return str(path)
+
+
+def test_runs_scripts_like_a_subprocess(server, script):
+    answer = server.run("TEST", [script, "a=1", "b"], 10)
+    assert answer["rc"] == 0 and not answer["timed_out"]
+    assert "args ['a=1', 'b'] __main__" in answer["output"]
+
+    assert server.run("TEST", [script, "fail"], 10)["rc"] == 3
+
+    answer = server.run("TEST", [script, "raise"], 10)
+    assert answer["rc"] == 1
+    assert "ValueError: broken plugin" in answer["output"]
+
+    assert server.stats["TEST"]["runs"] == 3
+    assert server.stats["TEST"]["saved_ms"] > 0
+
+
+def test_timeout_kills_the_process_group(server, script):
+    start = time.monotonic()
+    answer = server.run("TEST", [script, "hang"], 1)
+    assert time.monotonic() - start < 5
+    assert answer["timed_out"] and answer["rc"] is None
+
+    child = int(answer["output"].split("child ")[1].split()[0])
+    time.sleep(0.2)
+    # Killed, or a zombie until reparented and reaped
+    if os.path.exists(f"/proc/{child}/stat"):
+        with open(f"/proc/{child}/stat") as f:
+            assert f.read().split(") ")[1][0] == "Z"
+
+
+def test_children_stay_single_threaded(server, script):
+    answer = server.run("TEST", [script, "log"], 10)
+    assert answer["rc"] == 0
+    assert "[Test] logged from the child" in answer["output"]
+    assert "threads 1" in answer["output"]
+
+
+def test_restarts_when_config_changes(tmp_path, script):
+    conf_file = tmp_path / "app.conf"
+    conf_file.write_text("A=1\n")
+    server = ForkServer(str(conf_file))
+    try:
+        server.run("TEST", [script], 10)
+        first = server.proc
+        server.run("TEST", [script], 10)
+        assert server.proc is first
+
+        os.utime(conf_file, (time.time() + 10, time.time() + 10))
+        server.run("TEST", [script], 10)
+        assert server.proc is not first
+    finally:
+        server.stop()
+
+
+def test_can_fork():
+    assert can_fork(["python3", "/app/server/plugins/arp_scan/script.py", "userSubnets=x"])
+    assert can_fork(["/usr/bin/python3", "/app/front/plugins/x/script.py"])
+    assert not can_fork(["/bin/bash", "/app/front/plugins/x/script.sh"])
+    assert not can_fork(["python3", "-m", "module"])
+    assert not can_fork(["python3"])
+
+
+def test_run_plugin_uses_forkserver_when_enabled(script):
+    command = ["python3", script, "x"]
+    info = {"unique_prefix": "TEST"}
+
+    with patch.object(plugin, "get_setting_value", return_value=False), \
+         patch.object(plugin.fork_server, "run") as run:
+        assert "args ['x']" in plugin.run_plugin(command, 10, info)
+    run.assert_not_called()
+
+    answer = {"rc": 0, "timed_out": False, "output": "forked", "start_ms": 1.0, "saved_ms": 100.0}
+    with patch.object(plugin, "get_setting_value", return_value=True), \
+         patch.object(plugin.fork_server, "run", return_value=answer) as run:
+        assert plugin.run_plugin(command, 10, info) == "forked"
+    run.assert_called_once_with("TEST", [script, "x"], 10)
+
+    failed = dict(answer, rc=1)
+    with patch.object(plugin, "get_setting_value", return_value=True), \
+         patch.object(plugin.fork_server, "run", return_value=failed):
+        assert plugin.run_plugin(command, 10, info) is None
+
+    # Fork-server broken: the plugin still runs
+    with patch.object(plugin, "get_setting_value", return_value=True), \
+         patch.object(plugin.fork_server, "run", side_effect=ForkServerError("did not start")):
+        assert "args ['x']" in plugin.run_plugin(command, 10, info)
+
+
+def test_start_failure_raises(tmp_path):
+    server = ForkServer()
+    with patch.object(plugin_forkserver, "START_TIMEOUT", 0.5), \
+         patch.object(plugin_forkserver.sys, "executable", "/bin/false"):
+        with pytest.raises(ForkServerError):
+            server.run("TEST", [str(tmp_path / "script.py")], 1)
+    assert server.proc is None
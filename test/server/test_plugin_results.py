@@ -0,0 +1,120 @@
+"""
+Tests for the plugin result files (utils/plugin_results.py).
+
+Tests verify that:
+- Plugin_Objects writes JSON lines that keep pipes and line breaks in values
+- the pipe-delimited text format is still read, lines without a record skipped
+- broken JSON lines are reported and skipped, also across decode batches
+- SYNC nodes send the text format
+- execute_plugin reads both formats into the same event rows
+"""
+
+import json
+import os
+import sys
+from unittest.mock import MagicMock, patch
+
+INSTALL_PATH = os.getenv("NETALERTX_APP", "/app")
+sys.path.extend([f"{INSTALL_PATH}/server/plugins", f"{INSTALL_PATH}/server"])
+
+from plugin_helper import Plugin_Objects  # noqa: E402
+from utils import plugin_results  # noqa: E402
+from utils.plugin_results import RESULT_COLUMNS, iter_result_rows, read_result_rows, to_text_format  # noqa: E402
+import plugin  # noqa: E402
+
+
+def _objects(path):
+    objects = Plugin_Objects(str(path))
+    objects.add_object(primaryId="aa:00:00:00:00:01", secondaryId="10.0.0.1", watched1="Router | core",
+                       watched2=None, extra="line 1\nline 2", foreignKey="aa:00:00:00:00:01")
+    objects.add_object(primaryId="aa:00:00:00:00:02", secondaryId="10.0.0.2", watched1="Laptop",
+                       helpVal1="h1", helpVal4=4)
+    return objects
+
+
+def test_plugin_objects_write_json_lines(tmp_path):
+    path = tmp_path / "last_result.TEST.log"
+    objects = _objects(path)
+    objects.write_result_file()
+
+    lines = path.read_text().splitlines()
+    assert len(lines) == 2
+    assert all(len(json.loads(line)) == len(RESULT_COLUMNS) for line in lines)
+
+    rows = read_result_rows(str(path))
+    assert rows == [[str(value) for value in obj.columns()] for obj in objects.objects]
+    assert rows[0][3] == "Router | core"
+    assert rows[0][4] == "None"  # as in the text format
+    assert rows[0][7] == "line 1\nline 2"
+    assert rows[1][12] == "4"
+
+    # The text format of an object is unchanged
+    assert objects.objects[1].write() == "|".join(str(v) for v in objects.objects[1].columns()) + "\n"
+
+
+def test_text_format_still_read():
+    lines = [
+        "Starting scan...\n",
+        "aa:01|10.0.0.1|2026-10-19 10:00:00|Router|null|null|null|null|aa:01\n",
+        "\n",
+        "aa:02|10.0.0.2|2026-10-19 10:00:00|Laptop|null|null|null|null|aa:02|1|2|3|4\r\n",
+    ]
+    assert list(iter_result_rows(lines)) == [
+        ["aa:01", "10.0.0.1", "2026-10-19 10:00:00", "Router", "null", "null", "null", "null", "aa:01"],
+        ["aa:02", "10.0.0.2", "2026-10-19 10:00:00", "Laptop", "null", "null", "null", "null", "aa:02", "1", "2", "3", "4"],
+    ]
+    # A text line starting with a bracket is no JSON line
+    assert list(iter_result_rows(["[x]|y|z\n"])) == [["[x]", "y", "z"]]
+
+
+def test_broken_json_lines_skipped():
+    rows = [json.dumps([f"aa:{i}", "b"]) + "\n" for i in range(25)]
+    rows[3] = '["aa:3", "b"\n'
+    rows[11] = '"not a row"\n'
+    errors = []
+
+    with patch.object(plugin_results, "DECODE_BATCH_SIZE", 4):
+        result = list(iter_result_rows(rows, on_error=errors.append))
+
+    assert [row[0] for row in result] == [f"aa:{i}" for i in range(25) if i not in (3, 11)]
+    assert errors == ['["aa:3", "b"', '"not a row"']
+
+
+def test_to_text_format(tmp_path):
+    path = tmp_path / "last_result.TEST.log"
+    objects = _objects(path)
+    objects.write_result_file()
+
+    text = to_text_format(path.read_text())
+    assert text.splitlines()[-1] == objects.objects[1].write().rstrip("\n")
+    assert to_text_format("a|b|c\n") == "a|b|c\n"
+
+
+def test_execute_plugin_reads_both_formats(tmp_path):
+    plugins_dir = tmp_path / "plugins"
+    plugins_dir.mkdir()
+    objects = _objects(plugins_dir / "last_result.TEST.log")
+    objects.write_result_file()
+    with open(plugins_dir / "last_result.TEST.encoded.Node1.1.log", "w") as f:
+        f.write("Some output\n" + objects.objects[1].write())
+
+    info = {
+        "unique_prefix": "TEST",
+        "data_source": "script",
+        "settings": [{"function": "CMD", "value": "python3 /app/x.py"}, {"function": "RUN_TIMEOUT", "value": 10}],
+    }
+    with patch.object(plugin, "logPath", str(tmp_path)), \
+         patch("utils.plugin_utils.get_setting_value", return_value=""), \
+         patch.object(plugin, "process_plugin_events") as process, \
+         patch.object(plugin, "UserEventsQueueInstance"), \
+         patch.object(plugin, "update_api"):
+        plugin.execute_plugin(MagicMock(), [info], info, run_script=False)
+
+    events = sorted((e[2], e[6], e[11], e[15], e[18]) for e in process.call_args[0][2])
+    assert events == [
+        ("aa:00:00:00:00:01", "Router | core", "line 1\nline 2", "", ""),
+        ("aa:00:00:00:00:02", "Laptop", "", "h1", "4"),
+        ("aa:00:00:00:00:02", "Laptop", "", "h1", "4"),
+    ]
+    # Node files are removed once processed, local ones kept for SYNC
+    assert sorted(os.listdir(plugins_dir)) == ["last_result.TEST.log"]
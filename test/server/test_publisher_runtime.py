@@ -0,0 +1,147 @@
+"""
+Tests for the in-process notification publisher runtime (messaging/publisher_runtime.py).
+
+Tests verify that:
+- publishers run concurrently and their script is imported only once
+- a failing main() is retried, a publisher past its timeout is given up on
+- a publisher calling sys.exit() does not hold run_all until its timeout
+- a publisher still running past its timeout is not started in a second thread
+- MQTT, custom commands and PUBLISHER_RUNTIME=subprocess use the subprocess path
+- run_plugin_scripts only launches scripts that did not run in process
+"""
+
+import os
+import sys
+import time
+from unittest.mock import patch
+
+INSTALL_PATH = os.getenv("NETALERTX_APP", "/app")
+sys.path.extend([f"{INSTALL_PATH}/server/plugins", f"{INSTALL_PATH}/server"])
+
+from messaging import publisher_runtime  # noqa: E402
+from messaging.publisher_runtime import PublisherRuntime  # noqa: E402
+import plugin  # noqa: E402
+
+SCRIPT = """
+import time
+
+CALLS = []
+FAILURES = {failures}
+
+
+def main():
+    CALLS.append(time.monotonic())
+    if len(CALLS) <= FAILURES:
+        raise RuntimeError("boom")
+    time.sleep({sleep})
+"""
+
+
+def _publisher(tmp_path, prefix, sleep=0.0, failures=0, timeout=10, cmd=None):
+    path = tmp_path / f"{prefix.lower()}.py"
+    path.write_text(SCRIPT.format(sleep=sleep, failures=failures))
+    return {
+        "unique_prefix": prefix,
+        "plugin_type": "publisher",
+        "settings": [
+            {"function": "RUN", "value": "on_notification"},
+            {"function": "CMD", "value": cmd or f"python3 {path}"},
+            {"function": "RUN_TIMEOUT", "value": timeout},
+        ],
+    }
+
+
+def _runtime(runtime_setting="in-process"):
+    return patch.object(publisher_runtime, "get_setting_value", return_value=runtime_setting)
+
+
+def test_runs_concurrently_and_imports_once(tmp_path):
+    plugins = [_publisher(tmp_path, "NTFY", sleep=0.3), _publisher(tmp_path, "WEBHOOK", sleep=0.3)]
+    runtime = PublisherRuntime(retry_delay=0)
+
+    with _runtime():
+        start = time.monotonic()
+        assert runtime.run_all(plugins) == {"NTFY", "WEBHOOK"}
+        elapsed = time.monotonic() - start
+        runtime.run_all(plugins)
+
+    assert elapsed < 0.5
+    modules = list(runtime._modules.values())
+    assert len(modules) == 2
+    assert [len(m.CALLS) for m in modules] == [2, 2]
+
+
+def test_retries_and_timeout(tmp_path):
+    flaky = _publisher(tmp_path, "PUSHOVER", failures=2)
+    broken = _publisher(tmp_path, "PUSHSAFER", failures=5)
+    runtime = PublisherRuntime(retries=2, retry_delay=0)
+
+    with _runtime():
+        assert runtime.run_all([flaky, broken]) == {"PUSHOVER", "PUSHSAFER"}
+    calls = {path.rsplit("/", 1)[1]: len(m.CALLS) for path, m in runtime._modules.items()}
+    assert calls == {"pushover.py": 3, "pushsafer.py": 3}
+
+    slow = _publisher(tmp_path, "TELEGRAM", sleep=2)
+    with _runtime(), patch.object(publisher_runtime, "publisher_timeout", return_value=0.2):
+        start = time.monotonic()
+        assert runtime.run_all([slow]) == {"TELEGRAM"}
+        assert time.monotonic() - start < 1
+
+
+def test_sys_exit_does_not_wait_for_timeout(tmp_path):
+    publisher = _publisher(tmp_path, "APPRISE", timeout=10)
+    (tmp_path / "apprise.py").write_text("import sys\n\n\ndef main():\n    sys.exit(1)\n")
+    runtime = PublisherRuntime(retry_delay=0)
+
+    with _runtime():
+        start = time.monotonic()
+        assert runtime.run_all([publisher]) == {"APPRISE"}
+        assert time.monotonic() - start < 5
+
+
+def test_timed_out_publisher_is_not_started_twice(tmp_path):
+    slow = _publisher(tmp_path, "WEBHOOK", sleep=0.5)
+    runtime = PublisherRuntime(retry_delay=0)
+
+    with _runtime(), patch.object(publisher_runtime, "publisher_timeout", return_value=0.05):
+        assert runtime.run_all([slow]) == {"WEBHOOK"}
+        # Previous run still alive: left to the subprocess path
+        assert runtime.run_all([slow]) == set()
+        runtime._threads["WEBHOOK"].join()
+        assert runtime.run_all([slow]) == {"WEBHOOK"}
+
+    module = next(iter(runtime._modules.values()))
+    assert len(module.CALLS) == 2
+
+
+def test_unsupported_publishers_use_subprocess(tmp_path):
+    plugins = [
+        _publisher(tmp_path, "MQTT"),
+        _publisher(tmp_path, "APPRISE", cmd="/usr/bin/custom-notify --all"),
+        {"unique_prefix": "ARPSCAN", "settings": []},
+    ]
+    missing = _publisher(tmp_path, "SMTP", cmd="python3 /nonexistent/email_smtp.py")
+    runtime = PublisherRuntime()
+
+    with _runtime():
+        assert runtime.run_all(plugins + [missing]) == set()
+    with _runtime("subprocess"):
+        assert runtime.run_all([_publisher(tmp_path, "NTFY")]) == set()
+
+
+def test_run_plugin_scripts_skips_scripts_run_in_process(tmp_path):
+    plugins = [_publisher(tmp_path, "NTFY"), _publisher(tmp_path, "MQTT")]
+    calls = []
+
+    with patch.object(plugin, "execute_plugin", side_effect=lambda db, all_plugins, p, run_script=True: calls.append((p["unique_prefix"], run_script))), \
+         patch.object(plugin, "updateState"), \
+         patch.object(plugin, "print_plugin_info"), \
+         patch.object(plugin.plugin_manager, "get_plugin_states", return_value={}), \
+         patch.object(plugin.conf, "mySchedules", [], create=True), \
+         _runtime():
+        pm = plugin.plugin_manager(None, plugins)
+        pm.run_plugin_scripts("on_notification")
+        # Other run types never use the publisher runtime
+        pm.run_plugin_scripts("schedule")
+
+    assert calls == [("NTFY", False), ("MQTT", True)]
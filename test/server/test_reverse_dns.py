@@ -0,0 +1,146 @@
+"""
+Unit tests for the asyncio reverse DNS resolver (utils/reverse_dns.py) and
+the TTL cache it uses (utils/ttl_cache.py).
+
+A stub DNS server on 127.0.0.1 answers PTR queries depending on the last
+octet of the queried address:
+- x.x.x.N, N % 4 == 0  -> no reply (timeout)
+- x.x.x.N, N % 4 == 1  -> NXDOMAIN with an SOA (negative TTL)
+- otherwise            -> PTR host-N.lan.
+"""
+
+import os
+import socket
+import struct
+import sys
+import threading
+import time
+
+import pytest
+
+INSTALL_PATH = os.getenv('NETALERTX_APP', '/app')
+sys.path.extend([f"{INSTALL_PATH}/server/plugins", f"{INSTALL_PATH}/server"])
+
+from utils.reverse_dns import (  # noqa: E402
+    ReverseResolver,
+    build_query,
+    parse_response,
+    ptr_name,
+    _encode_name,
+)
+from utils.ttl_cache import TTLCache, MISS  # noqa: E402
+
+
+def _stub_reply(query):
+    qid = struct.unpack("!H", query[:2])[0]
+    end = query.index(b"\x00", 12) + 5
+    question = query[12:end]
+    labels = []
+    pos = 12
+    while query[pos]:
+        labels.append(query[pos + 1:pos + 1 + query[pos]].decode())
+        pos += query[pos] + 1
+    last_octet = int(labels[0])
+
+    if last_octet % 4 == 0:
+        return None
+    if last_octet % 4 == 1:
+        soa = _encode_name("ns.lan") + _encode_name("admin.lan") + struct.pack("!IIIII", 1, 2, 3, 4, 120)
+        authority = b"\xc0\x0c" + struct.pack("!HHIH", 6, 1, 300, len(soa)) + soa
+        return struct.pack("!HHHHHH", qid, 0x8183, 1, 0, 1, 0) + question + authority
+    target = _encode_name(f"host-{last_octet}.lan")
+    answer = b"\xc0\x0c" + struct.pack("!HHIH", 12, 1, 600, len(target)) + target
+    return struct.pack("!HHHHHH", qid, 0x8180, 1, 1, 0, 0) + question + answer
+
+
+@pytest.fixture
+def stub_server():
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind(("127.0.0.1", 0))
+    sock.settimeout(0.1)
+    stop = threading.Event()
+    seen = []
+
+    def serve():
+        while not stop.is_set():
+            try:
+                data, addr = sock.recvfrom(512)
+            except socket.timeout:
+                continue
+            seen.append(data)
+            reply = _stub_reply(data)
+            if reply:
+                sock.sendto(reply, addr)
+
+    t = threading.Thread(target=serve, daemon=True)
+    t.start()
+    yield sock.getsockname(), seen
+    stop.set()
+    t.join()
+    sock.close()
+
+
+def test_ptr_name():
+    assert ptr_name("192.168.1.10") == "10.1.168.192.in-addr.arpa"
+    assert ptr_name("::1").endswith(".ip6.arpa")
+
+
+def test_parse_positive_and_negative_reply():
+    query = build_query(4242, ptr_name("10.0.0.2"))
+    positive = parse_response(_stub_reply(query))
+    assert positive["qid"] == 4242
+    assert positive["names"] == ["host-2.lan."]
+    assert positive["ttl"] == 600
+
+    negative = parse_response(_stub_reply(build_query(7, ptr_name("10.0.0.1"))))
+    assert negative["rcode"] == 3
+    assert negative["names"] == []
+    assert negative["negative_ttl"] == 120
+
+
+def test_resolve_many_concurrently(stub_server):
+    server, _ = stub_server
+    resolver = ReverseResolver(nameservers=[server], concurrency=32, timeout=0.3, retries=0)
+    ips = [f"10.0.0.{i}" for i in range(1, 41)]
+
+    started = time.monotonic()
+    results = resolver.resolve_many(ips)
+    elapsed = time.monotonic() - started
+
+    assert results["10.0.0.2"] == (["host-2.lan."], "127.0.0.1")
+    assert results["10.0.0.1"] == ([], "127.0.0.1")
+    assert results["10.0.0.4"] == ([], "")
+    assert resolver.stats["timeouts"] == 10
+    # 10 silent hosts cost one timeout in parallel, not 10 in sequence
+    assert elapsed < 2.0
+
+
+def test_cache_skips_known_hosts(stub_server, tmp_path):
+    server, seen = stub_server
+    cache_file = str(tmp_path / "cache.json")
+    ips = ["10.0.0.1", "10.0.0.2", "10.0.0.4"]
+
+    first = ReverseResolver(nameservers=[server], timeout=0.2, retries=0, cache=TTLCache(cache_file))
+    first.resolve_many(ips)
+    first.cache.save()
+    queries_after_first_run = len(seen)
+
+    second = ReverseResolver(nameservers=[server], timeout=0.2, retries=0, cache=TTLCache(cache_file))
+    results = second.resolve_many(ips)
+
+    assert len(seen) == queries_after_first_run
+    assert second.stats["cached"] == 3
+    assert results["10.0.0.2"] == (["host-2.lan."], "127.0.0.1")
+    assert results["10.0.0.4"] == ([], "")
+
+
+def test_ttl_cache_expiry():
+    cache = TTLCache()
+    cache.set("a", "x", ttl=60)
+    cache.set("b", None)
+    cache.set("c", "y", ttl=-1)
+
+    assert cache.get("a") == "x"
+    assert cache.get("b") is None
+    assert cache.get("c") is MISS
+    assert cache.get("d") is MISS
@@ -0,0 +1,48 @@
+"""
+Unit tests for utils/ttl_cache.py.
+
+Tests verify that:
+- failed lookups back off exponentially up to max_negative_ttl
+- a successful lookup resets the backoff
+- the failure count survives a save/load round-trip after expiry
+"""
+
+import os
+import sys
+import time
+
+INSTALL_PATH = os.getenv('NETALERTX_APP', '/app')
+sys.path.extend([f"{INSTALL_PATH}/server"])
+
+from utils.ttl_cache import TTLCache, MISS  # noqa: E402
+
+
+def test_backoff_doubles_up_to_cap():
+    cache = TTLCache(negative_ttl=60, max_negative_ttl=300)
+
+    assert [cache.set_failed("h") for _ in range(5)] == [60, 120, 240, 300, 300]
+    assert cache.get("h") is None
+
+
+def test_success_resets_backoff():
+    cache = TTLCache(negative_ttl=60, max_negative_ttl=3600)
+    cache.set_failed("h")
+    cache.set_failed("h")
+    cache.set("h", "name")
+
+    assert cache.get("h") == "name"
+    assert cache.set_failed("h") == 60
+
+
+def test_failure_count_survives_expiry_and_reload(tmp_path):
+    path = str(tmp_path / "cache.json")
+    cache = TTLCache(path, negative_ttl=60, max_negative_ttl=3600)
+    cache.set_failed("h")
+    cache.set_failed("h")
+    # Let the entry expire; it is due for a retry but keeps its count
+    cache._entries["h"][1] = time.time() - 1
+    cache.save()
+
+    reloaded = TTLCache(path, negative_ttl=60, max_negative_ttl=3600)
+    assert reloaded.get("h") is MISS
+    assert reloaded.set_failed("h") == 240
@@ -21,6 +21,7 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'server', 'plug
 
 from models.device_instance import DeviceInstance  # noqa: E402 [flake8 lint suppression]
 from plugin_helper import normalize_mac  # noqa: E402 [flake8 lint suppression]
+from db.db_writer import DBWriter  # noqa: E402 [flake8 lint suppression]
 
 
 class TestDeviceAtomicity(unittest.TestCase):
@@ -85,8 +86,12 @@ class TestDeviceAtomicity(unittest.TestCase):
         conn.commit()
         conn.close()
 
+        # Dedicated writer bound to the test database
+        self.writer = DBWriter(self._get_test_db_connection)
+
     def tearDown(self):
         """Clean up test database."""
+        self.writer.stop()
         if os.path.exists(self.test_db_path):
             os.unlink(self.test_db_path)
 
@@ -105,7 +110,8 @@ class TestDeviceAtomicity(unittest.TestCase):
         test_mac = normalize_mac("aa:bb:cc:dd:ee:ff")
 
         # Patch at module level where it's used
-        with patch('models.device_instance.get_temp_db_connection', self._get_test_db_connection):
+        with patch('models.device_instance.get_read_db_connection', self._get_test_db_connection), \
+                patch('models.device_instance.get_db_writer', return_value=self.writer):
             # Create a new device
             data = {
                 "createNew": True,
@@ -155,7 +161,8 @@ class TestDeviceAtomicity(unittest.TestCase):
         conn.close()
 
         # Patch database connection
-        with patch('models.device_instance.get_temp_db_connection', self._get_test_db_connection):
+        with patch('models.device_instance.get_read_db_connection', self._get_test_db_connection), \
+                patch('models.device_instance.get_db_writer', return_value=self.writer):
             with patch('models.device_instance.enforce_source_on_user_update') as mock_enforce:
                 mock_enforce.return_value = None
                 data = {
@@ -201,7 +208,8 @@ class TestDeviceAtomicity(unittest.TestCase):
         conn.close()
 
         # Patch database connection and mock source enforcement failure
-        with patch('models.device_instance.get_temp_db_connection', self._get_test_db_connection):
+        with patch('models.device_instance.get_read_db_connection', self._get_test_db_connection), \
+                patch('models.device_instance.get_db_writer', return_value=self.writer):
             with patch('models.device_instance.enforce_source_on_user_update') as mock_enforce:
                 # Simulate source tracking failure
                 mock_enforce.side_effect = Exception("Source tracking error")
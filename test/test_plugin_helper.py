@@ -1,4 +1,6 @@
-from server.plugins.plugin_helper import is_mac, normalize_mac
+import os
+
+from server.plugins.plugin_helper import is_mac, normalize_mac, load_plugin_cache, save_plugin_cache
 
 
 def test_is_mac_accepts_wildcard():
@@ -27,4 +29,28 @@ def test_normalize_mac_preserves_internet_root():
     # Stays lowercase
     assert normalize_mac("internet") == "internet"
     assert normalize_mac("Internet") == "internet"
-    assert normalize_mac("INTERNET") == "internet"
\ No newline at end of file
+    assert normalize_mac("INTERNET") == "internet"
+
+
+def test_plugin_cache_round_trip(tmp_path):
+    path = str(tmp_path / "cache.TEST.json")
+    assert load_plugin_cache(path) == {}
+
+    assert save_plugin_cache(path, {"aa:bb:cc:dd:ee:ff": {"ports": [22]}}) is True
+    assert load_plugin_cache(path) == {"aa:bb:cc:dd:ee:ff": {"ports": [22]}}
+    assert os.listdir(tmp_path) == ["cache.TEST.json"]
+
+    # Unreadable or non-dict content loads as empty
+    (tmp_path / "cache.TEST.json").write_text("[1, 2")
+    assert load_plugin_cache(path) == {}
+    (tmp_path / "cache.TEST.json").write_text("[1, 2]")
+    assert load_plugin_cache(path) == {}
+
+
+def test_plugin_cache_failed_save_keeps_previous_file(tmp_path):
+    path = str(tmp_path / "cache.TEST.json")
+    save_plugin_cache(path, {"a": 1})
+
+    assert save_plugin_cache(path, {"a": object()}) is False
+    assert load_plugin_cache(path) == {"a": 1}
+    assert os.listdir(tmp_path) == ["cache.TEST.json"]